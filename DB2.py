@@ -11,17 +11,29 @@
 """
 import _db2
 import os
+import re
 import sys
 import time
 import types
 import binascii
+import csv
+import threading
+import traceback
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 __all__ = [
-    'Binary', 'BLOB',
+    'Binary', 'BLOB', 'Row',
     'Date', 'Time', 'Timestamp',
     'DateFromTicks', 'TimeFromTicks', 'TimestampFromTicks',
     'Error',
     'connect', 'Connection', 'connection',
+    'ConnectionPool', 'pool', 'PoolTimeoutError',
+    'SlowLog', 'fingerprint',
+    'aio',
     ]
 
 # /* Exceptions */ #
@@ -44,8 +56,94 @@ class BaseType_:
         return self.get_SQL_value()
 
 class LOBLoc(BaseType_):
-    def __init__(self, loc, type):
+    def __init__(self, loc, type, cursor=None):
         self.value = (loc, type)
+        self._cursor = cursor
+
+    def open(self, chunk_size=None):
+        '''File-like LOBReader over the value, see Cursor.readLOB()'''
+        if self._cursor is None:
+            raise InterfaceError, "LOB locator without a cursor"
+        return LOBReader(self._cursor, self, chunk_size)
+
+class LOBReader:
+    '''Read-only file-like object over the value of a LOB locator.
+
+    The value is read from the server as it is asked for, with
+    read(n), readinto(buffer) or by iterating over chunks of
+    chunk_size bytes, so a LOB of any size can be copied to a file or
+    a socket with bounded memory. The locator is valid until the end
+    of the transaction.
+    '''
+    def __init__(self, cursor, LOB, chunk_size=None):
+        self._cs = cursor._cs
+        self._loc, self._type = LOB.value
+        self.chunk_size = chunk_size or cursor.LOB_chunk_size
+        self.length = self._cs._LOBLength(self._loc, self._type)
+        self.pos = 0
+        self.closed = 0
+
+    def _check(self):
+        if self.closed:
+            raise ValueError, "I/O operation on closed LOBReader"
+
+    def read(self, n=-1):
+        self._check()
+        left = self.length - self.pos
+        if n is None or n < 0 or n > left:
+            n = left
+        if n <= 0:
+            return ''
+        data = self._cs._readLOB(self._loc, self._type, self.pos, n)
+        self.pos += len(data)
+        return data
+
+    def readinto(self, buffer):
+        self._check()
+        n = self._cs._readLOBInto(self._loc, self._type, self.pos,
+                                  self.length - self.pos, buffer)
+        self.pos += n
+        return n
+
+    def seek(self, offset, whence=0):
+        self._check()
+        if whence == 1:
+            offset = self.pos + offset
+        elif whence == 2:
+            offset = self.length + offset
+        elif whence != 0:
+            raise ValueError, "invalid whence (%r)" % whence
+        if offset < 0:
+            raise ValueError, "negative seek position %d" % offset
+        self.pos = offset
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+    def readable(self):
+        return 1
+
+    def seekable(self):
+        return 1
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        data = self.read(self.chunk_size)
+        if not data:
+            raise StopIteration
+        return data
+
+    def close(self):
+        self.closed = 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
 class Binary(BaseType_):
     def __init__(self, s):
@@ -107,15 +205,75 @@ FETCH_RELATIVE    = 6
 
 SQL_type_dict = _db2.get_SQL_type_dict()
 
+# type codes of the columns fetched as ('blob'|'clob', locator)
+LOB_type_codes = [ code for code, name in SQL_type_dict.items()
+                        if name in ('BLOB_LOCATOR', 'CLOB_LOCATOR') ]
+
+# NumPy dtypes of the type codes of _cs._fetchcolumns()
+numpy_dtypes = {
+    'h': 'int16',
+    'i': 'int32',
+    'q': 'int64',
+    'f': 'float32',
+    'd': 'float64',
+    'D': 'datetime64[D]',
+    'T': 'datetime64[us]',
+    't': 'timedelta64[s]',
+    }
+
+class ArrowBatch:
+    '''Rows fetched by Cursor.fetcharrow(), as an Arrow struct array
+    with one child array per column.
+
+    Arrow based libraries (pyarrow, Polars, DuckDB, ...) import it
+    through the Arrow PyCapsule interface, __arrow_c_array__(), which
+    hands the data over: it can be imported only once.
+    '''
+    def __init__(self, num_rows, schema, array):
+        self.num_rows = num_rows
+        self._capsules = (schema, array)
+
+    def __len__(self):
+        return self.num_rows
+
+    def __arrow_c_array__(self, requested_schema=None):
+        if self._capsules is None:
+            raise InterfaceError, "ArrowBatch has already been imported"
+        capsules = self._capsules
+        self._capsules = None
+        return capsules
+
 class Cursor:
-    def __init__(self, _cs):
+    def __init__(self, _cs, converters=None):
         self._cs = _cs
+        self.converters = {}
+        if converters is None:
+            converters = {}
+        self._conn_converters = converters
+        self._rows = []         # rows fetched ahead by next()
+        self._rowpos = 0
         self.arraysize = 10
+        self.batchsize = 1000
         self.auto_LOB_read = 1
+        self.LOB_inline_size = 32 * 1024
+        self.LOB_chunk_size = 1024 * 1024
+        self.native_datetime = 0
 
     def __del__(self):
         pass
 
+    def __setattr__(self, name, value):
+        self.__dict__[name] = value
+        if name in ('auto_LOB_read', 'LOB_inline_size'):
+            # LOB columns up to LOB_inline_size bytes are fetched with
+            # the rows, the others are read a block of rows at a time
+            d = self.__dict__
+            self._cs._LOBFetch(d.get('auto_LOB_read', 0) and 1 or 0,
+                               d.get('LOB_inline_size', 0))
+        elif name == 'native_datetime':
+            # datetime.date/time/datetime instead of strings
+            self._cs._nativeDatetime(value and 1 or 0)
+
     def _description2(self):
         ''' description: 
             (Name, TypeCode,
@@ -157,45 +315,179 @@ class Cursor:
 
         args = self._convert_params(args)
 
+        self._rows = []
         return func(what, *(args, ))
 
     def execute(self, stmt, *args):
         return self._sql_execute(self._cs.execute, stmt, *args)
 
-    def executemany(self, stmt, seq_params):
+    def _convert_param_seq(self, seq_params):
         for p in seq_params:
-            self.execute(stmt, *(p, ))
+            if type(p) not in (tuple, list):
+                p = (p, )
+            yield self._convert_params(p)
+
+    def executemany(self, stmt, seq_params, batchsize=None):
+        '''Execute stmt once for every parameter sequence in seq_params.
+
+        Rows are sent to the server batchsize (default: self.batchsize)
+        at a time as CLI parameter arrays. Returns the list of row
+        counts of the batches.
+        '''
+        if batchsize == None:
+            batchsize = self.batchsize
+
+        self._rows = []
+        return self._cs.executemany(stmt,
+                        self._convert_param_seq(seq_params), batchsize)
+
+    def load(self, stmt, iterable, batch_size=None, commit_every=None):
+        '''Bulk load: execute stmt for every parameter sequence of
+        iterable, which is read lazily (e.g. a generator).
+
+        Rows are sent batch_size (default: self.batchsize) at a time
+        as parameter arrays. Rows rejected by the server do not stop
+        the load. With commit_every, the transaction is committed
+        each time at least commit_every more rows have been sent, and
+        at the end, so a large load does not fill the transaction
+        log. Returns (rows, errors): the number of rows affected and
+        a list of (index, sqlstate, sqlcode, message) tuples for the
+        failed rows, index being the position of the row in iterable.
+        '''
+        if batch_size == None:
+            batch_size = self.batchsize
+
+        self._rows = []
+        return self._cs.load(stmt, self._convert_param_seq(iterable),
+                        batch_size, commit_every or 0)
 
     def callproc(self, procname, *args):
         return self._sql_execute(self._cs.callproc, procname, *args)
 
-    def readLOB(self, LOB):
+    def readLOB(self, LOB, stream=0, chunk_size=None):
+        '''The value of the LOB locator LOB. With stream, a file-like
+        LOBReader reading it chunk_size (default: self.LOB_chunk_size)
+        bytes at a time instead.
+        '''
+        if stream:
+            return LOBReader(self, LOB, chunk_size)
         return self._cs._readLOB(*LOB.value)
 
     def _convert_result_col(self, ret):
         type = ret[0]
         if type in ( "blob", "clob" ):
             loc = ret[1]
-            if self.auto_LOB_read:
+            if len(ret) > 2:
+                # read while fetching
+                r = ret[2]
+                if type == "blob":
+                    return Binary(r)
+                else:
+                    return r
+            elif self.auto_LOB_read:
                 r = self.readLOB( LOBLoc(loc, type) )
                 if type == "blob":
                     return Binary(r)
                 else:
                     return r
             else:
-                return LOBLoc(loc, type)
+                return LOBLoc(loc, type, self)
         else:
             return ret
 
+    def _LOB_columns(self):
+        desc = self._cs.description
+        if not desc:
+            return []
+        return [ i for i in range(len(desc))
+                    if desc[i][1] in LOB_type_codes ]
+
     def _convert_result_rows(self, rows):
+        LOBCols = self._LOB_columns()
+
         TupleType = types.TupleType
         for r in rows:
-            for i in range(len(r)):
+            for i in LOBCols:
                 if type(r[i]) == TupleType:
                     r[i] = self._convert_result_col(r[i])
+
+        if self.converters or self._conn_converters:
+            self._apply_converters(rows)
+        return rows
+
+    def register_converter(self, key, func):
+        '''Convert the values of the columns named key (a str, as in
+        .description), or of the type code key (an int, see SQL_type_dict) with func.
+
+        func is called once per fetched block of rows with the list of
+        the values of a column (None for NULLs) and returns the list
+        of the converted values. Converters registered on the cursor
+        come before the ones of its connection, column names before
+        type codes. func None removes the converter.
+        '''
+        _register_converter(self.converters, key, func)
+
+    def _column_converters(self):
+        desc = self._cs.description
+        if not desc:
+            return []
+        r = []
+        for i in range(len(desc)):
+            name, code = desc[i][0], desc[i][1]
+            for d in (self.converters, self._conn_converters):
+                func = d.get(name) or d.get(code)
+                if func is not None:
+                    r.append( (i, func) )
+                    break
+        return r
+
+    def _apply_converters(self, rows):
+        for i, func in self._column_converters():
+            values = func([ r[i] for r in rows ])
+            if len(values) != len(rows):
+                raise InterfaceError, \
+                    "converter returned %d values for %d rows" % \
+                    (len(values), len(rows))
+            for j in range(len(rows)):
+                rows[j][i] = values[j]
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        '''The next row. Rows are fetched arraysize at a time and
+        handed out one by one; fetchone(), fetchmany() and fetchall()
+        return the rows already fetched first.
+        '''
+        if self._rowpos >= len(self._rows):
+            self._rows = self.fetchmany(max(self.arraysize, 1))
+            self._rowpos = 0
+            if not self._rows:
+                raise StopIteration
+        r = self._rows[self._rowpos]
+        self._rowpos += 1
+        if type(r) == types.ListType:
+            return tuple(r)
+        return r
+
+    def _fetched_ahead(self, size):
+        # up to size (-1: all) of the rows fetched ahead by next()
+        pos = self._rowpos
+        if size < 0:
+            end = len(self._rows)
+        else:
+            end = min(len(self._rows), pos + size)
+        rows = self._rows[pos:end]
+        self._rowpos = end
+        if end >= len(self._rows):
+            self._rows = []
+            self._rowpos = 0
         return rows
 
     def fetchone(self, **kwargs):
+        if self._rowpos < len(self._rows):
+            return tuple(self._fetched_ahead(1)[0])
+
         r = self._cs.fetch(-1)
         if not r: return r
 
@@ -203,6 +495,9 @@ class Cursor:
         for i in range(len(r)):
             if type(r[i]) == TupleType:
                 r[i] = self._convert_result_col(r[i])
+
+        if self.converters or self._conn_converters:
+            self._apply_converters([r])
         # Returning a tuple for backwards compatibility
         return tuple(r)
 
@@ -211,19 +506,91 @@ class Cursor:
             size = self.arraysize
         if size <= 0:
             return []
-        rlist = self._cs.fetch(size)
+        if self._rowpos < len(self._rows):
+            rows = self._fetched_ahead(size)
+            if len(rows) == size:
+                return rows
+            return rows + self.fetchmany(size - len(rows))
+        rlist = self._cs.fetchmany(size)
         if not rlist: 
             return []
         return self._convert_result_rows(rlist)
 
     def fetchall(self):
-        rlist = []
-        while 1:
-            r = self.fetchone()
-            if not r:
-                break
-            rlist.append(r)
-        return rlist
+        rows = self._fetched_ahead(-1)
+        rlist = self._cs.fetchall()
+        # Returning tuples for backwards compatibility
+        return map(tuple, rows + self._convert_result_rows(rlist))
+
+    def fetchnumpy(self, size=None):
+        '''Fetch the next size rows (default: self.arraysize, -1: all
+        the remaining rows) as NumPy arrays.
+
+        Returns a list with one (values, nulls) pair of arrays per
+        column. Numeric, date and time columns come as typed arrays
+        (NULLs are 0 there), the other columns as object arrays;
+        nulls is a boolean array, True where the value is NULL.
+        DECIMAL and NUMERIC columns are float64 arrays, as fetchall()
+        returns them: use fetcharrow() to keep all their digits.
+        The typed arrays share the fetched buffers and are read-only.
+        '''
+        if numpy is None:
+            raise NotSupportedError, "fetchnumpy() needs NumPy"
+        if size == None:
+            size = self.arraysize
+
+        count, cols = self._cs._fetchcolumns(size)
+
+        LOBCols = self._LOB_columns()
+        r = []
+        for i in range(len(cols)):
+            code, data, nulls = cols[i]
+            if code:
+                values = numpy.frombuffer(data, numpy_dtypes[code])
+            else:
+                if i in LOBCols:
+                    data = [ v and self._convert_result_col(v)
+                                for v in data ]
+                values = numpy.empty(count, object)
+                values[:] = data
+            r.append( (values, numpy.frombuffer(nulls, numpy.bool_)) )
+        return r
+
+    def fetcharrow(self, size=None):
+        '''Fetch the next size rows (default: self.arraysize, -1: all
+        the remaining rows) as an ArrowBatch, without creating Python
+        objects for the values.
+
+        DECIMAL and NUMERIC columns come as decimal128 of their
+        precision and scale, with all their digits, character and CLOB
+        columns as large_utf8, BLOB and GRAPHIC columns as large_binary.
+        '''
+        if size == None:
+            size = self.arraysize
+
+        return ArrowBatch(*self._cs._fetcharrow(size))
+
+    def copy_to(self, fileobj, delimiter=',', null='',
+                quoting=csv.QUOTE_MINIMAL, quotechar='"',
+                lineterminator='\n', header=False):
+        '''Write the remaining rows of the result set to fileobj (a
+        file or any object with write()) as delimited text, formatted
+        in C from the fetched buffers. quoting is one of the csv.QUOTE_*
+        constants; NULLs are written as null, unquoted. BLOBs are
+        written as hex. With header, the column names come first.
+
+        Returns (rows, bytes) written, without the header.
+        '''
+        if self._rowpos < len(self._rows):
+            raise ProgrammingError, \
+                "copy_to() after rows were fetched by next()"
+        if header:
+            csv.writer(fileobj, delimiter=delimiter, quotechar=quotechar,
+                       quoting=quoting, lineterminator=lineterminator
+                       ).writerow([ d[0] for d in self.description ])
+
+        return self._cs._copyto(fileobj, delimiter, quotechar, quoting,
+                                null, lineterminator)
 
     def nextset(self):
         raise NotSupportedError
@@ -240,6 +607,33 @@ class Cursor:
     def set_timeout(self, timeout):
         return self._cs._timeout(timeout)
 
+    def get_LOB_upload_chunk(self):
+        '''Size in MB of the pieces LOB parameters given as a file,
+        a buffer, an object with read() or an iterator are sent in.
+        '''
+        return self._cs._LOBUploadChunk()
+
+    def set_LOB_upload_chunk(self, mb):
+        return self._cs._LOBUploadChunk(mb)
+
+    def set_prefetch(self, depth=2, blocksize=1000):
+        '''Fetch the rows of the result sets of the next executes in a
+        background thread, depth arrays of blocksize rows ahead of the
+        rows returned (depth 0: off). fetchnumpy() and fetcharrow()
+        are not available on a prefetched result set.
+        '''
+        return self._cs._prefetch(depth, blocksize)
+
+    def get_prefetch(self):
+        return self._cs._prefetch()
+
+    def get_prefetch_stats(self):
+        '''Counters of the prefetch thread since set_prefetch(): blocks
+        and rows fetched, waits (and wait_time, in seconds) of fetches
+        that found the next block not fetched yet.
+        '''
+        return self._cs._prefetchStats()
+
     def get_scrollable(self):
         return self._cs._scrollable()
 
@@ -257,34 +651,189 @@ class Cursor:
             raise NotSupportedError
         if value < 0:
             raise ValueError, "value SHOULD be >= 1"
-        return self._skip(value)
+        ahead = len(self._fetched_ahead(value))
+        if ahead == value:
+            return ahead
+        return ahead + self._skip(value - ahead)
+
+Row = _db2.Row
 
 class DictCursor(Cursor):
+    """Cursor fetching Row objects: rows of values that may also be
+    read by column name, row['COL'] or row.COL, and have the keys(),
+    values(), items(), get() and has_key() of a dict. As with a dict,
+    "in" and iteration are over the column names. Rows are read-only:
+    dict(row) makes a dict that can be changed.
+    """
+    _index_desc = None
+    _index = None
+
     def fetchone(self):
+        if self._rowpos < len(self._rows):
+            return self._fetched_ahead(1)[0]
         data = Cursor.fetchone(self)
         if not data: 
             return data
-        return self.wrap_dict(data)    
-        
-    def wrap_dict(self, data):
-        r = {}
+        return Row(self._row_index(), data)
+
+    def _row_index(self):
+        # one (names, {name: position}) for the rows of a result set
         desc = self._cs.description
-        for i in range(len(desc)):
-            name = desc[i][0]
-            r[name] = data[i]
-        return r
+        if desc is not self._index_desc:
+            names = tuple([ d[0] for d in desc ])
+            index = {}
+            for i in range(len(names)):
+                index[names[i]] = i
+            self._index = (names, index)
+            self._index_desc = desc
+        return self._index
+
+    def fetchall(self):
+        rows = self._fetched_ahead(-1)
+        return rows + self._convert_result_rows(self._cs.fetchall())
 
     def _convert_result_rows(self, rows):
-        TupleType = types.TupleType
-        for r in rows:
-            for i in range(len(r)):
-                if type(r[i]) == TupleType:
-                    r[i] = self._convert_result_col(r[i])
-        return map(self.wrap_dict, rows)
+        rows = Cursor._convert_result_rows(self, rows)
+        return _db2.make_rows(self._row_index(), rows)
         
+def _register_converter(converters, key, func):
+    if type(key) not in (types.StringType, types.IntType):
+        raise TypeError, "key SHOULD be a column name or a type code"
+    if func is None:
+        if converters.has_key(key):
+            del converters[key]
+    else:
+        converters[key] = func
+
+# /* Slow statement log */ #
+
+def _fingerprint_literal(m):
+    if m.group(1) is None:
+        return ' '                                      # comment
+    return '?'
+
+_fingerprint_subs = [
+    # string literals and comments in one pass, so that -- or /* in a
+    # literal does not start a comment, nor ' in a comment a literal
+    (re.compile(r"(\b[xXgGnN]?'(?:[^']|'')*'|'(?:[^']|'')*')"
+                r"|--[^\n]*|/\*.*?\*/", re.S), _fingerprint_literal),
+    (re.compile(r"\b\d+(?:\.\d*)?(?:[eE][-+]?\d+)?\b|\.\d+\b"), '?'),
+    (re.compile(r"\s+"), ' '),
+    (re.compile(r"\?(?: ?, ?\?)+"), '?+'),               # IN (?, ?, ?)
+    (re.compile(r"\(\?\+?\)(?: ?, ?\(\?\+?\))+"), '(?+)+'),  # VALUES rows
+]
+
+def fingerprint(stmt):
+    '''stmt with its literals replaced by ?, lists of ? by ?+,
+    comments dropped, white space collapsed and in lower case:
+    statements differing only by their values get the same
+    fingerprint.
+    '''
+    for r, sub in _fingerprint_subs:
+        stmt = r.sub(sub, stmt)
+    return stmt.strip().lower()
+
+class SlowLog:
+    """Slow statement log of a connection, see Connection.set_slow_log().
+
+    An execution (execute(), executemany(), callproc() and the fetches
+    of its result set) is logged once it is over if the CLI calls and
+    the conversion of its rows took threshold seconds or more. It is
+    written to the rotating file filename as a tab separated line
+    (time, seconds, rows, SQLSTATE, fingerprint) and given to
+    callback as a dict with the same keys, and summed up by
+    fingerprint: top() returns the slowest fingerprints.
+    """
+    def __init__(self, threshold, callback=None, filename=None,
+                 max_bytes=10 * 1024 * 1024, backup_count=5, top=20):
+        self.threshold = threshold
+        self.callback = callback
+        self.top_size = top
+        self._lock = threading.Lock()
+        self._totals = {}   # {fingerprint: [count, seconds, max, rows]}
+        self._handler = None
+        if filename:
+            import logging.handlers
+            self._handler = logging.handlers.RotatingFileHandler(
+                filename, maxBytes=max_bytes, backupCount=backup_count)
+
+    def __call__(self, stmt, duration, rows, sqlstate):
+        fp = fingerprint(stmt)
+        self._lock.acquire()
+        try:
+            t = self._totals.get(fp)
+            if t is None:
+                t = self._totals[fp] = [0, 0.0, 0.0, 0]
+            t[0] += 1
+            t[1] += duration
+            t[2] = max(t[2], duration)
+            t[3] += max(rows, 0)
+            if len(self._totals) > self.top_size * 10:
+                # keep the fingerprints with the most time
+                keep = self._top(self.top_size * 5)
+                self._totals = dict([ (k, self._totals[k]) for k in keep ])
+        finally:
+            self._lock.release()
+
+        record = {
+            'time':         time.time(),
+            'duration':     duration,
+            'rows':         rows,
+            'sqlstate':     sqlstate,
+            'fingerprint':  fp,
+        }
+        if self._handler:
+            import logging
+            line = '%s\t%.6f\t%d\t%s\t%s' % (
+                time.strftime('%Y-%m-%d %H:%M:%S'),
+                duration, rows, sqlstate or '-', fp)
+            self._handler.handle(logging.makeLogRecord({'msg': line}))
+        if self.callback:
+            self.callback(record)
+
+    def _top(self, n):
+        keys = self._totals.keys()
+        keys.sort(key=lambda k: self._totals[k][1], reverse=True)
+        return keys[:n]
+
+    def top(self, n=None):
+        '''The n (default: top) fingerprints with the most time, as
+        dicts: fingerprint, count, seconds (total), max, avg and rows.
+        '''
+        self._lock.acquire()
+        try:
+            r = []
+            for k in self._top(n or self.top_size):
+                count, seconds, max_, rows = self._totals[k]
+                r.append({
+                    'fingerprint':  k,
+                    'count':        count,
+                    'seconds':      seconds,
+                    'max':          max_,
+                    'avg':          seconds / count,
+                    'rows':         rows,
+                })
+            return r
+        finally:
+            self._lock.release()
+
+    def reset(self):
+        self._lock.acquire()
+        try:
+            self._totals = {}
+        finally:
+            self._lock.release()
+
+    def close(self):
+        if self._handler:
+            self._handler.close()
+            self._handler = None
+
 class Connection:
     def __init__(self, *args, **kwargs):
         self._db = _db2.connect(*args, **kwargs)
+        self.converters = {}
+        self.slow_log = None
 
     def __del__(self):
         pass
@@ -300,7 +849,13 @@ class Connection:
             cursorClass = DictCursor
         else:
             cursorClass = Cursor
-        return cursorClass(self._db.cursor())
+        return cursorClass(self._db.cursor(), self.converters)
+
+    def register_converter(self, key, func):
+        '''Converter of the columns fetched by the cursors of the
+        connection, see Cursor.register_converter().
+        '''
+        _register_converter(self.converters, key, func)
 
     def commit(self):
         self._db.commit()
@@ -308,8 +863,767 @@ class Connection:
     def rollback(self):
         self._db.rollback()
 
+    def stmt_cache_stats(self):
+        '''Prepared statement cache counters of the connection:
+        size, count, hits, misses and evictions.
+        '''
+        return self._db.stmt_cache_stats()
+
+    def proc_cache_stats(self):
+        '''callproc() parameter cache counters of the connection:
+        ttl, count, hits and misses.
+        '''
+        return self._db.proc_cache_stats()
+
+    def proc_cache_clear(self, procname=None):
+        '''Forget the cached parameters of procname (default: of all
+        procedures), e.g. after the procedure was redefined by another
+        connection. callproc() reads them from the catalog again.
+        '''
+        self._db.proc_cache_clear(procname)
+
+    def stats(self, reset=False):
+        '''Execution counters of the statements run by the cursors of
+        the connection, as {stmt: {counter: value}}: executes,
+        prepares, fetches, rows, prepare_time, execute_time,
+        fetch_time and convert_time (seconds), bytes_bound (parameter
+        buffers and LOB data sent), lob_reads and lob_bytes. At most
+        connect(stmtStatsSize=1000) statements are counted (0: none).
+        With reset, the counters start over. The counters of the last
+        execution of a cursor are Cursor.last_stats.
+        '''
+        return self._db.stats(reset and 1 or 0)
+
+    def set_slow_log(self, threshold, callback=None, filename=None,
+                     max_bytes=10 * 1024 * 1024, backup_count=5, top=20):
+        '''Log the executions of the cursors of the connection taking
+        threshold seconds or more (None: stop logging) to callback
+        and/or the file filename, rotated at max_bytes. Returns the
+        SlowLog, also .slow_log.
+        '''
+        if self.slow_log:
+            self.slow_log.close()
+        if threshold is None:
+            self._db._slowlog(None)
+            self.slow_log = None
+        else:
+            self.slow_log = SlowLog(threshold, callback, filename,
+                                    max_bytes, backup_count, top)
+            self._db._slowlog(self.slow_log, threshold)
+        return self.slow_log
+
 connect = Connection
 
+class PoolTimeoutError(OperationalError):
+    pass
+
+class PooledConnection:
+    """A Connection checked out of a ConnectionPool.
+
+    close() rolls back, closes the cursors made from it and gives the
+    connection back to the pool.
+    """
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self._cursors = []
+
+    def __del__(self):
+        self.close()
+
+    def __getattr__(self, name):
+        if name.startswith('__') or self.__dict__.get('_conn') is None:
+            raise AttributeError, name
+        return getattr(self._conn, name)
+
+    def __str__(self):
+        return str(self._conn)
+
+    def cursor(self, dictCursor=0):
+        cs = self._conn.cursor(dictCursor)
+        self._cursors.append(cs)
+        return cs
+
+    def close(self):
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            return
+        self._conn = None
+        cursors, self._cursors = self._cursors, []
+        self._pool._release(conn, cursors)
+
+class ConnectionPool:
+    """Pool of connections made with connect(**connect_kwargs).
+
+        min_size    connections opened up front and never reaped
+        max_size    connections open at most (idle + checked out)
+        timeout     seconds connection() waits for a free connection
+        max_idle    seconds after which idle connections above
+                    min_size are closed
+        ping_after  idle seconds after which a connection is checked
+                    with a query before it is handed out
+
+    Threads may share the pool (threadsafety = 2).
+    """
+    ping_stmt = "SELECT 1 FROM SYSIBM.SYSDUMMY1"
+
+    def __init__(self, min_size=0, max_size=10, timeout=30.0,
+                 max_idle=300.0, ping_after=60.0, **connect_kwargs):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError, "SHOULD be 0 <= min_size <= max_size, 1 <= max_size"
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.ping_after = ping_after
+        self._connect_kwargs = connect_kwargs
+
+        self._cond = threading.Condition()
+        self._idle = []         # [ (conn, returned at), ... ] oldest first
+        self._size = 0          # idle + checked out + being opened
+        self._in_use = 0
+        self._closed = 0
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._opened = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._peak_in_use = 0
+
+        for i in range(min_size):
+            self._size += 1
+            self._idle.append( (self._open(), time.time()) )
+
+    def _open(self):
+        # the caller has counted the connection in self._size
+        try:
+            conn = connect(**self._connect_kwargs)
+        except:
+            self._cond.acquire()
+            self._size -= 1
+            self._cond.notify()
+            self._cond.release()
+            raise
+        self._cond.acquire()
+        self._opened += 1
+        self._cond.release()
+        return conn
+
+    def _discard(self, conn):
+        self._cond.acquire()
+        self._size -= 1
+        self._discarded += 1
+        self._cond.notify()
+        self._cond.release()
+        try:
+            conn.close()
+        except Error:
+            pass
+
+    def _is_alive(self, conn, idle_for):
+        if not conn._db.connected:
+            return 0
+        if idle_for < self.ping_after:
+            return 1
+        try:
+            cs = conn.cursor()
+            try:
+                cs.execute(self.ping_stmt)
+                cs.fetchall()
+            finally:
+                cs.close()
+            conn.rollback()
+        except Error:
+            return 0
+        return 1
+
+    def _reap(self, now):
+        # called with the lock held
+        reaped = []
+        while self._idle and self._size > self.min_size \
+                and now - self._idle[0][1] >= self.max_idle:
+            reaped.append(self._idle.pop(0)[0])
+            self._size -= 1
+            self._discarded += 1
+        return reaped
+
+    def connection(self, timeout=None):
+        """Check out a connection, waiting at most timeout seconds
+        (default: self.timeout) for one to be free."""
+        if timeout is None:
+            timeout = self.timeout
+        start = time.time()
+        deadline = start + timeout
+
+        while 1:
+            conn = None
+            reaped = []
+            self._cond.acquire()
+            try:
+                while 1:
+                    if self._closed:
+                        raise InterfaceError('', -1, 'Pool is closed')
+                    now = time.time()
+                    reaped.extend( self._reap(now) )
+                    if self._idle:
+                        conn, since = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    if now >= deadline:
+                        self._timeouts += 1
+                        raise PoolTimeoutError('', -1,
+                            'No free connection in the pool after %.3fs'
+                                % (now - start))
+                    self._cond.wait(deadline - now)
+                self._in_use += 1
+                if self._in_use > self._peak_in_use:
+                    self._peak_in_use = self._in_use
+            finally:
+                self._cond.release()
+                for r in reaped:
+                    try:
+                        r.close()
+                    except Error:
+                        pass
+
+            if conn is None:
+                try:
+                    conn = self._open()
+                except:
+                    self._cond.acquire()
+                    self._in_use -= 1
+                    self._cond.release()
+                    raise
+            elif not self._is_alive(conn, now - since):
+                self._cond.acquire()
+                self._in_use -= 1
+                self._cond.release()
+                self._discard(conn)
+                continue
+
+            waited = time.time() - start
+            self._cond.acquire()
+            self._checkouts += 1
+            self._wait_total += waited
+            if waited > self._wait_max:
+                self._wait_max = waited
+            self._cond.release()
+
+            return PooledConnection(self, conn)
+
+    def _release(self, conn, cursors):
+        for cs in cursors:
+            try:
+                cs.close()
+            except Error:
+                pass
+
+        try:
+            conn.rollback()
+            alive = conn._db.connected
+        except Error:
+            alive = 0
+
+        self._cond.acquire()
+        try:
+            self._in_use -= 1
+            if alive and not self._closed:
+                self._idle.append( (conn, time.time()) )
+                self._cond.notify()
+                return
+        finally:
+            self._cond.release()
+
+        self._discard(conn)
+
+    def close(self):
+        """Close the idle connections. Checked out connections are
+        closed when they are given back."""
+        self._cond.acquire()
+        try:
+            self._closed = 1
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notifyAll()
+        finally:
+            self._cond.release()
+
+        for conn, since in idle:
+            try:
+                conn.close()
+            except Error:
+                pass
+
+    def stats(self):
+        """Pool counters: size, idle, in_use, peak_in_use, utilization
+        (in_use / max_size), checkouts, timeouts, opened, discarded,
+        wait_total, wait_max and wait_avg (seconds)."""
+        self._cond.acquire()
+        try:
+            if self._checkouts:
+                wait_avg = self._wait_total / self._checkouts
+            else:
+                wait_avg = 0.0
+            return {
+                'size':         self._size,
+                'idle':         len(self._idle),
+                'in_use':       self._in_use,
+                'peak_in_use':  self._peak_in_use,
+                'utilization':  float(self._in_use) / self.max_size,
+                'checkouts':    self._checkouts,
+                'timeouts':     self._timeouts,
+                'opened':       self._opened,
+                'discarded':    self._discarded,
+                'wait_total':   self._wait_total,
+                'wait_max':     self._wait_max,
+                'wait_avg':     wait_avg,
+            }
+        finally:
+            self._cond.release()
+
+pool = ConnectionPool
+
+# /* Asynchronous API: DB2.aio */ #
+
+class Future:
+    """Result of a call run by an Executor.
+
+    Callbacks added with add_done_callback(fn) are called with the
+    future, in the thread that completed it (or right away if it is
+    already done).
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._done = 0
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+
+    def done(self):
+        return self._done
+
+    def _wait(self, timeout):
+        self._cond.acquire()
+        try:
+            if not self._done:
+                self._cond.wait(timeout)
+            if not self._done:
+                raise OperationalError('', -1,
+                    'No result after %.3fs' % timeout)
+        finally:
+            self._cond.release()
+
+    def result(self, timeout=None):
+        self._wait(timeout)
+        if self._exc_info:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
+
+    def exception(self, timeout=None):
+        self._wait(timeout)
+        if self._exc_info:
+            return self._exc_info[1]
+        return None
+
+    def add_done_callback(self, fn):
+        self._cond.acquire()
+        try:
+            if not self._done:
+                self._callbacks.append(fn)
+                return
+        finally:
+            self._cond.release()
+        fn(self)
+
+    def _set(self, result, exc_info):
+        self._cond.acquire()
+        try:
+            self._result = result
+            self._exc_info = exc_info
+            self._done = 1
+            callbacks, self._callbacks = self._callbacks, []
+            self._cond.notifyAll()
+        finally:
+            self._cond.release()
+        for fn in callbacks:
+            try:
+                fn(self)
+            except:
+                traceback.print_exc()
+
+    def set_result(self, result):
+        self._set(result, None)
+
+    def set_exception(self, exc_info):
+        '''exc_info: a sys.exc_info() tuple'''
+        self._set(None, exc_info)
+
+    def _run(self, func, args):
+        try:
+            r = func(*args)
+        except:
+            self.set_exception(sys.exc_info())
+        else:
+            self.set_result(r)
+
+class Executor:
+    """At most max_workers threads running the submitted calls in
+    order. The calls wait in the executor, not in the caller."""
+    def __init__(self, max_workers=8):
+        if max_workers < 1:
+            raise ValueError, "max_workers SHOULD be >= 1"
+        self.max_workers = max_workers
+        self._cond = threading.Condition()
+        self._calls = []
+        self._threads = []
+        self._idle = 0
+        self._shutdown = 0
+
+    def submit(self, func, *args):
+        f = Future()
+        self._cond.acquire()
+        try:
+            if self._shutdown:
+                raise InterfaceError('', -1, 'Executor is shut down')
+            self._calls.append( (f, func, args) )
+            if self._idle:
+                self._cond.notify()
+            elif len(self._threads) < self.max_workers:
+                t = threading.Thread(target=self._work)
+                t.setDaemon(1)
+                self._threads.append(t)
+                t.start()
+        finally:
+            self._cond.release()
+        return f
+
+    def _work(self):
+        while 1:
+            self._cond.acquire()
+            try:
+                while not self._calls and not self._shutdown:
+                    self._idle += 1
+                    self._cond.wait()
+                    self._idle -= 1
+                if not self._calls:
+                    return
+                f, func, args = self._calls.pop(0)
+            finally:
+                self._cond.release()
+            f._run(func, args)
+
+    def shutdown(self, wait=1):
+        '''Stop the threads once the calls submitted are done.'''
+        self._cond.acquire()
+        try:
+            self._shutdown = 1
+            self._cond.notifyAll()
+            threads = self._threads[:]
+        finally:
+            self._cond.release()
+        if wait:
+            for t in threads:
+                t.join()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    '''The Executor of DB2.aio (8 threads unless set_executor()).'''
+    global _executor
+    _executor_lock.acquire()
+    try:
+        if _executor is None:
+            _executor = Executor()
+        return _executor
+    finally:
+        _executor_lock.release()
+
+def set_executor(executor):
+    global _executor
+    _executor = executor
+
+class _Serial:
+    # runs the calls on one connection one after the other, each in
+    # the executor, so that a busy connection holds one thread only
+    def __init__(self, executor):
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._calls = []
+        self._busy = 0
+
+    def submit(self, func, *args):
+        f = Future()
+        self._lock.acquire()
+        self._calls.append( (f, func, args) )
+        start = not self._busy
+        self._busy = 1
+        self._lock.release()
+        if start:
+            self._executor.submit(self._run_next)
+        return f
+
+    def _run_next(self):
+        self._lock.acquire()
+        f, func, args = self._calls.pop(0)
+        self._lock.release()
+
+        f._run(func, args)
+
+        self._lock.acquire()
+        more = len(self._calls)
+        if not more:
+            self._busy = 0
+        self._lock.release()
+        if more:
+            self._executor.submit(self._run_next)
+
+    def call_if_idle(self, func, *args):
+        # func(*args) in the calling thread, None without calling it
+        # if a call is queued or running
+        self._lock.acquire()
+        try:
+            if self._busy:
+                return None
+            return func(*args)
+        finally:
+            self._lock.release()
+
+def _done_future(result):
+    f = Future()
+    f.set_result(result)
+    return f
+
+class AsyncCursor:
+    """Cursor of an AsyncConnection: the methods doing I/O return a
+    Future. The Cursor is .cursor; its attributes (description,
+    rowcount, arraysize, ...) are read through the AsyncCursor.
+    """
+    def __init__(self, serial, cursor):
+        self._serial = serial
+        self.cursor = cursor
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError, name
+        return getattr(self.cursor, name)
+
+    def execute(self, stmt, *args):
+        return self._serial.submit(self.cursor.execute, stmt, *args)
+
+    def executemany(self, stmt, seq_params, batchsize=None):
+        return self._serial.submit(self.cursor.executemany,
+                                   stmt, seq_params, batchsize)
+
+    def load(self, stmt, iterable, batch_size=None, commit_every=None):
+        return self._serial.submit(self.cursor.load,
+                                   stmt, iterable, batch_size, commit_every)
+
+    def callproc(self, procname, *args):
+        return self._serial.submit(self.cursor.callproc, procname, *args)
+
+    def copy_to(self, fileobj, *args, **kwargs):
+        return self._serial.submit(self.cursor.copy_to, fileobj,
+                                   *args, **kwargs)
+
+    def fetchone(self):
+        return self._serial.submit(self.cursor.fetchone)
+
+    def fetchmany(self, size=None):
+        return self._serial.submit(self.cursor.fetchmany, size)
+
+    def fetchall(self):
+        return self._serial.submit(self.cursor.fetchall)
+
+    def _next(self):
+        try:
+            return self.cursor.next()
+        except StopIteration:
+            return None
+
+    def _next_ahead(self):
+        cs = self.cursor
+        if cs._rowpos < len(cs._rows):
+            return _done_future(self._next())
+        return None
+
+    def next(self):
+        '''Future of the next row, None at the end. Rows are fetched
+        arraysize at a time; the rows already fetched are returned in
+        done futures without going through the executor, unless calls
+        of the connection are still queued.
+        '''
+        f = self._serial.call_if_idle(self._next_ahead)
+        if f is None:
+            f = self._serial.submit(self._next)
+        return f
+
+    def close(self):
+        return self._serial.submit(self.cursor.close)
+
+class AsyncConnection:
+    """Connection whose methods doing I/O return a Future. The calls
+    on the connection and its cursors run one at a time, in order,
+    in the executor. The Connection is .connection.
+    """
+    def __init__(self, connection, executor=None):
+        self.connection = connection
+        self._serial = _Serial(executor or get_executor())
+
+    def __str__(self):
+        return str(self.connection)
+
+    def cursor(self, dictCursor=0):
+        return AsyncCursor(self._serial, self.connection.cursor(dictCursor))
+
+    def commit(self):
+        return self._serial.submit(self.connection.commit)
+
+    def rollback(self):
+        return self._serial.submit(self.connection.rollback)
+
+    def close(self):
+        return self._serial.submit(self.connection.close)
+
+    def stmt_cache_stats(self):
+        return self.connection.stmt_cache_stats()
+
+    def proc_cache_stats(self):
+        return self.connection.proc_cache_stats()
+
+    def proc_cache_clear(self, procname=None):
+        self.connection.proc_cache_clear(procname)
+
+    def stats(self, reset=False):
+        return self.connection.stats(reset)
+
+    def set_slow_log(self, *args, **kwargs):
+        return self.connection.set_slow_log(*args, **kwargs)
+
+def async_connect(*args, **kwargs):
+    '''Future of an AsyncConnection made with connect(*args, **kwargs)
+    in the executor (keyword executor, default get_executor()).'''
+    executor = kwargs.pop('executor', None) or get_executor()
+    f = Future()
+    def done(cf):
+        if cf.exception():
+            f.set_exception(cf._exc_info)
+        else:
+            f.set_result(AsyncConnection(cf.result(), executor))
+    executor.submit(lambda: connect(*args, **kwargs)) \
+        .add_done_callback(done)
+    return f
+
+class AsyncConnectionPool:
+    """ConnectionPool (.pool) handing out AsyncConnections.
+
+    connection() never holds an executor thread waiting for a free
+    connection: when all are checked out, the Future is queued and
+    completed when one is given back by closing its connection.
+    """
+    def __init__(self, executor=None, **pool_kwargs):
+        self._executor = executor or get_executor()
+        self.pool = ConnectionPool(**pool_kwargs)
+        self._lock = threading.Lock()
+        self._waiters = []
+        self._releases = 0
+
+    def connection(self):
+        '''Future of an AsyncConnection checked out of the pool.'''
+        f = Future()
+        self._checkout(f)
+        return f
+
+    def _checkout(self, f):
+        self._lock.acquire()
+        releases = self._releases
+        self._lock.release()
+        self._executor.submit(self._try_checkout, f, releases)
+
+    def _try_checkout(self, f, releases):
+        try:
+            conn = self.pool.connection(0)
+        except PoolTimeoutError:
+            self._lock.acquire()
+            retry = self._releases != releases
+            if not retry:
+                self._waiters.append(f)
+            self._lock.release()
+            if retry:
+                self._checkout(f)
+            return
+        except:
+            f.set_exception(sys.exc_info())
+            return
+        f.set_result(AsyncPooledConnection(self, conn))
+
+    def _released(self):
+        self._lock.acquire()
+        self._releases += 1
+        waiters, self._waiters = self._waiters[:1], self._waiters[1:]
+        self._lock.release()
+        for f in waiters:
+            self._checkout(f)
+
+    def close(self):
+        '''Close the pool; the checkouts still waiting fail.'''
+        self._lock.acquire()
+        waiters, self._waiters = self._waiters, []
+        self._lock.release()
+        self.pool.close()
+        for f in waiters:
+            try:
+                raise InterfaceError('', -1, 'Pool is closed')
+            except InterfaceError:
+                f.set_exception(sys.exc_info())
+
+    def stats(self):
+        '''stats() of the pool and the checkouts waiting (waiters).
+        timeouts counts the checkouts that found the pool busy.'''
+        st = self.pool.stats()
+        self._lock.acquire()
+        st['waiters'] = len(self._waiters)
+        self._lock.release()
+        return st
+
+class AsyncPooledConnection(AsyncConnection):
+    def __init__(self, pool, connection):
+        AsyncConnection.__init__(self, connection, pool._executor)
+        self._pool = pool
+
+    def close(self):
+        '''Future done when the connection is back in the pool.'''
+        f = self._serial.submit(self.connection.close)
+        f.add_done_callback(lambda f: self._pool._released())
+        return f
+
+aio = types.ModuleType('DB2.aio', """Asynchronous DB2 API.
+
+The calls doing I/O return Futures instead of blocking: they run in a
+bounded Executor shared by the connections (get_executor(),
+set_executor()), one call at a time per connection, and the C calls
+they make release the GIL. Hook the futures into an event loop with
+add_done_callback(); callbacks run in the executor threads.
+
+    connect(*args, **kwargs)    Future of an AsyncConnection
+    ConnectionPool(**kwargs)    AsyncConnectionPool
+""")
+aio.Future = Future
+aio.Executor = Executor
+aio.get_executor = get_executor
+aio.set_executor = set_executor
+aio.connect = async_connect
+aio.Connection = AsyncConnection
+aio.Cursor = AsyncCursor
+aio.ConnectionPool = AsyncConnectionPool
+aio.pool = AsyncConnectionPool
+sys.modules['DB2.aio'] = aio
+
 apilevel    = '2.0'
 
 # 0 Threads may not share the module.
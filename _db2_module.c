@@ -22,8 +22,13 @@
 #endif /* MS_WIN32 */ 
 
 #include "structmember.h"
+#include "datetime.h"
+#include "pythread.h"
 #include <sys/types.h>
 #include <sys/stat.h>
+#ifndef MS_WIN32
+#	include <sys/time.h>
+#endif
 #include <sqlcli1.h>
 #include <sqlenv.h>
 
@@ -149,28 +154,69 @@ const char *sqlState_4_ProgrammingError[] = {
 #define MAX_PWD_LENGTH	30
 #define MAX_STR_LEN	255
 
+/*
+ * One environment handle is shared by all connections of the process.
+ * It is allocated by the first connect() and freed when the last
+ * connection is closed (always with the GIL held).
+ */
+static SQLHANDLE	DB2_henv = SQL_NULL_HANDLE;
+static int		DB2_henvRefCount = 0;
+
+/* misc. conn info, read from the server on first use */
+typedef struct {
+	char		serverName[MAX_STR_LEN];
+	char		dbmsName[MAX_STR_LEN];
+	char		dbmsVer[MAX_STR_LEN];
+	char		driverName[MAX_STR_LEN];
+	char		driverVer[MAX_STR_LEN];
+} DB2ConnInfo;
+
 typedef struct {
 	PyObject_HEAD
-	SQLHANDLE	henv;		/* environment handle */
 	SQLHANDLE	hdbc;		/* connection handle */
-	SQLRETURN	sqlrc;
-
-	char		dbAlias[SQL_MAX_DSN_LENGTH + 1];
-	char		uid[MAX_UID_LENGTH + 1];
-	char		pwd[MAX_PWD_LENGTH + 1];
 
 	int		connected;
 	int		autoCommit;
 
-	/* misc. */
-	char		serverName[MAX_STR_LEN];
-	char		dbmsName[MAX_STR_LEN];
-	char		dbmsVer[MAX_STR_LEN];
-	char		driverName[MAX_STR_LEN];
-	char		driverVer[MAX_STR_LEN];
+	DB2ConnInfo	*info;		/* NULL until first read */
+
+	/* prepared statement cache, most recently used first */
+	struct _DB2StmtEntry	*stmtCacheHead;
+	struct _DB2StmtEntry	*stmtCacheTail;
+	int		stmtCacheCount;
+	int		stmtCacheSize;
+	long		stmtCacheHits;
+	long		stmtCacheMisses;
+	long		stmtCacheEvictions;
+	int		schemaGen;	/* bumped when tables may change */
+	int		ddlInTran;	/* DDL since the last commit/rollback */
+
+	/* callproc(): {procName: (loadTime, callStmt, paramInfo)} */
+	PyObject	*procCache;
+	double		procCacheTTL;	/* seconds, < 0: no expiry, 0: off */
+	long		procCacheHits;
+	long		procCacheMisses;
+
+	/* {stmt: PyCapsule of its DB2StmtStats}, see stats() */
+	PyObject	*stmtStats;
+	int		stmtStatsSize;	/* max. statements, 0: off */
+	int		statsGen;	/* bumped when stmtStats is reset */
+
+	/* slow statement log: slowLog(stmt, seconds, rows, sqlstate) */
+	PyObject	*slowLog;	/* NULL: off */
+	double		slowThreshold;	/* seconds */
+
+	/* cursors with a prefetch worker running on a statement */
+	struct _DB2CursorObj	*prefetchCursors;
 
 } DB2ConnObj;
 
+#define	STMT_CACHE_SIZE	20	/* default stmtCacheSize of connect() */
+#define	PROC_CACHE_TTL	300.0	/* default procCacheTTL of connect() */
+#define	STMT_STATS_SIZE	1000	/* default stmtStatsSize of connect() */
+#define	LOB_CHUNK_SIZE	(1024 * 1024)	/* default SQLPutData() chunk */
+#define	LOB_CHUNK_MAX_MB	1024	/* largest chunk, in MB */
+
 #define	CHECK_CONN_RC(rc)			\
 	if (!checkSuccess(rc)) {		\
 		return _DB2ConnObj_Conn_Error(self, NULL);	\
@@ -194,11 +240,20 @@ static PyObject * DB2ConnObj_end_tran(DB2ConnObj *, int);
 static PyObject * DB2ConnObj_commit(DB2ConnObj *, PyObject *);
 static PyObject * DB2ConnObj_rollback(DB2ConnObj *, PyObject *);
 static PyObject * DB2ConnObj_cursor(DB2ConnObj *, PyObject *);
+static PyObject * DB2ConnObj_stmt_cache_stats(DB2ConnObj *, PyObject *);
+static PyObject * DB2ConnObj_proc_cache_stats(DB2ConnObj *, PyObject *);
+static PyObject * DB2ConnObj_proc_cache_clear(DB2ConnObj *, PyObject *);
+static void _DB2ConnObj_proc_cache_drop(DB2ConnObj *, SQLCHAR *);
+static PyObject * DB2ConnObj_stats(DB2ConnObj *, PyObject *);
+static PyObject * DB2ConnObj_slow_log(DB2ConnObj *, PyObject *);
 static PyObject * DB2ConnObj_repr(DB2ConnObj *);
 static PyObject * _DB2ConnObj_Conn_Error(DB2ConnObj *, PyObject *);
+static PyObject * _DB2_Stmt_Error(SQLHANDLE);
 static PyObject * _DB2ConnObj_Disconnected_Error(DB2ConnObj *);
 
-static void DB2ConnObj_set_conn_info(DB2ConnObj *);
+static DB2ConnInfo * DB2ConnObj_conn_info(DB2ConnObj *);
+static SQLHANDLE _db2_env_acquire(void);
+static void _db2_env_release(void);
 
 static PyMethodDef
 DB2ConnObj_methods[] = {
@@ -206,23 +261,35 @@ DB2ConnObj_methods[] = {
 	{ "commit", (PyCFunction)DB2ConnObj_commit, METH_VARARGS, },
 	{ "rollback", (PyCFunction)DB2ConnObj_rollback, METH_VARARGS, },
 	{ "cursor", (PyCFunction)DB2ConnObj_cursor, METH_VARARGS, },
+	{ "stmt_cache_stats", (PyCFunction)DB2ConnObj_stmt_cache_stats, METH_VARARGS, },
+	{ "proc_cache_stats", (PyCFunction)DB2ConnObj_proc_cache_stats, METH_VARARGS, },
+	{ "proc_cache_clear", (PyCFunction)DB2ConnObj_proc_cache_clear, METH_VARARGS, },
+	{ "stats", (PyCFunction)DB2ConnObj_stats, METH_VARARGS, },
+	{ "_slowlog", (PyCFunction)DB2ConnObj_slow_log, METH_VARARGS, },
 	{ NULL, NULL }
 };
 
-typedef struct {
+typedef struct _DB2BindStruct DB2BindStruct;
+
+/* makes the Python value of row idx of a bound column */
+typedef PyObject *(*DB2Converter)(DB2BindStruct *, SQLPOINTER, int);
+
+struct _DB2BindStruct {
 
 	int		type;
 	int		typeEx;
 	SQLPOINTER	buf;
 	SQLINTEGER	bufLen;
 	SQLINTEGER	*outLen;
+	DB2Converter	convert;
 
-} DB2BindStruct;
+};
 
 typedef struct {
 
 	void		*buf;
 	SQLINTEGER	bufLen;
+	SQLINTEGER	bufCap;		/* bytes allocated at buf */
 
 	SQLSMALLINT	inOutType;	/* callproc */
 
@@ -232,14 +299,72 @@ typedef struct {
 	SQLSMALLINT	nullable;
 
 	SQLINTEGER	outLen;
+	SQLINTEGER	*outLens;	/* executemany: one per row of the batch */
+
+	PyObject	*lobSource;	/* data-at-exec LOB value */
+
+	/* what SQLBindParameter() was last given, to skip rebinding */
+	void		*boundBuf;
+	SQLINTEGER	boundLen;
+	SQLSMALLINT	boundCType;
 
 } DB2ParamStruct;
 
+/*
+ * A prepared statement handle with everything a cursor keeps about
+ * it, parked in the statement cache of its connection.
+ */
+typedef struct _DB2StmtEntry {
+
+	SQLHANDLE	hstmt;
+	SQLCHAR		*stmt;
+	int		bScrollable;
+
+	PyObject	*description;
+	int		bDescValid;
+
+	DB2BindStruct	**bindColList;
+	int		bindColCount;
+	SQLUSMALLINT	*rowStatus;
+	int		lastArraySize;
+	int		rowWidth;
+	int		bindInlineSize;
+
+	DB2ParamStruct	**paramList;
+	int		paramCount;
+
+	struct _DB2StmtEntry	*prev, *next;
+
+} DB2StmtEntry;
+
+typedef struct _DB2Prefetch DB2Prefetch;
+
+/*
+ * Execution counters of a statement, summed over all the cursors of
+ * the connection, and of the last execution of each cursor.
+ */
 typedef struct {
+	long		executes;	/* SQLExecute() calls */
+	long		prepares;	/* SQLPrepare() calls */
+	double		prepareTime;
+	double		executeTime;
+	long		fetches;	/* SQLFetchScroll() calls */
+	long		rows;		/* rows fetched */
+	double		fetchTime;
+	double		convertTime;	/* fetched rows -> Python */
+	PY_LONG_LONG	bytesBound;	/* parameter buffers and LOB data */
+	long		lobReads;	/* LOB values read from locators */
+	PY_LONG_LONG	lobBytes;
+} DB2StmtStats;
+
+typedef struct _DB2CursorObj {
 	PyObject_HEAD
 
+	DB2ConnObj	*conn;
+	int		stmtGen;	/* conn->schemaGen of lastStmt */
 	SQLHANDLE	hdbc;		/* Connection handle from ConnObj */
 	SQLHANDLE	hstmt;		/* Statement handle */
+	SQLHANDLE	hstmtLOB;	/* for the LOB locator functions */
 	int		opened;
 
 	SQLCHAR		*lastStmt;
@@ -255,18 +380,60 @@ typedef struct {
 	int		bScrollable;
 
 	int		lastArraySize;
+	int		rowWidth;	/* bytes bound per row */
 	int		rowCount;
 	int		bFetchRefresh;
+	int		bDescValid;	/* .description is of lastStmt */
 	SQLUINTEGER	nFetchedRows;
 	SQLUSMALLINT	*rowStatus;
 
 	PyObject	*messages;	/* Optional DB API Extensions */
 
 	int		timeout;
+	int		lobChunkSize;	/* bytes per SQLPutData() */
+	int		lobAutoRead;	/* read LOB values while fetching */
+	int		lobInlineSize;	/* LOBs up to this size are bound */
+	int		bindInlineSize;	/* lobInlineSize of bindColList */
+	int		nativeDatetime;	/* fetch datetime objects */
+
+	DB2Prefetch	*prefetch;	/* worker fetching ahead */
+	int		prefetchDepth;	/* row arrays fetched ahead, 0: off */
+	int		prefetchBlock;	/* rows per array */
+	struct _DB2CursorObj	*pfPrev;	/* in conn->prefetchCursors */
+	struct _DB2CursorObj	*pfNext;
+	long		pfBlocks;
+	long		pfRows;
+	long		pfWaits;
+	double		pfWaitTime;
+
+	DB2StmtStats	lastStats;	/* of the last execution */
+	DB2StmtStats	*stats;		/* of its statement, NULL: not kept */
+	PyObject	*statsKey;	/* statement text of stats */
+	PyObject	*statsEntry;	/* capsule holding stats */
+	int		statsGen;	/* conn->statsGen of stats */
+	int		slowPending;	/* execution not checked yet */
+	char		slowState[SQL_SQLSTATE_SIZE + 1];	/* of its error */
 } DB2CursorObj;
 
+/* count v in the stats of the last execution and of its statement */
+#define	STATS_ADD(self, field, v) do {				\
+		(self)->lastStats.field += (v);			\
+		if ((self)->stats) (self)->stats->field += (v);	\
+	} while (0)
+
 staticforward PyTypeObject	DB2CursorObj_Type;
 
+typedef struct {
+	PyObject_VAR_HEAD
+
+	PyObject	*index;		/* (names, {name: position}) */
+	PyObject	*values[1];
+} DB2RowObj;
+
+staticforward PyTypeObject	DB2RowObj_Type;
+
+#define DB2RowObj_Check(op)	PyObject_TypeCheck(op, &DB2RowObj_Type)
+
 static struct memberlist DB2CursorObj_members[] = {
 	{ "description", T_OBJECT, offsetof(DB2CursorObj, description), 0 },
 	{ "rowcount", T_INT, offsetof(DB2CursorObj, rowCount), 0 },
@@ -279,26 +446,83 @@ static struct memberlist DB2CursorObj_members[] = {
 		return _DB2CursorObj_Cursor_Error(self, NULL);	\
 	}
 
+static DB2StmtEntry * _DB2ConnObj_stmt_cache_get(DB2ConnObj *, SQLCHAR *, int);
+static void _DB2ConnObj_stmt_cache_put(DB2ConnObj *, DB2StmtEntry *);
+static void _DB2ConnObj_stmt_cache_clear(DB2ConnObj *);
+static void _DB2ConnObj_schema_changed(DB2ConnObj *);
+static int _DB2_is_DDL(SQLCHAR *);
+static int _DB2_is_set_schema(SQLCHAR *);
+static void _DB2StmtEntry_free(DB2StmtEntry *);
+
 static void DB2CursorObj_dealloc(DB2CursorObj *);
 static PyObject * DB2CursorObj_getattr(DB2CursorObj *, char *);
 static PyObject * DB2CursorObj_close(DB2CursorObj *, PyObject *);
 static PyObject * DB2CursorObj_execute(DB2CursorObj *, PyObject *);
+static PyObject * DB2CursorObj_executemany(DB2CursorObj *, PyObject *);
+static PyObject * DB2CursorObj_load(DB2CursorObj *, PyObject *);
+static PyObject * _DB2CursorObj_execute_batches(DB2CursorObj *, SQLCHAR *,
+		PyObject *, int, int, PyObject *);
 static PyObject * DB2CursorObj_fetch(DB2CursorObj *, PyObject *);
+static PyObject * DB2CursorObj_fetchmany(DB2CursorObj *, PyObject *);
+static PyObject * DB2CursorObj_fetchall(DB2CursorObj *, PyObject *);
+static PyObject * DB2CursorObj_fetch_columns(DB2CursorObj *, PyObject *);
+static PyObject * DB2CursorObj_fetch_arrow(DB2CursorObj *, PyObject *);
+static PyObject * DB2CursorObj_copy_to(DB2CursorObj *, PyObject *);
 static PyObject * DB2CursorObj_callproc(DB2CursorObj *, PyObject *);
 static PyObject * DB2CursorObj_skip_rows(DB2CursorObj *, PyObject *);
 
 static int _DB2CursorObj_set_col_desc(DB2CursorObj *, int);
 static int _DB2CursorObj_get_param_info(DB2CursorObj *, int);
 static int _DB2CursorObj_prepare_param_vars(DB2CursorObj *, int, PyObject *);
+static int _DB2CursorObj_prepare_param_array(DB2CursorObj *, int, PyObject *);
+static int _DB2CursorObj_prepare(DB2CursorObj *, SQLCHAR *);
+static int _DB2CursorObj_run(DB2CursorObj *);
+static void _DB2ParamStruct_free_buf(DB2ParamStruct *);
+static void *_DB2ParamStruct_alloc_buf(DB2ParamStruct *, SQLINTEGER);
+static double _db2_now(void);
+static void _DB2CursorObj_stats_start(DB2CursorObj *, SQLCHAR *);
+static void _DB2CursorObj_slow_check(DB2CursorObj *);
+static PyObject * _DB2StmtStats_dict(DB2StmtStats *);
+static PyObject * _DB2CursorObj_Param_Count_Error(void);
 static int _DB2CursorObj_bind_col(DB2CursorObj *, int, int);
+static int _DB2CursorObj_bind_fetch(DB2CursorObj *, int);
+typedef int (*DB2FetchSink)(DB2CursorObj *, void *);
+static int _DB2CursorObj_fetch_block(DB2CursorObj *, int, DB2FetchSink, void *);
+static int _DB2CursorObj_fetch_loop(DB2CursorObj *, int, DB2FetchSink, void *);
+static int _DB2CursorObj_store_rows(DB2CursorObj *, void *);
+static PyObject * _DB2CursorObj_fetch_rows(DB2CursorObj *, int);
 static int _DB2CursorObj_reset_bind_col(DB2CursorObj *, int);
 static int _DB2CursorObj_reset_params(DB2CursorObj *, int);
 static int _DB2CursorObj_reset_cursor(DB2CursorObj *);
+static void _DB2CursorObj_forget_stmt(DB2CursorObj *);
+static DB2StmtEntry * _DB2CursorObj_stmt_save(DB2CursorObj *);
+static void _DB2CursorObj_stmt_load(DB2CursorObj *, DB2StmtEntry *);
+static int _DB2CursorObj_stmt_cache_swap(DB2CursorObj *, SQLCHAR *);
+static void _DB2BindStruct_free_list(DB2BindStruct **, int);
+static void _DB2ParamStruct_free_list(DB2ParamStruct **, int);
+static int _DB2CursorObj_describe(DB2CursorObj *);
 static PyObject * _SQL_CType_2_PyType(DB2BindStruct *, int);
+static void _DB2BindStruct_set_converter(DB2BindStruct *, int);
 static PyObject * _SQLType_2_PyType(DB2ParamStruct *);
+static PyObject * _DB2CursorObj_retrieve_one_row(DB2CursorObj *, int, int);
 static PyObject * _DB2CursorObj_retrieve_rows(DB2CursorObj *, int);
 static PyObject * DB2CursorObj_read_LOB(DB2CursorObj *, PyObject *);
-static int _DB2CursorObj_send_lob_file(DB2CursorObj *, FILE *);
+static PyObject * DB2CursorObj_read_LOB_into(DB2CursorObj *, PyObject *);
+static PyObject * DB2CursorObj_LOB_length(DB2CursorObj *, PyObject *);
+static int _DB2CursorObj_LOB_stmt(DB2CursorObj *, SQLHANDLE *);
+static int _DB2CursorObj_send_lob_file(DB2CursorObj *, PyObject *);
+static int _DB2CursorObj_send_lob(DB2CursorObj *, DB2ParamStruct *);
+static int _db2_is_LOB_stream(PyObject *);
+static PyObject * DB2CursorObj_LOB_chunk(DB2CursorObj *, PyObject *);
+static PyObject * DB2CursorObj_LOB_fetch(DB2CursorObj *, PyObject *);
+static PyObject * DB2CursorObj_native_datetime(DB2CursorObj *, PyObject *);
+static void _DB2CursorObj_set_converters(DB2CursorObj *);
+static PyObject * DB2CursorObj_prefetch(DB2CursorObj *, PyObject *);
+static PyObject * DB2CursorObj_prefetch_stats(DB2CursorObj *, PyObject *);
+static void _DB2CursorObj_prefetch_stop(DB2CursorObj *);
+static int _DB2CursorObj_prefetching(DB2CursorObj *);
+static PyObject * _DB2CursorObj_prefetch_rows(DB2CursorObj *, int);
+static int _DB2CursorObj_read_block_LOBs(DB2CursorObj *, PyObject *, int);
 static PyObject * _DB2CursorObj_get_Cursor_Error(DB2CursorObj *, PyObject *);
 static PyObject * _DB2CursorObj_Cursor_Error(DB2CursorObj *, PyObject *);
 static PyObject * _DB2CursorObj_fill_Cursor_messages(DB2CursorObj *);
@@ -312,10 +536,24 @@ static PyMethodDef
 DB2CursorObj_methods[] = {
 	{ "close", (PyCFunction)DB2CursorObj_close, METH_VARARGS, },
 	{ "execute", (PyCFunction)DB2CursorObj_execute, METH_VARARGS, },
+	{ "executemany", (PyCFunction)DB2CursorObj_executemany, METH_VARARGS, },
+	{ "load", (PyCFunction)DB2CursorObj_load, METH_VARARGS, },
 	{ "fetch", (PyCFunction)DB2CursorObj_fetch, METH_VARARGS, },
+	{ "fetchmany", (PyCFunction)DB2CursorObj_fetchmany, METH_VARARGS, },
+	{ "fetchall", (PyCFunction)DB2CursorObj_fetchall, METH_VARARGS, },
+	{ "_fetchcolumns", (PyCFunction)DB2CursorObj_fetch_columns, METH_VARARGS, },
+	{ "_fetcharrow", (PyCFunction)DB2CursorObj_fetch_arrow, METH_VARARGS, },
+	{ "_copyto", (PyCFunction)DB2CursorObj_copy_to, METH_VARARGS, },
 	{ "callproc", (PyCFunction)DB2CursorObj_callproc, METH_VARARGS, },
 	{ "_skip", (PyCFunction)DB2CursorObj_skip_rows, METH_VARARGS, },
 	{ "_readLOB", (PyCFunction)DB2CursorObj_read_LOB, METH_VARARGS, },
+	{ "_readLOBInto", (PyCFunction)DB2CursorObj_read_LOB_into, METH_VARARGS, },
+	{ "_LOBLength", (PyCFunction)DB2CursorObj_LOB_length, METH_VARARGS, },
+	{ "_LOBUploadChunk", (PyCFunction)DB2CursorObj_LOB_chunk, METH_VARARGS, },
+	{ "_LOBFetch", (PyCFunction)DB2CursorObj_LOB_fetch, METH_VARARGS, },
+	{ "_nativeDatetime", (PyCFunction)DB2CursorObj_native_datetime, METH_VARARGS, },
+	{ "_prefetch", (PyCFunction)DB2CursorObj_prefetch, METH_VARARGS, },
+	{ "_prefetchStats", (PyCFunction)DB2CursorObj_prefetch_stats, METH_VARARGS, },
 	{ "_timeout", (PyCFunction)DB2CursorObj_timeout, METH_VARARGS, },
 	{ "_scrollable", (PyCFunction)DB2CursorObj_scrollable_flag, METH_VARARGS, },
 	{ NULL, NULL }
@@ -403,6 +641,11 @@ _DB2CursorObj_get_Cursor_Error(DB2CursorObj *self, PyObject *exc)
 
 	if (!exc) { exc = determineException(v); }
 
+	if (self->slowPending) {
+		strncpy(self->slowState, v, SQL_SQLSTATE_SIZE);
+		self->slowState[SQL_SQLSTATE_SIZE] = '\0';
+	}
+
 	r = PyTuple_New(2);
 
 	PyTuple_SetItem(r, 0, exc);
@@ -463,6 +706,21 @@ _DB2ConnObj_Conn_Error(DB2ConnObj *self, PyObject *exc)
 	return NULL;
 }
 
+static PyObject *
+_DB2_Stmt_Error(SQLHANDLE hstmt)
+{
+	/* error of a statement handle not owned by a cursor */
+	PyObject *t;
+	char *v;
+
+	t = _DB2_GetDiagRec(hstmt, SQL_HANDLE_STMT);
+	v = PyString_AsString(PyTuple_GetItem(t, 0));
+
+	PyErr_SetObject(determineException(v), t);
+	Py_DECREF(t);
+	return NULL;
+}
+
 static PyObject *
 _DB2ConnObj_Disconnected_Error(DB2ConnObj *self)
 {
@@ -574,13 +832,17 @@ _db2_connect(PyObject *self, PyObject *args, PyObject *kwargs)
 {
 	static char *kwList[] = {
 			"dsn", "uid", "pwd",
-			"autoCommit", "connectType", NULL,
+			"autoCommit", "connectType", "stmtCacheSize",
+			"procCacheTTL", "stmtStatsSize", NULL,
 	};
 	char *dsn	= "sample";
 	char *uid	= "";
 	char *pwd	= "";
 	int autoCommit	= 0;	/* no auto-commit mode */
 	int connectType	= 1;	/* single database per Unit of Work */
+	int stmtCacheSize = STMT_CACHE_SIZE;	/* 0: no statement cache */
+	double procCacheTTL = PROC_CACHE_TTL;	/* 0: no procedure cache */
+	int stmtStatsSize = STMT_STATS_SIZE;	/* 0: no statement stats */
 
 	SQLRETURN	rc;
 
@@ -588,9 +850,10 @@ _db2_connect(PyObject *self, PyObject *args, PyObject *kwargs)
 
 	if (!PyArg_ParseTupleAndKeywords(
 		args, kwargs,
-		"|sssii", kwList,
+		"|sssiiidi", kwList,
 		&dsn, &uid, &pwd,
-		&autoCommit, &connectType)) {
+		&autoCommit, &connectType, &stmtCacheSize, &procCacheTTL,
+		&stmtStatsSize)) {
 		return NULL;
 	}
 
@@ -599,16 +862,39 @@ _db2_connect(PyObject *self, PyObject *args, PyObject *kwargs)
 	}
 
 	c->connected		= FALSE;
-	c->serverName[0]	= '\0';
-	c->dbmsName[0]		= '\0';
-	c->dbmsVer[0]		= '\0';
-	c->driverName[0]	= '\0';
-	c->driverVer[0]		= '\0';
+	c->info			= NULL;
 	c->autoCommit		= autoCommit;
 
-	rc = SQLAllocHandle( SQL_HANDLE_ENV, SQL_NULL_HANDLE, &c->henv );
+	c->stmtCacheHead	= NULL;
+	c->stmtCacheTail	= NULL;
+	c->stmtCacheCount	= 0;
+	c->stmtCacheSize	= stmtCacheSize;
+	c->stmtCacheHits	= 0;
+	c->stmtCacheMisses	= 0;
+	c->stmtCacheEvictions	= 0;
+	c->schemaGen		= 0;
+	c->ddlInTran		= 0;
+
+	c->procCache		= PyDict_New();
+	c->procCacheTTL		= procCacheTTL;
+	c->procCacheHits	= 0;
+	c->procCacheMisses	= 0;
+
+	c->stmtStats		= PyDict_New();
+	c->stmtStatsSize	= stmtStatsSize;
+	c->statsGen		= 0;
+
+	c->slowLog		= NULL;
+	c->slowThreshold	= 0.0;
+
+	c->prefetchCursors	= NULL;
+
+	if (!_db2_env_acquire()) {
+		Py_DECREF(c);
+		return NULL;
+	}
 
-	rc = SQLAllocHandle( SQL_HANDLE_DBC, c->henv, &c->hdbc );
+	rc = SQLAllocHandle( SQL_HANDLE_DBC, DB2_henv, &c->hdbc );
 
 	rc = SQLSetConnectAttr( c->hdbc,
 		SQL_ATTR_AUTOCOMMIT,
@@ -627,40 +913,99 @@ _db2_connect(PyObject *self, PyObject *args, PyObject *kwargs)
 
 	if ( checkSuccess(rc) ) {
 		c->connected = TRUE;
-		DB2ConnObj_set_conn_info(c);	/* fill misc conn info */
 
 		return (PyObject *)c;
 	} else {
 		_DB2ConnObj_Conn_Error(c, DB2_DatabaseError);
 		rc = SQLFreeHandle( SQL_HANDLE_DBC, c->hdbc );
-		rc = SQLFreeHandle( SQL_HANDLE_ENV, c->henv );
+		_db2_env_release();
 		Py_DECREF(c);
 
 		return NULL;
 	}
 }
 
+static SQLHANDLE
+_db2_env_acquire(void)
+{
+	SQLRETURN	rc;
+	PyObject	*t;
+
+	if (DB2_henvRefCount == 0) {
+		rc = SQLAllocHandle( SQL_HANDLE_ENV, SQL_NULL_HANDLE, &DB2_henv );
+
+		if (rc != SQL_SUCCESS && rc != SQL_SUCCESS_WITH_INFO) {
+			DB2_henv = SQL_NULL_HANDLE;
+
+			t = Py_BuildValue("(sis)", "", -1,
+				"Cannot allocate a CLI environment handle");
+			PyErr_SetObject(DB2_InterfaceError, t);
+			Py_DECREF(t);
+			return SQL_NULL_HANDLE;
+		}
+	}
+
+	DB2_henvRefCount++;
+
+	return DB2_henv;
+}
+
 static void
-DB2ConnObj_set_conn_info(DB2ConnObj *self)
+_db2_env_release(void)
+{
+	if (--DB2_henvRefCount == 0) {
+		SQLFreeHandle( SQL_HANDLE_ENV, DB2_henv );
+		DB2_henv = SQL_NULL_HANDLE;
+	}
+}
+
+static DB2ConnInfo *
+DB2ConnObj_conn_info(DB2ConnObj *self)
 {
+	/*
+		misc. conn info: read once, the first time it is wanted.
+		NULL with an exception set if it cannot be read anymore.
+	*/
 	SQLRETURN	rc;
 	SQLUSMALLINT	supported; /* check if SQLGetInfo() is supported */
 	SQLSMALLINT	len;
 	SQLHANDLE	hdbc = self->hdbc;
-	int		flags = 0;
+	DB2ConnInfo	*info;
 
-	rc = SQLGetFunctions(self->hdbc, SQL_API_SQLGETINFO, &supported);
+	if (self->info) {
+		return self->info;
+	}
 
-	if (supported != SQL_TRUE) {
-		return;
+	if (!self->connected) {
+		_DB2ConnObj_Disconnected_Error(self);
+		return NULL;
 	}
 
-	SQLGetInfo(hdbc, SQL_DBMS_NAME, self->dbmsName, MAX_STR_LEN, &len);
-	SQLGetInfo(hdbc, SQL_DBMS_VER, self->dbmsVer, MAX_STR_LEN, &len);
-	SQLGetInfo(hdbc, SQL_DRIVER_NAME, self->driverName, MAX_STR_LEN, &len);
-	SQLGetInfo(hdbc, SQL_DRIVER_VER, self->driverVer, MAX_STR_LEN, &len);
-	SQLGetInfo(hdbc, SQL_SERVER_NAME, self->serverName, MAX_STR_LEN, &len);
-	SQLGetInfo(hdbc, SQL_FETCH_DIRECTION, &flags, 4, &len);
+	info = (DB2ConnInfo *) MY_MALLOC(sizeof(DB2ConnInfo));
+	memset(info, 0, sizeof(DB2ConnInfo));
+
+	Py_BEGIN_ALLOW_THREADS ;
+
+	rc = SQLGetFunctions(hdbc, SQL_API_SQLGETINFO, &supported);
+
+	if (rc == SQL_SUCCESS && supported == SQL_TRUE) {
+		SQLGetInfo(hdbc, SQL_DBMS_NAME, info->dbmsName, MAX_STR_LEN, &len);
+		SQLGetInfo(hdbc, SQL_DBMS_VER, info->dbmsVer, MAX_STR_LEN, &len);
+		SQLGetInfo(hdbc, SQL_DRIVER_NAME, info->driverName, MAX_STR_LEN, &len);
+		SQLGetInfo(hdbc, SQL_DRIVER_VER, info->driverVer, MAX_STR_LEN, &len);
+		SQLGetInfo(hdbc, SQL_SERVER_NAME, info->serverName, MAX_STR_LEN, &len);
+	}
+
+	Py_END_ALLOW_THREADS ;
+
+	/* another thread may have got here first while the GIL was released */
+	if (self->info) {
+		MY_FREE(info);
+		return self->info;
+	}
+	self->info = info;
+
+	return info;
 }
 
 static PyObject *
@@ -698,14 +1043,48 @@ DB2ConnObj_dealloc(DB2ConnObj * self)
 {
 	DB2ConnObj_close( self, (PyObject *)NULL );
 
+	if (self->info) {
+		MY_FREE(self->info);
+		self->info = NULL;
+	}
+
+	Py_XDECREF(self->procCache);
+	Py_XDECREF(self->stmtStats);
+	Py_XDECREF(self->slowLog);
+
 	PyObject_Del(self);
 }
 
 static PyObject *
 DB2ConnObj_getattr(DB2ConnObj *self, char *name)
 {
+	DB2ConnInfo *info;
+	char *val = NULL;
+
 	if (strcmp(name, "connected") == 0) {
 		return Py_BuildValue("i", self->connected);
+	} else if (strcmp(name, "serverName") == 0
+			|| strcmp(name, "dbmsName") == 0
+			|| strcmp(name, "dbmsVer") == 0
+			|| strcmp(name, "driverName") == 0
+			|| strcmp(name, "driverVer") == 0) {
+		if (!(info = DB2ConnObj_conn_info(self))) {
+			return NULL;
+		}
+
+		if (strcmp(name, "serverName") == 0) {
+			val = info->serverName;
+		} else if (strcmp(name, "dbmsName") == 0) {
+			val = info->dbmsName;
+		} else if (strcmp(name, "dbmsVer") == 0) {
+			val = info->dbmsVer;
+		} else if (strcmp(name, "driverName") == 0) {
+			val = info->driverName;
+		} else {
+			val = info->driverVer;
+		}
+
+		return PyString_FromString(val);
 	} else {
 		return Py_FindMethod(DB2ConnObj_methods, (PyObject *)self, name);
 	}
@@ -715,7 +1094,12 @@ static PyObject *
 DB2ConnObj_repr(DB2ConnObj *self)
 {
 	char buf[1024];
+	DB2ConnInfo *info;
+
 	if (self->connected) {
+		if (!(info = DB2ConnObj_conn_info(self))) {
+			return NULL;
+		}
 		sprintf(buf,
 			"<open connection at %lx, "
 			"serverName: %s, "
@@ -723,9 +1107,9 @@ DB2ConnObj_repr(DB2ConnObj *self)
 			"dbmsVersion: %s"
 			">",
 			(long)self,
-			self->serverName,
-			self->dbmsName,
-			self->dbmsVer
+			info->serverName,
+			info->dbmsName,
+			info->dbmsVer
 			);
 	} else {
 		sprintf(buf, "<closed connection at %lx>", (long)self);
@@ -734,6 +1118,18 @@ DB2ConnObj_repr(DB2ConnObj *self)
 	return PyString_FromString(buf);
 }
 
+static void
+_DB2ConnObj_prefetch_stop(DB2ConnObj *self)
+{
+	/*
+	 * Stop the prefetch workers of the cursors, which may be in a
+	 * CLI call on a statement of the connection.
+	 */
+	while (self->prefetchCursors) {
+		_DB2CursorObj_prefetch_stop(self->prefetchCursors);
+	}
+}
+
 static PyObject *
 DB2ConnObj_close(DB2ConnObj *self, PyObject *args)
 {
@@ -752,21 +1148,35 @@ DB2ConnObj_close(DB2ConnObj *self, PyObject *args)
 	if (self->connected) {
 		SQLRETURN	rc;
 
+		_DB2ConnObj_prefetch_stop(self);
+		_DB2ConnObj_stmt_cache_clear(self);
+		PyDict_Clear(self->procCache);
+
 		if (!self->autoCommit) {
 			/* w/o this, SQLDisconnect will fail! */
 			DB2ConnObj_rollback(self, NULL);
 		}
 
+		Py_BEGIN_ALLOW_THREADS ;
+
 		rc = SQLDisconnect( self->hdbc );
+
+		Py_END_ALLOW_THREADS ;
+
 		CHECK_CONN_RC(rc);
 
 		self->connected = FALSE;
 
 		rc = SQLFreeHandle( SQL_HANDLE_DBC, self->hdbc );
-		CHECK_CONN_RC(rc);
 
-		rc = SQLFreeHandle( SQL_HANDLE_ENV, self->henv );
-		CHECK_CONN_RC(rc);
+		/* the connection is gone either way: release the env */
+		if (!checkSuccess(rc)) {
+			_DB2ConnObj_Conn_Error(self, NULL);
+			_db2_env_release();
+			return NULL;
+		}
+
+		_db2_env_release();
 	}
 
 	Py_INCREF(Py_None);
@@ -782,9 +1192,24 @@ DB2ConnObj_end_tran(DB2ConnObj *self, int endType)
 		return _DB2ConnObj_Disconnected_Error(self);
 	}
 
+	if (endType == SQL_ROLLBACK) {
+		/* closes the result sets the workers are fetching from */
+		_DB2ConnObj_prefetch_stop(self);
+	}
+
+	Py_BEGIN_ALLOW_THREADS ;
+
 	rc = SQLEndTran( SQL_HANDLE_DBC, self->hdbc, endType );
+
+	Py_END_ALLOW_THREADS ;
+
 	CHECK_CONN_RC(rc);
 
+	if (self->ddlInTran && endType == SQL_ROLLBACK) {
+		_DB2ConnObj_schema_changed(self);
+	}
+	self->ddlInTran = 0;
+
 	Py_INCREF(Py_None);
 	return Py_None;
 }
@@ -815,8 +1240,11 @@ DB2ConnObj_cursor(DB2ConnObj *self, PyObject *args)
 		return PyErr_NoMemory();
 	}
 
+	Py_INCREF(self);
+	c->conn		= self;
 	c->hdbc		= self->hdbc;
 	c->hstmt	= (SQLHANDLE)NULL;
+	c->hstmtLOB	= (SQLHANDLE)NULL;
 
 	Py_INCREF(Py_None);
 	c->description	= Py_None;
@@ -829,12 +1257,36 @@ DB2ConnObj_cursor(DB2ConnObj *self, PyObject *args)
 
 	c->bScrollable		= 0;
 	c->lastArraySize	= -1;
+	c->rowWidth		= 0;
 	c->rowCount		= -1;
 	c->opened		= 1;
 	c->messages		= PyList_New(0);
 	c->timeout		= 0;	/* indefinite */
+	c->lobChunkSize		= LOB_CHUNK_SIZE;
+	c->lobAutoRead		= 0;
+	c->lobInlineSize	= 0;
+	c->bindInlineSize	= 0;
+	c->nativeDatetime	= 0;
+	c->prefetch		= NULL;
+	c->prefetchDepth	= 0;
+	c->prefetchBlock	= 0;
+	c->pfPrev		= NULL;
+	c->pfNext		= NULL;
+	c->pfBlocks		= 0;
+	c->pfRows		= 0;
+	c->pfWaits		= 0;
+	c->pfWaitTime		= 0.0;
+	memset(&c->lastStats, 0, sizeof(DB2StmtStats));
+	c->slowPending		= 0;
+	c->slowState[0]		= '\0';
+	c->stats		= NULL;
+	c->statsKey		= NULL;
+	c->statsEntry		= NULL;
+	c->statsGen		= 0;
 	c->rowStatus		= (SQLUSMALLINT *)NULL;
 	c->bFetchRefresh	= 0;
+	c->bDescValid		= 0;
+	c->stmtGen		= 0;
 
 	rc = SQLAllocHandle( SQL_HANDLE_STMT, self->hdbc, &c->hstmt);
 
@@ -845,667 +1297,4265 @@ DB2ConnObj_cursor(DB2ConnObj *self, PyObject *args)
 	} else {
 		Py_DECREF(c->description);
 		Py_DECREF(c->messages);
+		Py_DECREF(c->conn);
 		PyObject_Del(c);
 		/* Connection closed ? */
 		return _DB2ConnObj_Conn_Error(self, NULL);
 	}
 }
 
-/* #### CURSOR METHODS ### */
-
-static void
-DB2CursorObj_dealloc(DB2CursorObj *self)
+static PyObject *
+DB2ConnObj_stmt_cache_stats(DB2ConnObj *self, PyObject *args)
 {
-	DB2CursorObj_close(self, NULL);
-
-	if (self->lastStmt) {
-		MY_FREE(self->lastStmt);
-		self->lastStmt = NULL;
+	if (!PyArg_ParseTuple(args, "")) {
+		return NULL;
 	}
 
-	Py_XDECREF(self->description);
-	Py_XDECREF(self->messages);
-
-	PyObject_Del(self);
+	return Py_BuildValue("{s:i,s:i,s:l,s:l,s:l}",
+			"size", self->stmtCacheSize,
+			"count", self->stmtCacheCount,
+			"hits", self->stmtCacheHits,
+			"misses", self->stmtCacheMisses,
+			"evictions", self->stmtCacheEvictions);
 }
 
 static PyObject *
-DB2CursorObj_getattr(DB2CursorObj *self, char *name)
+DB2ConnObj_proc_cache_stats(DB2ConnObj *self, PyObject *args)
 {
-	PyObject *t;
-
-	t = Py_FindMethod(DB2CursorObj_methods, (PyObject *)self, name);
-	if (t) return t;
+	if (!PyArg_ParseTuple(args, "")) {
+		return NULL;
+	}
 
-	PyErr_Clear();
-	return PyMember_Get((char *)self, DB2CursorObj_members, name);
+	return Py_BuildValue("{s:d,s:i,s:l,s:l}",
+			"ttl", self->procCacheTTL,
+			"count", (int)PyDict_Size(self->procCache),
+			"hits", self->procCacheHits,
+			"misses", self->procCacheMisses);
 }
 
-static int
-_DB2CursorObj_reset_cursor(DB2CursorObj * self)
+static void
+_DB2ConnObj_proc_cache_drop(DB2ConnObj *self, SQLCHAR *procName)
 {
-	SQLRETURN	rc;
-
-	rc = SQLFreeStmt(self->hstmt, SQL_RESET_PARAMS);
-
-	if (rc == SQL_INVALID_HANDLE) {
-		if (DEBUG > 1) { fprintf(stderr, "* SQL_INVALID_HANDLE\n"); }
-		return 0;
+	if (PyDict_DelItemString(self->procCache, procName) != 0) {
+		PyErr_Clear();	/* was not cached */
 	}
-
-	rc = SQLFreeStmt(self->hstmt, SQL_UNBIND);
-
-	rc = SQLFreeStmt(self->hstmt, SQL_CLOSE);
-
-	/* Cursor is Scrollable or not */
-	rc = SQLSetStmtAttr(self->hstmt,
-		SQL_ATTR_CURSOR_SCROLLABLE,
-		(SQLPOINTER)(
-			self->bScrollable ? SQL_SCROLLABLE : SQL_NONSCROLLABLE
-		),
-		0);
-
-	return 1;
 }
 
 static PyObject *
-DB2CursorObj_close(DB2CursorObj *self, PyObject *args)
+DB2ConnObj_proc_cache_clear(DB2ConnObj *self, PyObject *args)
 {
-	SQLRETURN	rc;
+	/*
+		Forget the parameters of procName, or of all procedures:
+		callproc() looks them up in the catalog again.
+	*/
+	SQLCHAR *procName = NULL;
 
-	if (self->hstmt) {
-		if ( _DB2CursorObj_reset_cursor(self) ) {
-			rc = SQLFreeHandle( SQL_HANDLE_STMT, self->hstmt );
-			CHECK_CURSOR_RC(rc);
-		}
-		self->hstmt = (SQLHANDLE)NULL;
+	if (!PyArg_ParseTuple(args, "|z", &procName)) {
+		return NULL;
 	}
 
-	_DB2CursorObj_reset_params(self, 0);
-	_DB2CursorObj_reset_bind_col(self, 0);
+	if (procName) {
+		_DB2ConnObj_proc_cache_drop(self, procName);
+	} else {
+		PyDict_Clear(self->procCache);
+	}
 
 	Py_INCREF(Py_None);
 	return Py_None;
 }
 
 static PyObject *
-DB2CursorObj_execute(DB2CursorObj *self, PyObject *args)
+DB2ConnObj_stats(DB2ConnObj *self, PyObject *args)
 {
 	/*
-
-	.execute(operation[,parameters]) 
-          
-            Prepare and execute a database operation (query or
-            command).  Parameters may be provided as sequence or
-            mapping and will be bound to variables in the operation.
-            Variables are specified in a database-specific notation
-            (see the module's paramstyle attribute for details). [5]
-            
-            A reference to the operation will be retained by the
-            cursor.  If the same operation object is passed in again,
-            then the cursor can optimize its behavior.  This is most
-            effective for algorithms where the same operation is used,
-            but different parameters are bound to it (many times).
-            
-            For maximum efficiency when reusing an operation, it is
-            best to use the setinputsizes() method to specify the
-            parameter types and sizes ahead of time.  It is legal for
-            a parameter to not match the predefined information; the
-            implementation should compensate, possibly with a loss of
-            efficiency.
-            
-            The parameters may also be specified as list of tuples to
-            e.g. insert multiple rows in a single operation, but this
-            kind of usage is depreciated: executemany() should be used
-            instead.
-            
-            Return values are not defined.
-
+		{stmt: {counter: value}} of the statements executed by
+		the cursors of the connection. With reset, the counters
+		start over.
 	*/
-	SQLCHAR		*stmt;
-	SQLRETURN	rc;
-	SQLSMALLINT	numParams = 0, numCols;
-	SQLINTEGER	rowCount;
-	PyObject	*params = NULL;
+	PyObject	*r, *key, *entry, *d;
+	Py_ssize_t	pos = 0;
+	int		reset = 0;
 
-	if (!PyArg_ParseTuple(args, "s|O", &stmt, &params)) {
+	if (!PyArg_ParseTuple(args, "|i", &reset)) {
 		return NULL;
 	}
 
-	/* clear .messages */
-	Py_XDECREF(self->messages);
-	self->messages = PyList_New(0);
+	r = PyDict_New();
 
-	/* Close cursor (if opened) */
-	if (!_DB2CursorObj_reset_cursor(self)) {
-		return _DB2CursorObj_Cursor_Error(self, NULL);
+	while (PyDict_Next(self->stmtStats, &pos, &key, &entry)) {
+		d = _DB2StmtStats_dict(
+			(DB2StmtStats *)PyCapsule_GetPointer(entry, NULL));
+		PyDict_SetItem(r, key, d);
+		Py_DECREF(d);
 	}
 
-	/* Prepare */
-	if (!self->lastStmt || strcmp(self->lastStmt, stmt) != 0) {
-		if (SQLPrepare(self->hstmt, stmt, SQL_NTS) != SQL_SUCCESS) {
-			return _DB2CursorObj_Cursor_Error(self, NULL);
-		}
+	if (reset) {
+		/* cursors holding an entry drop it on their next execute */
+		PyDict_Clear(self->stmtStats);
+		self->statsGen++;
+	}
 
-		if (SQLNumParams(self->hstmt, &numParams) != SQL_SUCCESS) {
-			return _DB2CursorObj_Cursor_Error(self, NULL);
-		}
+	return r;
+}
 
-		_DB2CursorObj_reset_params(self, numParams);
+static PyObject *
+DB2ConnObj_slow_log(DB2ConnObj *self, PyObject *args)
+{
+	/*
+		._slowlog(func, threshold): call func(stmt, seconds, rows,
+		sqlstate) for every execution taking at least threshold
+		seconds, once it is over. func None: off.
+	*/
+	PyObject	*func;
+	double		threshold = 0.0;
 
-		MY_FREE(self->lastStmt);
-		self->lastStmt = (SQLCHAR *)MY_MALLOC(strlen(stmt)+1);
-		memset(self->lastStmt, 0, strlen(stmt)+1);
-		strcpy(self->lastStmt, stmt);
+	if (!PyArg_ParseTuple(args, "O|d", &func, &threshold)) {
+		return NULL;
+	}
 
-		if (DEBUG) {
-			fprintf(stderr,
-				"* # of Params: %d for ``%s\'\'\n",
-				self->paramCount, stmt);
+	if (func != Py_None && !PyCallable_Check(func)) {
+		PyErr_SetString(PyExc_TypeError, "func SHOULD be callable");
+		return NULL;
+	}
+
+	Py_CLEAR(self->slowLog);
+	if (func != Py_None) {
+		Py_INCREF(func);
+		self->slowLog = func;
+	}
+	self->slowThreshold = threshold;
+
+	Py_INCREF(Py_None);
+	return Py_None;
+}
+
+static void
+_DB2ConnObj_stmt_cache_unlink(DB2ConnObj *self, DB2StmtEntry *e)
+{
+	if (e->prev) {
+		e->prev->next = e->next;
+	} else {
+		self->stmtCacheHead = e->next;
+	}
+
+	if (e->next) {
+		e->next->prev = e->prev;
+	} else {
+		self->stmtCacheTail = e->prev;
+	}
+
+	e->prev = e->next = NULL;
+	self->stmtCacheCount--;
+}
+
+static DB2StmtEntry *
+_DB2ConnObj_stmt_cache_get(DB2ConnObj *self, SQLCHAR *stmt, int bScrollable)
+{
+	/*
+		Take the cached statement prepared from stmt out of the
+		cache. NULL on a miss.
+	*/
+	DB2StmtEntry *e;
+
+	for (e = self->stmtCacheHead; e; e = e->next) {
+		if (e->bScrollable == bScrollable && strcmp(e->stmt, stmt) == 0) {
+			_DB2ConnObj_stmt_cache_unlink(self, e);
+			self->stmtCacheHits++;
+			return e;
+		}
+	}
+
+	self->stmtCacheMisses++;
+	return NULL;
+}
+
+static void
+_DB2ConnObj_stmt_cache_put(DB2ConnObj *self, DB2StmtEntry *e)
+{
+	/* Least recently used entries go beyond stmtCacheSize */
+	DB2StmtEntry *old;
+
+	e->prev = NULL;
+	e->next = self->stmtCacheHead;
+	if (self->stmtCacheHead) {
+		self->stmtCacheHead->prev = e;
+	} else {
+		self->stmtCacheTail = e;
+	}
+	self->stmtCacheHead = e;
+	self->stmtCacheCount++;
+
+	while (self->stmtCacheCount > self->stmtCacheSize) {
+		old = self->stmtCacheTail;
+		_DB2ConnObj_stmt_cache_unlink(self, old);
+		_DB2StmtEntry_free(old);
+		self->stmtCacheEvictions++;
+	}
+}
+
+static void
+_DB2ConnObj_stmt_cache_clear(DB2ConnObj *self)
+{
+	DB2StmtEntry *e;
+
+	while ((e = self->stmtCacheHead)) {
+		_DB2ConnObj_stmt_cache_unlink(self, e);
+		_DB2StmtEntry_free(e);
+	}
+}
+
+static void
+_DB2ConnObj_schema_changed(DB2ConnObj *self)
+{
+	/*
+		DDL was run or rolled back: statements prepared so far
+		may describe tables that are gone or have changed.
+	*/
+	self->schemaGen++;
+	_DB2ConnObj_stmt_cache_clear(self);
+	PyDict_Clear(self->procCache);
+}
+
+static SQLCHAR *
+_DB2_match_word(SQLCHAR *s, const char *word)
+{
+	/* s past word and the blanks after it, NULL if s does not start with word */
+	size_t i;
+
+	for (i = 0; word[i] && Py_TOUPPER(s[i]) == word[i]; i++)
+		;
+	if (word[i] != '\0' || Py_ISALNUM(s[i]) || s[i] == '_') {
+		return NULL;
+	}
+	s += i;
+	while (Py_ISSPACE(*s)) s++;
+
+	return s;
+}
+
+static int
+_DB2_is_DDL(SQLCHAR *stmt)
+{
+	static const char *ddlList[] = {
+		"CREATE", "DROP", "ALTER", "RENAME", "DECLARE", NULL,
+	};
+	const char **p;
+
+	while (Py_ISSPACE(*stmt)) stmt++;
+
+	for (p = ddlList; *p; p++) {
+		if (_DB2_match_word(stmt, *p)) {
+			return 1;
+		}
+	}
+
+	return 0;
+}
+
+static int
+_DB2_is_set_schema(SQLCHAR *stmt)
+{
+	/*
+		SET [CURRENT] SCHEMA, SQLID or [FUNCTION] PATH: unqualified
+		names of the statements prepared so far resolved otherwise.
+	*/
+	static const char *regList[] = {
+		"SCHEMA", "SQLID", "PATH", "FUNCTION",
+		"CURRENT_SCHEMA", "CURRENT_PATH", NULL,
+	};
+	const char **p;
+	SQLCHAR *s, *t;
+
+	while (Py_ISSPACE(*stmt)) stmt++;
+
+	if (!(s = _DB2_match_word(stmt, "SET"))) {
+		return 0;
+	}
+	if ((t = _DB2_match_word(s, "CURRENT"))) {
+		s = t;
+	}
+	for (p = regList; *p; p++) {
+		if (_DB2_match_word(s, *p)) {
+			return 1;
+		}
+	}
+
+	return 0;
+}
+
+/* #### CURSOR METHODS ### */
+
+static void
+DB2CursorObj_dealloc(DB2CursorObj *self)
+{
+	DB2CursorObj_close(self, NULL);
+
+	if (self->lastStmt) {
+		MY_FREE(self->lastStmt);
+		self->lastStmt = NULL;
+	}
+
+	Py_XDECREF(self->description);
+	Py_XDECREF(self->messages);
+	Py_XDECREF(self->statsKey);
+	Py_XDECREF(self->statsEntry);
+	Py_XDECREF(self->conn);
+
+	PyObject_Del(self);
+}
+
+static PyObject *
+DB2CursorObj_getattr(DB2CursorObj *self, char *name)
+{
+	PyObject *t;
+
+	if (strcmp(name, "last_stats") == 0) {
+		return _DB2StmtStats_dict(&self->lastStats);
+	}
+
+	t = Py_FindMethod(DB2CursorObj_methods, (PyObject *)self, name);
+	if (t) return t;
+
+	PyErr_Clear();
+	return PyMember_Get((char *)self, DB2CursorObj_members, name);
+}
+
+static int
+_DB2CursorObj_reset_cursor(DB2CursorObj * self)
+{
+	SQLRETURN	rc;
+
+	_DB2CursorObj_prefetch_stop(self);
+
+	/*
+		Column and parameter bindings are kept while the
+		statement is the same
+	*/
+	rc = SQLFreeStmt(self->hstmt, SQL_CLOSE);
+
+	if (rc == SQL_INVALID_HANDLE) {
+		if (DEBUG > 1) { fprintf(stderr, "* SQL_INVALID_HANDLE\n"); }
+		return 0;
+	}
+
+	return 1;
+}
+
+static void
+_DB2CursorObj_forget_stmt(DB2CursorObj *self)
+{
+	/*
+		The statement handle no longer holds lastStmt: drop it
+		along with its description, column and parameter bindings.
+	*/
+	_DB2CursorObj_prefetch_stop(self);
+
+	if (self->lastStmt) {
+		MY_FREE(self->lastStmt);
+		self->lastStmt = NULL;
+	}
+
+	if (self->hstmt) {
+		SQLFreeStmt(self->hstmt, SQL_UNBIND);
+		SQLFreeStmt(self->hstmt, SQL_RESET_PARAMS);
+
+		/* Cursor is Scrollable or not (for the next SQLPrepare) */
+		SQLSetStmtAttr(self->hstmt,
+			SQL_ATTR_CURSOR_SCROLLABLE,
+			(SQLPOINTER)(
+				self->bScrollable ? SQL_SCROLLABLE : SQL_NONSCROLLABLE
+			),
+			0);
+	}
+
+	self->bDescValid = 0;
+	self->bFetchRefresh = 1;
+}
+
+static DB2StmtEntry *
+_DB2CursorObj_stmt_save(DB2CursorObj *self)
+{
+	/*
+		Move the statement handle of the cursor, with its
+		description, bindings and parameters, into a new
+		cache entry. The cursor is left without a handle.
+	*/
+	DB2StmtEntry *e;
+
+	e = (DB2StmtEntry *) MY_MALLOC(sizeof(DB2StmtEntry));
+
+	e->hstmt		= self->hstmt;
+	e->stmt			= self->lastStmt;
+	e->bScrollable		= self->bScrollable;
+	e->description		= self->description;
+	e->bDescValid		= self->bDescValid;
+	e->bindColList		= self->bindColList;
+	e->bindColCount		= self->bindColCount;
+	e->rowStatus		= self->rowStatus;
+	e->lastArraySize	= self->bFetchRefresh ? -1 : self->lastArraySize;
+	e->rowWidth		= self->rowWidth;
+	e->bindInlineSize	= self->bindInlineSize;
+	e->paramList		= self->paramList;
+	e->paramCount		= self->paramCount;
+	e->prev = e->next	= NULL;
+
+	self->hstmt		= (SQLHANDLE)NULL;
+	self->lastStmt		= (SQLCHAR *)NULL;
+	Py_INCREF(Py_None);
+	self->description	= Py_None;
+	self->bDescValid	= 0;
+	self->bindColList	= (DB2BindStruct **)NULL;
+	self->bindColCount	= 0;
+	self->rowStatus		= (SQLUSMALLINT *)NULL;
+	self->lastArraySize	= -1;
+	self->rowWidth		= 0;
+	self->paramList		= (DB2ParamStruct **)NULL;
+	self->paramCount	= 0;
+	self->bFetchRefresh	= 1;
+
+	return e;
+}
+
+static void
+_DB2CursorObj_stmt_load(DB2CursorObj *self, DB2StmtEntry *e)
+{
+	/*
+		Make the statement of a cache entry the statement of the
+		cursor. The cursor MUST be without a handle.
+	*/
+	Py_XDECREF(self->description);
+
+	self->hstmt		= e->hstmt;
+	self->lastStmt		= e->stmt;
+	self->stmtGen		= self->conn->schemaGen;
+	self->description	= e->description;
+	self->bDescValid	= e->bDescValid;
+	self->bindColList	= e->bindColList;
+	self->bindColCount	= e->bindColCount;
+	self->rowStatus		= e->rowStatus;
+	self->lastArraySize	= e->lastArraySize;
+	self->rowWidth		= e->rowWidth;
+	self->bindInlineSize	= e->bindInlineSize;
+	self->paramList		= e->paramList;
+	self->paramCount	= e->paramCount;
+	self->bFetchRefresh	= (e->lastArraySize == -1);
+
+	MY_FREE(e);
+
+	/* bound by a cursor that may fetch datetimes differently */
+	_DB2CursorObj_set_converters(self);
+
+	/* Statement attributes still refer to the previous owner */
+	if (!self->bFetchRefresh) {
+		SQLSetStmtAttr(self->hstmt,
+			SQL_ATTR_ROWS_FETCHED_PTR,
+			(SQLPOINTER)&self->nFetchedRows, 0);
+	}
+	_DB2CursorObj_timeout(self, -1);
+}
+
+static int
+_DB2CursorObj_stmt_cache_swap(DB2CursorObj *self, SQLCHAR *stmt)
+{
+	/*
+		Park the prepared statement of the cursor in the
+		connection's statement cache and take stmt from it.
+
+		Returns 1 if stmt was found prepared, 0 if the cursor
+		now has a handle on which stmt is still to be prepared,
+		and -1 if a new handle could not be allocated.
+	*/
+	DB2ConnObj	*conn = self->conn;
+	DB2StmtEntry	*e;
+	SQLRETURN	rc;
+
+	if (!conn->connected || conn->stmtCacheSize <= 0) {
+		return 0;
+	}
+
+	e = _DB2ConnObj_stmt_cache_get(conn, stmt, self->bScrollable);
+
+	if (self->lastStmt) {
+		_DB2ConnObj_stmt_cache_put(conn, _DB2CursorObj_stmt_save(self));
+
+		if (!e) {
+			rc = SQLAllocHandle(SQL_HANDLE_STMT, self->hdbc, &self->hstmt);
+			if (!checkSuccess(rc)) {
+				self->hstmt = (SQLHANDLE)NULL;
+				return -1;
+			}
+			_DB2CursorObj_timeout(self, -1);
+			return 0;
+		}
+	} else if (e) {
+		/* Nothing prepared on our handle: drop it */
+		_DB2StmtEntry_free(_DB2CursorObj_stmt_save(self));
+	} else {
+		return 0;
+	}
+
+	_DB2CursorObj_stmt_load(self, e);
+
+	return 1;
+}
+
+static int
+_DB2CursorObj_describe(DB2CursorObj *self)
+{
+	/*
+		Set .description after an execution, unless it was
+		already set for this prepared statement.
+		Returns 0 on a CLI error.
+	*/
+	SQLSMALLINT	numCols;
+
+	if (self->bDescValid) {
+		return 1;
+	}
+
+	if (SQLNumResultCols(self->hstmt, &numCols) != SQL_SUCCESS) {
+		return 0;
+	}
+
+	_DB2CursorObj_set_col_desc(self, numCols);
+
+	self->bDescValid = 1;
+	self->bFetchRefresh = 1;
+
+	return 1;
+}
+
+static PyObject *
+DB2CursorObj_close(DB2CursorObj *self, PyObject *args)
+{
+	SQLRETURN	rc;
+
+	_DB2CursorObj_slow_check(self);
+
+	if (self->hstmt && !self->conn->connected) {
+		/* freed along with the connection handle: the number may be reused */
+		_DB2CursorObj_prefetch_stop(self);
+		self->hstmt = (SQLHANDLE)NULL;
+	}
+
+	if (self->hstmt) {
+		if ( _DB2CursorObj_reset_cursor(self) ) {
+			if (self->lastStmt && self->conn->connected
+					&& self->conn->stmtCacheSize > 0) {
+				/* other cursors may run it again */
+				_DB2ConnObj_stmt_cache_put(self->conn,
+					_DB2CursorObj_stmt_save(self));
+			} else {
+				rc = SQLFreeHandle( SQL_HANDLE_STMT, self->hstmt );
+				CHECK_CURSOR_RC(rc);
+			}
+		}
+		self->hstmt = (SQLHANDLE)NULL;
+	}
+
+	if (self->hstmtLOB) {
+		if (self->conn->connected) {
+			SQLFreeHandle( SQL_HANDLE_STMT, self->hstmtLOB );
+		}
+		self->hstmtLOB = (SQLHANDLE)NULL;
+	}
+
+	_DB2CursorObj_forget_stmt(self);
+	_DB2CursorObj_reset_params(self, 0);
+	_DB2CursorObj_reset_bind_col(self, 0);
+
+	Py_INCREF(Py_None);
+	return Py_None;
+}
+
+static PyObject *
+_DB2CursorObj_Param_Count_Error(void)
+{
+	PyObject *t;
+
+	t = PyTuple_New(3);
+	PyTuple_SetItem(t, 0, PyString_FromString(""));
+	PyTuple_SetItem(t, 1, PyInt_FromLong(-1));
+	PyTuple_SetItem(t, 2,
+		PyString_FromString("Wrong number of parameters")
+		);
+
+	PyErr_SetObject(DB2_ProgrammingError, t);
+	Py_DECREF(t);
+	return NULL;
+}
+
+static void
+_DB2StmtStats_free(PyObject *capsule)
+{
+	MY_FREE(PyCapsule_GetPointer(capsule, NULL));
+}
+
+static PyObject *
+_DB2StmtStats_dict(DB2StmtStats *st)
+{
+	return Py_BuildValue("{s:l,s:l,s:d,s:d,s:l,s:l,s:d,s:d,s:L,s:l,s:L}",
+			"executes", st->executes,
+			"prepares", st->prepares,
+			"prepare_time", st->prepareTime,
+			"execute_time", st->executeTime,
+			"fetches", st->fetches,
+			"rows", st->rows,
+			"fetch_time", st->fetchTime,
+			"convert_time", st->convertTime,
+			"bytes_bound", st->bytesBound,
+			"lob_reads", st->lobReads,
+			"lob_bytes", st->lobBytes);
+}
+
+static void
+_DB2CursorObj_stats_start(DB2CursorObj *self, SQLCHAR *stmt)
+{
+	/*
+		A new execution of stmt: clear .last_stats and find the
+		counters of stmt in the connection (only when the cursor
+		runs another statement than last time).
+	*/
+	DB2ConnObj	*conn = self->conn;
+	DB2StmtStats	*st;
+	PyObject	*entry;
+
+	_DB2CursorObj_slow_check(self);
+
+	memset(&self->lastStats, 0, sizeof(DB2StmtStats));
+	self->slowPending = 1;
+	self->slowState[0] = '\0';
+
+	if (self->statsKey && self->statsGen == conn->statsGen &&
+			strcmp(PyString_AS_STRING(self->statsKey), stmt) == 0) {
+		return;
+	}
+
+	Py_CLEAR(self->statsKey);
+	Py_CLEAR(self->statsEntry);
+	self->stats = NULL;
+
+	/* the slow statement log needs the text too */
+	self->statsKey = PyString_FromString(stmt);
+	self->statsGen = conn->statsGen;
+
+	if (conn->stmtStatsSize <= 0) {
+		return;
+	}
+
+	entry = PyDict_GetItem(conn->stmtStats, self->statsKey);
+
+	if (entry) {
+		Py_INCREF(entry);
+	} else if (PyDict_Size(conn->stmtStats) < conn->stmtStatsSize) {
+		st = (DB2StmtStats *)MY_MALLOC(sizeof(DB2StmtStats));
+		memset(st, 0, sizeof(DB2StmtStats));
+		entry = PyCapsule_New(st, NULL, _DB2StmtStats_free);
+		PyDict_SetItem(conn->stmtStats, self->statsKey, entry);
+	} else {
+		/* too many statements: only .last_stats */
+		return;
+	}
+
+	self->statsEntry = entry;
+	self->stats = (DB2StmtStats *)PyCapsule_GetPointer(entry, NULL);
+}
+
+static int
+_DB2CursorObj_has_result(DB2CursorObj *self)
+{
+	/* .description has columns */
+	return self->description && PyTuple_Check(self->description)
+		&& PyTuple_GET_SIZE(self->description) > 0;
+}
+
+static void
+_DB2CursorObj_slow_check(DB2CursorObj *self)
+{
+	/*
+		The last execution is over (its result set was fetched, or
+		it had none, failed, or another statement is executed):
+		hand it to the slow statement log of the connection if it
+		took conn->slowThreshold seconds or more in the CLI calls
+		and the conversion of the rows. Any exception set is kept.
+	*/
+	DB2ConnObj	*conn = self->conn;
+	DB2StmtStats	*st = &self->lastStats;
+	PyObject	*r, *et, *ev, *tb;
+	double		duration;
+	long		rows;
+
+	if (!self->slowPending) {
+		return;
+	}
+	self->slowPending = 0;
+
+	if (!conn->slowLog || !self->statsKey) {
+		return;
+	}
+
+	duration = st->prepareTime + st->executeTime
+			+ st->fetchTime + st->convertTime;
+
+	if (duration < conn->slowThreshold) {
+		return;
+	}
+
+	if (_DB2CursorObj_has_result(self)) {
+		rows = st->rows;
+	} else if (self->slowState[0]) {
+		rows = -1;
+	} else {
+		rows = self->rowCount;
+	}
+
+	PyErr_Fetch(&et, &ev, &tb);
+
+	r = PyObject_CallFunction(conn->slowLog, "Odlz",
+			self->statsKey, duration, rows,
+			self->slowState[0] ? self->slowState : NULL);
+
+	if (r) {
+		Py_DECREF(r);
+	} else {
+		PyErr_WriteUnraisable(conn->slowLog);
+	}
+
+	PyErr_Restore(et, ev, tb);
+}
+
+static void
+_DB2CursorObj_stats_params(DB2CursorObj *self, int nRows)
+{
+	/* count the parameter buffers bound for nRows rows */
+	PY_LONG_LONG	n = 0;
+	int		i;
+
+	for (i=0; i < self->paramCount; i++) {
+		if (self->paramList[i]) {
+			n += self->paramList[i]->bufLen;
+		}
+	}
+
+	STATS_ADD(self, bytesBound, n * nRows);
+}
+
+static int
+_DB2CursorObj_prepare(DB2CursorObj *self, SQLCHAR *stmt)
+{
+	/*
+		Prepare stmt unless it is the statement prepared last time.
+		Returns 0 with an exception set on failure.
+	*/
+	SQLRETURN	rc;
+	SQLSMALLINT	numParams = 0;
+	double		t;
+
+	if (self->lastStmt && self->stmtGen != self->conn->schemaGen) {
+		/* prepared before a schema change: not worth keeping */
+		_DB2CursorObj_forget_stmt(self);
+	}
+
+	if (self->lastStmt && strcmp(self->lastStmt, stmt) == 0) {
+		return 1;
+	}
+
+	switch (_DB2CursorObj_stmt_cache_swap(self, stmt)) {
+	case 1:
+		return 1;
+	case -1:
+		_DB2ConnObj_Conn_Error(self->conn, NULL);
+		return 0;
+	}
+
+	_DB2CursorObj_forget_stmt(self);
+
+	t = _db2_now();
+
+	Py_BEGIN_ALLOW_THREADS ;
+
+	rc = SQLPrepare(self->hstmt, stmt, SQL_NTS);
+
+	Py_END_ALLOW_THREADS ;
+
+	STATS_ADD(self, prepares, 1);
+	STATS_ADD(self, prepareTime, _db2_now() - t);
+
+	if (rc != SQL_SUCCESS) {
+		_DB2CursorObj_Cursor_Error(self, NULL);
+		return 0;
+	}
+
+	if (SQLNumParams(self->hstmt, &numParams) != SQL_SUCCESS) {
+		_DB2CursorObj_Cursor_Error(self, NULL);
+		return 0;
+	}
+
+	_DB2CursorObj_reset_params(self, numParams);
+
+	MY_FREE(self->lastStmt);
+	self->lastStmt = (SQLCHAR *)MY_MALLOC(strlen(stmt)+1);
+	memset(self->lastStmt, 0, strlen(stmt)+1);
+	strcpy(self->lastStmt, stmt);
+	self->stmtGen = self->conn->schemaGen;
+
+	if (DEBUG) {
+		fprintf(stderr,
+			"* # of Params: %d for ``%s\'\'\n",
+			self->paramCount, stmt);
+	}
+
+	return 1;
+}
+
+static int
+_DB2CursorObj_run_stmt(DB2CursorObj *self)
+{
+	/*
+		SQLExecute() the prepared statement with the parameters
+		bound, feeding LOB files on SQL_NEED_DATA.
+		Returns 0 with an exception set on failure.
+	*/
+	SQLRETURN	rc;
+
+	Py_BEGIN_ALLOW_THREADS ;
+
+	rc = SQLExecute(self->hstmt);
+
+	Py_END_ALLOW_THREADS ;
+
+	show_rc_name("cs.execute() - SQLExecute", rc);
+
+	if ( rc == SQL_NEED_DATA ) {
+		SQLPOINTER token;	/* ps->buf of a data-at-exec parameter */
+
+		while (1) {
+			Py_BEGIN_ALLOW_THREADS ;
+
+			rc = SQLParamData(self->hstmt, &token);
+
+			Py_END_ALLOW_THREADS ;
+
+			if (rc == SQL_SUCCESS) {
+				break;
+			} else if (rc == SQL_NEED_DATA) {
+				if (!_DB2CursorObj_send_lob(self,
+						*(DB2ParamStruct **)token)) {
+					SQLCancel(self->hstmt);
+					return 0;
+				}
+			} else if (rc == SQL_SUCCESS_WITH_INFO) {
+				_DB2CursorObj_fill_Cursor_messages(self);
+				break;
+			} else {
+				_DB2CursorObj_Cursor_Error(self, NULL);
+				return 0;
+			}
+		}
+	}
+	/*
+	 * SQL_NO_DATA_FOUND is returned when DB2 issues a SQL0000W warning
+	 */
+	if (rc == SQL_SUCCESS) {
+		;
+	} else if (rc == SQL_SUCCESS_WITH_INFO || rc == SQL_NO_DATA_FOUND) {
+		_DB2CursorObj_fill_Cursor_messages(self);
+	} else {
+		_DB2CursorObj_Cursor_Error(self, NULL);
+		return 0;
+	}
+
+	return 1;
+}
+
+static int
+_DB2CursorObj_run(DB2CursorObj *self)
+{
+	double	t = _db2_now();
+	int	r;
+
+	r = _DB2CursorObj_run_stmt(self);
+
+	STATS_ADD(self, executes, 1);
+	STATS_ADD(self, executeTime, _db2_now() - t);
+
+	/* whichever of execute(), executemany() or load() ran it */
+	if (r && self->lastStmt) {
+		if (_DB2_is_DDL(self->lastStmt)) {
+			_DB2ConnObj_schema_changed(self->conn);
+			self->conn->ddlInTran = !self->conn->autoCommit;
+		} else if (_DB2_is_set_schema(self->lastStmt)) {
+			_DB2ConnObj_schema_changed(self->conn);
+		}
+	}
+
+	return r;
+}
+
+static PyObject *
+_DB2CursorObj_execute(DB2CursorObj *self, PyObject *args)
+{
+	/*
+
+	.execute(operation[,parameters]) 
+          
+            Prepare and execute a database operation (query or
+            command).  Parameters may be provided as sequence or
+            mapping and will be bound to variables in the operation.
+            Variables are specified in a database-specific notation
+            (see the module's paramstyle attribute for details). [5]
+            
+            A reference to the operation will be retained by the
+            cursor.  If the same operation object is passed in again,
+            then the cursor can optimize its behavior.  This is most
+            effective for algorithms where the same operation is used,
+            but different parameters are bound to it (many times).
+            
+            For maximum efficiency when reusing an operation, it is
+            best to use the setinputsizes() method to specify the
+            parameter types and sizes ahead of time.  It is legal for
+            a parameter to not match the predefined information; the
+            implementation should compensate, possibly with a loss of
+            efficiency.
+            
+            The parameters may also be specified as list of tuples to
+            e.g. insert multiple rows in a single operation, but this
+            kind of usage is depreciated: executemany() should be used
+            instead.
+            
+            Return values are not defined.
+
+	*/
+	SQLCHAR		*stmt;
+	SQLRETURN	rc;
+	SQLINTEGER	rowCount;
+	PyObject	*params = NULL;
+
+	if (!PyArg_ParseTuple(args, "s|O", &stmt, &params)) {
+		return NULL;
+	}
+
+	/* clear .messages */
+	Py_XDECREF(self->messages);
+	self->messages = PyList_New(0);
+
+	_DB2CursorObj_stats_start(self, stmt);
+
+	/* Close cursor (if opened) */
+	if (!_DB2CursorObj_reset_cursor(self)) {
+		return _DB2CursorObj_Cursor_Error(self, NULL);
+	}
+
+	/* Prepare */
+	if (!_DB2CursorObj_prepare(self, stmt)) {
+		return NULL;
+	}
+
+	/* bind parameters */
+	if (self->paramCount) {	/* There are ? markers in SQL */
+		int r;
+
+		if (self->paramCount != PyTuple_Size(params)) {
+			return _DB2CursorObj_Param_Count_Error();
+		}
+
+		if (!_DB2CursorObj_get_param_info(self, self->paramCount)) {
+			return _DB2CursorObj_Cursor_Error(self, NULL);
+		}
+
+		r = _DB2CursorObj_prepare_param_vars(self,
+					self->paramCount, params);
+
+		if (r == 0) {
+			return NULL;
+		} else if (r == -1) {
+			return _DB2CursorObj_Cursor_Error(self, NULL);
+		}
+
+		_DB2CursorObj_stats_params(self, 1);
+	}
+
+	if (!_DB2CursorObj_run(self)) {
+		return NULL;
+	}
+
+	/*
+
+	.rowcount 
+          
+            This read-only attribute specifies the number of rows that
+            the last executeXXX() produced (for DQL statements like
+            'select') or affected (for DML statements like 'update' or
+            'insert').
+            
+            The attribute is -1 in case no executeXXX() has been
+            performed on the cursor or the rowcount of the last
+            operation is not determinable by the interface. [7]
+
+            Note: Future versions of the DB API specification could
+            redefine the latter case to have the object return None
+            instead of -1.
+
+	*/
+	rc = SQLRowCount(self->hstmt, &rowCount);
+	self->rowCount = rowCount;
+
+	if (!_DB2CursorObj_describe(self)) {
+		return _DB2CursorObj_Cursor_Error(self, NULL);
+	}
+
+	if (rowCount == -1) {
+		/* SELECT */
+		Py_INCREF(Py_None);
+		return Py_None;
+	} else {
+		/* UPDATE, DELETE, INSERT, ... */
+		return Py_BuildValue("i", rowCount);
+	}
+}
+
+static PyObject *
+DB2CursorObj_execute(DB2CursorObj *self, PyObject *args)
+{
+	PyObject *r = _DB2CursorObj_execute(self, args);
+
+	/* a result set is checked once it is fetched */
+	if (!r || !_DB2CursorObj_has_result(self)) {
+		_DB2CursorObj_slow_check(self);
+	}
+
+	return r;
+}
+
+static PyObject *
+DB2CursorObj_executemany(DB2CursorObj *self, PyObject *args)
+{
+	/*
+
+	.executemany(operation,seq_of_parameters[,batchsize])
+
+	    Prepare a database operation (query or command) and then
+	    execute it against all parameter sequences or mappings
+	    found in the sequence seq_of_parameters.
+
+	    Modules are free to implement this method using multiple
+	    calls to the execute() method or by using array operations
+	    to have the database process the sequence as a whole in
+	    one call.
+
+	    Rows are bound as column-wise parameter arrays
+	    (SQL_ATTR_PARAMSET_SIZE) and sent batchsize rows per
+	    SQLExecute().  A batch holding a LOB file is sent one row
+	    at a time, since files go through SQLPutData().
+
+	    Returns a list with the row count of every batch.
+
+	*/
+	SQLCHAR		*stmt;
+	PyObject	*seq;
+	int		batchSize = 1000;
+
+	if (!PyArg_ParseTuple(args, "sO|i", &stmt, &seq, &batchSize)) {
+		return NULL;
+	}
+
+	return _DB2CursorObj_execute_batches(self, stmt, seq, batchSize, 0, NULL);
+}
+
+static PyObject *
+DB2CursorObj_load(DB2CursorObj *self, PyObject *args)
+{
+	/*
+
+	.load(operation,seq_of_parameters,batchsize[,commitevery])
+
+	    Like executemany(), but a row the server rejects does not
+	    stop the load: the rows are sent non-atomically with
+	    SQL_ATTR_PARAM_STATUS_PTR and the failed ones are reported.
+	    With commitevery > 0 the transaction is committed after
+	    every commitevery rows (at batch ends) and at the end.
+
+	    Returns (rows, errors): the count of rows affected and a
+	    list of (index, sqlstate, sqlcode, message) of the failed
+	    rows, index counting from 0 in seq_of_parameters.
+
+	*/
+	SQLCHAR		*stmt;
+	PyObject	*seq, *errors, *counts;
+	int		batchSize, commitEvery = 0;
+
+	if (!PyArg_ParseTuple(args, "sOi|i", &stmt, &seq, &batchSize,
+				&commitEvery)) {
+		return NULL;
+	}
+
+	errors = PyList_New(0);
+
+	counts = _DB2CursorObj_execute_batches(self, stmt, seq, batchSize,
+				commitEvery, errors);
+	if (!counts) {
+		Py_DECREF(errors);
+		return NULL;
+	}
+	Py_DECREF(counts);
+
+	return Py_BuildValue("(lN)", (long)self->rowCount, errors);
+}
+
+static int
+_DB2CursorObj_row_errors(DB2CursorObj *self, int first, int nRows,
+		SQLUSMALLINT *status, PyObject *errors)
+{
+	/*
+		Append (index, sqlstate, sqlcode, message) to errors for
+		every row of the last SQLExecute() whose status is
+		SQL_PARAM_ERROR, from the diagnostic records of the
+		statement. Returns the number of failed rows.
+	*/
+	SQLCHAR		sqlState[ SQL_SQLSTATE_SIZE + 1 ];
+	SQLCHAR		msgText[ SQL_MAX_MESSAGE_LENGTH + 1 ];
+	SQLSMALLINT	msgTextOutLen, recNum;
+	SQLINTEGER	nativeErr, rowNum, lastRow = 0;
+	PyObject	*t;
+	int		i, nFailed = 0;
+
+	for (i=0; i < nRows; i++) {
+		if (status[i] == SQL_PARAM_ERROR) {
+			nFailed++;
+		}
+	}
+
+	if (!nFailed) {
+		return 0;
+	}
+
+	for (recNum = 1; ; recNum++) {
+		if (SQLGetDiagRec(SQL_HANDLE_STMT, self->hstmt, recNum,
+				sqlState, &nativeErr, msgText,
+				sizeof(msgText), &msgTextOutLen) == SQL_NO_DATA_FOUND) {
+			break;
+		}
+
+		rowNum = 0;
+		SQLGetDiagField(SQL_HANDLE_STMT, self->hstmt, recNum,
+			SQL_DIAG_ROW_NUMBER, &rowNum, 0, NULL);
+
+		if (rowNum < 1 && nRows == 1) {
+			rowNum = 1;
+		}
+
+		/* first record of each failed row */
+		if (rowNum < 1 || rowNum > nRows || rowNum == lastRow
+				|| status[rowNum-1] != SQL_PARAM_ERROR) {
+			continue;
+		}
+		lastRow = rowNum;
+
+		t = Py_BuildValue("(is#ls#)", first + rowNum - 1,
+			sqlState, 5, (long)nativeErr, msgText, (int)msgTextOutLen);
+		PyList_Append(errors, t);
+		Py_DECREF(t);
+	}
+
+	return nFailed;
+}
+
+static void
+_DB2CursorObj_row_status_off(DB2CursorObj *self, SQLUSMALLINT *status)
+{
+	/* back to atomic parameter arrays without a status array */
+	if (status) {
+		if (self->hstmt) {
+			SQLSetStmtAttr(self->hstmt, SQL_ATTR_PARAM_STATUS_PTR,
+				NULL, 0);
+			SQLSetStmtAttr(self->hstmt, SQL_ATTR_PARAMOPT_ATOMIC,
+				(SQLPOINTER)SQL_ATOMIC_YES, 0);
+		}
+		MY_FREE(status);
+	}
+}
+
+static PyObject *
+_DB2CursorObj_execute_batches(DB2CursorObj *self, SQLCHAR *stmt,
+		PyObject *seq, int batchSize, int commitEvery, PyObject *errors)
+{
+	/*
+		executemany() and, with an errors list, load(): run stmt
+		for every row of seq, batchSize rows per SQLExecute().
+		Returns the list of the row counts of the batches.
+	*/
+	SQLRETURN	rc;
+	SQLINTEGER	rowCount;
+	PyObject	*iter, *item, *params, *count, *t;
+	PyObject	*batch = NULL, *counts = NULL;
+	SQLUSMALLINT	*status = NULL;
+	int		nRows, batchCount, total = 0;
+	int		seen = 0, uncommitted = 0;
+	int		i, r;
+
+	if (batchSize < 1) {
+		PyErr_SetString(PyExc_ValueError, "batchsize SHOULD be >= 1");
+		return NULL;
+	}
+
+	if (!(iter = PyObject_GetIter(seq))) {
+		return NULL;
+	}
+
+	/* clear .messages */
+	Py_XDECREF(self->messages);
+	self->messages = PyList_New(0);
+
+	_DB2CursorObj_stats_start(self, stmt);
+
+	/* Close cursor (if opened) */
+	if (!_DB2CursorObj_reset_cursor(self)) {
+		_DB2CursorObj_Cursor_Error(self, NULL);
+		goto Error;
+	}
+
+	if (!_DB2CursorObj_prepare(self, stmt)) {
+		goto Error;
+	}
+
+	if (self->paramCount &&
+			!_DB2CursorObj_get_param_info(self, self->paramCount)) {
+		_DB2CursorObj_Cursor_Error(self, NULL);
+		goto Error;
+	}
+
+	if (errors) {
+		/* go on past failing rows, telling which ones failed */
+		status = (SQLUSMALLINT *)MY_MALLOC(sizeof(SQLUSMALLINT) * batchSize);
+		SQLSetStmtAttr(self->hstmt, SQL_ATTR_PARAMOPT_ATOMIC,
+			(SQLPOINTER)SQL_ATOMIC_NO, 0);
+		SQLSetStmtAttr(self->hstmt, SQL_ATTR_PARAM_STATUS_PTR,
+			(SQLPOINTER)status, 0);
+	}
+
+	counts = PyList_New(0);
+
+	while (1) {
+		/* collect the next batch */
+		Py_XDECREF(batch);
+		batch = PyList_New(0);
+
+		while (PyList_GET_SIZE(batch) < batchSize) {
+			if (!(item = PyIter_Next(iter))) {
+				break;
+			}
+			params = PySequence_Tuple(item);
+			Py_DECREF(item);
+
+			if (!params) {
+				goto Error;
+			}
+			if (PyTuple_GET_SIZE(params) != self->paramCount) {
+				Py_DECREF(params);
+				_DB2CursorObj_Param_Count_Error();
+				goto Error;
+			}
+
+			PyList_Append(batch, params);
+			Py_DECREF(params);
+		}
+
+		if (PyErr_Occurred()) {
+			goto Error;
+		}
+
+		nRows = PyList_GET_SIZE(batch);
+		if (nRows == 0) {
+			break;
+		}
+
+		if (self->paramCount) {
+			r = _DB2CursorObj_prepare_param_array(self,
+						self->paramCount, batch);
+		} else {
+			r = 1;
+		}
+
+		if (r == 0) {
+			goto Error;
+		} else if (r == -1) {
+			_DB2CursorObj_Cursor_Error(self, NULL);
+			goto Error;
+		}
+
+		batchCount = 0;
+
+		if (r == 2) {
+			/* LOB file in this batch: one row at a time */
+			for (i=0; i < nRows; i++) {
+				r = _DB2CursorObj_prepare_param_vars(self,
+						self->paramCount,
+						PyList_GET_ITEM(batch, i));
+				if (r == 0) {
+					goto Error;
+				} else if (r == -1) {
+					_DB2CursorObj_Cursor_Error(self, NULL);
+					goto Error;
+				}
+
+				_DB2CursorObj_stats_params(self, 1);
+
+				if (status) {
+					status[0] = SQL_PARAM_UNUSED;
+				}
+
+				if (!_DB2CursorObj_run(self)) {
+					if (!status || !_DB2CursorObj_row_errors(self,
+							seen + i, 1, status, errors)) {
+						goto Error;
+					}
+					PyErr_Clear();
+					continue;
+				}
+
+				rc = SQLRowCount(self->hstmt, &rowCount);
+				if (rowCount > 0) {
+					batchCount += rowCount;
+				}
+			}
+		} else {
+			rc = SQLSetStmtAttr(self->hstmt,
+				SQL_ATTR_PARAMSET_SIZE,
+				(SQLPOINTER)nRows, 0);
+
+			if (!checkSuccess(rc)) {
+				_DB2CursorObj_Cursor_Error(self, NULL);
+				goto Error;
+			}
+
+			if (status) {
+				for (i=0; i < nRows; i++) {
+					status[i] = SQL_PARAM_UNUSED;
+				}
+			}
+
+			_DB2CursorObj_stats_params(self, nRows);
+
+			r = _DB2CursorObj_run(self);
+
+			if (status && _DB2CursorObj_row_errors(self,
+					seen, nRows, status, errors) && !r) {
+				/* every row failed */
+				PyErr_Clear();
+				r = 1;
+			}
+
+			rowCount = 0;
+			if (r) {
+				rc = SQLRowCount(self->hstmt, &rowCount);
+			}
+
+			/* back to one row per SQLExecute() for .execute() */
+			SQLSetStmtAttr(self->hstmt,
+				SQL_ATTR_PARAMSET_SIZE,
+				(SQLPOINTER)1, 0);
+
+			if (!r) {
+				goto Error;
+			}
+
+			if (rowCount > 0) {
+				batchCount = rowCount;
+			}
+		}
+
+		count = PyInt_FromLong(batchCount);
+		PyList_Append(counts, count);
+		Py_DECREF(count);
+
+		total += batchCount;
+		seen += nRows;
+		uncommitted += nRows;
+
+		if (commitEvery > 0 && uncommitted >= commitEvery
+				&& !self->conn->autoCommit) {
+			if (!(t = DB2ConnObj_commit(self->conn, NULL))) {
+				goto Error;
+			}
+			Py_DECREF(t);
+			uncommitted = 0;
+		}
+
+		if (nRows < batchSize) {
+			break;
+		}
+	}
+
+	if (commitEvery > 0 && uncommitted && !self->conn->autoCommit) {
+		if (!(t = DB2ConnObj_commit(self->conn, NULL))) {
+			goto Error;
+		}
+		Py_DECREF(t);
+	}
+
+	_DB2CursorObj_row_status_off(self, status);
+
+	Py_XDECREF(batch);
+	Py_DECREF(iter);
+
+	self->rowCount = total;
+
+	if (!_DB2CursorObj_describe(self)) {
+		Py_DECREF(counts);
+		_DB2CursorObj_Cursor_Error(self, NULL);
+		_DB2CursorObj_slow_check(self);
+		return NULL;
+	}
+
+	_DB2CursorObj_slow_check(self);
+
+	return counts;
+
+Error:
+	_DB2CursorObj_row_status_off(self, status);
+
+	Py_XDECREF(batch);
+	Py_XDECREF(counts);
+	Py_DECREF(iter);
+
+	_DB2CursorObj_slow_check(self);
+
+	return NULL;
+}
+
+#define MAX_NAME_LEN		128
+
+static PyObject *
+_DB2CursorObj_proc_columns(DB2CursorObj *self, SQLCHAR *procName)
+{
+	/*
+		Look procName up in the catalog. Returns a new
+		(loadTime, callStmt, paramInfo) tuple, paramInfo holding
+		one (inOutType, dataType, colSize, decDigits, nullable)
+		tuple per parameter, or NULL with an exception set.
+	*/
+	SQLHANDLE	hstmtProc;
+	SQLRETURN	rc;
+	PyObject	*paramInfo, *info, *callStmt, *entry;
+	char		*p;
+	int		i, numParams;
+
+	struct {
+		SQLINTEGER	ind;
+		SQLSMALLINT	val;
+	} colType, colDataType, decDigits, nullable;
+
+	struct {
+		SQLINTEGER	ind;
+		SQLCHAR		val[MAX_NAME_LEN+1];
+	} colName, colDataTypeName;
+
+	struct {
+		SQLINTEGER	ind;
+		SQLINTEGER	val;
+	} colSize, colOrdinalPos;
+
+	/* New handle for Stored Procedure inspection */
+	rc = SQLAllocHandle(SQL_HANDLE_STMT, self->hdbc, &hstmtProc);
+
+	if (!checkSuccess(rc)) {
+		return _DB2ConnObj_Conn_Error(self->conn, NULL);
+	}
+
+	Py_BEGIN_ALLOW_THREADS ;
+
+	rc = SQLProcedureColumns(
+		hstmtProc,
+		NULL,	/* CatalogName */
+		0,
+		"%",	/* SchemaName */
+		SQL_NTS,
+		procName,	/* ProcName */
+		SQL_NTS,
+		"%",		/* ColumnName */
+		SQL_NTS
+		);
+
+	Py_END_ALLOW_THREADS ;
+
+	if (rc != SQL_SUCCESS) {
+		_DB2_Stmt_Error(hstmtProc);
+		SQLFreeHandle( SQL_HANDLE_STMT, hstmtProc );
+		return NULL;
+	}
+
+	rc = SQLBindCol(
+		hstmtProc,
+		4,		/* Column Name */
+		SQL_C_CHAR,
+		colName.val,
+		sizeof(colName.val),
+		&colName.ind
+		);
+
+	rc = SQLBindCol(
+		hstmtProc,
+		5,		/* Column Type */
+		SQL_C_SHORT,
+		(SQLPOINTER)&colType.val,	/* IN, OUT, INOUT */
+		sizeof(colType.val),
+		&colType.ind
+		);
+
+	rc = SQLBindCol(
+		hstmtProc,
+		6,		/* Data Type */
+		SQL_C_SHORT,
+		(SQLPOINTER)&colDataType.val,
+		sizeof(colDataType.val),
+		&colDataType.ind
+		);
+
+	rc = SQLBindCol(
+		hstmtProc,
+		7,		/* Data Type Name */
+		SQL_C_CHAR,
+		&colDataTypeName.val,
+		sizeof(colDataTypeName.val),
+		&colDataTypeName.ind
+		);
+
+	rc = SQLBindCol(
+		hstmtProc,
+		8,		/* Column Size */
+		SQL_C_LONG,
+		(SQLPOINTER)&colSize.val,
+		sizeof(colSize.val),
+		&colSize.ind
+		);
+
+	rc = SQLBindCol(
+		hstmtProc,
+		10,		/* Decimal Digits */
+		SQL_C_SHORT,
+		(SQLPOINTER)&decDigits.val,
+		sizeof(decDigits.val),
+		&decDigits.ind
+		);
+
+	rc = SQLBindCol(
+		hstmtProc,
+		12,		/* Nullable */
+		SQL_C_SHORT,
+		(SQLPOINTER)&nullable.val,
+		sizeof(nullable.val),
+		&nullable.ind
+		);
+
+	rc = SQLBindCol(
+		hstmtProc,
+		18,		/* Param Ordinal Position */
+		SQL_C_LONG,
+		(SQLPOINTER)&colOrdinalPos.val,
+		sizeof(colOrdinalPos.val),
+		&colOrdinalPos.ind
+		);
+
+	paramInfo = PyList_New(0);
+
+	while (1) {
+		Py_BEGIN_ALLOW_THREADS ;
+
+		rc = SQLFetch(hstmtProc);
+
+		Py_END_ALLOW_THREADS ;
+
+		if (rc != SQL_SUCCESS) {
+			break;
+		}
+
+		if (DEBUG > 1) {
+			fprintf(stderr, "* Param #%d Name:: %s\n",
+				(int)PyList_GET_SIZE(paramInfo)+1, colName.val);
+		}
+
+		info = Py_BuildValue("(iilii)",
+			(int)colType.val,	/* IN OUT */
+			(int)colDataType.val,	/* SQL Data Type */
+			(long)colSize.val,
+			(int)decDigits.val,
+			nullable.val == SQL_NULLABLE ? 1 : 0);
+		PyList_Append(paramInfo, info);
+		Py_DECREF(info);
+	}
+
+	rc = SQLFreeHandle( SQL_HANDLE_STMT, hstmtProc );
+
+	/* CALL procName ( ?,?,...,? ) */
+	numParams = PyList_GET_SIZE(paramInfo);
+	callStmt = PyString_FromStringAndSize(NULL,
+			strlen(procName) + 8 + 2 * numParams);
+	p = PyString_AS_STRING(callStmt);
+	p += sprintf(p, "CALL %s ( ", procName);
+	for (i=0; i < numParams; i++) {
+		*p++ = '?';
+		*p++ = ',';
+	}
+	p[-1] = ')';	/* replace last , with ) */
+	_PyString_Resize(&callStmt, p - PyString_AS_STRING(callStmt));
+
+	entry = Py_BuildValue("(dNN)", _db2_now(), callStmt,
+			PyList_AsTuple(paramInfo));
+	Py_DECREF(paramInfo);
+
+	return entry;
+}
+
+static PyObject *
+_DB2CursorObj_proc_info(DB2CursorObj *self, SQLCHAR *procName)
+{
+	/*
+		The (loadTime, callStmt, paramInfo) of procName, from the
+		procedure cache of the connection unless it is older than
+		procCacheTTL seconds. Returns a new reference.
+	*/
+	DB2ConnObj	*conn = self->conn;
+	PyObject	*entry;
+	double		ttl = conn->procCacheTTL;
+
+	entry = PyDict_GetItemString(conn->procCache, procName);
+
+	if (entry && (ttl < 0 ||
+			_db2_now() - PyFloat_AS_DOUBLE(
+				PyTuple_GET_ITEM(entry, 0)) < ttl)) {
+		conn->procCacheHits++;
+		Py_INCREF(entry);
+		return entry;
+	}
+
+	conn->procCacheMisses++;
+
+	return _DB2CursorObj_proc_columns(self, procName);
+}
+
+static PyObject *
+_DB2CursorObj_callproc(DB2CursorObj *self, PyObject *args)
+{
+	/*
+
+	.callproc(procname[,parameters])
+          
+            (This method is optional since not all databases provide
+            stored procedures. [3])
+            
+            Call a stored database procedure with the given name. The
+            sequence of parameters must contain one entry for each
+            argument that the procedure expects. The result of the
+            call is returned as modified copy of the input
+            sequence. Input parameters are left untouched, output and
+            input/output parameters replaced with possibly new values.
+            
+            The procedure may also provide a result set as
+            output. This must then be made available through the
+            standard fetchXXX() methods.
+
+	*/
+	/* YYY */
+	SQLCHAR		*procName;
+	PyObject	*params = NULL;
+	PyObject	*retVal;
+	PyObject	*entry, *paramInfo;
+	SQLCHAR		*callStmt;
+
+	SQLRETURN	rc;
+	double		t;
+	SQLINTEGER	rowCount;
+	DB2ParamStruct	*ps;
+	int		i;
+	int		r;
+
+	if (!PyArg_ParseTuple(args, "s|O", &procName, &params)) {
+		return NULL;
+	}
+
+	/* Close cursor (if opened) */
+	_DB2CursorObj_reset_cursor(self);
+
+	/* The CALL below replaces the statement prepared by execute() */
+	_DB2CursorObj_forget_stmt(self);
+
+	if (!(entry = _DB2CursorObj_proc_info(self, procName))) {
+		return NULL;
+	}
+
+	callStmt = PyString_AS_STRING(PyTuple_GET_ITEM(entry, 1));
+	paramInfo = PyTuple_GET_ITEM(entry, 2);
+
+	_DB2CursorObj_stats_start(self, callStmt);
+
+	if ((params ? PyTuple_Size(params) : 0) != PyTuple_GET_SIZE(paramInfo)) {
+		/* may have been redefined since it was cached */
+		Py_DECREF(entry);
+		_DB2ConnObj_proc_cache_drop(self->conn, procName);
+		return _DB2CursorObj_Param_Count_Error();
+	}
+
+	_DB2CursorObj_reset_params(self, PyTuple_GET_SIZE(paramInfo));
+
+	for ( i=0; i < self->paramCount; i++ ) {
+		PyObject *info = PyTuple_GET_ITEM(paramInfo, i);
+
+		ps = (DB2ParamStruct *) MY_MALLOC(sizeof(DB2ParamStruct));
+		memset(ps, 0, sizeof(DB2ParamStruct));
+		self->paramList[i] = ps;
+
+		ps->inOutType = (SQLSMALLINT)PyInt_AS_LONG(PyTuple_GET_ITEM(info, 0));
+		ps->dataType = (SQLSMALLINT)PyInt_AS_LONG(PyTuple_GET_ITEM(info, 1));
+		ps->colSize = (SQLUINTEGER)PyInt_AS_LONG(PyTuple_GET_ITEM(info, 2));
+		ps->decDigits = (SQLSMALLINT)PyInt_AS_LONG(PyTuple_GET_ITEM(info, 3));
+		ps->nullable = (SQLSMALLINT)PyInt_AS_LONG(PyTuple_GET_ITEM(info, 4));
+	}
+
+	t = _db2_now();
+
+	Py_BEGIN_ALLOW_THREADS ;
+
+	rc = SQLPrepare( self->hstmt, callStmt, SQL_NTS );
+
+	Py_END_ALLOW_THREADS ;
+
+	STATS_ADD(self, prepares, 1);
+	STATS_ADD(self, prepareTime, _db2_now() - t);
+
+	if (rc != SQL_SUCCESS) {
+		Py_DECREF(entry);
+		_DB2ConnObj_proc_cache_drop(self->conn, procName);
+		return _DB2CursorObj_Cursor_Error(self, NULL);
+	}
+
+	if (self->conn->procCacheTTL != 0) {
+		PyDict_SetItemString(self->conn->procCache, procName, entry);
+	}
+	Py_DECREF(entry);
+
+	r = _DB2CursorObj_prepare_param_vars(self, self->paramCount, params);
+
+	if (r == 0) {
+		return NULL;
+	} else if (r == -1) {
+		return _DB2CursorObj_Cursor_Error(self, NULL);
+	}
+
+	_DB2CursorObj_stats_params(self, 1);
+
+	t = _db2_now();
+
+	Py_BEGIN_ALLOW_THREADS ;
+
+	rc = SQLExecute(self->hstmt);
+
+	Py_END_ALLOW_THREADS ;
+
+	show_rc_name("cs.callproc() - SQLExecute", rc);
+
+	if ( rc == SQL_NEED_DATA ) {
+		SQLPOINTER token;	/* ps->buf of a data-at-exec parameter */
+
+		while (1) {
+			Py_BEGIN_ALLOW_THREADS ;
+
+			rc = SQLParamData(self->hstmt, &token);
+
+			Py_END_ALLOW_THREADS ;
+
+			if (rc == SQL_SUCCESS) {
+				break;
+			} else if (rc == SQL_SUCCESS_WITH_INFO ) {
+				_DB2CursorObj_fill_Cursor_messages(self);
+				break;
+			} else if (rc == SQL_NEED_DATA) {
+				if (!_DB2CursorObj_send_lob(self,
+						*(DB2ParamStruct **)token)) {
+					SQLCancel(self->hstmt);
+					return NULL;
+				}
+			} else {
+				return _DB2CursorObj_Cursor_Error(self, NULL);
+			}
+		}
+	}
+
+	STATS_ADD(self, executes, 1);
+	STATS_ADD(self, executeTime, _db2_now() - t);
+
+	if ( rc == SQL_SUCCESS ) {
+		;
+	} else if ( rc == SQL_SUCCESS_WITH_INFO ) {
+		_DB2CursorObj_fill_Cursor_messages(self);
+	} else {
+		return _DB2CursorObj_Cursor_Error(self, NULL);
+	}
+
+	rc = SQLRowCount(self->hstmt, (SQLINTEGER *)&rowCount);
+	self->rowCount = rowCount;
+
+	if (!_DB2CursorObj_describe(self)) {
+		return _DB2CursorObj_Cursor_Error(self, NULL);
+	}
+
+	/* build Return Value */
+	retVal = PyTuple_New( self->paramCount );
+
+	for ( i=0; i < self->paramCount; i++ ) {
+		PyObject *tmpVal;
+
+		ps = self->paramList[i];
+
+		if (DEBUG > 2) {
+			fprintf(stderr, "* Parameter [%d]\n", i);
+			fprintf(stderr, "\tinOutType: %d\n", ps->inOutType);
+			fprintf(stderr, "\tdataType: %d\n", ps->dataType);
+			fprintf(stderr, "\tdataTypeName: %s\n", get_SQL_type_name(ps->dataType));
+			fprintf(stderr, "\tcolSize: %d\n", (int)ps->colSize);
+			fprintf(stderr, "\tbufLen: %d\n", (int)ps->bufLen);
+			fprintf(stderr, "\toutLen: %d\n", (int)ps->outLen);
+			fprintf(stderr, "\t---\n");
+		}
+
+		if ( ps->inOutType == SQL_PARAM_INPUT ) {
+			tmpVal = PyTuple_GetItem(params, i);
+			Py_INCREF(tmpVal);
+		} else {
+			tmpVal = _SQLType_2_PyType(ps);
+		}
+
+		PyTuple_SetItem(retVal, i, tmpVal);
+	}
+
+	return retVal;
+}
+
+static PyObject *
+DB2CursorObj_callproc(DB2CursorObj *self, PyObject *args)
+{
+	PyObject *r = _DB2CursorObj_callproc(self, args);
+
+	/* a result set is checked once it is fetched */
+	if (!r || !_DB2CursorObj_has_result(self)) {
+		_DB2CursorObj_slow_check(self);
+	}
+
+	return r;
+}
+
+static PyObject *
+DB2CursorObj_fetch(DB2CursorObj *self, PyObject *args)
+{
+	/*
+
+	.fetchone() 
+          
+            Fetch the next row of a query result set, returning a
+            single sequence, or None when no more data is
+            available. [6]
+            
+            An Error (or subclass) exception is raised if the previous
+            call to executeXXX() did not produce any result set or no
+            call was issued yet.
+
+	*/
+	SQLRETURN	rc;
+	SQLHSTMT	hstmt = self->hstmt;
+	int		wanted = -1, howmany;
+	int		orient = 1;
+	int		offset = 1;
+	SQLUSMALLINT	fOrient;
+	PyObject	*rows, *row;
+	double		t;
+
+	if (!PyArg_ParseTuple(args, "|iii", &wanted, &orient, &offset)) {
+		return NULL;
+	}
+
+	if (self->bScrollable) {
+		if (orient == 1) {
+			fOrient = SQL_FETCH_NEXT;
+		} else if (orient == 2) {
+			fOrient = SQL_FETCH_FIRST;
+		} else if (orient == 3) {
+			fOrient = SQL_FETCH_LAST;
+		} else if (orient == 4) {
+			fOrient = SQL_FETCH_PRIOR;
+		} else if (orient == 5) {
+			fOrient = SQL_FETCH_ABSOLUTE;
+		} else if (orient == 6) {
+			fOrient = SQL_FETCH_RELATIVE;
+		} else {
+			fOrient = SQL_FETCH_NEXT;	/* fall back */
+		}
+	} else {
+		fOrient = SQL_FETCH_NEXT;
+	}
+
+	if (wanted == -1) {
+		howmany = 1;
+	} else {
+		howmany = wanted;
+	}
+
+	switch (_DB2CursorObj_prefetching(self)) {
+	case -1:
+		return NULL;
+	case 1:
+		rows = _DB2CursorObj_prefetch_rows(self, howmany);
+		if (rows && wanted == -1) {
+			row = PyList_GET_SIZE(rows) ? PyList_GET_ITEM(rows, 0)
+						    : Py_None;
+			Py_INCREF(row);
+			Py_DECREF(rows);
+			return row;
+		}
+		return rows;
+	}
+
+	if (!_DB2CursorObj_bind_fetch(self, howmany)) {
+		return _DB2CursorObj_Cursor_Error(self, NULL);
+	}
+
+	t = _db2_now();
+
+	Py_BEGIN_ALLOW_THREADS ;
+
+	rc = SQLFetchScroll(hstmt, fOrient, (SQLINTEGER)offset);
+
+	Py_END_ALLOW_THREADS ;
+
+	STATS_ADD(self, fetches, 1);
+	STATS_ADD(self, fetchTime, _db2_now() - t);
+
+	if (checkSuccess(rc)) {
+		STATS_ADD(self, rows, self->nFetchedRows);
+		t = _db2_now();
+		rows = _DB2CursorObj_retrieve_rows(self, wanted);
+		STATS_ADD(self, convertTime, _db2_now() - t);
+		return rows;
+	} else if (rc == SQL_NO_DATA_FOUND) {
+		_DB2CursorObj_slow_check(self);
+		Py_INCREF(Py_None);
+		return Py_None;
+	} else {
+		_DB2CursorObj_Cursor_Error(self, NULL);
+		_DB2CursorObj_slow_check(self);
+		return NULL;
+	}
+}
+
+/*
+ * Block sizes of fetchall()/fetchmany(): fetchall() starts with
+ * FETCH_BLOCK_MIN rows and doubles the row array after each full
+ * block, up to FETCH_BLOCK_MAX rows or FETCH_BLOCK_BYTES of bound
+ * buffers.
+ */
+#define	FETCH_BLOCK_MIN		32
+#define	FETCH_BLOCK_MAX		4096
+#define	FETCH_BLOCK_BYTES	(4 * 1024 * 1024)
+
+static int
+_DB2CursorObj_bind_fetch(DB2CursorObj *self, int howmany)
+{
+	/*
+	 * (Re)bind the result columns for a row array of howmany rows.
+	 * Nothing to do while the result set and array size are the
+	 * same as for the last fetch.
+	 */
+	SQLRETURN	rc;
+	SQLSMALLINT	numCols;
+
+	if (!self->bFetchRefresh && self->lastArraySize == howmany &&
+			self->bindInlineSize == self->lobInlineSize) {
+		return 1;
+	}
+
+	if (SQLNumResultCols(self->hstmt, &numCols) != SQL_SUCCESS) {
+		return 0;
+	}
+
+	_DB2CursorObj_reset_bind_col(self, numCols);
+	_DB2CursorObj_bind_col(self, numCols, howmany);
+
+	rc = SQLSetStmtAttr(self->hstmt,
+		SQL_ATTR_ROW_ARRAY_SIZE,
+		(SQLPOINTER)howmany, 0);
+
+	if (!checkSuccess(rc)) return 0;
+
+	rc = SQLSetStmtAttr(self->hstmt,
+		SQL_ATTR_ROW_BIND_TYPE,
+		(SQLPOINTER)SQL_BIND_BY_COLUMN, 0);
+
+	if (!checkSuccess(rc)) return 0;
+
+	rc = SQLSetStmtAttr(self->hstmt,
+		SQL_ATTR_ROWS_FETCHED_PTR,
+		(SQLPOINTER)&self->nFetchedRows, 0);
+
+	if (!checkSuccess(rc)) return 0;
+
+	rc = SQLSetStmtAttr(self->hstmt,
+		SQL_ATTR_ROW_STATUS_PTR,
+		(SQLPOINTER)self->rowStatus, 0);
+
+	if (!checkSuccess(rc)) return 0;
+
+	self->bFetchRefresh = 0;
+	self->lastArraySize = howmany;
+	self->bindInlineSize = self->lobInlineSize;
+
+	return 1;
+}
+
+static int
+_DB2CursorObj_fetch_block(DB2CursorObj *self, int howmany,
+			DB2FetchSink sink, void *arg)
+{
+	/*
+	 * Fetch the next block of at most howmany rows and hand them
+	 * to sink, which stores the rows still bound to the columns.
+	 *
+	 * Returns the number of rows fetched, 0 at the end of the
+	 * result set and -1 with an exception set.
+	 */
+	SQLRETURN	rc;
+	SQLUINTEGER	i;
+	double		t;
+	int		r;
+
+	if (!_DB2CursorObj_bind_fetch(self, howmany)) {
+		_DB2CursorObj_Cursor_Error(self, NULL);
+		return -1;
+	}
+
+	t = _db2_now();
+
+	Py_BEGIN_ALLOW_THREADS ;
+
+	rc = SQLFetchScroll(self->hstmt, SQL_FETCH_NEXT, 0);
+
+	Py_END_ALLOW_THREADS ;
+
+	STATS_ADD(self, fetches, 1);
+	STATS_ADD(self, fetchTime, _db2_now() - t);
+
+	if (rc == SQL_NO_DATA_FOUND) {
+		return 0;
+	} else if (!checkSuccess(rc)) {
+		_DB2CursorObj_Cursor_Error(self, NULL);
+		return -1;
+	}
+
+	/* refer to SQLFetchScroll() */
+	for (i=0; i < self->nFetchedRows; i++) {
+		if (self->rowStatus[i] == SQL_ROW_ERROR) {
+			_DB2CursorObj_Cursor_Error(self, NULL);
+			return -1;
+		}
+	}
+
+	STATS_ADD(self, rows, self->nFetchedRows);
+
+	t = _db2_now();
+	r = sink(self, arg);
+	STATS_ADD(self, convertTime, _db2_now() - t);
+
+	return r;
+}
+
+static int
+_DB2CursorObj_fetch_loop(DB2CursorObj *self, int wanted,
+			DB2FetchSink sink, void *arg)
+{
+	/*
+	 * Fetch wanted rows (all of them if wanted is -1) in blocks of
+	 * rows, handing every block to sink.
+	 *
+	 * Returns the number of rows fetched or -1 with an exception set.
+	 */
+	int		block, maxBlock, howmany, got, total = 0;
+
+	block = FETCH_BLOCK_MIN;
+	maxBlock = FETCH_BLOCK_MAX;
+
+	while (wanted == -1 || total < wanted) {
+		if (wanted == -1) {
+			howmany = block;
+		} else {
+			howmany = wanted - total;
+			if (howmany > maxBlock) {
+				howmany = maxBlock;
+			}
+		}
+
+		got = _DB2CursorObj_fetch_block(self, howmany, sink, arg);
+
+		if (got < 0) {
+			_DB2CursorObj_slow_check(self);
+			return -1;
+		}
+
+		/* The row width is known once the columns are bound */
+		if (self->rowWidth > 0 &&
+			FETCH_BLOCK_BYTES / self->rowWidth < maxBlock) {
+			maxBlock = FETCH_BLOCK_BYTES / self->rowWidth;
+			if (maxBlock < 1) {
+				maxBlock = 1;
+			}
+		}
+
+		total += got;
+
+		/* A short block is the end of the result set */
+		if ((SQLUINTEGER)howmany > self->nFetchedRows || got == 0) {
+			_DB2CursorObj_slow_check(self);
+			break;
+		}
+
+		if (block < maxBlock) {
+			block *= 2;
+			if (block > maxBlock) {
+				block = maxBlock;
+			}
+		}
+	}
+
+	return total;
+}
+
+static int
+_DB2CursorObj_store_rows(DB2CursorObj *self, void *arg)
+{
+	/* DB2FetchSink: append the rows of the block to the list arg */
+	PyObject	*rows = (PyObject *)arg;
+	PyObject	*row;
+	SQLUINTEGER	i;
+	int		numCols, count = 0, first;
+
+	numCols = PyTuple_Size(self->description);
+	first = PyList_GET_SIZE(rows);
+
+	for (i=0; i < self->nFetchedRows; i++) {
+		if (self->rowStatus[i] == SQL_ROW_NOROW) {
+			continue;
+		}
+
+		row = _DB2CursorObj_retrieve_one_row(self, numCols, i);
+		PyList_Append(rows, row);
+		Py_DECREF(row);
+
+		count++;
+	}
+
+	if (self->lobAutoRead &&
+			!_DB2CursorObj_read_block_LOBs(self, rows, first)) {
+		return -1;
+	}
+
+	return count;
+}
+
+static PyObject *
+_DB2CursorObj_fetch_rows(DB2CursorObj *self, int wanted)
+{
+	/*
+	 * Fetch wanted rows (all of them if wanted is -1) as a list of
+	 * lists.
+	 */
+	PyObject	*rows;
+
+	switch (_DB2CursorObj_prefetching(self)) {
+	case -1:
+		return NULL;
+	case 1:
+		return _DB2CursorObj_prefetch_rows(self, wanted);
+	}
+
+	rows = PyList_New(0);
+
+	if (_DB2CursorObj_fetch_loop(self, wanted,
+			_DB2CursorObj_store_rows, rows) < 0) {
+		Py_DECREF(rows);
+		return NULL;
+	}
+
+	return rows;
+}
+
+/*
+ * Prefetch: with ._prefetch(depth, blockSize), the rows of a result set
+ * are fetched by a worker thread into a ring of depth row arrays of
+ * blockSize rows, while fetchone()/fetchmany()/fetchall() turn the
+ * arrays already filled into Python rows. Every array has its own bind
+ * buffers; the worker binds the columns to the next free array before
+ * each SQLFetchScroll().
+ *
+ * Each slot has two locks used as semaphores: ready, released by the
+ * worker when the slot is filled, and free, released by the consumer
+ * when it is done with the rows of the slot. The worker never calls
+ * Python and runs without the GIL. The statement handle belongs to the
+ * worker until _DB2CursorObj_prefetch_stop().
+ */
+
+typedef struct {
+	DB2BindStruct		*cols;
+	SQLUSMALLINT		*rowStatus;
+	SQLUINTEGER		nFetched;
+	SQLRETURN		rc;
+	double			fetchTime;	/* of SQLFetchScroll() */
+	int			last;	/* the worker is done after this one */
+	PyThread_type_lock	ready;
+	PyThread_type_lock	free;
+} DB2PrefetchSlot;
+
+struct _DB2Prefetch {
+	SQLHANDLE	hstmt;
+	int		numCols;
+	int		depth;
+	int		blockSize;
+	DB2PrefetchSlot	*slots;
+	int		w;		/* slot the worker fills next */
+	int		c;		/* slot the consumer reads */
+	SQLUINTEGER	pos;		/* next row of slot c */
+	int		holding;	/* consumer has slot c */
+	int		finished;	/* consumer got the last slot */
+	volatile int	stop;
+};
+
+static double
+_db2_now(void)
+{
+#ifdef MS_WIN32
+	return GetTickCount() / 1000.0;
+#else
+	struct timeval	tv;
+
+	gettimeofday(&tv, NULL);
+	return tv.tv_sec + tv.tv_usec / 1000000.0;
+#endif
+}
+
+static void
+_db2_prefetch_worker(void *arg)
+{
+	DB2Prefetch	*p = (DB2Prefetch *)arg;
+	DB2PrefetchSlot	*slot;
+	DB2BindStruct	*bs;
+	SQLRETURN	rc;
+	SQLUINTEGER	i;
+	int		c, last;
+	double		t;
+
+	for (;;) {
+		slot = &p->slots[p->w];
+
+		PyThread_acquire_lock(slot->free, WAIT_LOCK);
+
+		slot->nFetched = 0;
+		slot->fetchTime = 0.0;
+		if (p->stop) {
+			slot->rc = SQL_NO_DATA_FOUND;
+			slot->last = 1;
+			PyThread_release_lock(slot->ready);
+			return;
+		}
+
+		rc = SQL_SUCCESS;
+		for (c=0; c < p->numCols && checkSuccess(rc); c++) {
+			bs = &slot->cols[c];
+			rc = SQLBindCol(p->hstmt, (SQLUSMALLINT)(c + 1),
+				bs->type, bs->buf, bs->bufLen, bs->outLen);
+		}
+		if (checkSuccess(rc)) {
+			rc = SQLSetStmtAttr(p->hstmt,
+				SQL_ATTR_ROWS_FETCHED_PTR,
+				(SQLPOINTER)&slot->nFetched, 0);
+		}
+		if (checkSuccess(rc)) {
+			rc = SQLSetStmtAttr(p->hstmt,
+				SQL_ATTR_ROW_STATUS_PTR,
+				(SQLPOINTER)slot->rowStatus, 0);
+		}
+		if (checkSuccess(rc)) {
+			t = _db2_now();
+			rc = SQLFetchScroll(p->hstmt, SQL_FETCH_NEXT, 0);
+			slot->fetchTime = _db2_now() - t;
+		}
+		if (checkSuccess(rc)) {
+			for (i=0; i < slot->nFetched; i++) {
+				if (slot->rowStatus[i] == SQL_ROW_ERROR) {
+					rc = SQL_ERROR;
+					break;
+				}
+			}
+		}
+
+		last = !checkSuccess(rc);
+		slot->rc = rc;
+		slot->last = last;
+		if (last) {
+			slot->nFetched = 0;
+		} else {
+			p->w = (p->w + 1) % p->depth;
+		}
+
+		/* p may be freed as soon as the last slot is ready */
+		PyThread_release_lock(slot->ready);
+
+		if (last) {
+			return;
+		}
+	}
+}
+
+static void
+_DB2Prefetch_free(DB2Prefetch *p)
+{
+	DB2PrefetchSlot	*slot;
+	int		i, c;
+
+	for (i=0; i < p->depth; i++) {
+		slot = &p->slots[i];
+		if (slot->cols) {
+			for (c=0; c < p->numCols; c++) {
+				MY_FREE(slot->cols[c].buf);
+				MY_FREE(slot->cols[c].outLen);
+			}
+			MY_FREE(slot->cols);
+		}
+		MY_FREE(slot->rowStatus);
+		if (slot->ready) PyThread_free_lock(slot->ready);
+		if (slot->free) PyThread_free_lock(slot->free);
+	}
+	MY_FREE(p->slots);
+	MY_FREE(p);
+}
+
+static int
+_DB2CursorObj_prefetch_start(DB2CursorObj *self)
+{
+	/*
+	 * Start the worker on the current result set.
+	 * Returns 0 with an exception set on failure.
+	 */
+	DB2Prefetch	*p;
+	DB2PrefetchSlot	*slot;
+	DB2BindStruct	*bs;
+	int		i, c, blockSize = self->prefetchBlock;
+
+	/* column types and sizes, row array size and bind type */
+	if (!_DB2CursorObj_bind_fetch(self, blockSize)) {
+		_DB2CursorObj_Cursor_Error(self, NULL);
+		return 0;
+	}
+
+	p = (DB2Prefetch *) MY_MALLOC(sizeof(DB2Prefetch));
+	memset(p, 0, sizeof(DB2Prefetch));
+	p->hstmt = self->hstmt;
+	p->numCols = self->bindColCount;
+	p->depth = self->prefetchDepth;
+	p->blockSize = blockSize;
+	p->slots = (DB2PrefetchSlot *)
+		MY_MALLOC(sizeof(DB2PrefetchSlot) * p->depth);
+	memset(p->slots, 0, sizeof(DB2PrefetchSlot) * p->depth);
+
+	for (i=0; i < p->depth; i++) {
+		slot = &p->slots[i];
+		slot->cols = (DB2BindStruct *)
+			MY_MALLOC(sizeof(DB2BindStruct) * p->numCols);
+		for (c=0; c < p->numCols; c++) {
+			bs = &slot->cols[c];
+			*bs = *self->bindColList[c];
+			bs->buf = (SQLPOINTER)MY_MALLOC(bs->bufLen * blockSize);
+			bs->outLen = (SQLINTEGER *)
+				MY_MALLOC(sizeof(SQLINTEGER) * blockSize);
+		}
+		slot->rowStatus = (SQLUSMALLINT *)
+			MY_MALLOC(sizeof(SQLUSMALLINT) * blockSize);
+		slot->ready = PyThread_allocate_lock();
+		slot->free = PyThread_allocate_lock();
+		if (!slot->ready || !slot->free) {
+			_DB2Prefetch_free(p);
+			PyErr_SetString(DB2_InterfaceError,
+				"cannot allocate prefetch locks");
+			return 0;
+		}
+		PyThread_acquire_lock(slot->ready, WAIT_LOCK);
+	}
+
+	/* the bindings of the cursor are replaced by the worker's */
+	self->bFetchRefresh = 1;
+	self->lastArraySize = -1;
+
+	if (PyThread_start_new_thread(_db2_prefetch_worker, p) == -1) {
+		_DB2Prefetch_free(p);
+		PyErr_SetString(DB2_InterfaceError,
+			"cannot start prefetch thread");
+		return 0;
+	}
+
+	self->prefetch = p;
+
+	/* stopped by the connection before it rolls back or disconnects */
+	self->pfPrev = NULL;
+	self->pfNext = self->conn->prefetchCursors;
+	if (self->pfNext) {
+		self->pfNext->pfPrev = self;
+	}
+	self->conn->prefetchCursors = self;
+	return 1;
+}
+
+static DB2PrefetchSlot *
+_DB2CursorObj_prefetch_slot(DB2CursorObj *self)
+{
+	/*
+	 * The slot the consumer reads, waiting for the worker to fill
+	 * it if needed. NULL at the end of the result set, with an
+	 * exception set if the worker failed.
+	 */
+	DB2Prefetch	*p = self->prefetch;
+	DB2PrefetchSlot	*slot = &p->slots[p->c];
+	double		t;
+
+	if (p->holding) {
+		return slot;
+	}
+	if (p->finished) {
+		return NULL;
+	}
+
+	if (!PyThread_acquire_lock(slot->ready, NOWAIT_LOCK)) {
+		self->pfWaits++;
+		t = _db2_now();
+
+		Py_BEGIN_ALLOW_THREADS ;
+
+		PyThread_acquire_lock(slot->ready, WAIT_LOCK);
+
+		Py_END_ALLOW_THREADS ;
+
+		self->pfWaitTime += _db2_now() - t;
+	}
+
+	if (slot->last) {
+		/* the worker is gone */
+		STATS_ADD(self, fetches, 1);
+		STATS_ADD(self, fetchTime, slot->fetchTime);
+		p->finished = 1;
+		if (slot->rc != SQL_NO_DATA_FOUND) {
+			_DB2CursorObj_Cursor_Error(self, NULL);
+		}
+		_DB2CursorObj_slow_check(self);
+		return NULL;
+	}
+
+	self->pfBlocks++;
+	self->pfRows += slot->nFetched;
+	STATS_ADD(self, fetches, 1);
+	STATS_ADD(self, rows, slot->nFetched);
+	STATS_ADD(self, fetchTime, slot->fetchTime);
+	p->holding = 1;
+	p->pos = 0;
+	return slot;
+}
+
+static void
+_DB2CursorObj_prefetch_release(DB2CursorObj *self)
+{
+	/* give the slot the consumer holds back to the worker */
+	DB2Prefetch	*p = self->prefetch;
+
+	if (p->holding) {
+		p->holding = 0;
+		PyThread_release_lock(p->slots[p->c].free);
+		p->c = (p->c + 1) % p->depth;
+	}
+}
+
+static PyObject *
+_DB2CursorObj_prefetch_rows(DB2CursorObj *self, int wanted)
+{
+	/*
+	 * The next wanted rows (all of them if wanted is -1) from the
+	 * prefetched row arrays, as a list of lists.
+	 */
+	DB2Prefetch	*p = self->prefetch;
+	DB2PrefetchSlot	*slot;
+	PyObject	*rows, *row, *val;
+	int		count = 0, first, c;
+	double		t;
+
+	rows = PyList_New(0);
+
+	while (wanted < 0 || count < wanted) {
+		slot = _DB2CursorObj_prefetch_slot(self);
+		if (!slot) {
+			break;
+		}
+
+		first = PyList_GET_SIZE(rows);
+		t = _db2_now();
+		for ( ; p->pos < slot->nFetched &&
+				(wanted < 0 || count < wanted); p->pos++) {
+			if (slot->rowStatus[p->pos] == SQL_ROW_NOROW) {
+				continue;
+			}
+			row = PyList_New(p->numCols);
+			for (c=0; c < p->numCols; c++) {
+				val = _SQL_CType_2_PyType(&slot->cols[c], p->pos);
+				PyList_SET_ITEM(row, c, val);
+			}
+			PyList_Append(rows, row);
+			Py_DECREF(row);
+			count++;
+		}
+
+		if (self->lobAutoRead &&
+				!_DB2CursorObj_read_block_LOBs(self, rows, first)) {
+			Py_DECREF(rows);
+			return NULL;
+		}
+		STATS_ADD(self, convertTime, _db2_now() - t);
+
+		if (p->pos >= slot->nFetched) {
+			_DB2CursorObj_prefetch_release(self);
+		}
+	}
+
+	if (PyErr_Occurred()) {
+		Py_DECREF(rows);
+		return NULL;
+	}
+
+	return rows;
+}
+
+static void
+_DB2CursorObj_prefetch_stop(DB2CursorObj *self)
+{
+	/*
+	 * Stop the worker, dropping the rows not fetched yet, and give
+	 * the statement handle back to the cursor.
+	 */
+	DB2Prefetch	*p = self->prefetch;
+	DB2PrefetchSlot	*slot;
+
+	if (!p) {
+		return;
+	}
+
+	p->stop = 1;
+	_DB2CursorObj_prefetch_release(self);
+
+	Py_BEGIN_ALLOW_THREADS ;
+
+	while (!p->finished) {
+		slot = &p->slots[p->c];
+		PyThread_acquire_lock(slot->ready, WAIT_LOCK);
+		if (slot->last) {
+			p->finished = 1;
+		} else {
+			PyThread_release_lock(slot->free);
+			p->c = (p->c + 1) % p->depth;
+		}
+	}
+
+	Py_END_ALLOW_THREADS ;
+
+	self->prefetch = NULL;
+	_DB2Prefetch_free(p);
+
+	if (self->pfPrev) {
+		self->pfPrev->pfNext = self->pfNext;
+	} else {
+		self->conn->prefetchCursors = self->pfNext;
+	}
+	if (self->pfNext) {
+		self->pfNext->pfPrev = self->pfPrev;
+	}
+	self->pfPrev = self->pfNext = NULL;
+
+	if (self->conn->connected) {
+		SQLFreeStmt(self->hstmt, SQL_UNBIND);
+		SQLSetStmtAttr(self->hstmt, SQL_ATTR_ROWS_FETCHED_PTR, NULL, 0);
+		SQLSetStmtAttr(self->hstmt, SQL_ATTR_ROW_STATUS_PTR, NULL, 0);
+	}
+	self->bFetchRefresh = 1;
+	self->lastArraySize = -1;
+}
+
+static int
+_DB2CursorObj_prefetching(DB2CursorObj *self)
+{
+	/*
+	 * 1 if the rows are to be taken from the prefetch worker
+	 * (started here on the first fetch of a result set), 0 if not,
+	 * -1 with an exception set.
+	 */
+	SQLSMALLINT	numCols;
+
+	if (self->prefetch) {
+		return 1;
+	}
+	if (self->prefetchDepth <= 0 || !self->hstmt) {
+		return 0;
+	}
+	if (!checkSuccess(SQLNumResultCols(self->hstmt, &numCols))
+			|| numCols == 0) {
+		/* the usual error */
+		return 0;
+	}
+
+	return _DB2CursorObj_prefetch_start(self) ? 1 : -1;
+}
+
+static PyObject *
+DB2CursorObj_prefetch(DB2CursorObj *self, PyObject *args)
+{
+	/*
+
+	._prefetch([depth, blockSize])
+
+	    Fetch the rows of the next result sets from a worker thread,
+	    depth row arrays of blockSize rows ahead (depth 0: no
+	    prefetch). Returns the previous (depth, blockSize). The
+	    counters of ._prefetchStats() are reset.
+
+	*/
+	int		depth = -1, blockSize = 0;
+	PyObject	*old;
+
+	if (!PyArg_ParseTuple(args, "|ii", &depth, &blockSize)) {
+		return NULL;
+	}
+
+	old = Py_BuildValue("(ii)", self->prefetchDepth, self->prefetchBlock);
+
+	if (depth >= 0) {
+		if (depth > 0 && blockSize < 1) {
+			Py_DECREF(old);
+			PyErr_SetString(PyExc_ValueError,
+				"blockSize SHOULD be >= 1");
+			return NULL;
+		}
+		self->prefetchDepth = depth;
+		self->prefetchBlock = blockSize;
+		self->pfBlocks = self->pfRows = self->pfWaits = 0;
+		self->pfWaitTime = 0.0;
+	}
+
+	return old;
+}
+
+static PyObject *
+DB2CursorObj_prefetch_stats(DB2CursorObj *self, PyObject *args)
+{
+	/*
+
+	._prefetchStats()
+
+	    {'blocks', 'rows', 'waits', 'wait_time'}: row arrays and
+	    rows taken from the worker, how many times and how long
+	    (seconds) fetching had to wait for the worker.
+
+	*/
+	if (!PyArg_ParseTuple(args, "")) {
+		return NULL;
+	}
+
+	return Py_BuildValue("{s:l,s:l,s:l,s:d}",
+			"blocks", self->pfBlocks,
+			"rows", self->pfRows,
+			"waits", self->pfWaits,
+			"wait_time", self->pfWaitTime);
+}
+
+static PyObject *
+DB2CursorObj_fetchmany(DB2CursorObj *self, PyObject *args)
+{
+	/*
+
+	.fetchmany([size=cursor.arraysize])
+          
+            Fetch the next set of rows of a query result, returning a
+            sequence of sequences (e.g. a list of tuples). An empty
+            sequence is returned when no more rows are available.
+
+	*/
+	int		wanted;
+
+	if (!PyArg_ParseTuple(args, "i", &wanted)) {
+		return NULL;
+	}
+
+	if (wanted <= 0) {
+		return PyList_New(0);
+	}
+
+	return _DB2CursorObj_fetch_rows(self, wanted);
+}
+
+static PyObject *
+DB2CursorObj_fetchall(DB2CursorObj *self, PyObject *args)
+{
+	/*
+
+	.fetchall() 
+
+            Fetch all (remaining) rows of a query result, returning
+            them as a sequence of sequences (e.g. a list of tuples).
+
+	*/
+	if (!PyArg_ParseTuple(args, "")) {
+		return NULL;
+	}
+
+	return _DB2CursorObj_fetch_rows(self, -1);
+}
+
+/*
+ * Column-wise fetch: the bound column buffers of every block are
+ * appended to one contiguous array per column, without creating a
+ * Python object per value for the fixed width types.
+ *
+ * typeCode of a column is a struct/array module style code:
+ *
+ *	'h' int16	SMALLINT
+ *	'i' int32	INTEGER
+ *	'q' int64	BIGINT
+ *	'f' float32	REAL
+ *	'd' float64	DOUBLE, FLOAT, DECIMAL, NUMERIC (fetchnumpy())
+ *	'n' decimal128	DECIMAL, NUMERIC (fetcharrow()): value * 10**scale
+ *			as a 16 byte two's complement integer
+ *	'D' int64	DATE, days since 1970-01-01
+ *	'T' int64	TIMESTAMP, microseconds since 1970-01-01 00:00:00
+ *	't' int64	TIME, seconds since midnight
+ *
+ * Columns of the other types (typeCode 0) are kept either as a list
+ * of Python objects, as fetchall() returns them, or as variable length
+ * binary data: the values one after another in data, value i from
+ * offsets[i] to offsets[i+1].
+ *
+ * The buffers are allocated with malloc(), so that they can be handed
+ * over to an Arrow consumer (see below) which may free them without
+ * holding the GIL.
+ */
+typedef struct {
+	char		typeCode;
+	int		itemSize;
+	int		precision;	/* typeCode 'n' */
+	int		scale;
+
+	char		*data;
+	char		*nulls;		/* one byte per row, 1 for NULL */
+	int		capacity;	/* rows */
+
+	/* typeCode 0 */
+	PyObject	*objects;
+	const char	*varFormat;	/* Arrow format of the binary data */
+	PY_LONG_LONG	*offsets;
+	PY_LONG_LONG	dataCap;
+
+} DB2ColData;
+
+typedef struct {
+	int		numCols;
+	int		numRows;
+	DB2ColData	*cols;
+} DB2ColBatch;
+
+static PY_LONG_LONG
+_db2_days_from_civil(int y, int m, int d)
+{
+	/* days since 1970-01-01 of a proleptic Gregorian date */
+	int era, yoe, doy, doe;
+
+	y -= m <= 2;
+	era = (y >= 0 ? y : y - 399) / 400;
+	yoe = y - era * 400;
+	doy = (153 * (m + (m > 2 ? -3 : 9)) + 2) / 5 + d - 1;
+	doe = yoe * 365 + yoe / 4 - yoe / 100 + doy;
+
+	return (PY_LONG_LONG)era * 146097 + doe - 719468;
+}
+
+static PY_LONG_LONG
+_db2_atoll(const char *s)
+{
+	PY_LONG_LONG	v = 0;
+	int		neg = 0;
+
+	while (*s == ' ') s++;
+	if (*s == '-' || *s == '+') {
+		neg = *s == '-';
+		s++;
+	}
+	while (*s >= '0' && *s <= '9') {
+		v = v * 10 + (*s++ - '0');
+	}
+
+	return neg ? -v : v;
+}
+
+static void
+_db2_decimal128(const char *s, int len, int scale, char *out)
+{
+	/*
+	 * The DECIMAL string s as value * 10**scale in a 16 byte two's
+	 * complement integer, in native byte order. Digits past scale
+	 * are dropped.
+	 */
+	unsigned int		w[4] = { 0, 0, 0, 0 };	/* least significant first */
+	unsigned PY_LONG_LONG	c;
+	int			i, k, neg = 0, frac = -1, digit;
+	static const int	one = 1;
+
+	for (i=0; i <= len; i++) {
+		if (i < len && s[i] >= '0' && s[i] <= '9') {
+			if (frac >= scale) {
+				continue;
+			}
+			digit = s[i] - '0';
+			if (frac >= 0) {
+				frac++;
+			}
+		} else if (i < len && (s[i] == '.' || s[i] == ',')) {
+			frac = 0;
+			continue;
+		} else if (i < len && s[i] == '-') {
+			neg = 1;
+			continue;
+		} else if (i < len) {
+			continue;
+		} else {
+			/* pad the fraction up to scale */
+			if (frac < 0) {
+				frac = 0;
+			}
+			if (frac >= scale) {
+				break;
+			}
+			digit = 0;
+			frac++;
+			i--;
+		}
+		c = digit;
+		for (k=0; k < 4; k++) {
+			c += (unsigned PY_LONG_LONG)w[k] * 10;
+			w[k] = (unsigned int)c;
+			c >>= 32;
+		}
+	}
+
+	if (neg) {
+		c = 1;
+		for (k=0; k < 4; k++) {
+			c += (unsigned int)~w[k];
+			w[k] = (unsigned int)c;
+			c >>= 32;
+		}
+	}
+
+	for (k=0; k < 4; k++) {
+		memcpy(out + 4 * (*(char *)&one ? k : 3 - k), &w[k], 4);
+	}
+}
+
+static void
+_DB2ColBatch_init(DB2ColBatch *batch, DB2CursorObj *self, int bVarData)
+{
+	/*
+	 * One DB2ColData per result column. bVarData (fetcharrow()):
+	 * keep the columns without a typeCode as binary data, not as
+	 * objects, and DECIMAL as decimal128 instead of float64.
+	 */
+	DB2ColData	*col;
+	int		i, numCols;
+	long		dataType;
+
+	numCols = PyTuple_Size(self->description);
+
+	batch->numCols = numCols;
+	batch->numRows = 0;
+	batch->cols = (DB2ColData *) MY_MALLOC(
+				sizeof(DB2ColData) * (numCols ? numCols : 1));
+	memset(batch->cols, 0, sizeof(DB2ColData) * (numCols ? numCols : 1));
+
+	for (i=0; i < numCols; i++) {
+		PyObject *item = PyTuple_GetItem(self->description, i);
+
+		col = &batch->cols[i];
+		dataType = PyInt_AsLong(PyTuple_GetItem(item, 1));
+
+		switch (dataType) {
+		case SQL_SMALLINT:
+			col->typeCode = 'h';
+			col->itemSize = sizeof(short);
+			break;
+		case SQL_INTEGER:
+			col->typeCode = 'i';
+			col->itemSize = sizeof(int);
+			break;
+		case SQL_REAL:
+			col->typeCode = 'f';
+			col->itemSize = sizeof(float);
+			break;
+		case SQL_DECIMAL:
+		case SQL_NUMERIC:
+			if (bVarData) {
+				col->typeCode = 'n';
+				col->itemSize = 16;
+				col->precision = (int)PyInt_AsLong(
+						PyTuple_GetItem(item, 4));
+				col->scale = (int)PyInt_AsLong(
+						PyTuple_GetItem(item, 5));
+				break;
+			}
+			/* fall through */
+		case SQL_DOUBLE:
+		case SQL_FLOAT:
+			col->typeCode = 'd';
+			col->itemSize = sizeof(double);
+			break;
+		case SQL_BIGINT:
+			col->typeCode = 'q';
+			col->itemSize = sizeof(PY_LONG_LONG);
+			break;
+		case SQL_TYPE_DATE:
+			col->typeCode = 'D';
+			col->itemSize = sizeof(PY_LONG_LONG);
+			break;
+		case SQL_TYPE_TIMESTAMP:
+			col->typeCode = 'T';
+			col->itemSize = sizeof(PY_LONG_LONG);
+			break;
+		case SQL_TYPE_TIME:
+			col->typeCode = 't';
+			col->itemSize = sizeof(PY_LONG_LONG);
+			break;
+		default:
+			col->typeCode = 0;
+			if (!bVarData) {
+				col->objects = PyList_New(0);
+				break;
+			}
+			switch (dataType) {
+			case SQL_BLOB_LOCATOR:
+			case SQL_DBCLOB_LOCATOR:
+			case SQL_GRAPHIC:
+			case SQL_VARGRAPHIC:
+			case SQL_LONGVARGRAPHIC:
+				col->varFormat = "Z";	/* large binary */
+				break;
+			default:
+				col->varFormat = "U";	/* large utf-8 string */
+				break;
+			}
+			col->offsets = (PY_LONG_LONG *) malloc(
+						sizeof(PY_LONG_LONG));
+			col->offsets[0] = 0;
+			break;
+		}
+	}
+}
+
+static void
+_DB2ColBatch_free(DB2ColBatch *batch)
+{
+	int		i;
+
+	for (i=0; i < batch->numCols; i++) {
+		free(batch->cols[i].data);
+		free(batch->cols[i].nulls);
+		free(batch->cols[i].offsets);
+		Py_XDECREF(batch->cols[i].objects);
+	}
+	MY_FREE(batch->cols);
+	batch->cols = NULL;
+	batch->numCols = 0;
+}
+
+static void
+_DB2ColData_store_fixed(DB2ColData *col, DB2BindStruct *bs, int idx, char *out)
+{
+	/* convert the value of row idx of bs into out */
+	SQLPOINTER	buf = (SQLPOINTER)((SQLCHAR *)bs->buf + (bs->bufLen * idx));
+	char		tmp[64], *end;
+	int		len;
+	DATE_STRUCT	*dateSt;
+	TIME_STRUCT	*timeSt;
+	TIMESTAMP_STRUCT *tsSt;
+
+	switch (col->typeCode) {
+	case 'h':
+		*(short *)out = *(SQLSMALLINT *)buf;
+		break;
+	case 'i':
+		*(int *)out = *(SQLINTEGER *)buf;
+		break;
+	case 'f':
+		*(float *)out = *(SQLREAL *)buf;
+		break;
+	case 'd':
+		if (bs->type == SQL_C_DOUBLE) {
+			*(double *)out = *(SQLDOUBLE *)buf;
+		} else {
+			/* DECIMAL and NUMERIC are bound as SQL_C_CHAR */
+			len = bs->outLen[idx];
+			if (len < 0 || len >= (int)sizeof(tmp)) {
+				len = sizeof(tmp) - 1;
+			}
+			strncpy(tmp, (char *)buf, len);
+			tmp[len] = '\0';
+			convertSeparator(tmp, len);
+			*(double *)out = PyOS_string_to_double(tmp, &end, NULL);
+			if (PyErr_Occurred()) {
+				PyErr_Clear();
+				*(double *)out = 0.0;
+			}
+		}
+		break;
+	case 'n':
+		/* bound as SQL_C_CHAR */
+		len = bs->outLen[idx];
+		if (len < 0 || len > bs->bufLen) {
+			len = strlen((char *)buf);
+		}
+		_db2_decimal128((char *)buf, len, col->scale, out);
+		break;
+	case 'q':
+		*(PY_LONG_LONG *)out = _db2_atoll((char *)buf);
+		break;
+	case 'D':
+		dateSt = (DATE_STRUCT *)buf;
+		*(PY_LONG_LONG *)out = _db2_days_from_civil(
+				dateSt->year, dateSt->month, dateSt->day);
+		break;
+	case 'T':
+		tsSt = (TIMESTAMP_STRUCT *)buf;
+		*(PY_LONG_LONG *)out =
+			(_db2_days_from_civil(tsSt->year, tsSt->month, tsSt->day)
+				* 86400 + tsSt->hour * 3600
+				+ tsSt->minute * 60 + tsSt->second) * 1000000
+			+ tsSt->fraction / 1000;
+		break;
+	case 't':
+		timeSt = (TIME_STRUCT *)buf;
+		*(PY_LONG_LONG *)out =
+			timeSt->hour * 3600 + timeSt->minute * 60 + timeSt->second;
+		break;
+	}
+}
+
+static int
+_DB2ColData_store_var(DB2ColData *col, DB2CursorObj *self,
+			DB2BindStruct *bs, int idx, int n)
+{
+	/*
+	 * Append the value of row idx of bs as value n of col.
+	 * Returns 0 with an exception set on failure.
+	 */
+	SQLPOINTER	buf = (SQLPOINTER)((SQLCHAR *)bs->buf + (bs->bufLen * idx));
+	PyObject	*val = NULL, *args;
+	char		*ptr = NULL;
+	PY_LONG_LONG	len = 0, need;
+
+	if (col->nulls[n]) {
+		/* empty */
+	} else if (bs->type == SQL_C_CHAR) {
+		ptr = (char *)buf;
+		len = strlen(ptr);
+	} else {
+		val = _SQL_CType_2_PyType(bs, idx);
+		if (val && PyTuple_Check(val) && PyTuple_GET_SIZE(val) > 2) {
+			/* inline LOB: ('blob'|'clob', None, data) */
+			args = PyTuple_GET_ITEM(val, 2);
+			Py_INCREF(args);
+			Py_DECREF(val);
+			val = args;
+		} else if (val && PyTuple_Check(val)) {
+			/* LOB locator: ('blob'|'clob', locator) */
+			args = Py_BuildValue("(OO)",
+					PyTuple_GetItem(val, 1),
+					PyTuple_GetItem(val, 0));
+			Py_DECREF(val);
+			val = DB2CursorObj_read_LOB(self, args);
+			Py_DECREF(args);
+		}
+		if (val == NULL || !PyString_Check(val)) {
+			Py_XDECREF(val);
+			if (!PyErr_Occurred()) {
+				PyErr_SetString(DB2_InterfaceError,
+					"cannot export column value");
+			}
+			return 0;
+		}
+		ptr = PyString_AS_STRING(val);
+		len = PyString_GET_SIZE(val);
+	}
+
+	need = col->offsets[n] + len;
+	if (need > col->dataCap) {
+		PY_LONG_LONG cap = col->dataCap ? col->dataCap : 1024;
+
+		while (cap < need) cap *= 2;
+		col->data = (char *) realloc(col->data, (size_t)cap);
+		if (!col->data) {
+			Py_XDECREF(val);
+			PyErr_NoMemory();
+			return 0;
+		}
+		col->dataCap = cap;
+	}
+	if (len) {
+		memcpy(col->data + col->offsets[n], ptr, (size_t)len);
+	}
+	col->offsets[n+1] = need;
+
+	Py_XDECREF(val);
+
+	return 1;
+}
+
+static int
+_DB2CursorObj_store_columns(DB2CursorObj *self, void *arg)
+{
+	/* DB2FetchSink: append the rows of the block to the DB2ColBatch arg */
+	DB2ColBatch	*batch = (DB2ColBatch *)arg;
+	DB2ColData	*col;
+	DB2BindStruct	*bs;
+	PyObject	*val;
+	SQLUINTEGER	i;
+	int		c, n, need, count = 0;
+
+	for (i=0; i < self->nFetchedRows; i++) {
+		if (self->rowStatus[i] != SQL_ROW_NOROW) count++;
+	}
+
+	need = batch->numRows + count;
+
+	for (c=0; c < batch->numCols; c++) {
+		col = &batch->cols[c];
+		bs = self->bindColList[c];
+
+		if (need > col->capacity) {
+			int cap = col->capacity ? col->capacity : FETCH_BLOCK_MIN;
+
+			while (cap < need) cap *= 2;
+			col->nulls = (char *) realloc(col->nulls, cap);
+			if (col->typeCode) {
+				col->data = (char *) realloc(col->data,
+							cap * col->itemSize);
+			} else if (col->offsets) {
+				col->offsets = (PY_LONG_LONG *) realloc(col->offsets,
+						(cap + 1) * sizeof(PY_LONG_LONG));
+			}
+			if (!col->nulls || (col->typeCode && !col->data) ||
+					(col->varFormat && !col->offsets)) {
+				PyErr_NoMemory();
+				return -1;
+			}
+			col->capacity = cap;
+		}
+
+		n = batch->numRows;
+		for (i=0; i < self->nFetchedRows; i++) {
+			if (self->rowStatus[i] == SQL_ROW_NOROW) {
+				continue;
+			}
+			col->nulls[n] = bs->outLen[i] == SQL_NULL_DATA;
+			if (col->typeCode) {
+				char *out = col->data + n * col->itemSize;
+
+				if (col->nulls[n]) {
+					memset(out, 0, col->itemSize);
+				} else {
+					_DB2ColData_store_fixed(col, bs, i, out);
+				}
+			} else if (col->varFormat) {
+				if (!_DB2ColData_store_var(col, self, bs, i, n)) {
+					return -1;
+				}
+			} else {
+				val = _SQL_CType_2_PyType(bs, i);
+				PyList_Append(col->objects, val);
+				Py_DECREF(val);
+			}
+			n++;
+		}
+	}
+
+	batch->numRows = need;
+
+	return count;
+}
+
+static int
+_DB2CursorObj_fetch_batch(DB2CursorObj *self, int wanted,
+			DB2ColBatch *batch, int bVarData)
+{
+	/*
+	 * Fetch wanted rows (all remaining rows if -1) into batch.
+	 * Returns 0 with an exception set on failure.
+	 */
+	if (self->description == NULL || self->description == Py_None) {
+		PyErr_SetString(DB2_ProgrammingError, "no result set to fetch");
+		return 0;
+	}
+	if (self->prefetch) {
+		PyErr_SetString(DB2_NotSupportedError,
+			"column-wise fetch of a prefetched result set");
+		return 0;
+	}
+
+	_DB2ColBatch_init(batch, self, bVarData);
+
+	if (wanted != 0 && _DB2CursorObj_fetch_loop(self, wanted,
+			_DB2CursorObj_store_columns, batch) < 0) {
+		_DB2ColBatch_free(batch);
+		return 0;
+	}
+
+	return 1;
+}
+
+static PyObject *
+DB2CursorObj_fetch_columns(DB2CursorObj *self, PyObject *args)
+{
+	/*
+
+	._fetchcolumns(size)
+
+	    Fetch the next size rows (all remaining rows if size is -1)
+	    column by column. Returns (rowcount, columns) where every
+	    column is (typeCode, data, nulls):
+
+	    typeCode is one of the codes above, or None
+	    data is a string of rowcount native items of typeCode, or
+	        a list of rowcount Python values if typeCode is None
+	    nulls is a string of rowcount bytes, "\1" for NULL
+
+	*/
+	DB2ColBatch	batch;
+	DB2ColData	*col;
+	PyObject	*cols, *item, *ret;
+	int		wanted, c;
+
+	if (!PyArg_ParseTuple(args, "i", &wanted)) {
+		return NULL;
+	}
+
+	if (!_DB2CursorObj_fetch_batch(self, wanted, &batch, 0)) {
+		return NULL;
+	}
+
+	cols = PyList_New(batch.numCols);
+
+	for (c=0; c < batch.numCols; c++) {
+		col = &batch.cols[c];
+
+		item = PyTuple_New(3);
+		if (col->typeCode) {
+			PyTuple_SetItem(item, 0,
+				PyString_FromStringAndSize(&col->typeCode, 1));
+			PyTuple_SetItem(item, 1,
+				PyString_FromStringAndSize(col->data,
+					batch.numRows * col->itemSize));
+		} else {
+			Py_INCREF(Py_None);
+			PyTuple_SetItem(item, 0, Py_None);
+			Py_INCREF(col->objects);
+			PyTuple_SetItem(item, 1, col->objects);
 		}
+		PyTuple_SetItem(item, 2,
+			PyString_FromStringAndSize(col->nulls, batch.numRows));
+
+		PyList_SetItem(cols, c, item);
 	}
 
-	/* bind parameters */
-	if (self->paramCount) {	/* There are ? markers in SQL */
-		int r;
+	ret = Py_BuildValue("(iN)", batch.numRows, cols);
 
-		if (self->paramCount != PyTuple_Size(params)) {
-			PyObject *t;
+	_DB2ColBatch_free(&batch);
 
-			t = PyTuple_New(3);
-			PyTuple_SetItem(t, 0, PyString_FromString(""));
-			PyTuple_SetItem(t, 1, PyInt_FromLong(-1));
-			PyTuple_SetItem(t, 2,
-				PyString_FromString("Wrong number of parameters")
-				);
+	return ret;
+}
 
-			PyErr_SetObject(DB2_ProgrammingError, t);
-			return NULL;
-		}
+/*
+ * Arrow C Data Interface
+ *
+ * A batch of rows is exported as a struct array with one child array
+ * per result column, as a pair of "arrow_schema" and "arrow_array"
+ * PyCapsules (the Arrow PyCapsule interface). The column buffers are
+ * handed over to the ArrowArray, whose release callback frees them.
+ *
+ * https://arrow.apache.org/docs/format/CDataInterface.html
+ */
+#ifndef ARROW_C_DATA_INTERFACE
+#define ARROW_C_DATA_INTERFACE
+
+#define ARROW_FLAG_DICTIONARY_ORDERED	1
+#define ARROW_FLAG_NULLABLE		2
+#define ARROW_FLAG_MAP_KEYS_SORTED	4
+
+struct ArrowSchema {
+	const char		*format;
+	const char		*name;
+	const char		*metadata;
+	PY_LONG_LONG		flags;
+	PY_LONG_LONG		n_children;
+	struct ArrowSchema	**children;
+	struct ArrowSchema	*dictionary;
+	void			(*release)(struct ArrowSchema *);
+	void			*private_data;
+};
 
-		if (!_DB2CursorObj_get_param_info(self, self->paramCount)) {
-			return _DB2CursorObj_Cursor_Error(self, NULL);
+struct ArrowArray {
+	PY_LONG_LONG		length;
+	PY_LONG_LONG		null_count;
+	PY_LONG_LONG		offset;
+	PY_LONG_LONG		n_buffers;
+	PY_LONG_LONG		n_children;
+	const void		**buffers;
+	struct ArrowArray	**children;
+	struct ArrowArray	*dictionary;
+	void			(*release)(struct ArrowArray *);
+	void			*private_data;
+};
+
+#endif /* ARROW_C_DATA_INTERFACE */
+
+static void
+_db2_arrow_schema_release(struct ArrowSchema *schema)
+{
+	PY_LONG_LONG	i;
+
+	for (i=0; i < schema->n_children; i++) {
+		struct ArrowSchema *child = schema->children[i];
+
+		if (child->release) {
+			child->release(child);
 		}
+		free(child);
+	}
+	free(schema->children);
+	free((void *)schema->name);
+	free(schema->private_data);	/* allocated format, if any */
+	schema->release = NULL;
+}
 
-		r = _DB2CursorObj_prepare_param_vars(self,
-					self->paramCount, params);
+static void
+_db2_arrow_array_release(struct ArrowArray *array)
+{
+	PY_LONG_LONG	i;
 
-		if (r == 0) {
-			return NULL;
-		} else if (r == -1) {
-			return _DB2CursorObj_Cursor_Error(self, NULL);
+	for (i=0; i < array->n_children; i++) {
+		struct ArrowArray *child = array->children[i];
+
+		if (child->release) {
+			child->release(child);
 		}
+		free(child);
+	}
+	free(array->children);
+	for (i=0; i < array->n_buffers; i++) {
+		free((void *)array->buffers[i]);
 	}
+	free(array->buffers);
+	array->release = NULL;
+}
 
-	Py_BEGIN_ALLOW_THREADS ;
+static void
+_db2_arrow_schema_capsule_free(PyObject *capsule)
+{
+	struct ArrowSchema *schema;
 
-	rc = SQLExecute(self->hstmt);
+	schema = (struct ArrowSchema *)
+			PyCapsule_GetPointer(capsule, "arrow_schema");
+	if (schema->release) {
+		schema->release(schema);
+	}
+	free(schema);
+}
 
-	Py_END_ALLOW_THREADS ;
+static void
+_db2_arrow_array_capsule_free(PyObject *capsule)
+{
+	struct ArrowArray *array;
 
-	show_rc_name("cs.execute() - SQLExecute", rc);
+	array = (struct ArrowArray *)
+			PyCapsule_GetPointer(capsule, "arrow_array");
+	if (array->release) {
+		array->release(array);
+	}
+	free(array);
+}
 
-	if ( rc == SQL_NEED_DATA ) {
-		FILE **fpPtr;
+static const char *
+_DB2ColData_arrow_format(DB2ColData *col, int numRows)
+{
+	/*
+	 * Arrow format of col. DATE and TIME are scaled to date64
+	 * (milliseconds) and time64 (microseconds) in place. The
+	 * decimal128 format is allocated, to be freed by the caller.
+	 */
+	char		*fmt;
+	PY_LONG_LONG	*v = (PY_LONG_LONG *)col->data;
+	int		i;
 
-		while (1) {
-			rc = SQLParamData(self->hstmt, (SQLPOINTER *)&fpPtr);
-			if (rc == SQL_SUCCESS) {
-				break;
-			} else if (rc == SQL_NEED_DATA) {
-				_DB2CursorObj_send_lob_file(self, *fpPtr);
-			} else if (rc == SQL_SUCCESS_WITH_INFO) {
-				_DB2CursorObj_fill_Cursor_messages(self);
-			} else {
-				return _DB2CursorObj_Cursor_Error(self, NULL);
+	switch (col->typeCode) {
+	case 'h':	return "s";
+	case 'i':	return "i";
+	case 'q':	return "l";
+	case 'f':	return "f";
+	case 'd':	return "g";
+	case 'n':
+		fmt = (char *) malloc(32);
+		sprintf(fmt, "d:%d,%d", col->precision, col->scale);
+		return fmt;
+	case 'T':	return "tsu:";
+	case 'D':
+		for (i=0; i < numRows; i++) v[i] *= 86400000;
+		return "tdm";
+	case 't':
+		for (i=0; i < numRows; i++) v[i] *= 1000000;
+		return "ttu";
+	}
+
+	return col->varFormat;
+}
+
+static void
+_DB2ColData_arrow_export(DB2ColData *col, int numRows,
+			struct ArrowArray *array)
+{
+	/* move the buffers of col into array */
+	const void	**buffers;
+	unsigned char	*validity = NULL;
+	PY_LONG_LONG	nullCount = 0;
+	int		i;
+
+	for (i=0; i < numRows; i++) {
+		nullCount += col->nulls[i];
+	}
+
+	if (nullCount) {
+		validity = (unsigned char *) calloc((numRows + 7) / 8, 1);
+		for (i=0; i < numRows; i++) {
+			if (!col->nulls[i]) {
+				validity[i / 8] |= 1 << (i % 8);
 			}
 		}
 	}
-	/*
-	 * SQL_NO_DATA_FOUND is returned when DB2 issues a SQL0000W warning
-	 */
-	if (rc == SQL_SUCCESS) {
-		;
-	} else if (rc == SQL_SUCCESS_WITH_INFO || rc == SQL_NO_DATA_FOUND) {
-		_DB2CursorObj_fill_Cursor_messages(self);
+
+	/* no NULL data buffer pointers, even for empty arrays */
+	if (!col->data) {
+		col->data = (char *) malloc(1);
+	}
+
+	buffers = (const void **) malloc(sizeof(void *) * 3);
+	buffers[0] = validity;
+	if (col->typeCode) {
+		buffers[1] = col->data;
+		array->n_buffers = 2;
 	} else {
-		return _DB2CursorObj_Cursor_Error(self, NULL);
+		buffers[1] = col->offsets;
+		buffers[2] = col->data;
+		array->n_buffers = 3;
 	}
+	col->data = NULL;
+	col->offsets = NULL;
+
+	array->length = numRows;
+	array->null_count = nullCount;
+	array->offset = 0;
+	array->n_children = 0;
+	array->buffers = buffers;
+	array->children = NULL;
+	array->dictionary = NULL;
+	array->release = _db2_arrow_array_release;
+	array->private_data = NULL;
+}
 
+static PyObject *
+DB2CursorObj_fetch_arrow(DB2CursorObj *self, PyObject *args)
+{
 	/*
 
-	.rowcount 
-          
-            This read-only attribute specifies the number of rows that
-            the last executeXXX() produced (for DQL statements like
-            'select') or affected (for DML statements like 'update' or
-            'insert').
-            
-            The attribute is -1 in case no executeXXX() has been
-            performed on the cursor or the rowcount of the last
-            operation is not determinable by the interface. [7]
+	._fetcharrow(size)
 
-            Note: Future versions of the DB API specification could
-            redefine the latter case to have the object return None
-            instead of -1.
+	    Fetch the next size rows (all remaining rows if size is -1)
+	    as an Arrow struct array with one child per column. Returns
+	    (rowcount, schema capsule, array capsule).
 
 	*/
-	rc = SQLRowCount(self->hstmt, &rowCount);
-	self->rowCount = rowCount;
+	DB2ColBatch	batch;
+	DB2ColData	*col;
+	struct ArrowSchema *schema, *child;
+	struct ArrowArray *array;
+	PyObject	*item, *name;
+	int		wanted, c, n;
+
+	if (!PyArg_ParseTuple(args, "i", &wanted)) {
+		return NULL;
+	}
 
-	self->bFetchRefresh = 1;
+	if (!_DB2CursorObj_fetch_batch(self, wanted, &batch, 1)) {
+		return NULL;
+	}
 
-	if (SQLNumResultCols(self->hstmt, &numCols) == SQL_SUCCESS) {
-		_DB2CursorObj_set_col_desc(self, numCols);
-	} else {
-		return _DB2CursorObj_Cursor_Error(self, NULL);
+	n = batch.numCols;
+
+	schema = (struct ArrowSchema *) calloc(1, sizeof(struct ArrowSchema));
+	schema->format = "+s";
+	schema->n_children = n;
+	schema->children = (struct ArrowSchema **)
+				calloc(n ? n : 1, sizeof(struct ArrowSchema *));
+	schema->release = _db2_arrow_schema_release;
+
+	array = (struct ArrowArray *) calloc(1, sizeof(struct ArrowArray));
+	array->length = batch.numRows;
+	array->n_buffers = 1;
+	array->buffers = (const void **) calloc(1, sizeof(void *));
+	array->n_children = n;
+	array->children = (struct ArrowArray **)
+				calloc(n ? n : 1, sizeof(struct ArrowArray *));
+	array->release = _db2_arrow_array_release;
+
+	for (c=0; c < n; c++) {
+		col = &batch.cols[c];
+		item = PyTuple_GetItem(self->description, c);
+		name = PyTuple_GetItem(item, 0);
+
+		child = (struct ArrowSchema *) calloc(1, sizeof(struct ArrowSchema));
+		child->format = _DB2ColData_arrow_format(col, batch.numRows);
+		if (col->typeCode == 'n') {
+			/* freed with the schema */
+			child->private_data = (void *)child->format;
+		}
+		child->name = strcpy(
+				(char *) malloc(PyString_Size(name) + 1),
+				PyString_AsString(name));
+		if (PyInt_AsLong(PyTuple_GetItem(item, 6))) {
+			child->flags = ARROW_FLAG_NULLABLE;
+		}
+		child->release = _db2_arrow_schema_release;
+		schema->children[c] = child;
+
+		array->children[c] = (struct ArrowArray *)
+					calloc(1, sizeof(struct ArrowArray));
+		_DB2ColData_arrow_export(col, batch.numRows, array->children[c]);
 	}
 
-	if (rowCount == -1) {
-		/* SELECT */
-		Py_INCREF(Py_None);
-		return Py_None;
+	item = Py_BuildValue("(iNN)", batch.numRows,
+		PyCapsule_New(schema, "arrow_schema",
+				_db2_arrow_schema_capsule_free),
+		PyCapsule_New(array, "arrow_array",
+				_db2_arrow_array_capsule_free));
+
+	_DB2ColBatch_free(&batch);
+
+	return item;
+}
+
+/*
+ * copy_to(): the rows of the result set are written as delimited text
+ * (CSV, TSV, ...) formatted straight from the bound column buffers into
+ * an output buffer, which is written out COPY_BUF_SIZE bytes at a time,
+ * with the GIL released when the file is a real file. Quoting follows
+ * the csv module (QUOTE_MINIMAL, QUOTE_ALL, QUOTE_NONNUMERIC and
+ * QUOTE_NONE have the same values); NULLs are written as the null
+ * string, never quoted.
+ */
+#define	COPY_BUF_SIZE		(1024 * 1024)
+
+#define	COPY_QUOTE_MINIMAL	0
+#define	COPY_QUOTE_ALL		1
+#define	COPY_QUOTE_NONNUMERIC	2
+#define	COPY_QUOTE_NONE		3
+
+typedef struct {
+	DB2CursorObj	*cursor;
+	PyObject	*file;
+	char		*buf;
+	Py_ssize_t	len;
+	Py_ssize_t	cap;
+	char		delimiter;
+	char		quotechar;
+	int		quoting;
+	char		*null;
+	int		nullLen;
+	char		*lineterminator;
+	int		lineterminatorLen;
+	long		rows;
+	PY_LONG_LONG	bytes;
+} DB2Copy;
+
+static int
+_DB2Copy_flush(DB2Copy *cp)
+{
+	/* Write the output buffer out. Returns 0 with an exception set. */
+	PyObject	*r;
+	FILE		*fp;
+	size_t		n = 0;
+
+	if (cp->len == 0) {
+		return 1;
+	}
+
+	if (PyFile_Check(cp->file)) {
+		fp = PyFile_AsFile(cp->file);
+		if (!fp) {
+			PyErr_SetString(PyExc_ValueError,
+				"I/O operation on closed file");
+			return 0;
+		}
+		PyFile_IncUseCount((PyFileObject *)cp->file);
+
+		Py_BEGIN_ALLOW_THREADS ;
+
+		n = fwrite(cp->buf, 1, cp->len, fp);
+
+		Py_END_ALLOW_THREADS ;
+
+		PyFile_DecUseCount((PyFileObject *)cp->file);
+
+		if (n != (size_t)cp->len) {
+			PyErr_SetFromErrno(PyExc_IOError);
+			clearerr(fp);
+			return 0;
+		}
 	} else {
-		/* UPDATE, DELETE, INSERT, ... */
-		return Py_BuildValue("i", rowCount);
+		r = PyObject_CallMethod(cp->file, "write", "s#",
+					cp->buf, (int)cp->len);
+		if (!r) {
+			return 0;
+		}
+		Py_DECREF(r);
 	}
-}
 
-#define	MAX_PROC_PARAMS_NUM	25
-#define MAX_NAME_LEN		128
-#define MAX_PROC_BUF_LEN	1024
+	cp->bytes += cp->len;
+	cp->len = 0;
 
-static PyObject *
-DB2CursorObj_callproc(DB2CursorObj *self, PyObject *args)
+	return 1;
+}
+
+static char *
+_DB2Copy_reserve(DB2Copy *cp, Py_ssize_t n)
 {
 	/*
+	 * Room for n more bytes in the output buffer, flushing it (or
+	 * growing it for a value bigger than the buffer) if needed.
+	 */
+	if (cp->len + n > cp->cap) {
+		if (!_DB2Copy_flush(cp)) {
+			return NULL;
+		}
+		if (n > cp->cap) {
+			MY_FREE(cp->buf);
+			cp->cap = n;
+			cp->buf = (char *)MY_MALLOC(cp->cap);
+			if (!cp->buf) {
+				PyErr_NoMemory();
+				return NULL;
+			}
+		}
+	}
+
+	return cp->buf + cp->len;
+}
+
+static int
+_DB2Copy_put(DB2Copy *cp, const char *data, Py_ssize_t n)
+{
+	char *p;
+
+	if (!(p = _DB2Copy_reserve(cp, n))) {
+		return 0;
+	}
+	memcpy(p, data, n);
+	cp->len += n;
+
+	return 1;
+}
+
+static int
+_DB2Copy_put_field(DB2Copy *cp, const char *data, Py_ssize_t n, int text)
+{
+	/* A field, quoted as cp->quoting asks. text: not a number */
+	Py_ssize_t	i, extra = 0;
+	int		quote;
+	char		*p, ch;
+
+	switch (cp->quoting) {
+	case COPY_QUOTE_ALL:
+		quote = 1;
+		break;
+	case COPY_QUOTE_NONNUMERIC:
+		quote = text;
+		break;
+	case COPY_QUOTE_NONE:
+		quote = 0;
+		break;
+	default:
+		quote = 0;
+		for (i=0; i < n; i++) {
+			ch = data[i];
+			if (ch == cp->delimiter || ch == cp->quotechar ||
+					ch == '\n' || ch == '\r') {
+				quote = 1;
+				break;
+			}
+		}
+		break;
+	}
+
+	if (!quote) {
+		return _DB2Copy_put(cp, data, n);
+	}
+
+	for (i=0; i < n; i++) {
+		if (data[i] == cp->quotechar) {
+			extra++;
+		}
+	}
+
+	if (!(p = _DB2Copy_reserve(cp, n + extra + 2))) {
+		return 0;
+	}
+
+	*p++ = cp->quotechar;
+	for (i=0; i < n; i++) {
+		if (data[i] == cp->quotechar) {
+			*p++ = cp->quotechar;
+		}
+		*p++ = data[i];
+	}
+	*p++ = cp->quotechar;
+
+	cp->len += n + extra + 2;
+
+	return 1;
+}
+
+static int
+_DB2Copy_put_hex(DB2Copy *cp, const unsigned char *data, Py_ssize_t n)
+{
+	/* binary values as hex, like Binary.get_SQL_value() */
+	static const char hexDigits[] = "0123456789ABCDEF";
+	Py_ssize_t	i;
+	char		*p;
+
+	if (!(p = _DB2Copy_reserve(cp, n * 2))) {
+		return 0;
+	}
+
+	for (i=0; i < n; i++) {
+		*p++ = hexDigits[data[i] >> 4];
+		*p++ = hexDigits[data[i] & 0x0f];
+	}
+	cp->len += n * 2;
+
+	return 1;
+}
+
+static int
+_DB2Copy_put_LOB(DB2Copy *cp, SQLSMALLINT type, SQLINTEGER loc)
+{
+	/* the value of a LOB locator, read with the GIL released */
+	SQLHANDLE	hstmt;
+	SQLRETURN	rc;
+	SQLINTEGER	len = 0, outLen, dummyInd;
+	char		*data;
+	int		ok;
+
+	if (!_DB2CursorObj_LOB_stmt(cp->cursor, &hstmt)) {
+		return 0;
+	}
+
+	Py_BEGIN_ALLOW_THREADS ;
+
+	rc = SQLGetLength(hstmt, type, loc, &len, &dummyInd);
+
+	Py_END_ALLOW_THREADS ;
+
+	if (!checkSuccess(rc)) {
+		_DB2_Stmt_Error(hstmt);
+		return 0;
+	}
+
+	data = (char *)MY_MALLOC(len ? len : 1);
+
+	if (len) {
+		Py_BEGIN_ALLOW_THREADS ;
+
+		rc = SQLGetSubString(hstmt, type, loc, 1, len, SQL_C_BINARY,
+			data, len, &outLen, &dummyInd);
+
+		Py_END_ALLOW_THREADS ;
+
+		if (!checkSuccess(rc)) {
+			MY_FREE(data);
+			_DB2_Stmt_Error(hstmt);
+			return 0;
+		}
+	}
+
+	STATS_ADD(cp->cursor, lobReads, 1);
+	STATS_ADD(cp->cursor, lobBytes, len);
+
+	if (type == SQL_C_BLOB_LOCATOR) {
+		ok = _DB2Copy_put_hex(cp, (unsigned char *)data, len);
+	} else {
+		ok = _DB2Copy_put_field(cp, data, len, 1);
+	}
+	MY_FREE(data);
+
+	return ok;
+}
+
+static int
+_DB2Copy_put_value(DB2Copy *cp, DB2BindStruct *bs, int idx)
+{
+	/* the value of row idx of a bound column */
+	SQLPOINTER	buf = (SQLPOINTER)((SQLCHAR *)bs->buf + (bs->bufLen * idx));
+	SQLINTEGER	n = bs->outLen[idx];
+	char		tmp[64], *s;
+	int		len, ok;
+
+	if (n == SQL_NULL_DATA) {
+		return _DB2Copy_put(cp, cp->null, cp->nullLen);
+	}
+
+	switch (bs->type) {
+
+	case SQL_C_CHAR:
+		/* truncated values are what fitted in the buffer */
+		if (n < 0 || n > bs->bufLen - 1) {
+			n = strlen((char *)buf);
+		}
+		switch (bs->typeEx) {
+		case SQL_BIGINT:
+			return _DB2Copy_put_field(cp, (char *)buf, n, 0);
+		case SQL_DECIMAL:
+		case SQL_NUMERIC:
+			/* at most 31 digits, the sign and the separator */
+			if (n > (SQLINTEGER)sizeof(tmp)) {
+				n = sizeof(tmp);
+			}
+			memcpy(tmp, buf, n);
+			convertSeparator(tmp, n);
+			return _DB2Copy_put_field(cp, tmp, n, 0);
+		default:
+			return _DB2Copy_put_field(cp, (char *)buf, n, 1);
+		}
 
-	.callproc(procname[,parameters])
-          
-            (This method is optional since not all databases provide
-            stored procedures. [3])
-            
-            Call a stored database procedure with the given name. The
-            sequence of parameters must contain one entry for each
-            argument that the procedure expects. The result of the
-            call is returned as modified copy of the input
-            sequence. Input parameters are left untouched, output and
-            input/output parameters replaced with possibly new values.
-            
-            The procedure may also provide a result set as
-            output. This must then be made available through the
-            standard fetchXXX() methods.
+	case SQL_C_SHORT:
+		len = sprintf(tmp, "%d", (int)*(SQLSMALLINT *)buf);
+		return _DB2Copy_put_field(cp, tmp, len, 0);
 
-	*/
-	/* YYY */
-	SQLCHAR		*procName;
-	SQLCHAR		callStmt[MAX_PROC_BUF_LEN];
-	PyObject	*params;
-	PyObject	*retVal;
+	case SQL_C_LONG:
+		len = sprintf(tmp, "%ld", (long)*(SQLINTEGER *)buf);
+		return _DB2Copy_put_field(cp, tmp, len, 0);
 
-	SQLHANDLE	hstmtProc;
-	SQLRETURN	rc;
-	int		numParams;
-	SQLSMALLINT	numCols;
-	SQLINTEGER	rowCount;
-	DB2ParamStruct	*ps;
-	int		i;
-	int		r;
+	case SQL_C_FLOAT:
+	case SQL_C_DOUBLE:
+		/* the repr() of the Python float */
+		s = PyOS_double_to_string(bs->type == SQL_C_FLOAT ?
+				(double)*(SQLREAL *)buf : *(SQLDOUBLE *)buf,
+				'r', 0, Py_DTSF_ADD_DOT_0, NULL);
+		if (!s) {
+			return 0;
+		}
+		ok = _DB2Copy_put_field(cp, s, strlen(s), 0);
+		PyMem_Free(s);
+		return ok;
 
-	struct {
-		SQLINTEGER	ind;
-		SQLSMALLINT	val;
-	} colType, colDataType, decDigits, nullable;
+	case SQL_C_BINARY:
+		return _DB2Copy_put_hex(cp, (unsigned char *)buf, n);
 
-	struct {
-		SQLINTEGER	ind;
-		SQLCHAR		val[MAX_NAME_LEN+1];
-	} colName, colDataTypeName;
+	case SQL_C_BLOB_LOCATOR:
+	case SQL_C_CLOB_LOCATOR:
+		return _DB2Copy_put_LOB(cp, bs->type, *(SQLINTEGER *)buf);
 
-	struct {
-		SQLINTEGER	ind;
-		SQLINTEGER	val;
-	} colSize, colOrdinalPos;
+	case SQL_C_TYPE_DATE: {
+		DATE_STRUCT *st = (DATE_STRUCT *)buf;
 
-	if (!PyArg_ParseTuple(args, "s|O", &procName, &params)) {
-		return NULL;
+		len = sprintf(tmp, "%04d-%02d-%02d",
+				st->year, st->month, st->day);
+		return _DB2Copy_put_field(cp, tmp, len, 1);
 	}
 
-	_DB2CursorObj_reset_params(self, MAX_PROC_PARAMS_NUM);
+	case SQL_C_TYPE_TIME: {
+		TIME_STRUCT *st = (TIME_STRUCT *)buf;
 
-	/* Close cursor (if opened) */
-	_DB2CursorObj_reset_cursor(self);
-
-	/* New handle for Stored Procedure inspection */
-	rc = SQLAllocHandle(SQL_HANDLE_STMT, self->hdbc, &hstmtProc);
+		len = sprintf(tmp, "%02d:%02d:%02d",
+				st->hour, st->minute, st->second);
+		return _DB2Copy_put_field(cp, tmp, len, 1);
+	}
 
-	rc = SQLProcedureColumns(
-		hstmtProc,
-		NULL,	/* CatalogName */
-		0,
-		"%",	/* SchemaName */
-		SQL_NTS,
-		procName,	/* ProcName */
-		SQL_NTS,
-		"%",		/* ColumnName */
-		SQL_NTS
-		);
+	case SQL_C_TYPE_TIMESTAMP: {
+		TIMESTAMP_STRUCT *st = (TIMESTAMP_STRUCT *)buf;
 
-	if (rc != SQL_SUCCESS) {
-		return _DB2CursorObj_Cursor_Error(self, NULL);
+		len = sprintf(tmp, "%04d-%02d-%02d-%02d.%02d.%02d.%06u",
+				st->year, st->month, st->day,
+				st->hour, st->minute, st->second,
+				(unsigned int)st->fraction / 1000);
+		return _DB2Copy_put_field(cp, tmp, len, 1);
 	}
 
-	rc = SQLBindCol(
-		hstmtProc,
-		4,		/* Column Name */
-		SQL_C_CHAR,
-		colName.val,
-		sizeof(colName.val),
-		&colName.ind
-		);
+	case SQL_C_DBCHAR:
+		return _DB2Copy_put_field(cp, (char *)buf,
+				strnlen((char *)buf, n * 2), 1);
 
-	rc = SQLBindCol(
-		hstmtProc,
-		5,		/* Column Type */
-		SQL_C_SHORT,
-		(SQLPOINTER)&colType.val,	/* IN, OUT, INOUT */
-		sizeof(colType.val),
-		&colType.ind
-		);
+	default:
+		return _DB2Copy_put_field(cp, (char *)buf,
+				strlen((char *)buf), 1);
+	}
+}
 
-	rc = SQLBindCol(
-		hstmtProc,
-		6,		/* Data Type */
-		SQL_C_SHORT,
-		(SQLPOINTER)&colDataType.val,
-		sizeof(colDataType.val),
-		&colDataType.ind
-		);
+static int
+_DB2Copy_put_row(DB2Copy *cp, DB2BindStruct **cols, int numCols, int idx)
+{
+	int c;
 
-	rc = SQLBindCol(
-		hstmtProc,
-		7,		/* Data Type Name */
-		SQL_C_CHAR,
-		&colDataTypeName.val,
-		sizeof(colDataTypeName.val),
-		&colDataTypeName.ind
-		);
+	for (c=0; c < numCols; c++) {
+		if (c && !_DB2Copy_put(cp, &cp->delimiter, 1)) {
+			return 0;
+		}
+		if (!_DB2Copy_put_value(cp, cols[c], idx)) {
+			return 0;
+		}
+	}
 
-	rc = SQLBindCol(
-		hstmtProc,
-		8,		/* Column Size */
-		SQL_C_LONG,
-		(SQLPOINTER)&colSize.val,
-		sizeof(colSize.val),
-		&colSize.ind
-		);
+	cp->rows++;
 
-	rc = SQLBindCol(
-		hstmtProc,
-		10,		/* Decimal Digits */
-		SQL_C_SHORT,
-		(SQLPOINTER)&decDigits.val,
-		sizeof(decDigits.val),
-		&decDigits.ind
-		);
+	return _DB2Copy_put(cp, cp->lineterminator, cp->lineterminatorLen);
+}
 
-	rc = SQLBindCol(
-		hstmtProc,
-		12,		/* Nullable */
-		SQL_C_SHORT,
-		(SQLPOINTER)&nullable.val,
-		sizeof(nullable.val),
-		&nullable.ind
-		);
+static int
+_DB2CursorObj_copy_block(DB2CursorObj *self, void *arg)
+{
+	/* DB2FetchSink: write the rows of the block */
+	DB2Copy		*cp = (DB2Copy *)arg;
+	SQLUINTEGER	i;
+	int		count = 0;
+
+	for (i=0; i < self->nFetchedRows; i++) {
+		if (self->rowStatus[i] == SQL_ROW_NOROW) {
+			continue;
+		}
+		if (!_DB2Copy_put_row(cp, self->bindColList,
+				self->bindColCount, i)) {
+			return -1;
+		}
+		count++;
+	}
 
-	rc = SQLBindCol(
-		hstmtProc,
-		18,		/* Param Ordinal Position */
-		SQL_C_LONG,
-		(SQLPOINTER)&colOrdinalPos.val,
-		sizeof(colOrdinalPos.val),
-		&colOrdinalPos.ind
-		);
+	return count;
+}
 
-	sprintf((char *)callStmt, "CALL %s ( ", procName);
+static int
+_DB2CursorObj_copy_prefetched(DB2CursorObj *self, DB2Copy *cp)
+{
+	/* write the rows of the prefetched row arrays */
+	DB2Prefetch	*p = self->prefetch;
+	DB2PrefetchSlot	*slot;
+	DB2BindStruct	**cols;
+	int		c, ok = 1;
+
+	cols = (DB2BindStruct **)MY_MALLOC(
+			sizeof(DB2BindStruct *) * (p->numCols ? p->numCols : 1));
+
+	while (ok && (slot = _DB2CursorObj_prefetch_slot(self))) {
+		for (c=0; c < p->numCols; c++) {
+			cols[c] = &slot->cols[c];
+		}
+		for ( ; p->pos < slot->nFetched; p->pos++) {
+			if (slot->rowStatus[p->pos] == SQL_ROW_NOROW) {
+				continue;
+			}
+			if (!_DB2Copy_put_row(cp, cols, p->numCols, p->pos)) {
+				ok = 0;
+				break;
+			}
+		}
+		if (ok) {
+			_DB2CursorObj_prefetch_release(self);
+		}
+	}
 
-	numParams = 0;
-	i = 0;
+	MY_FREE(cols);
 
-	while (1) {
-		rc = SQLFetch(hstmtProc);
+	return ok && !PyErr_Occurred();
+}
 
-		if (rc != SQL_SUCCESS) {
-			break;
-		}
+static PyObject *
+DB2CursorObj_copy_to(DB2CursorObj *self, PyObject *args)
+{
+	/*
 
-		if (DEBUG > 1) {
-			fprintf(stderr, "* Param #%d Name:: %s\n", i+1, colName.val);
-		}
+	._copyto(file, delimiter, quotechar, quoting, null, lineterminator)
 
-		strcat((char *)callStmt, "?,");
+	    Write the remaining rows of the result set to file as
+	    delimited text. Returns (rows, bytes) written.
 
-		ps = (DB2ParamStruct *) MY_MALLOC(sizeof(DB2ParamStruct));
-		memset(ps, 0, sizeof(DB2ParamStruct));
-		self->paramList[i] = ps;
+	*/
+	DB2Copy		cp;
+	int		ok;
 
-		ps->inOutType = colType.val;	/* IN OUT */
-		ps->dataType = colDataType.val;	/* SQL Data Type */
-		ps->colSize = colSize.val;
-		ps->decDigits = decDigits.val;
-		ps->nullable = nullable.val == SQL_NULLABLE ? 1 : 0;
+	memset(&cp, 0, sizeof(cp));
 
-		i += 1;
+	if (!PyArg_ParseTuple(args, "Occis#s#",
+			&cp.file, &cp.delimiter, &cp.quotechar, &cp.quoting,
+			&cp.null, &cp.nullLen,
+			&cp.lineterminator, &cp.lineterminatorLen)) {
+		return NULL;
 	}
 
-	self->paramCount = i;
-
-	callStmt[ strlen(callStmt) - 1 ] = ')';	/* replace last , with ) */
+	if (!PyFile_Check(cp.file) &&
+			!PyObject_HasAttrString(cp.file, "write")) {
+		PyErr_SetString(PyExc_TypeError,
+			"file SHOULD be a file or have a write() method");
+		return NULL;
+	}
 
-	rc = SQLFreeHandle( SQL_HANDLE_STMT, hstmtProc );
+	cp.cursor = self;
+	cp.cap = COPY_BUF_SIZE;
+	cp.buf = (char *)MY_MALLOC(cp.cap);
 
-	rc = SQLPrepare( self->hstmt, callStmt, SQL_NTS );
+	switch (_DB2CursorObj_prefetching(self)) {
+	case -1:
+		ok = 0;
+		break;
+	case 1:
+		ok = _DB2CursorObj_copy_prefetched(self, &cp);
+		break;
+	default:
+		ok = _DB2CursorObj_fetch_loop(self, -1,
+				_DB2CursorObj_copy_block, &cp) >= 0;
+		break;
+	}
 
-	if (rc != SQL_SUCCESS) {
-		return _DB2CursorObj_Cursor_Error(self, NULL);
+	if (ok) {
+		ok = _DB2Copy_flush(&cp);
 	}
 
-	r = _DB2CursorObj_prepare_param_vars(self, self->paramCount, params);
+	MY_FREE(cp.buf);
 
-	if (r == 0) {
+	if (!ok) {
 		return NULL;
-	} else if (r == -1) {
-		return _DB2CursorObj_Cursor_Error(self, NULL);
 	}
 
-	Py_BEGIN_ALLOW_THREADS ;
-
-	rc = SQLExecute(self->hstmt);
+	return Py_BuildValue("(lL)", cp.rows, cp.bytes);
+}
 
-	Py_END_ALLOW_THREADS ;
+static int
+_DB2CursorObj_read_block_LOBs(DB2CursorObj *self, PyObject *rows, int first)
+{
+	/*
+	 * auto_LOB_read: replace the ('blob'|'clob', locator) values of
+	 * rows[first:] by ('blob'|'clob', locator, data). The LOBs of
+	 * the whole block are read through the LOB statement handle of
+	 * the cursor, with the GIL released once for the lengths and
+	 * once for the data.
+	 *
+	 * Returns 0 with an exception set on failure.
+	 */
+	SQLRETURN	rc = SQL_SUCCESS;
+	SQLHANDLE	hstmt;
+	SQLINTEGER	*locs, *lens, outLen, dummyInd;
+	SQLSMALLINT	*types;
+	char		**bufs;
+	PyObject	**datas, *row, *val, *t;
+	int		*cells;
+	int		numRows, numCols, r, c, n, i, count = 0, ok = 1;
 
-	show_rc_name("cs.callproc() - SQLExecute", rc);
+	numRows = PyList_GET_SIZE(rows) - first;
+	numCols = self->bindColCount;
 
-	if ( rc == SQL_NEED_DATA ) {
-		FILE **fpPtr;
+	for (c=0; c < numCols; c++) {
+		int type = self->bindColList[c]->type;
 
-		while (1) {
-			rc = SQLParamData(self->hstmt, (SQLPOINTER *)&fpPtr);
-			if (rc == SQL_SUCCESS) {
-				break;
-			} else if (rc == SQL_SUCCESS_WITH_INFO ) {
-				_DB2CursorObj_fill_Cursor_messages(self);
-			} else if (rc == SQL_NEED_DATA) {
-				_DB2CursorObj_send_lob_file(self, *fpPtr);
-			} else {
-				return _DB2CursorObj_Cursor_Error(self, NULL);
-			}
+		if (type == SQL_C_BLOB_LOCATOR || type == SQL_C_CLOB_LOCATOR) {
+			count++;
 		}
 	}
-
-	if ( rc == SQL_SUCCESS ) {
-		;
-	} else if ( rc == SQL_SUCCESS_WITH_INFO ) {
-		_DB2CursorObj_fill_Cursor_messages(self);
-	} else {
-		return _DB2CursorObj_Cursor_Error(self, NULL);
+	if (count == 0 || numRows <= 0) {
+		return 1;
+	}
+	if (!_DB2CursorObj_LOB_stmt(self, &hstmt)) {
+		return 0;
 	}
 
-	rc = SQLRowCount(self->hstmt, (SQLINTEGER *)&rowCount);
-	self->rowCount = rowCount;
+	n = count * numRows;
+	locs = (SQLINTEGER *) MY_MALLOC(sizeof(SQLINTEGER) * n);
+	lens = (SQLINTEGER *) MY_MALLOC(sizeof(SQLINTEGER) * n);
+	types = (SQLSMALLINT *) MY_MALLOC(sizeof(SQLSMALLINT) * n);
+	bufs = (char **) MY_MALLOC(sizeof(char *) * n);
+	datas = (PyObject **) MY_MALLOC(sizeof(PyObject *) * n);
+	cells = (int *) MY_MALLOC(sizeof(int) * n);
+
+	/* the locators of the block, skipping NULLs */
+	count = 0;
+	for (r=0; r < numRows; r++) {
+		row = PyList_GET_ITEM(rows, first + r);
+		for (c=0; c < numCols; c++) {
+			int type = self->bindColList[c]->type;
+
+			if (type != SQL_C_BLOB_LOCATOR && type != SQL_C_CLOB_LOCATOR) {
+				continue;
+			}
+			val = PyList_GET_ITEM(row, c);
+			if (!PyTuple_Check(val)) {
+				continue;
+			}
+			locs[count] = (SQLINTEGER)PyInt_AsLong(PyTuple_GET_ITEM(val, 1));
+			types[count] = type;
+			cells[count] = r * numCols + c;
+			datas[count] = NULL;
+			count++;
+		}
+	}
 
-	self->bFetchRefresh = 1;
+	Py_BEGIN_ALLOW_THREADS ;
 
-	if (SQLNumResultCols(self->hstmt, &numCols) == SQL_SUCCESS) {
-		_DB2CursorObj_set_col_desc(self, numCols);
-	} else {
-		return _DB2CursorObj_Cursor_Error(self, NULL);
+	for (i=0; i < count; i++) {
+		rc = SQLGetLength(hstmt, types[i], locs[i], &lens[i], &dummyInd);
+		if (!checkSuccess(rc)) break;
 	}
 
-	/* build Return Value */
-	retVal = PyTuple_New( self->paramCount );
-
-	for ( i=0; i < self->paramCount; i++ ) {
-		PyObject *tmpVal;
+	Py_END_ALLOW_THREADS ;
 
-		ps = self->paramList[i];
+	if (!checkSuccess(rc)) {
+		_DB2_Stmt_Error(hstmt);
+		ok = 0;
+	}
 
-		if (DEBUG > 2) {
-			fprintf(stderr, "* Parameter [%d]\n", i);
-			fprintf(stderr, "\tinOutType: %d\n", ps->inOutType);
-			fprintf(stderr, "\tdataType: %d\n", ps->dataType);
-			fprintf(stderr, "\tdataTypeName: %s\n", get_SQL_type_name(ps->dataType));
-			fprintf(stderr, "\tcolSize: %d\n", (int)ps->colSize);
-			fprintf(stderr, "\tbufLen: %d\n", (int)ps->bufLen);
-			fprintf(stderr, "\toutLen: %d\n", (int)ps->outLen);
-			fprintf(stderr, "\t---\n");
+	for (i=0; ok && i < count; i++) {
+		datas[i] = PyString_FromStringAndSize(NULL, lens[i]);
+		if (!datas[i]) {
+			ok = 0;
+			break;
+		}
+		bufs[i] = PyString_AS_STRING(datas[i]);
+	}
+
+	if (ok) {
+		Py_BEGIN_ALLOW_THREADS ;
+
+		for (i=0; i < count; i++) {
+			if (lens[i] == 0) continue;
+			rc = SQLGetSubString(hstmt, types[i], locs[i],
+				1, lens[i], SQL_C_BINARY,
+				bufs[i], lens[i], &outLen, &dummyInd);
+			if (!checkSuccess(rc)) break;
 		}
 
-		if ( ps->inOutType == SQL_PARAM_INPUT ) {
-			tmpVal = PyTuple_GetItem(params, i);
-			Py_INCREF(tmpVal);
-		} else {
-			tmpVal = _SQLType_2_PyType(ps);
+		Py_END_ALLOW_THREADS ;
+
+		if (!checkSuccess(rc)) {
+			_DB2_Stmt_Error(hstmt);
+			ok = 0;
 		}
+	}
 
-		PyTuple_SetItem(retVal, i, tmpVal);
+	if (ok) {
+		STATS_ADD(self, lobReads, count);
+		for (i=0; i < count; i++) {
+			STATS_ADD(self, lobBytes, lens[i]);
+		}
 	}
 
-	return retVal;
+	for (i=0; i < count; i++) {
+		if (ok) {
+			row = PyList_GET_ITEM(rows, first + cells[i] / numCols);
+			c = cells[i] % numCols;
+			val = PyList_GET_ITEM(row, c);
+			t = PyTuple_Pack(3, PyTuple_GET_ITEM(val, 0),
+					PyTuple_GET_ITEM(val, 1), datas[i]);
+			PyList_SetItem(row, c, t);
+		}
+		Py_XDECREF(datas[i]);
+	}
+
+	MY_FREE(locs);
+	MY_FREE(lens);
+	MY_FREE(types);
+	MY_FREE(bufs);
+	MY_FREE(datas);
+	MY_FREE(cells);
+
+	return ok;
 }
 
 static PyObject *
-DB2CursorObj_fetch(DB2CursorObj *self, PyObject *args)
+DB2CursorObj_LOB_fetch(DB2CursorObj *self, PyObject *args)
 {
 	/*
 
-	.fetchone() 
-          
-            Fetch the next row of a query result set, returning a
-            single sequence, or None when no more data is
-            available. [6]
-            
-            An Error (or subclass) exception is raised if the previous
-            call to executeXXX() did not produce any result set or no
-            call was issued yet.
+	._LOBFetch(autoRead, inlineSize)
+
+	    How fetchone()/fetchmany()/fetchall() return LOB columns.
+	    With autoRead, LOB columns declared at most inlineSize
+	    bytes long are fetched with the rows, the others are read
+	    block by block: both come as ('blob'|'clob', locator, data),
+	    locator None for the inline ones. Otherwise LOBs come as
+	    ('blob'|'clob', locator).
 
 	*/
-	SQLRETURN	rc;
-	SQLHSTMT	hstmt = self->hstmt;
-	int		wanted = -1, howmany;
-	int		orient = 1;
-	int		offset = 1;
-	SQLUSMALLINT	fOrient;
+	int		autoRead, inlineSize;
 
-	if (!PyArg_ParseTuple(args, "|iii", &wanted, &orient, &offset)) {
+	if (!PyArg_ParseTuple(args, "ii", &autoRead, &inlineSize)) {
 		return NULL;
 	}
 
-	if (self->bScrollable) {
-		if (orient == 1) {
-			fOrient = SQL_FETCH_NEXT;
-		} else if (orient == 2) {
-			fOrient = SQL_FETCH_FIRST;
-		} else if (orient == 3) {
-			fOrient = SQL_FETCH_LAST;
-		} else if (orient == 4) {
-			fOrient = SQL_FETCH_PRIOR;
-		} else if (orient == 5) {
-			fOrient = SQL_FETCH_ABSOLUTE;
-		} else if (orient == 6) {
-			fOrient = SQL_FETCH_RELATIVE;
-		} else {
-			fOrient = SQL_FETCH_NEXT;	/* fall back */
-		}
-	} else {
-		fOrient = SQL_FETCH_NEXT;
-	}
+	self->lobAutoRead = autoRead;
+	self->lobInlineSize = autoRead ? inlineSize : 0;
 
-	if (wanted == -1) {
-		howmany = 1;
-	} else {
-		howmany = wanted;
-	}
+	Py_INCREF(Py_None);
+	return Py_None;
+}
 
-	if (self->bFetchRefresh || self->lastArraySize != howmany) {
-		SQLSMALLINT numCols;
+static void
+_DB2CursorObj_set_converters(DB2CursorObj *self)
+{
+	/* re-pick the converters of the bound columns */
+	int i;
 
-		if (SQLNumResultCols(self->hstmt, &numCols) == SQL_SUCCESS) {
-			_DB2CursorObj_reset_bind_col(self, numCols);
-			_DB2CursorObj_bind_col(self, numCols, howmany);
-		} else {
-			return _DB2CursorObj_Cursor_Error(self, NULL);
+	for (i=0; i < self->bindColCount; i++) {
+		if (self->bindColList[i]) {
+			_DB2BindStruct_set_converter(self->bindColList[i],
+					self->nativeDatetime);
 		}
-		self->bFetchRefresh = 0;
-		self->lastArraySize = howmany;
 	}
+}
 
-	rc = SQLSetStmtAttr(hstmt,
-		SQL_ATTR_ROW_ARRAY_SIZE,
-		(SQLPOINTER)howmany, 0);
+static PyObject *
+DB2CursorObj_native_datetime(DB2CursorObj *self, PyObject *args)
+{
+	/*
 
-	CHECK_CURSOR_RC(rc);
+	._nativeDatetime(flag)
 
-	rc = SQLSetStmtAttr(hstmt,
-		SQL_ATTR_ROW_BIND_TYPE,
-		(SQLPOINTER)SQL_BIND_BY_COLUMN, 0);
+	    Fetch DATE, TIME and TIMESTAMP columns as datetime.date,
+	    datetime.time and datetime.datetime objects when flag is
+	    true, as strings otherwise (default).
 
-	CHECK_CURSOR_RC(rc);
+	*/
+	int		flag;
 
-	if (self->bScrollable) {
-		if (0) {
-		rc = SQLSetStmtAttr(hstmt,
-			SQL_ATTR_CURSOR_TYPE,
-			(SQLPOINTER)SQL_CURSOR_STATIC, 0);
-		}
+	if (!PyArg_ParseTuple(args, "i", &flag)) {
+		return NULL;
 	}
 
-	rc = SQLSetStmtAttr(hstmt,
-		SQL_ATTR_ROWS_FETCHED_PTR,
-		(SQLPOINTER)&self->nFetchedRows, 0);
-
-	CHECK_CURSOR_RC(rc);
-
-	rc = SQLSetStmtAttr(hstmt,
-		SQL_ATTR_ROW_STATUS_PTR,
-		(SQLPOINTER)self->rowStatus, 0);
-
-	CHECK_CURSOR_RC(rc);
-
-	Py_BEGIN_ALLOW_THREADS ;
-
-	rc = SQLFetchScroll(hstmt, fOrient, (SQLINTEGER)offset);
-
-	Py_END_ALLOW_THREADS ;
+	self->nativeDatetime = flag ? 1 : 0;
+	_DB2CursorObj_set_converters(self);
 
-	if (checkSuccess(rc)) {
-		return _DB2CursorObj_retrieve_rows(self, wanted);
-	} else if (rc == SQL_NO_DATA_FOUND) {
-		Py_INCREF(Py_None);
-		return Py_None;
-	} else {
-		return _DB2CursorObj_Cursor_Error(self, NULL);
-	}
+	Py_INCREF(Py_None);
+	return Py_None;
 }
 
 static PyObject *
@@ -1515,6 +5565,7 @@ DB2CursorObj_skip_rows(DB2CursorObj *self, PyObject *args)
 	SQLRETURN	rc;
 	SQLSMALLINT	numCols;
 	int		i, count = 0;
+	double		t;
 
 	if (!PyArg_ParseTuple(args, "|i", &howmany)) {
 		return NULL;
@@ -1528,7 +5579,25 @@ DB2CursorObj_skip_rows(DB2CursorObj *self, PyObject *args)
 		return Py_BuildValue("i", -1);
 	}
 
+	if (self->prefetch) {
+		PyObject *rows = _DB2CursorObj_prefetch_rows(self, howmany);
+
+		if (!rows) {
+			return NULL;
+		}
+		count = PyList_GET_SIZE(rows);
+		Py_DECREF(rows);
+		return Py_BuildValue("i", count);
+	}
+
+	/* one row per fetch, not the rowset of the last fetchmany() */
+	if (!_DB2CursorObj_bind_fetch(self, 1)) {
+		return _DB2CursorObj_Cursor_Error(self, NULL);
+	}
+
 	for (i=0; i < howmany; i++) {
+		t = _db2_now();
+
 		Py_BEGIN_ALLOW_THREADS ;
 
 		if (self->bScrollable) {
@@ -1539,12 +5608,17 @@ DB2CursorObj_skip_rows(DB2CursorObj *self, PyObject *args)
 
 		Py_END_ALLOW_THREADS ;
 
+		STATS_ADD(self, fetches, 1);
+		STATS_ADD(self, fetchTime, _db2_now() - t);
+
 		CHECK_CURSOR_RC(rc);
 
 		if (rc == SQL_NO_DATA_FOUND) {
+			_DB2CursorObj_slow_check(self);
 			break;
 		}
 
+		STATS_ADD(self, rows, 1);
 		count += 1;
 	}
 
@@ -1664,27 +5738,17 @@ _DB2CursorObj_set_col_desc(DB2CursorObj *self, int numCols)
 static int
 _DB2CursorObj_reset_bind_col(DB2CursorObj *self, int numCols)
 {
-	int i;
-	DB2BindStruct *bs;
-
-	for (i=0; i < self->bindColCount; i++) {
-		bs = self->bindColList[i];
-		if (bs) {
-			MY_FREE(bs->buf);
-			MY_FREE(bs->outLen);
-			MY_FREE(bs);
-		}
-	}
-
-	if (self->bindColList) { MY_FREE(self->bindColList); }
+	_DB2BindStruct_free_list(self->bindColList, self->bindColCount);
 	if (self->rowStatus) {
 		MY_FREE(self->rowStatus);
 		self->rowStatus = NULL;
 	}
+	self->rowWidth = 0;
 
 	if (numCols) {
 		self->bindColList = (DB2BindStruct **) MY_MALLOC(
 					sizeof(DB2BindStruct *) * numCols);
+		memset(self->bindColList, 0, sizeof(DB2BindStruct *) * numCols);
 		self->bindColCount = numCols;
 	} else {
 		self->bindColList = (DB2BindStruct **)NULL;
@@ -1779,11 +5843,24 @@ _DB2CursorObj_bind_col(DB2CursorObj *self, int numCols, int arraySize)
 			break;
 
 		case SQL_BLOB_LOCATOR:
+			if (colSize > 0 && colSize <= self->lobInlineSize) {
+				/* small enough to come with the row */
+				bCol->type = SQL_C_BINARY;
+				bCol->typeEx = dataType;
+				bCol->bufLen = colSize;
+				break;
+			}
 			bCol->type = SQL_C_BLOB_LOCATOR;
 			bCol->bufLen = sizeof(SQLINTEGER);
 			break;
 
 		case SQL_CLOB_LOCATOR:
+			if (colSize > 0 && colSize <= self->lobInlineSize) {
+				bCol->type = SQL_C_CHAR;
+				bCol->typeEx = dataType;
+				bCol->bufLen = sizeof(SQLCHAR)*(colSize+1);
+				break;
+			}
 			bCol->type = SQL_C_CLOB_LOCATOR;
 			bCol->bufLen = sizeof(SQLINTEGER);
 			break;
@@ -1794,207 +5871,323 @@ _DB2CursorObj_bind_col(DB2CursorObj *self, int numCols, int arraySize)
 			bCol->bufLen = sizeof(SQLDOUBLE);
 			break;
 
-		case SQL_TYPE_DATE:
-			bCol->type = SQL_C_TYPE_DATE;
-			bCol->bufLen = sizeof(DATE_STRUCT);
-			break;
+		case SQL_TYPE_DATE:
+			bCol->type = SQL_C_TYPE_DATE;
+			bCol->bufLen = sizeof(DATE_STRUCT);
+			break;
+
+		case SQL_TYPE_TIME:
+			bCol->type = SQL_C_TYPE_TIME;
+			bCol->bufLen = sizeof(TIME_STRUCT);
+			break;
+
+		case SQL_TYPE_TIMESTAMP:
+			bCol->type = SQL_C_TYPE_TIMESTAMP;
+			bCol->bufLen = sizeof(TIMESTAMP_STRUCT);
+			break;
+
+		case SQL_CLOB:
+		case SQL_BLOB:
+			/* SQLBindFileToCol */
+			if (DEBUG) printf("Oops *LOB (%i)\n", i);
+			return 0;
+			break;
+
+		case SQL_DBCLOB:
+		case SQL_GRAPHIC:
+		case SQL_VARGRAPHIC:
+		case SQL_LONGVARGRAPHIC:
+			bCol->type = SQL_C_DBCHAR;
+			bCol->bufLen = sizeof(SQLDBCHAR)*(colSize+1);
+			break;
+
+		default:
+			bCol->type = SQL_C_CHAR;
+			bCol->bufLen = sizeof(SQLCHAR)*(colSize+1);
+			break;
+		}
+
+		_DB2BindStruct_set_converter(bCol, self->nativeDatetime);
+
+		bCol->buf = (SQLPOINTER)MY_MALLOC(bCol->bufLen * arraySize);
+		memset(bCol->buf, 0, bCol->bufLen * arraySize);
+
+		bCol->outLen = (SQLINTEGER *) MY_MALLOC(
+				sizeof(SQLINTEGER) * arraySize
+				);
+
+		SQLBindCol(self->hstmt,
+				colIdx,
+				bCol->type,
+				(SQLPOINTER)bCol->buf,
+				bCol->bufLen,
+				(SQLINTEGER *)bCol->outLen
+			);
+
+		self->rowWidth += bCol->bufLen + sizeof(SQLINTEGER);
+	}
+
+	self->rowStatus = MY_MALLOC(sizeof(SQLUSMALLINT) * arraySize);
+	memset(self->rowStatus, 0, sizeof(SQLUSMALLINT) * arraySize);
+
+	return 1;
+}
+
+/*
+ * Fetch converters: one per bound column, chosen by
+ * _DB2BindStruct_set_converter() when the column is bound. They get
+ * the (non NULL) value of row idx at buf and return a new reference.
+ */
+
+static PyObject *
+_db2_conv_char(DB2BindStruct *bs, SQLPOINTER buf, int idx)
+{
+	return PyString_FromString((char *)buf);
+}
+
+static PyObject *
+_db2_conv_bigint(DB2BindStruct *bs, SQLPOINTER buf, int idx)
+{
+	return PyLong_FromString((char *)buf, NULL, 0);
+}
+
+static PyObject *
+_db2_conv_decimal(DB2BindStruct *bs, SQLPOINTER buf, int idx)
+{
+	PyObject *val, *tmpVal;
+	char *tempStr;
+
+	tempStr = (char *)MY_MALLOC(bs->outLen[idx]+1);
+	strncpy(tempStr, (char *)(buf), bs->outLen[idx]);
+	tempStr[bs->outLen[idx]] = '\0';
+	convertSeparator(tempStr, bs->outLen[idx]);
+	tmpVal = PyString_FromString(tempStr);
+	MY_FREE(tempStr);
+	val = PyFloat_FromString(tmpVal, NULL);
+	Py_DECREF(tmpVal);
+
+	return val;
+}
+
+static PyObject *
+_db2_conv_inline_clob(DB2BindStruct *bs, SQLPOINTER buf, int idx)
+{
+	return Py_BuildValue("(sOs#)", "clob", Py_None,
+			(char *)buf, (int)bs->outLen[idx]);
+}
+
+static PyObject *
+_db2_conv_inline_blob(DB2BindStruct *bs, SQLPOINTER buf, int idx)
+{
+	return Py_BuildValue("(sOs#)", "blob", Py_None,
+			(char *)buf, (int)bs->outLen[idx]);
+}
+
+static PyObject *
+_db2_conv_short(DB2BindStruct *bs, SQLPOINTER buf, int idx)
+{
+	return PyInt_FromLong(*(SQLSMALLINT *)(buf));
+}
+
+static PyObject *
+_db2_conv_long(DB2BindStruct *bs, SQLPOINTER buf, int idx)
+{
+	return PyInt_FromLong(*(SQLINTEGER *)(buf));
+}
+
+static PyObject *
+_db2_conv_float(DB2BindStruct *bs, SQLPOINTER buf, int idx)
+{
+	return PyFloat_FromDouble(*(SQLREAL *)(buf));
+}
+
+static PyObject *
+_db2_conv_double(DB2BindStruct *bs, SQLPOINTER buf, int idx)
+{
+	return PyFloat_FromDouble(*(SQLDOUBLE *)(buf));
+}
+
+static PyObject *
+_db2_conv_blob_locator(DB2BindStruct *bs, SQLPOINTER buf, int idx)
+{
+	return Py_BuildValue("(si)", "blob", (int)*(SQLINTEGER *)(buf));
+}
+
+static PyObject *
+_db2_conv_clob_locator(DB2BindStruct *bs, SQLPOINTER buf, int idx)
+{
+	return Py_BuildValue("(si)", "clob", (int)*(SQLINTEGER *)(buf));
+}
+
+static PyObject *
+_db2_conv_date_str(DB2BindStruct *bs, SQLPOINTER buf, int idx)
+{
+	DATE_STRUCT *st = (DATE_STRUCT *)buf;
+	char tmp[32];
+	int len;
+
+	len = sprintf(tmp, "%04d-%02d-%02d", st->year, st->month, st->day);
+
+	return PyString_FromStringAndSize(tmp, len);
+}
+
+static PyObject *
+_db2_conv_time_str(DB2BindStruct *bs, SQLPOINTER buf, int idx)
+{
+	TIME_STRUCT *st = (TIME_STRUCT *)buf;
+	char tmp[32];
+	int len;
+
+	len = sprintf(tmp, "%02d:%02d:%02d",
+			st->hour, st->minute, st->second);
 
-		case SQL_TYPE_TIME:
-			bCol->type = SQL_C_TYPE_TIME;
-			bCol->bufLen = sizeof(TIME_STRUCT);
-			break;
+	return PyString_FromStringAndSize(tmp, len);
+}
 
-		case SQL_TYPE_TIMESTAMP:
-			bCol->type = SQL_C_TYPE_TIMESTAMP;
-			bCol->bufLen = sizeof(TIMESTAMP_STRUCT);
-			break;
+static PyObject *
+_db2_conv_timestamp_str(DB2BindStruct *bs, SQLPOINTER buf, int idx)
+{
+	TIMESTAMP_STRUCT *st = (TIMESTAMP_STRUCT *)buf;
+	char tmp[64];
+	int len;
 
-		case SQL_CLOB:
-		case SQL_BLOB:
-			/* SQLBindFileToCol */
-			if (DEBUG) printf("Oops *LOB (%i)\n", i);
-			return 0;
-			break;
+	/* YYYY-MM-DD-hh.mm.ss.ffffff, fraction is in nanoseconds */
+	len = sprintf(tmp, "%04d-%02d-%02d-%02d.%02d.%02d.%06u",
+			st->year, st->month, st->day,
+			st->hour, st->minute, st->second,
+			(unsigned int)st->fraction / 1000);
 
-		case SQL_DBCLOB:
-		case SQL_GRAPHIC:
-		case SQL_VARGRAPHIC:
-		case SQL_LONGVARGRAPHIC:
-			bCol->type = SQL_C_DBCHAR;
-			bCol->bufLen = sizeof(SQLDBCHAR)*(colSize+1);
-			break;
+	return PyString_FromStringAndSize(tmp, len);
+}
 
-		default:
-			bCol->type = SQL_C_CHAR;
-			bCol->bufLen = sizeof(SQLCHAR)*(colSize+1);
-			break;
-		}
+static PyObject *
+_db2_conv_date_obj(DB2BindStruct *bs, SQLPOINTER buf, int idx)
+{
+	DATE_STRUCT *st = (DATE_STRUCT *)buf;
 
-		bCol->buf = (SQLPOINTER)MY_MALLOC(bCol->bufLen * arraySize);
-		memset(bCol->buf, 0, bCol->bufLen * arraySize);
+	return PyDate_FromDate(st->year, st->month, st->day);
+}
 
-		bCol->outLen = (SQLINTEGER *) MY_MALLOC(
-				sizeof(SQLINTEGER) * arraySize
-				);
+static PyObject *
+_db2_conv_time_obj(DB2BindStruct *bs, SQLPOINTER buf, int idx)
+{
+	TIME_STRUCT *st = (TIME_STRUCT *)buf;
 
-		SQLBindCol(self->hstmt,
-				colIdx,
-				bCol->type,
-				(SQLPOINTER)bCol->buf,
-				bCol->bufLen,
-				(SQLINTEGER *)bCol->outLen
-			);
-	}
+	return PyTime_FromTime(st->hour, st->minute, st->second, 0);
+}
 
-	self->rowStatus = MY_MALLOC(sizeof(SQLUSMALLINT) * arraySize);
-	memset(self->rowStatus, 0, sizeof(SQLUSMALLINT) * arraySize);
+static PyObject *
+_db2_conv_timestamp_obj(DB2BindStruct *bs, SQLPOINTER buf, int idx)
+{
+	TIMESTAMP_STRUCT *st = (TIMESTAMP_STRUCT *)buf;
 
-	return 1;
+	return PyDateTime_FromDateAndTime(st->year, st->month, st->day,
+			st->hour, st->minute, st->second,
+			(int)(st->fraction / 1000));
 }
 
 static PyObject *
-_SQL_CType_2_PyType(DB2BindStruct *bs, int idx)
+_db2_conv_dbchar(DB2BindStruct *bs, SQLPOINTER buf, int idx)
 {
-	PyObject *val, *tmpVal;
+	PyObject *val;
 	char *tempStr;
-	int size;
-	SQLPOINTER buf = (SQLPOINTER)((SQLCHAR *)bs->buf + (bs->bufLen * idx));
 
-	DATE_STRUCT dateSt;
-	TIME_STRUCT timeSt;
-	TIMESTAMP_STRUCT timestampSt;
-	char *fractionPart;
+	tempStr = (char *)MY_MALLOC(bs->outLen[idx] * 2 + 1);
+	strncpy(tempStr, (char *)(buf), bs->outLen[idx] * 2);
+	tempStr[ bs->outLen[idx] * 2 ] = '\0';
+	val = PyString_FromString(tempStr);
+	MY_FREE(tempStr);
 
-	if ( bs->outLen[idx] == SQL_NULL_DATA ) {
-		Py_INCREF(Py_None);
-		return Py_None;
-	}
+	return val;
+}
 
+static void
+_DB2BindStruct_set_converter(DB2BindStruct *bs, int nativeDatetime)
+{
 	switch (bs->type) {
 
 	case SQL_C_CHAR:
 		switch (bs->typeEx) {
-
 		case SQL_BIGINT:
-			val = PyLong_FromString((SQLCHAR *)(buf), NULL, 0);
+			bs->convert = _db2_conv_bigint;
 			break;
-
-		case SQL_DECIMAL:	
-		case SQL_NUMERIC:	
-    		tempStr = (char *)MY_MALLOC(bs->outLen[idx]+1);
-    		strncpy(tempStr, (char *)(buf), bs->outLen[idx]);
-    		tempStr[bs->outLen[idx]] = '\0';
-            convertSeparator(tempStr, bs->outLen[idx]);
-    		tmpVal = PyString_FromString(tempStr);
-    		MY_FREE(tempStr);
-			val = PyFloat_FromString(tmpVal, NULL);
-			Py_DECREF(tmpVal);
+		case SQL_CLOB_LOCATOR:
+			bs->convert = _db2_conv_inline_clob;
+			break;
+		case SQL_DECIMAL:
+		case SQL_NUMERIC:
+			bs->convert = _db2_conv_decimal;
 			break;
 		default:
-			val = PyString_FromString((SQLCHAR *)(buf));
+			bs->convert = _db2_conv_char;
 			break;
-
 		}
 		break;
 
 	case SQL_C_SHORT:
-		val = PyInt_FromLong(*(SQLSMALLINT *)(buf));
+		bs->convert = _db2_conv_short;
 		break;
 
 	case SQL_C_LONG:
-		val = PyInt_FromLong(*(SQLINTEGER *)(buf));
+		bs->convert = _db2_conv_long;
 		break;
 
 	case SQL_C_FLOAT:
-		val = PyFloat_FromDouble(*(SQLREAL *)(buf));
+		bs->convert = _db2_conv_float;
 		break;
 
 	case SQL_C_DOUBLE:
-		val = PyFloat_FromDouble(*(SQLDOUBLE *)(buf));
+		bs->convert = _db2_conv_double;
+		break;
+
+	case SQL_C_BINARY:
+		bs->convert = _db2_conv_inline_blob;
 		break;
 
 	case SQL_C_BLOB_LOCATOR:
-		val = PyTuple_New(2);
-		PyTuple_SetItem(val, 0, PyString_FromString("blob"));
-		PyTuple_SetItem(val, 1, PyInt_FromLong(*(SQLINTEGER *)(buf)));
+		bs->convert = _db2_conv_blob_locator;
 		break;
 
 	case SQL_C_CLOB_LOCATOR:
-		val = PyTuple_New(2);
-		PyTuple_SetItem(val, 0, PyString_FromString("clob"));
-		PyTuple_SetItem(val, 1, PyInt_FromLong(*(SQLINTEGER *)(buf)));
+		bs->convert = _db2_conv_clob_locator;
 		break;
 
 	case SQL_C_TYPE_DATE:
-		dateSt = *(DATE_STRUCT *)(buf);
-		tempStr = (char *)MY_MALLOC(10 + 1);
-		sprintf(tempStr,
-				"%04d-%02d-%02d",
-				dateSt.year,
-				dateSt.month,
-				dateSt.day
-			);
-		val = PyString_FromString(tempStr);
-		MY_FREE(tempStr);
+		bs->convert = nativeDatetime ?
+			_db2_conv_date_obj : _db2_conv_date_str;
 		break;
 
 	case SQL_C_TYPE_TIME:
-		timeSt = *(TIME_STRUCT *)(buf);
-		tempStr = (char *)MY_MALLOC(8 + 1);
-		sprintf(tempStr,
-				"%02d:%02d:%02d",
-				timeSt.hour,
-				timeSt.minute,
-				timeSt.second
-			);
-		val = PyString_FromString(tempStr);
-		MY_FREE(tempStr);
+		bs->convert = nativeDatetime ?
+			_db2_conv_time_obj : _db2_conv_time_str;
 		break;
 
 	case SQL_C_TYPE_TIMESTAMP:
-		timestampSt = *(TIMESTAMP_STRUCT *)(buf);
-		size = 26 + 1;
-		tempStr = (char *) MY_MALLOC(size);
-		memset(tempStr, 0, size);
-		sprintf(tempStr,
-				"%04d-%02d-%02d-%02d.%02d.%02d.",
-				timestampSt.year,
-				timestampSt.month,
-				timestampSt.day,
-				timestampSt.hour,
-				timestampSt.minute,
-				timestampSt.second);
-
-		/* ffffff part */
-
-		fractionPart = (char *)MY_MALLOC(16);
-		memset(fractionPart, 0, 16);
-		sprintf(fractionPart, "%09d", (unsigned int)timestampSt.fraction);
-		fractionPart[6] = '\0';
-		strcat(tempStr, fractionPart);
-
-		/* val = PyString_FromStringAndSize(tempStr, 26); */
-		val = PyString_FromString(tempStr);
-
-		MY_FREE(tempStr);
-		MY_FREE(fractionPart);
-
+		bs->convert = nativeDatetime ?
+			_db2_conv_timestamp_obj : _db2_conv_timestamp_str;
 		break;
 
 	case SQL_C_DBCHAR:
-		tempStr = (char *)MY_MALLOC(bs->outLen[idx] * 2);
-		strncpy(tempStr, (char *)(buf), bs->outLen[idx] * 2);
-		tempStr[ bs->outLen[idx] * 2 ] = '\0';
-		val = PyString_FromString(tempStr);
-		MY_FREE(tempStr);
+		bs->convert = _db2_conv_dbchar;
 		break;
 
 	default:
-		val = PyString_FromString((SQLCHAR *)(buf));
+		bs->convert = _db2_conv_char;
 		break;
 	}
+}
 
-	return val;
+static PyObject *
+_SQL_CType_2_PyType(DB2BindStruct *bs, int idx)
+{
+	SQLPOINTER buf = (SQLPOINTER)((SQLCHAR *)bs->buf + (bs->bufLen * idx));
+
+	if ( bs->outLen[idx] == SQL_NULL_DATA ) {
+		Py_INCREF(Py_None);
+		return Py_None;
+	}
+
+	return bs->convert(bs, buf, idx);
 }
 
 static PyObject *
@@ -2094,7 +6287,19 @@ _DB2CursorObj_retrieve_rows(DB2CursorObj *self, int howmany)
 
 	if (howmany == -1) {
 		/* fetchone() */
-		return _DB2CursorObj_retrieve_one_row(self, numCols, 0);
+		val = _DB2CursorObj_retrieve_one_row(self, numCols, 0);
+		if (self->lobAutoRead) {
+			rows = PyList_New(1);
+			PyList_SET_ITEM(rows, 0, val);
+			if (!_DB2CursorObj_read_block_LOBs(self, rows, 0)) {
+				Py_DECREF(rows);
+				return NULL;
+			}
+			val = PyList_GET_ITEM(rows, 0);
+			Py_INCREF(val);
+			Py_DECREF(rows);
+		}
+		return val;
 	} else {
 		SQLUSMALLINT status;
 
@@ -2121,22 +6326,7 @@ _DB2CursorObj_retrieve_rows(DB2CursorObj *self, int howmany)
 static int
 _DB2CursorObj_reset_params(DB2CursorObj *self, int numParams)
 {
-	int i;
-	DB2ParamStruct *ps;
-
-	for (i=0; i < self->paramCount; i++) {
-		ps = self->paramList[i];
-		if (ps) {
-			if (ps->bufLen) {
-				MY_FREE(ps->buf);
-				ps->buf = NULL;
-			}
-			MY_FREE(ps);
-			ps = NULL;
-		}
-	}
-
-	if (self->paramList) { MY_FREE(self->paramList); }
+	_DB2ParamStruct_free_list(self->paramList, self->paramCount);
 
 	if (numParams) {
 		self->paramList = (DB2ParamStruct **)
@@ -2151,6 +6341,95 @@ _DB2CursorObj_reset_params(DB2CursorObj *self, int numParams)
 	return 1;
 }
 
+static void
+_DB2BindStruct_free_list(DB2BindStruct **list, int count)
+{
+	int i;
+	DB2BindStruct *bs;
+
+	for (i=0; i < count; i++) {
+		bs = list[i];
+		if (bs) {
+			MY_FREE(bs->buf);
+			MY_FREE(bs->outLen);
+			MY_FREE(bs);
+		}
+	}
+
+	if (list) { MY_FREE(list); }
+}
+
+static void
+_DB2ParamStruct_free_list(DB2ParamStruct **list, int count)
+{
+	int i;
+	DB2ParamStruct *ps;
+
+	for (i=0; i < count; i++) {
+		ps = list[i];
+		if (ps) {
+			_DB2ParamStruct_free_buf(ps);
+			MY_FREE(ps);
+		}
+	}
+
+	if (list) { MY_FREE(list); }
+}
+
+static void
+_DB2StmtEntry_free(DB2StmtEntry *e)
+{
+	if (e->hstmt) {
+		SQLFreeHandle(SQL_HANDLE_STMT, e->hstmt);
+	}
+
+	_DB2BindStruct_free_list(e->bindColList, e->bindColCount);
+	_DB2ParamStruct_free_list(e->paramList, e->paramCount);
+
+	if (e->rowStatus) { MY_FREE(e->rowStatus); }
+	if (e->stmt) { MY_FREE(e->stmt); }
+
+	Py_XDECREF(e->description);
+
+	MY_FREE(e);
+}
+
+static void
+_DB2ParamStruct_free_buf(DB2ParamStruct *ps)
+{
+	if (ps->buf) {
+		MY_FREE(ps->buf);
+		ps->buf = NULL;
+	}
+	if (ps->outLens) {
+		MY_FREE(ps->outLens);
+		ps->outLens = NULL;
+	}
+	Py_XDECREF(ps->lobSource);
+	ps->lobSource = NULL;
+	ps->bufLen = 0;
+	ps->bufCap = 0;
+	ps->boundBuf = NULL;
+}
+
+static void *
+_DB2ParamStruct_alloc_buf(DB2ParamStruct *ps, SQLINTEGER size)
+{
+	/*
+		Buffer of at least size bytes for the parameter value,
+		reusing the one of the last execute when it is big enough.
+	*/
+	if (ps->bufCap < size) {
+		if (ps->buf) {
+			MY_FREE(ps->buf);
+		}
+		ps->buf = MY_MALLOC(size);
+		ps->bufCap = size;
+	}
+
+	return ps->buf;
+}
+
 static void
 set_param_type_error(int paramIdx, SQLSMALLINT sqlType, char *requireType)
 {
@@ -2173,9 +6452,13 @@ _DB2CursorObj_get_param_info(DB2CursorObj *self, int numParams)
 	/* Get parameter info */
 	for ( i=0; i < numParams; i++ ) {
 		paramIdx = i + 1;
+		ps = self->paramList[i];
+		if (ps) {
+			/* described when the statement was prepared */
+			continue;
+		}
 		ps = (DB2ParamStruct *) MY_MALLOC(sizeof(DB2ParamStruct));
 		memset(ps, 0, sizeof(DB2ParamStruct));
-		self->paramList[i] = ps;
 
 		rc = SQLDescribeParam(
 			self->hstmt,
@@ -2187,10 +6470,12 @@ _DB2CursorObj_get_param_info(DB2CursorObj *self, int numParams)
 			);
 
 		if (!checkSuccess(rc)) {
+			MY_FREE(ps);
 			return 0;
 		}
 
 		ps->inOutType = SQL_PARAM_INPUT;
+		self->paramList[i] = ps;
 	}
 
 	return 1;
@@ -2210,7 +6495,6 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 	SQLINTEGER	intVal;
 	SQLDOUBLE       doubleVal;
 	SQLREAL       floatVal;
-	FILE		*fp;
 
 	for ( i=0; i < numParams; i++ ) {
 		paramIdx = i + 1;
@@ -2218,6 +6502,13 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 
 		paramVal = PyTuple_GetItem(params, i);
 
+		if (ps->outLens) {
+			/* bound as an array by executemany() */
+			_DB2ParamStruct_free_buf(ps);
+		}
+		Py_XDECREF(ps->lobSource);
+		ps->lobSource = NULL;
+
 		if (DEBUG > 2) {
 			fprintf(stderr, "* Param #%d: ColName(%s)\n", paramIdx, get_SQL_type_name(ps->dataType));
 			fprintf(stderr, "* Param #%d: ColSize(%d)\n", paramIdx, (int)ps->colSize);
@@ -2242,12 +6533,12 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 			if ( PyString_Check(paramVal) ) {
 				ps->bufLen = (SQLINTEGER)strlen( PyString_AsString(paramVal) ) + 1;
                 ps->bufLen = (ps->colSize + 1 > (SQLUINTEGER)ps->bufLen) ? ps->colSize + 1 : ps->bufLen;
-               	ps->buf = MY_MALLOC(sizeof(SQLCHAR) * (ps->bufLen));
+               	ps->buf = _DB2ParamStruct_alloc_buf(ps, sizeof(SQLCHAR) * (ps->bufLen));
 				strcpy((char *)ps->buf, PyString_AsString(paramVal) );
 				ps->outLen = PyString_Size(paramVal);
 			} else if ( paramVal == Py_None ) {
 				ps->outLen = SQL_NULL_DATA;
-				ps->buf = MY_MALLOC(sizeof(SQLCHAR) * (ps->bufLen));
+				ps->buf = _DB2ParamStruct_alloc_buf(ps, sizeof(SQLCHAR) * (ps->bufLen));
 			} else {
 				set_param_type_error(paramIdx, ps->dataType, "str");
 				return 0;
@@ -2259,13 +6550,15 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 		case SQL_BLOB:
 		case SQL_DBCLOB:
 
-			if ( PyFile_Check(paramVal) ) {
+			if ( _db2_is_LOB_stream(paramVal) ) {
 				CDataType = SQL_C_BINARY;
 
-				ps->bufLen = ps->colSize + 1;
-				ps->buf = MY_MALLOC(ps->bufLen);
-				fp = PyFile_AsFile(paramVal);
-				memcpy(ps->buf, &fp, sizeof(FILE *));
+				/* SQLParamData() gives back ps->buf: ps */
+				ps->bufLen = sizeof(DB2ParamStruct *);
+				ps->buf = _DB2ParamStruct_alloc_buf(ps, ps->bufLen);
+				memcpy(ps->buf, &ps, sizeof(ps));
+				Py_INCREF(paramVal);
+				ps->lobSource = paramVal;
 				ps->outLen = SQL_DATA_AT_EXEC;
 
 			} else if ( PyString_Check(paramVal) ) {
@@ -2273,7 +6566,7 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 				CDataType = SQL_C_CHAR;
 
 				ps->bufLen = PyString_Size(paramVal);
-				ps->buf = MY_MALLOC(sizeof(SQLCHAR) * (ps->bufLen+1));
+				ps->buf = _DB2ParamStruct_alloc_buf(ps, sizeof(SQLCHAR) * (ps->bufLen+1));
 				strcpy((char *)ps->buf, PyString_AsString(paramVal));
 				ps->outLen = ps->bufLen;
 
@@ -2281,11 +6574,12 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 				CDataType = SQL_C_BINARY;
 
 				ps->bufLen = ps->colSize + 1;
-				ps->buf = MY_MALLOC(ps->bufLen);
+				ps->buf = _DB2ParamStruct_alloc_buf(ps, ps->bufLen);
 
 				ps->outLen = SQL_NULL_DATA;
 			} else {
-				set_param_type_error(paramIdx, ps->dataType, "file | str");
+				set_param_type_error(paramIdx, ps->dataType,
+					"file | str | buffer | iterator");
 				return 0;
 			}
 
@@ -2295,7 +6589,7 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 			CDataType = SQL_C_SHORT;
 
 			ps->bufLen = sizeof(SQLSMALLINT);
-			ps->buf = MY_MALLOC(ps->bufLen);
+			ps->buf = _DB2ParamStruct_alloc_buf(ps, ps->bufLen);
 
 			if ( PyInt_Check(paramVal) ) {
 				smallIntVal = (SQLSMALLINT)PyInt_AsLong(paramVal);
@@ -2314,7 +6608,7 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 			CDataType = SQL_C_LONG;
 
 			ps->bufLen = sizeof(SQLINTEGER);
-			ps->buf = MY_MALLOC(ps->bufLen);
+			ps->buf = _DB2ParamStruct_alloc_buf(ps, ps->bufLen);
 
 			if ( PyInt_Check(paramVal) ) {
 				intVal = (SQLINTEGER)PyInt_AsLong(paramVal);
@@ -2337,7 +6631,7 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 			if ( PyLong_Check(paramVal) || PyInt_Check(paramVal) ) {
 				tmpVal = PyObject_Str(paramVal);/* str(long) */
 				ps->bufLen = PyString_Size(tmpVal);
-				ps->buf = MY_MALLOC(sizeof(SQLCHAR) * (ps->bufLen+1));
+				ps->buf = _DB2ParamStruct_alloc_buf(ps, sizeof(SQLCHAR) * (ps->bufLen+1));
 
 				strcpy((char *)ps->buf, PyString_AsString(tmpVal));
 
@@ -2345,7 +6639,7 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 				ps->outLen = ps->bufLen;
 			} else if ( paramVal == Py_None ) {
 				ps->bufLen = ps->colSize + ps->decDigits + 1;
-				ps->buf = MY_MALLOC(sizeof(SQLCHAR) * (ps->bufLen+1));
+				ps->buf = _DB2ParamStruct_alloc_buf(ps, sizeof(SQLCHAR) * (ps->bufLen+1));
 				ps->outLen = SQL_NULL_DATA;
 			} else {
 				set_param_type_error(paramIdx, ps->dataType, "long int");
@@ -2359,7 +6653,7 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 			CDataType = SQL_C_DOUBLE;
 			if ( PyFloat_Check(paramVal) )  {
 				ps->bufLen = sizeof(SQLDOUBLE);
-				ps->buf = MY_MALLOC(ps->bufLen);
+				ps->buf = _DB2ParamStruct_alloc_buf(ps, ps->bufLen);
 				if (DEBUG) {
 					fprintf(stderr, "* FLOAT\n");
 				}
@@ -2372,7 +6666,7 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 			}
 			else if ( PyInt_Check(paramVal) ) {
 				ps->bufLen = sizeof(SQLDOUBLE);
-				ps->buf = MY_MALLOC(ps->bufLen);
+				ps->buf = _DB2ParamStruct_alloc_buf(ps, ps->bufLen);
 				if (DEBUG) {
 					fprintf(stderr, "* Integer to FLOAT\n");
 				}
@@ -2381,7 +6675,7 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 				ps->outLen = ps->bufLen;
 			} else if ( paramVal == Py_None ) {
 				ps->bufLen = sizeof(SQLDOUBLE);
-				ps->buf = MY_MALLOC(ps->bufLen);
+				ps->buf = _DB2ParamStruct_alloc_buf(ps, ps->bufLen);
 				ps->outLen = SQL_NULL_DATA;
 			} else {
 				set_param_type_error(paramIdx, ps->dataType, "float");
@@ -2392,7 +6686,7 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 			CDataType = SQL_C_FLOAT;
 			if ( PyFloat_Check(paramVal) )  {
 				ps->bufLen = sizeof(SQLREAL);
-				ps->buf = MY_MALLOC(ps->bufLen);
+				ps->buf = _DB2ParamStruct_alloc_buf(ps, ps->bufLen);
 				if (DEBUG) {
 					fprintf(stderr, "* FLOAT\n");
 				}
@@ -2405,7 +6699,7 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 			}
 			else if ( PyInt_Check(paramVal) ) {
 				ps->bufLen = sizeof(SQLREAL);
-				ps->buf = MY_MALLOC(ps->bufLen);
+				ps->buf = _DB2ParamStruct_alloc_buf(ps, ps->bufLen);
 				if (DEBUG) {
 					fprintf(stderr, "* Integer to FLOAT\n");
 				}
@@ -2414,7 +6708,7 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 				ps->outLen = ps->bufLen;
 			} else if ( paramVal == Py_None ) {
 				ps->bufLen = sizeof(SQLREAL);
-				ps->buf = MY_MALLOC(ps->bufLen);
+				ps->buf = _DB2ParamStruct_alloc_buf(ps, ps->bufLen);
 				ps->outLen = SQL_NULL_DATA;
 			} else {
 				set_param_type_error(paramIdx, ps->dataType, "float");
@@ -2427,54 +6721,303 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 			if ( PyFloat_Check(paramVal) )  {
 				tmpVal = PyObject_Str(paramVal);
 				ps->bufLen = PyString_Size(tmpVal);
-				ps->buf = MY_MALLOC(sizeof(SQLCHAR) * (ps->bufLen+1));
+				ps->buf = _DB2ParamStruct_alloc_buf(ps, sizeof(SQLCHAR) * (ps->bufLen+1));
 				strcpy((char *)ps->buf, PyString_AsString(tmpVal));
 				Py_DECREF(tmpVal);
 				ps->outLen = ps->bufLen;
 			} else if ( PyInt_Check(paramVal) ) {
 				tmpVal = PyObject_Str(paramVal);
 				ps->bufLen = PyString_Size(tmpVal);
-				ps->buf = MY_MALLOC(sizeof(SQLCHAR) * (ps->bufLen+1));
+				ps->buf = _DB2ParamStruct_alloc_buf(ps, sizeof(SQLCHAR) * (ps->bufLen+1));
 				strcpy((char *)ps->buf, PyString_AsString(tmpVal));
 				Py_DECREF(tmpVal);
 				ps->outLen = ps->bufLen;
 			} else if ( PyLong_Check(paramVal)) {
 				tmpVal = PyObject_Str(paramVal);/* str(long) */
 				ps->bufLen = PyString_Size(tmpVal);
-				ps->buf = MY_MALLOC(sizeof(SQLCHAR) * (ps->bufLen+1));
+				ps->buf = _DB2ParamStruct_alloc_buf(ps, sizeof(SQLCHAR) * (ps->bufLen+1));
 				strcpy((char *)ps->buf, PyString_AsString(tmpVal));
 				Py_DECREF(tmpVal);
 				ps->outLen = ps->bufLen;
 			} else if ( paramVal == Py_None ) {
                 CDataType = SQL_C_DOUBLE;
 				ps->bufLen = sizeof(SQLDOUBLE);
-				ps->buf = MY_MALLOC(ps->bufLen);
+				ps->buf = _DB2ParamStruct_alloc_buf(ps, ps->bufLen);
 				ps->outLen = SQL_NULL_DATA;
 			} else {
 				set_param_type_error(paramIdx, ps->dataType, "float");
 				return 0;
 			}
-			break;
-		default:
-			if (DEBUG) {
-				fprintf(stderr, "* Param SQL Type: %d\n", ps->dataType);
+			break;
+		default:
+			if (DEBUG) {
+				fprintf(stderr, "* Param SQL Type: %d\n", ps->dataType);
+			}
+
+			CDataType = SQL_C_CHAR;
+
+			ps->bufLen = ps->colSize + ps->decDigits + 2;
+			ps->buf = _DB2ParamStruct_alloc_buf(ps, sizeof(SQLCHAR) * (ps->bufLen));
+
+			if ( paramVal == Py_None ) {
+				ps->outLen = SQL_NULL_DATA;
+			} else {
+				tmpVal = PyObject_Str(paramVal);
+				ps->outLen = PyString_Size(tmpVal);
+				strcpy((char *)ps->buf, PyString_AsString(tmpVal));
+				Py_DECREF(tmpVal);
+			}
+			break;
+		}
+
+		if (ps->boundBuf == ps->buf && ps->boundCType == CDataType
+				&& ps->boundLen == ps->bufLen) {
+			/* still bound from the last execute */
+			continue;
+		}
+
+		rc = SQLBindParameter(
+			self->hstmt,		/* Statement Handle */
+			paramIdx,		/* Parameter Number */
+			ps->inOutType,		/* InputOutput Type */
+			CDataType,		/* Value Type */
+			ps->dataType,		/* Parameter Type */
+			ps->colSize,		/* Column Size */
+			ps->decDigits,		/* Decimal Digits */
+			(SQLPOINTER)ps->buf,	/* Parameter Value Ptr */
+			ps->bufLen,		/* Buffer Length */
+			&ps->outLen		/* StrLen or IndPtr */
+			);
+
+		if (rc != SQL_SUCCESS) {
+			ps->boundBuf = NULL;
+			return -1;
+		}
+
+		ps->boundBuf = ps->buf;
+		ps->boundLen = ps->bufLen;
+		ps->boundCType = CDataType;
+	}
+
+	return 1;
+}
+
+/*
+ * Bind every parameter as a column-wise array of len(rows) values.
+ *
+ * Returns 1 on success, 0 with a Python exception set, -1 on a CLI
+ * error and 2 when a LOB file is found (files are sent with
+ * SQLPutData() and cannot go in an array).
+ */
+static int
+_DB2CursorObj_prepare_param_array(DB2CursorObj *self, int numParams, PyObject *rows)
+{
+	int		i, j, nRows;
+	SQLRETURN	rc;
+	SQLSMALLINT	paramIdx;
+	DB2ParamStruct	*ps;
+	PyObject	*paramVal, *tmpVal, *strs;
+	SQLSMALLINT	CDataType;
+	SQLINTEGER	width;
+	char		*requireType;
+
+	nRows = PyList_GET_SIZE(rows);
+
+	for ( i=0; i < numParams; i++ ) {
+		paramIdx = i + 1;
+		ps = self->paramList[i];
+
+		_DB2ParamStruct_free_buf(ps);
+		ps->outLens = (SQLINTEGER *)MY_MALLOC(sizeof(SQLINTEGER) * nRows);
+
+		switch (ps->dataType) {
+
+		case SQL_SMALLINT:
+		case SQL_INTEGER:
+			if (ps->dataType == SQL_SMALLINT) {
+				CDataType = SQL_C_SHORT;
+				ps->bufLen = sizeof(SQLSMALLINT);
+			} else {
+				CDataType = SQL_C_LONG;
+				ps->bufLen = sizeof(SQLINTEGER);
+			}
+			ps->buf = MY_MALLOC(ps->bufLen * nRows);
+
+			for (j=0; j < nRows; j++) {
+				paramVal = PyTuple_GET_ITEM(PyList_GET_ITEM(rows, j), i);
+
+				if ( PyInt_Check(paramVal) ) {
+					if (CDataType == SQL_C_SHORT) {
+						((SQLSMALLINT *)ps->buf)[j] =
+							(SQLSMALLINT)PyInt_AsLong(paramVal);
+					} else {
+						((SQLINTEGER *)ps->buf)[j] =
+							(SQLINTEGER)PyInt_AsLong(paramVal);
+					}
+					ps->outLens[j] = ps->bufLen;
+				} else if ( paramVal == Py_None ) {
+					ps->outLens[j] = SQL_NULL_DATA;
+				} else {
+					set_param_type_error(paramIdx, ps->dataType, "int");
+					return 0;
+				}
+			}
+
+			break;
+
+		case SQL_FLOAT:
+		case SQL_DOUBLE:
+		case SQL_REAL:
+			if (ps->dataType == SQL_REAL) {
+				CDataType = SQL_C_FLOAT;
+				ps->bufLen = sizeof(SQLREAL);
+			} else {
+				CDataType = SQL_C_DOUBLE;
+				ps->bufLen = sizeof(SQLDOUBLE);
+			}
+			ps->buf = MY_MALLOC(ps->bufLen * nRows);
+
+			for (j=0; j < nRows; j++) {
+				paramVal = PyTuple_GET_ITEM(PyList_GET_ITEM(rows, j), i);
+
+				if ( PyFloat_Check(paramVal) || PyInt_Check(paramVal) ) {
+					if (CDataType == SQL_C_FLOAT) {
+						((SQLREAL *)ps->buf)[j] =
+							(SQLREAL)PyFloat_AsDouble(paramVal);
+					} else {
+						((SQLDOUBLE *)ps->buf)[j] =
+							(SQLDOUBLE)PyFloat_AsDouble(paramVal);
+					}
+					ps->outLens[j] = ps->bufLen;
+				} else if ( paramVal == Py_None ) {
+					ps->outLens[j] = SQL_NULL_DATA;
+				} else {
+					set_param_type_error(paramIdx, ps->dataType, "float");
+					return 0;
+				}
+			}
+
+			break;
+
+		default:
+			/*
+			 * Everything else goes as SQL_C_CHAR, in rows of
+			 * the widest value of the batch.
+			 */
+			CDataType = SQL_C_CHAR;
+
+			switch (ps->dataType) {
+			case SQL_CLOB:
+			case SQL_BLOB:
+			case SQL_DBCLOB:
+				requireType = "file | str | buffer | iterator";
+				break;
+			case SQL_BIGINT:
+				requireType = "long int";
+				break;
+			case SQL_DECIMAL:
+			case SQL_NUMERIC:
+				requireType = "float";
+				break;
+			case SQL_CHAR:
+			case SQL_VARCHAR:
+			case SQL_LONGVARCHAR:
+			case SQL_VARBINARY:
+			case SQL_LONGVARBINARY:
+			case SQL_BINARY:
+			case SQL_DATALINK:
+			case SQL_TYPE_DATE:
+			case SQL_TYPE_TIME:
+			case SQL_TYPE_TIMESTAMP:
+				requireType = "str";
+				break;
+			default:
+				requireType = NULL;	/* str() of anything */
+				break;
+			}
+
+			strs = PyList_New(nRows);
+			width = 1;
+
+			for (j=0; j < nRows; j++) {
+				paramVal = PyTuple_GET_ITEM(PyList_GET_ITEM(rows, j), i);
+
+				if ( paramVal == Py_None ) {
+					Py_INCREF(Py_None);
+					PyList_SET_ITEM(strs, j, Py_None);
+					continue;
+				}
+
+				tmpVal = NULL;
+
+				if ( PyString_Check(paramVal) ) {
+					if (ps->dataType != SQL_BIGINT &&
+						ps->dataType != SQL_DECIMAL &&
+						ps->dataType != SQL_NUMERIC) {
+						Py_INCREF(paramVal);
+						tmpVal = paramVal;
+					}
+				} else if ( _db2_is_LOB_stream(paramVal) ) {
+					if (ps->dataType == SQL_CLOB ||
+						ps->dataType == SQL_BLOB ||
+						ps->dataType == SQL_DBCLOB) {
+						Py_DECREF(strs);
+						return 2;
+					}
+				} else if ( PyInt_Check(paramVal) || PyLong_Check(paramVal) ) {
+					if (ps->dataType == SQL_BIGINT ||
+						ps->dataType == SQL_DECIMAL ||
+						ps->dataType == SQL_NUMERIC) {
+						tmpVal = PyObject_Str(paramVal);
+					}
+				} else if ( PyFloat_Check(paramVal) ) {
+					if (ps->dataType == SQL_DECIMAL ||
+						ps->dataType == SQL_NUMERIC) {
+						tmpVal = PyObject_Str(paramVal);
+					}
+				}
+
+				if ( !tmpVal && !requireType ) {
+					tmpVal = PyObject_Str(paramVal);
+				}
+
+				if ( !tmpVal ) {
+					Py_DECREF(strs);
+					if (!PyErr_Occurred()) {
+						set_param_type_error(paramIdx,
+							ps->dataType, requireType);
+					}
+					return 0;
+				}
+
+				if (PyString_GET_SIZE(tmpVal) + 1 > width) {
+					width = PyString_GET_SIZE(tmpVal) + 1;
+				}
+				PyList_SET_ITEM(strs, j, tmpVal);
 			}
 
-			CDataType = SQL_C_CHAR;
+			ps->bufLen = width;
+			ps->buf = MY_MALLOC(sizeof(SQLCHAR) * ps->bufLen * nRows);
 
-			ps->bufLen = ps->colSize + ps->decDigits + 2;
-			ps->buf = MY_MALLOC(sizeof(SQLCHAR) * (ps->bufLen));
+			for (j=0; j < nRows; j++) {
+				tmpVal = PyList_GET_ITEM(strs, j);
 
-			if ( paramVal == Py_None ) {
-				ps->outLen = SQL_NULL_DATA;
-			} else {
-				tmpVal = PyObject_Str(paramVal);
-				ps->outLen = PyString_Size(tmpVal);
-				strcpy((char *)ps->buf, PyString_AsString(tmpVal));
-				Py_DECREF(tmpVal);
+				if ( tmpVal == Py_None ) {
+					((SQLCHAR *)ps->buf)[ps->bufLen * j] = '\0';
+					ps->outLens[j] = SQL_NULL_DATA;
+				} else {
+					memcpy((SQLCHAR *)ps->buf + ps->bufLen * j,
+						PyString_AS_STRING(tmpVal),
+						PyString_GET_SIZE(tmpVal) + 1);
+					ps->outLens[j] = PyString_GET_SIZE(tmpVal);
+				}
 			}
+
+			Py_DECREF(strs);
+
 			break;
 		}
+
 		rc = SQLBindParameter(
 			self->hstmt,		/* Statement Handle */
 			paramIdx,		/* Parameter Number */
@@ -2484,8 +7027,8 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 			ps->colSize,		/* Column Size */
 			ps->decDigits,		/* Decimal Digits */
 			(SQLPOINTER)ps->buf,	/* Parameter Value Ptr */
-			ps->bufLen,		/* Buffer Length */
-			&ps->outLen		/* StrLen or IndPtr */
+			ps->bufLen,		/* Buffer Length (per row) */
+			ps->outLens		/* StrLen or IndPtr array */
 			);
 
 		if (rc != SQL_SUCCESS) {
@@ -2496,85 +7039,497 @@ _DB2CursorObj_prepare_param_vars(DB2CursorObj *self, int numParams, PyObject *pa
 	return 1;
 }
 
+static int
+_db2_LOB_locator_type(char *lobTypeName, SQLSMALLINT *locType)
+{
+	/* 0 with an exception set for an unknown LOB type name */
+	if (strcmp(lobTypeName, "clob") == 0) {
+		*locType = SQL_C_CLOB_LOCATOR;
+	} else if (strcmp(lobTypeName, "blob") == 0) {
+		*locType = SQL_C_BLOB_LOCATOR;
+	} else if (strcmp(lobTypeName, "dbclob") == 0) {
+		*locType = SQL_C_DBCLOB_LOCATOR;
+	} else {
+		PyErr_Format(DB2_InterfaceError,
+			"unknown LOB type '%.20s'", lobTypeName);
+		return 0;
+	}
+	return 1;
+}
+
+static int
+_DB2CursorObj_LOB_stmt(DB2CursorObj *self, SQLHANDLE *hstmt)
+{
+	/*
+	 * Statement handle for the LOB locator functions, allocated
+	 * the first time and kept until the cursor is closed.
+	 * Returns 0 with an exception set on failure.
+	 */
+	SQLRETURN	rc;
+
+	if (!self->hstmtLOB) {
+		rc = SQLAllocHandle(SQL_HANDLE_STMT, self->hdbc, &self->hstmtLOB);
+		if (rc != SQL_SUCCESS) {
+			self->hstmtLOB = (SQLHANDLE)NULL;
+			_DB2ConnObj_Conn_Error(self->conn, NULL);
+			return 0;
+		}
+	}
+
+	*hstmt = self->hstmtLOB;
+	return 1;
+}
+
+static PyObject *
+DB2CursorObj_LOB_length(DB2CursorObj *self, PyObject *args)
+{
+	/*
+
+	._LOBLength(locator, 'blob'|'clob'|'dbclob')
+
+	    Length of the LOB value of the locator
+
+	*/
+	SQLRETURN	rc;
+	SQLINTEGER	loc, dataLen = 0, dummyInd;
+	SQLSMALLINT	locType;
+	char		*lobTypeName = NULL;
+	SQLHANDLE	hstmt;
+
+	if (!PyArg_ParseTuple(args, "is", &loc, &lobTypeName)) {
+		return NULL;
+	}
+	if (!_db2_LOB_locator_type(lobTypeName, &locType)) {
+		return NULL;
+	}
+	if (!_DB2CursorObj_LOB_stmt(self, &hstmt)) {
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS ;
+
+	rc = SQLGetLength(hstmt, locType, loc, &dataLen, &dummyInd);
+
+	Py_END_ALLOW_THREADS ;
+
+	if (!checkSuccess(rc)) {
+		return _DB2_Stmt_Error(hstmt);
+	}
+
+	return PyInt_FromLong(dataLen);
+}
+
 static PyObject *
 DB2CursorObj_read_LOB(DB2CursorObj *self, PyObject *args)
 {
+	/*
+
+	._readLOB(locator, 'blob'|'clob'|'dbclob'[, offset, length])
+
+	    The LOB value of the locator, or length bytes of it from
+	    offset (0-based) on. The caller keeps offset + length within
+	    the LOB.
+
+	*/
 	SQLRETURN	rc;
-	SQLINTEGER	loc, dataLen, outLen, dummyInd;
+	SQLINTEGER	loc, outLen = 0, dummyInd;
 	SQLSMALLINT	locType;
 	char		*lobTypeName = NULL;
-	char		*buf;
+	int		offset = 0, length = -1;
 	PyObject	*retData;
 	SQLHANDLE	hstmt;
 
-	if (!PyArg_ParseTuple(args, "is", &loc, &lobTypeName)) {
+	if (!PyArg_ParseTuple(args, "is|ii",
+			&loc, &lobTypeName, &offset, &length)) {
 		return NULL;
 	}
-	if (strcmp(lobTypeName, "clob") == 0) {
-		locType = SQL_C_CLOB_LOCATOR;
-	} else if (strcmp(lobTypeName, "blob") == 0) {
-		locType = SQL_C_BLOB_LOCATOR;
-	} else if (strcmp(lobTypeName, "dbclob") == 0) {
-		locType = SQL_C_DBCLOB_LOCATOR;
-	} else {
+	if (!_db2_LOB_locator_type(lobTypeName, &locType)) {
+		return NULL;
+	}
+	if (!_DB2CursorObj_LOB_stmt(self, &hstmt)) {
 		return NULL;
 	}
 
-	rc = SQLAllocHandle( SQL_HANDLE_STMT, self->hdbc, &hstmt);
+	if (length < 0) {
+		Py_BEGIN_ALLOW_THREADS ;
+
+		rc = SQLGetLength(hstmt, locType, loc, (SQLINTEGER *)&length,
+				&dummyInd);
+
+		Py_END_ALLOW_THREADS ;
+
+		if (!checkSuccess(rc)) {
+			return _DB2_Stmt_Error(hstmt);
+		}
+		length -= offset;
+	}
+
+	if (length <= 0) {
+		return PyString_FromString("");
+	}
+
+	if (!(retData = PyString_FromStringAndSize(NULL, length))) {
+		return PyErr_NoMemory();
+	}
+
+	Py_BEGIN_ALLOW_THREADS ;
 
-	rc = SQLGetLength(
+	rc = SQLGetSubString(
 		hstmt,
 		locType,
 		loc,
-		&dataLen,
+		offset + 1, length,
+		SQL_C_BINARY,
+		PyString_AS_STRING(retData),
+		length,
+		&outLen,
 		&dummyInd
 		);
 
-	if (!(retData = PyString_FromStringAndSize(NULL, dataLen))) {
-		return PyErr_NoMemory();
+	Py_END_ALLOW_THREADS ;
+
+	if (!checkSuccess(rc)) {
+		Py_DECREF(retData);
+		return _DB2_Stmt_Error(hstmt);
+	}
+
+	STATS_ADD(self, lobReads, 1);
+	STATS_ADD(self, lobBytes, outLen < length ? outLen : length);
+
+	if (outLen >= 0 && outLen < length) {
+		_PyString_Resize(&retData, outLen);
 	}
 
-	buf = PyString_AsString(retData);
+	return retData;
+}
+
+static PyObject *
+DB2CursorObj_read_LOB_into(DB2CursorObj *self, PyObject *args)
+{
+	/*
+
+	._readLOBInto(locator, 'blob'|'clob'|'dbclob', offset, length, buffer)
+
+	    Read length bytes of the LOB value from offset (0-based) on
+	    into the writable buffer. Returns the number of bytes read.
+
+	*/
+	SQLRETURN	rc;
+	SQLINTEGER	loc, outLen = 0, dummyInd;
+	SQLSMALLINT	locType;
+	char		*lobTypeName = NULL;
+	int		offset, length;
+	Py_buffer	buf;
+	SQLHANDLE	hstmt;
+
+	if (!PyArg_ParseTuple(args, "isiiw*",
+			&loc, &lobTypeName, &offset, &length, &buf)) {
+		return NULL;
+	}
+	if (length > buf.len) {
+		length = buf.len;
+	}
+	if (!_db2_LOB_locator_type(lobTypeName, &locType) ||
+			!_DB2CursorObj_LOB_stmt(self, &hstmt)) {
+		PyBuffer_Release(&buf);
+		return NULL;
+	}
+
+	if (length <= 0) {
+		PyBuffer_Release(&buf);
+		return PyInt_FromLong(0);
+	}
+
+	Py_BEGIN_ALLOW_THREADS ;
 
 	rc = SQLGetSubString(
 		hstmt,
 		locType,
 		loc,
-		1, dataLen,
+		offset + 1, length,
 		SQL_C_BINARY,
-		buf,
-		dataLen,
+		buf.buf,
+		length,
 		&outLen,
 		&dummyInd
 		);
 
-	rc = SQLFreeHandle( SQL_HANDLE_STMT, hstmt);
+	Py_END_ALLOW_THREADS ;
+
+	PyBuffer_Release(&buf);
+
+	if (!checkSuccess(rc)) {
+		return _DB2_Stmt_Error(hstmt);
+	}
+
+	STATS_ADD(self, lobReads, 1);
+	STATS_ADD(self, lobBytes, outLen < length ? outLen : length);
+
+	return PyInt_FromLong(outLen < length ? outLen : length);
+}
+
+static int
+_db2_is_LOB_stream(PyObject *v)
+{
+	/* sent as a data-at-exec LOB: file, reader, buffer or iterator */
+	if (v == Py_None || PyString_Check(v) || PyUnicode_Check(v)) {
+		return 0;
+	}
+
+	return PyFile_Check(v) ||
+		PyObject_HasAttrString(v, "read") ||
+		PyObject_CheckBuffer(v) ||
+		PyObject_CheckReadBuffer(v) ||
+		PyIter_Check(v);
+}
+
+static int
+_db2_get_buffer(PyObject *o, Py_buffer *view)
+{
+	/* read-only view of the bytes of o; 0 with an exception set */
+	const void	*ptr;
+	Py_ssize_t	len;
+
+	if (PyUnicode_Check(o)) {
+		PyErr_SetString(PyExc_TypeError,
+			"LOB data must be str or a buffer, not unicode");
+		return 0;
+	}
+	if (PyObject_CheckBuffer(o)) {
+		return PyObject_GetBuffer(o, view, PyBUF_SIMPLE) == 0;
+	}
+	if (PyObject_AsReadBuffer(o, &ptr, &len) < 0) {
+		return 0;
+	}
+	return PyBuffer_FillInfo(view, o, (void *)ptr, len, 1, PyBUF_SIMPLE) == 0;
+}
+
+static int
+_DB2CursorObj_put_data(DB2CursorObj *self, const char *buf, Py_ssize_t len)
+{
+	/*
+	 * SQLPutData() len bytes from buf, lobChunkSize bytes at a time
+	 * and without the GIL. Returns 0 with an exception set.
+	 */
+	SQLRETURN	rc = SQL_SUCCESS;
+	Py_ssize_t	n;
+
+	STATS_ADD(self, bytesBound, len);
+
+	Py_BEGIN_ALLOW_THREADS ;
+
+	do {
+		n = len > self->lobChunkSize ? self->lobChunkSize : len;
+		rc = SQLPutData(self->hstmt, (SQLPOINTER)buf, (SQLINTEGER)n);
+		buf += n;
+		len -= n;
+	} while (len > 0 && checkSuccess(rc));
+
+	Py_END_ALLOW_THREADS ;
+
+	if (!checkSuccess(rc)) {
+		_DB2CursorObj_Cursor_Error(self, NULL);
+		return 0;
+	}
+
+	return 1;
+}
+
+static int
+_DB2CursorObj_send_lob_file(DB2CursorObj *self, PyObject *file)
+{
+	SQLRETURN	rc = SQL_SUCCESS;
+	FILE		*fp = PyFile_AsFile(file);
+	char		*buf;
+	size_t		count;
+	int		sent = 0;
+
+	/* fseek(fp, 0L, SEEK_SET); */
+
+	if (!fp) {
+		PyErr_SetString(PyExc_ValueError, "I/O operation on closed file");
+		return 0;
+	}
+
+	buf = (char *) MY_MALLOC(self->lobChunkSize);
+	if (!buf) {
+		PyErr_NoMemory();
+		return 0;
+	}
+
+	/* keeps other threads from closing the file while it is read */
+	PyFile_IncUseCount((PyFileObject *)file);
+
+	Py_BEGIN_ALLOW_THREADS ;
+
+	while (1) {
+		count = fread(buf, (size_t) 1, (size_t) self->lobChunkSize, fp);
+		if (count == 0 && sent) {
+			break;
+		}
+		rc = SQLPutData(
+			self->hstmt,
+			(SQLPOINTER)buf,
+			(SQLINTEGER)count);
+		sent = 1;
+		if (count == 0 || !checkSuccess(rc)) {
+			break;
+		}
+	}
+
+	Py_END_ALLOW_THREADS ;
+
+	PyFile_DecUseCount((PyFileObject *)file);
+
+	MY_FREE(buf);
+
+	if (!checkSuccess(rc)) {
+		_DB2CursorObj_Cursor_Error(self, NULL);
+		return 0;
+	}
+
+	return 1;
+}
+
+static int
+_DB2CursorObj_send_lob(DB2CursorObj *self, DB2ParamStruct *ps)
+{
+	/*
+	 * Send the value of a data-at-exec LOB parameter: a file, an
+	 * object with read(), a buffer or an iterator of chunks.
+	 *
+	 * Buffers, and chunks of at least lobChunkSize bytes, are sent
+	 * from where they are. Smaller chunks are gathered so that every
+	 * SQLPutData() but the last sends lobChunkSize bytes.
+	 *
+	 * Returns 0 with an exception set on failure.
+	 */
+	PyObject	*src = ps->lobSource;
+	PyObject	*iter = NULL, *chunk;
+	Py_buffer	view;
+	char		*stage = NULL;
+	Py_ssize_t	staged = 0, n;
+	int		sent = 0, ok = 1, bRead;
+
+	if (PyFile_Check(src)) {
+		return _DB2CursorObj_send_lob_file(self, src);
+	}
+
+	bRead = PyObject_HasAttrString(src, "read");
+
+	if (!bRead && (PyObject_CheckBuffer(src) || PyObject_CheckReadBuffer(src))) {
+		if (!_db2_get_buffer(src, &view)) {
+			return 0;
+		}
+		ok = _DB2CursorObj_put_data(self, view.buf, view.len);
+		PyBuffer_Release(&view);
+		return ok;
+	}
+
+	if (!bRead && !(iter = PyObject_GetIter(src))) {
+		return 0;
+	}
+
+	while (ok) {
+		if (bRead) {
+			chunk = PyObject_CallMethod(src, "read", "n",
+						(Py_ssize_t)self->lobChunkSize);
+		} else {
+			chunk = PyIter_Next(iter);
+		}
+		if (!chunk) {
+			ok = !PyErr_Occurred();
+			break;
+		}
+		if (!_db2_get_buffer(chunk, &view)) {
+			Py_DECREF(chunk);
+			ok = 0;
+			break;
+		}
+		Py_DECREF(chunk);
+
+		if (view.len == 0 && bRead) {
+			PyBuffer_Release(&view);
+			break;	/* EOF */
+		}
+
+		if (staged == 0 && view.len >= self->lobChunkSize) {
+			ok = _DB2CursorObj_put_data(self, view.buf, view.len);
+			sent = 1;
+		} else {
+			char	*p = (char *)view.buf;
+			Py_ssize_t left = view.len;
+
+			if (!stage) {
+				stage = (char *) MY_MALLOC(self->lobChunkSize);
+				if (!stage) {
+					PyErr_NoMemory();
+					ok = 0;
+				}
+			}
+			while (ok && left > 0) {
+				n = self->lobChunkSize - staged;
+				if (n > left) n = left;
+				memcpy(stage + staged, p, n);
+				staged += n;
+				p += n;
+				left -= n;
+				if (staged == self->lobChunkSize) {
+					ok = _DB2CursorObj_put_data(self, stage, staged);
+					staged = 0;
+					sent = 1;
+				}
+			}
+		}
+		PyBuffer_Release(&view);
+	}
+
+	if (ok && (staged || !sent)) {
+		/* the last chunk, or the empty value */
+		ok = _DB2CursorObj_put_data(self, stage ? stage : "", staged);
+	}
 
-	return retData;
+	Py_XDECREF(iter);
+	if (stage) {
+		MY_FREE(stage);
+	}
+
+	return ok;
 }
 
-static int
-_DB2CursorObj_send_lob_file(DB2CursorObj *self, FILE *fp)
+static PyObject *
+DB2CursorObj_LOB_chunk(DB2CursorObj *self, PyObject *args)
 {
-	SQLRETURN rc;
-	char buf[1024];
-	size_t count;
+	/*
 
-	/* fseek(fp, 0L, SEEK_SET); */
+	._LOBUploadChunk([megabytes])
 
-	while (1) {
-		count = fread(buf, (size_t) 1, (size_t) 1024, fp);
-		if (count == 0 || count == -1) {
-			break;
-		} else if (count > 0) {
-			rc = SQLPutData(
-				self->hstmt,
-				(SQLPOINTER)buf,
-				(SQLINTEGER)count);
+	    Size of the SQLPutData() chunks of LOB parameters, in MB.
+	    Sets it if given, returns the previous value.
+
+	*/
+	double		mb = -1.0, old;
+
+	if (!PyArg_ParseTuple(args, "|d", &mb)) {
+		return NULL;
+	}
+
+	old = self->lobChunkSize / (1024.0 * 1024.0);
+
+	if (mb > LOB_CHUNK_MAX_MB) {
+		PyErr_Format(PyExc_ValueError,
+			"LOB upload chunk SHOULD be at most %d MB", LOB_CHUNK_MAX_MB);
+		return NULL;
+	}
+
+	if (mb >= 0.0) {
+		self->lobChunkSize = (int)(mb * 1024 * 1024);
+		if (self->lobChunkSize < 1) {
+			self->lobChunkSize = 1;
 		}
 	}
 
-	return count ? 0 : 1;
+	return PyFloat_FromDouble(old);
 }
 
 void
@@ -2634,15 +7589,476 @@ DB2CursorObj_scrollable_flag(DB2CursorObj *self, PyObject *args)
 		return NULL;
 	}
 
-	if (PyObject_IsTrue(obj)) {
-		self->bScrollable = 1;
-	} else {
-		self->bScrollable = 0;
+	if (PyObject_IsTrue(obj) != self->bScrollable) {
+		self->bScrollable = PyObject_IsTrue(obj) ? 1 : 0;
+
+		/* the cursor type is fixed at SQLPrepare() time */
+		_DB2CursorObj_forget_stmt(self);
 	}
 
 	return Py_BuildValue("i", self->bScrollable);
 }
 
+/* ########################################################################
+
+   Row Object
+
+   ######################################################################### */
+
+/*
+ * A fetched row: the values like a tuple, plus an index shared by the
+ * rows of a result set, (names, {name: position}), giving access to
+ * them by column name: row[0], row['COL'] or row.COL. As the dicts
+ * DictCursor used to return, "in" and iteration are over the column
+ * names.
+ */
+
+static PyObject *
+_DB2RowObj_new(PyObject *index, PyObject *values)
+{
+	/* new row holding the items of the sequence values */
+	DB2RowObj	*row;
+	PyObject	*seq, *v;
+	Py_ssize_t	i, n;
+
+	seq = PySequence_Fast(values, "row values SHOULD be a sequence");
+	if (!seq) {
+		return NULL;
+	}
+	n = PySequence_Fast_GET_SIZE(seq);
+
+	row = PyObject_GC_NewVar(DB2RowObj, &DB2RowObj_Type, n);
+	if (!row) {
+		Py_DECREF(seq);
+		return NULL;
+	}
+
+	Py_INCREF(index);
+	row->index = index;
+	for (i=0; i < n; i++) {
+		v = PySequence_Fast_GET_ITEM(seq, i);
+		Py_INCREF(v);
+		row->values[i] = v;
+	}
+	Py_DECREF(seq);
+
+	PyObject_GC_Track(row);
+	return (PyObject *)row;
+}
+
+static int
+_DB2RowObj_check_index(PyObject *index)
+{
+	if (!PyTuple_Check(index) || PyTuple_GET_SIZE(index) != 2 ||
+			!PyTuple_Check(PyTuple_GET_ITEM(index, 0)) ||
+			!PyDict_Check(PyTuple_GET_ITEM(index, 1))) {
+		PyErr_SetString(PyExc_TypeError,
+			"row index SHOULD be (names tuple, {name: position})");
+		return 0;
+	}
+	return 1;
+}
+
+static PyObject *
+DB2RowObj_tp_new(PyTypeObject *type, PyObject *args, PyObject *kwargs)
+{
+	PyObject	*index, *values;
+
+	if (!PyArg_ParseTuple(args, "OO:Row", &index, &values)) {
+		return NULL;
+	}
+	if (!_DB2RowObj_check_index(index)) {
+		return NULL;
+	}
+
+	return _DB2RowObj_new(index, values);
+}
+
+static void
+DB2RowObj_dealloc(DB2RowObj *self)
+{
+	Py_ssize_t	i;
+
+	PyObject_GC_UnTrack(self);
+	for (i=0; i < Py_SIZE(self); i++) {
+		Py_XDECREF(self->values[i]);
+	}
+	Py_XDECREF(self->index);
+	PyObject_GC_Del(self);
+}
+
+static int
+DB2RowObj_traverse(DB2RowObj *self, visitproc visit, void *arg)
+{
+	Py_ssize_t	i;
+
+	for (i=0; i < Py_SIZE(self); i++) {
+		Py_VISIT(self->values[i]);
+	}
+	Py_VISIT(self->index);
+	return 0;
+}
+
+static int
+DB2RowObj_clear(DB2RowObj *self)
+{
+	Py_ssize_t	i;
+
+	for (i=0; i < Py_SIZE(self); i++) {
+		Py_CLEAR(self->values[i]);
+	}
+	return 0;
+}
+
+static PyObject *
+_DB2RowObj_values_tuple(DB2RowObj *self)
+{
+	PyObject	*t, *v;
+	Py_ssize_t	i;
+
+	t = PyTuple_New(Py_SIZE(self));
+	if (!t) {
+		return NULL;
+	}
+	for (i=0; i < Py_SIZE(self); i++) {
+		v = self->values[i] ? self->values[i] : Py_None;
+		Py_INCREF(v);
+		PyTuple_SET_ITEM(t, i, v);
+	}
+	return t;
+}
+
+static Py_ssize_t
+DB2RowObj_length(DB2RowObj *self)
+{
+	return Py_SIZE(self);
+}
+
+static PyObject *
+DB2RowObj_item(DB2RowObj *self, Py_ssize_t i)
+{
+	PyObject	*v;
+
+	if (i < 0 || i >= Py_SIZE(self)) {
+		PyErr_SetString(PyExc_IndexError, "row index out of range");
+		return NULL;
+	}
+	v = self->values[i] ? self->values[i] : Py_None;
+	Py_INCREF(v);
+	return v;
+}
+
+static PyObject *
+_DB2RowObj_by_name(DB2RowObj *self, PyObject *name)
+{
+	/* value of column name, NULL without an exception if none */
+	PyObject	*pos;
+
+	pos = PyDict_GetItem(PyTuple_GET_ITEM(self->index, 1), name);
+	if (!pos) {
+		return NULL;
+	}
+	return DB2RowObj_item(self, PyInt_AsSsize_t(pos));
+}
+
+static PyObject *
+DB2RowObj_subscript(DB2RowObj *self, PyObject *key)
+{
+	PyObject	*v, *t;
+	Py_ssize_t	i;
+
+	if (PyString_Check(key) || PyUnicode_Check(key)) {
+		v = _DB2RowObj_by_name(self, key);
+		if (!v && !PyErr_Occurred()) {
+			PyErr_SetObject(PyExc_KeyError, key);
+		}
+		return v;
+	}
+	if (PySlice_Check(key)) {
+		t = _DB2RowObj_values_tuple(self);
+		if (!t) {
+			return NULL;
+		}
+		v = PyObject_GetItem(t, key);
+		Py_DECREF(t);
+		return v;
+	}
+
+	i = PyNumber_AsSsize_t(key, PyExc_IndexError);
+	if (i == -1 && PyErr_Occurred()) {
+		return NULL;
+	}
+	if (i < 0) {
+		i += Py_SIZE(self);
+	}
+	return DB2RowObj_item(self, i);
+}
+
+static PyObject *
+DB2RowObj_getattro(DB2RowObj *self, PyObject *name)
+{
+	PyObject	*v;
+
+	v = PyObject_GenericGetAttr((PyObject *)self, name);
+	if (v || !PyErr_ExceptionMatches(PyExc_AttributeError)) {
+		return v;
+	}
+
+	v = _DB2RowObj_by_name(self, name);
+	if (v) {
+		PyErr_Clear();
+	}
+	return v;
+}
+
+static int
+DB2RowObj_contains(DB2RowObj *self, PyObject *key)
+{
+	return PyDict_GetItem(PyTuple_GET_ITEM(self->index, 1), key) != NULL;
+}
+
+static PyObject *
+DB2RowObj_iter(DB2RowObj *self)
+{
+	return PyObject_GetIter(PyTuple_GET_ITEM(self->index, 0));
+}
+
+static PyObject *
+DB2RowObj_keys(DB2RowObj *self, PyObject *args)
+{
+	return PySequence_List(PyTuple_GET_ITEM(self->index, 0));
+}
+
+static PyObject *
+DB2RowObj_values(DB2RowObj *self, PyObject *args)
+{
+	PyObject	*t, *l;
+
+	if (!(t = _DB2RowObj_values_tuple(self))) {
+		return NULL;
+	}
+	l = PySequence_List(t);
+	Py_DECREF(t);
+	return l;
+}
+
+static PyObject *
+DB2RowObj_items(DB2RowObj *self, PyObject *args)
+{
+	PyObject	*names, *items, *v;
+	Py_ssize_t	i, n;
+
+	names = PyTuple_GET_ITEM(self->index, 0);
+	n = PyTuple_GET_SIZE(names);
+	if (n > Py_SIZE(self)) {
+		n = Py_SIZE(self);
+	}
+
+	items = PyList_New(n);
+	for (i=0; items && i < n; i++) {
+		v = Py_BuildValue("(OO)", PyTuple_GET_ITEM(names, i),
+				self->values[i] ? self->values[i] : Py_None);
+		if (!v) {
+			Py_CLEAR(items);
+			break;
+		}
+		PyList_SET_ITEM(items, i, v);
+	}
+	return items;
+}
+
+static PyObject *
+DB2RowObj_get(DB2RowObj *self, PyObject *args)
+{
+	PyObject	*key, *def = Py_None, *v;
+
+	if (!PyArg_ParseTuple(args, "O|O:get", &key, &def)) {
+		return NULL;
+	}
+
+	v = _DB2RowObj_by_name(self, key);
+	if (!v && !PyErr_Occurred()) {
+		Py_INCREF(def);
+		v = def;
+	}
+	return v;
+}
+
+static PyObject *
+DB2RowObj_has_key(DB2RowObj *self, PyObject *args)
+{
+	PyObject	*key;
+
+	if (!PyArg_ParseTuple(args, "O:has_key", &key)) {
+		return NULL;
+	}
+
+	return PyBool_FromLong(PyDict_GetItem(
+				PyTuple_GET_ITEM(self->index, 1), key) != NULL);
+}
+
+static PyObject *
+DB2RowObj_richcompare(PyObject *a, PyObject *b, int op)
+{
+	/*
+	 * A row compares as the tuple of its values, and equal to the
+	 * dict of its items (what DictCursor used to return).
+	 */
+	PyObject	*x, *y, *r;
+
+	if (!DB2RowObj_Check(a)) {
+		/* reflected */
+		x = a; a = b; b = x;
+		switch (op) {
+		case Py_LT: op = Py_GT; break;
+		case Py_LE: op = Py_GE; break;
+		case Py_GT: op = Py_LT; break;
+		case Py_GE: op = Py_LE; break;
+		}
+	}
+
+	if (PyDict_Check(b)) {
+		if (op != Py_EQ && op != Py_NE) {
+			Py_INCREF(Py_NotImplemented);
+			return Py_NotImplemented;
+		}
+		r = DB2RowObj_items((DB2RowObj *)a, NULL);
+		x = r ? PyDict_New() : NULL;
+		if (x && PyDict_MergeFromSeq2(x, r, 1) < 0) {
+			Py_CLEAR(x);
+		}
+		Py_XDECREF(r);
+		if (!x) {
+			return NULL;
+		}
+		Py_INCREF(b);
+		y = b;
+	} else if (DB2RowObj_Check(b) || PyTuple_Check(b)) {
+		x = _DB2RowObj_values_tuple((DB2RowObj *)a);
+		y = DB2RowObj_Check(b) ?
+			_DB2RowObj_values_tuple((DB2RowObj *)b) : (Py_INCREF(b), b);
+		if (!x || !y) {
+			Py_XDECREF(x);
+			Py_XDECREF(y);
+			return NULL;
+		}
+	} else {
+		Py_INCREF(Py_NotImplemented);
+		return Py_NotImplemented;
+	}
+
+	r = PyObject_RichCompare(x, y, op);
+	Py_DECREF(x);
+	Py_DECREF(y);
+	return r;
+}
+
+static long
+DB2RowObj_hash(DB2RowObj *self)
+{
+	PyObject	*t;
+	long		h;
+
+	t = _DB2RowObj_values_tuple(self);
+	if (!t) {
+		return -1;
+	}
+	h = PyObject_Hash(t);
+	Py_DECREF(t);
+	return h;
+}
+
+static PyObject *
+DB2RowObj_repr(DB2RowObj *self)
+{
+	PyObject	*items, *r;
+
+	items = DB2RowObj_items(self, NULL);
+	if (!items) {
+		return NULL;
+	}
+	r = PyString_FromString("Row(");
+	PyString_ConcatAndDel(&r, PyObject_Repr(items));
+	PyString_ConcatAndDel(&r, PyString_FromString(")"));
+	Py_DECREF(items);
+	return r;
+}
+
+static PyObject *
+DB2RowObj_reduce(DB2RowObj *self, PyObject *args)
+{
+	PyObject	*t, *r;
+
+	t = _DB2RowObj_values_tuple(self);
+	if (!t) {
+		return NULL;
+	}
+	r = Py_BuildValue("(O(OO))", Py_TYPE(self), self->index, t);
+	Py_DECREF(t);
+	return r;
+}
+
+static PyObject *
+_db2_make_rows(PyObject *self, PyObject *args)
+{
+	/*
+
+	make_rows(index, rows)
+
+	    Replace the items of the list rows by Row objects sharing
+	    index, (names, {name: position}). Returns rows.
+
+	*/
+	PyObject	*index, *rows, *row;
+	Py_ssize_t	i;
+
+	if (!PyArg_ParseTuple(args, "OO!:make_rows",
+			&index, &PyList_Type, &rows)) {
+		return NULL;
+	}
+	if (!_DB2RowObj_check_index(index)) {
+		return NULL;
+	}
+
+	for (i=0; i < PyList_GET_SIZE(rows); i++) {
+		row = _DB2RowObj_new(index, PyList_GET_ITEM(rows, i));
+		if (!row) {
+			return NULL;
+		}
+		PyList_SetItem(rows, i, row);
+	}
+
+	Py_INCREF(rows);
+	return rows;
+}
+
+static PySequenceMethods DB2RowObj_as_sequence = {
+	(lenfunc)DB2RowObj_length,		/* sq_length */
+	0,					/* sq_concat */
+	0,					/* sq_repeat */
+	(ssizeargfunc)DB2RowObj_item,		/* sq_item */
+	0,					/* sq_slice */
+	0,					/* sq_ass_item */
+	0,					/* sq_ass_slice */
+	(objobjproc)DB2RowObj_contains,		/* sq_contains */
+};
+
+static PyMappingMethods DB2RowObj_as_mapping = {
+	(lenfunc)DB2RowObj_length,		/* mp_length */
+	(binaryfunc)DB2RowObj_subscript,	/* mp_subscript */
+	0,					/* mp_ass_subscript */
+};
+
+static PyMethodDef DB2RowObj_methods[] = {
+	{ "keys", (PyCFunction)DB2RowObj_keys, METH_NOARGS, },
+	{ "values", (PyCFunction)DB2RowObj_values, METH_NOARGS, },
+	{ "items", (PyCFunction)DB2RowObj_items, METH_NOARGS, },
+	{ "get", (PyCFunction)DB2RowObj_get, METH_VARARGS, },
+	{ "has_key", (PyCFunction)DB2RowObj_has_key, METH_VARARGS, },
+	{ "__reduce__", (PyCFunction)DB2RowObj_reduce, METH_NOARGS, },
+	{ NULL, NULL }
+};
+
 /* ########################################################################
 
    Type Object
@@ -2701,6 +8117,49 @@ static PyTypeObject DB2CursorObj_Type = {
 
 };
 
+static PyTypeObject DB2RowObj_Type = {
+	PyObject_HEAD_INIT(NULL)
+	0,
+	"_db2.Row",
+	sizeof(DB2RowObj) - sizeof(PyObject *),
+	sizeof(PyObject *),
+
+	(destructor)DB2RowObj_dealloc,		/* tp_dealloc */
+	0,					/* tp_print */
+	0,					/* tp_getattr */
+	0,					/* tp_setattr */
+	0,					/* tp_compare */
+	(reprfunc)DB2RowObj_repr,		/* tp_repr */
+	0,					/* tp_as_number */
+	&DB2RowObj_as_sequence,			/* tp_as_sequence */
+	&DB2RowObj_as_mapping,			/* tp_as_mapping */
+	(hashfunc)DB2RowObj_hash,		/* tp_hash */
+	0,					/* tp_call */
+	0,					/* tp_str */
+	(getattrofunc)DB2RowObj_getattro,	/* tp_getattro */
+	0,					/* tp_setattro */
+	0,					/* tp_as_buffer */
+	Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,	/* tp_flags */
+	"Row(index, values): fetched row, by position or column name",
+	(traverseproc)DB2RowObj_traverse,	/* tp_traverse */
+	(inquiry)DB2RowObj_clear,		/* tp_clear */
+	DB2RowObj_richcompare,			/* tp_richcompare */
+	0,					/* tp_weaklistoffset */
+	(getiterfunc)DB2RowObj_iter,		/* tp_iter */
+	0,					/* tp_iternext */
+	DB2RowObj_methods,			/* tp_methods */
+	0,					/* tp_members */
+	0,					/* tp_getset */
+	0,					/* tp_base */
+	0,					/* tp_dict */
+	0,					/* tp_descr_get */
+	0,					/* tp_descr_set */
+	0,					/* tp_dictoffset */
+	0,					/* tp_init */
+	0,					/* tp_alloc */
+	DB2RowObj_tp_new,			/* tp_new */
+};
+
 /* #########################################################################
 
    Module Method Definition
@@ -2721,6 +8180,12 @@ _db2_methods[] = {
 		METH_VARARGS,
 		"get SQL type number -> name dict"
 	},
+	{
+		"make_rows",
+		(PyCFunction)_db2_make_rows,
+		METH_VARARGS,
+		"replace the lists of a list by Row objects"
+	},
 	{ NULL, NULL }	/* sentinel */
 };
 
@@ -2799,6 +8264,14 @@ init_db2(void)
 
 	init_DB_API_2_exception(dict);
 
+	PyDateTime_IMPORT;
+
+	if (PyType_Ready(&DB2RowObj_Type) < 0) {
+		goto Error;
+	}
+	Py_INCREF(&DB2RowObj_Type);
+	PyDict_SetItemString(dict, "Row", (PyObject *)&DB2RowObj_Type);
+
 	PyDict_SetItemString(dict, "__version__", PyString_FromString(__version__));
 
 Error:
@@ -0,0 +1,289 @@
+"""PyDB2 benchmark suite.
+
+Measures the fetch methods, DictCursor, executemany(), LOB reads and
+writes and the fetch of each column type against the fake DB2 CLI
+library in fakecli/, whose SYNTH_* tables generate their rows on the
+fly and whose SINK_* tables throw inserted rows away.  The results
+only depend on the module and the machine, so they can be compared
+from one build to the next.  Build the module against the fake first:
+
+    python setup.py build_ext --inplace --fakecli
+    python bench/bench.py [-n rows] [-r repeat] [-L latency_us] [name ...]
+
+Each benchmark runs repeat times and the fastest run is reported:
+
+    rows/s      rows fetched or sent per second
+    calls/krow  CLI calls per 1000 rows
+    heap KB     C heap (malloc) still allocated when the run ends,
+                the results being held
+    objs/row    Python container objects created per row and still
+                alive when the run ends
+
+The names given select the benchmarks whose name starts with one of
+them (e.g. "fetch" or "type_").  -L simulates the network with a sleep
+in every CLI call that would be a server round trip.
+"""
+
+import os
+import sys
+import gc
+import time
+import ctypes
+import ctypes.util
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import DB2
+import _db2
+
+# Column kinds of the fake's synthetic tables, with their sizes
+TYPES = [
+    'SMALLINT', 'INTEGER', 'BIGINT', 'REAL', 'DOUBLE', 'DECIMAL',
+    'CHAR16', 'VARCHAR64', 'DATE', 'TIME', 'TIMESTAMP', 'BLOB256', 'CLOB256',
+    ]
+
+class _mallinfo(ctypes.Structure):
+    _fields_ = [ (name, ctypes.c_int) for name in
+                 ('arena', 'ordblks', 'smblks', 'hblks', 'hblkhd', 'usmblks',
+                  'fsmblks', 'uordblks', 'fordblks', 'keepcost') ]
+
+class _mallinfo2(ctypes.Structure):
+    _fields_ = [ (name, ctypes.c_size_t) for name in
+                 ('arena', 'ordblks', 'smblks', 'hblks', 'hblkhd', 'usmblks',
+                  'fsmblks', 'uordblks', 'fordblks', 'keepcost') ]
+
+def _heap_function():
+    # glibc only: bytes in use = uordblks (arena) + hblkhd (mmap)
+    name = ctypes.util.find_library('c')
+    if not name:
+        return None
+    try:
+        libc = ctypes.CDLL(name)
+    except OSError:
+        return None
+    for func, struct in (('mallinfo2', _mallinfo2), ('mallinfo', _mallinfo)):
+        f = getattr(libc, func, None)
+        if f is not None:
+            f.restype = struct
+            return f
+    return None
+
+class Meter:
+    def __init__(self):
+        lib = ctypes.CDLL(_db2.__file__)
+        try:
+            self.calls = lib.fakecli_call_count
+        except AttributeError:
+            raise SystemExit('%s is not built against the fake CLI, '
+                             'run "python setup.py build_ext --inplace '
+                             '--fakecli"' % _db2.__file__)
+        self.calls.restype = ctypes.c_long
+        self.calls.argtypes = [ ctypes.c_char_p ]
+        self.set_latency = lib.fakecli_set_latency
+        self.set_latency.argtypes = [ ctypes.c_int ]
+        self.mallinfo = _heap_function()
+
+    def heap(self):
+        if self.mallinfo is None:
+            return 0
+        mi = self.mallinfo()
+        return mi.uordblks + mi.hblkhd
+
+    def measure(self, run, repeat):
+        '''Times run() repeat times and returns the fastest run as
+        (rows, seconds, calls, heap bytes, objects)'''
+        best = None
+        for i in range(repeat):
+            gc.collect()
+            gc.disable()
+            try:
+                heap = self.heap()
+                objs = gc.get_count()[0]
+                calls = self.calls(None)
+                start = time.time()
+                rows, held = run()
+                elapsed = time.time() - start
+                result = (rows, elapsed, self.calls(None) - calls,
+                          self.heap() - heap, gc.get_count()[0] - objs)
+                del held
+            finally:
+                gc.enable()
+            if best is None or result[1] < best[1]:
+                best = result
+        return best
+
+# Each benchmark gets the connection and the number of rows, does its
+# setup and returns the function to time. That function returns the
+# number of rows it handled and whatever it fetched, which is held
+# while the memory is measured.
+
+def bench_fetchone(conn, n):
+    cs = conn.cursor()
+    def run():
+        cs.execute('SELECT * FROM SYNTH_INTEGER_%d' % n)
+        rows = 0
+        while cs.fetchone() is not None:
+            rows += 1
+        return rows, None
+    return run
+
+def bench_fetchmany(conn, n):
+    cs = conn.cursor()
+    def run():
+        cs.execute('SELECT * FROM SYNTH_INTEGER_%d' % n)
+        rows = 0
+        while 1:
+            r = cs.fetchmany(1000)
+            if not r:
+                break
+            rows += len(r)
+        return rows, None
+    return run
+
+def bench_fetchall(conn, n):
+    cs = conn.cursor()
+    def run():
+        cs.execute('SELECT * FROM SYNTH_INTEGER_%d' % n)
+        r = cs.fetchall()
+        return len(r), r
+    return run
+
+def bench_iterate(conn, n):
+    cs = conn.cursor()
+    cs.arraysize = 1000
+    def run():
+        cs.execute('SELECT * FROM SYNTH_INTEGER_%d' % n)
+        rows = 0
+        for row in cs:
+            rows += 1
+        return rows, None
+    return run
+
+def bench_mixed(conn, n):
+    cs = conn.cursor()
+    def run():
+        cs.execute('SELECT * FROM SYNTH_MIXED_%d' % n)
+        r = cs.fetchall()
+        return len(r), r
+    return run
+
+def bench_dictcursor(conn, n):
+    cs = conn.cursor(dictCursor=1)
+    def run():
+        cs.execute('SELECT * FROM SYNTH_MIXED_%d' % n)
+        r = cs.fetchall()
+        return len(r), r
+    return run
+
+def bench_executemany(conn, n):
+    cs = conn.cursor()
+    cs.execute('CREATE TABLE SINK_BENCH '
+               '(C1 INTEGER, C2 VARCHAR(32), C3 DOUBLE, C4 TIMESTAMP)')
+    params = [ (i, 'row %d' % i, i * 0.5, '2008-01-01-12.00.00.000000')
+               for i in xrange(n) ]
+    def run():
+        cs.executemany('INSERT INTO SINK_BENCH VALUES (?, ?, ?, ?)', params)
+        return len(params), None
+    return run
+
+def bench_lob_read_inline(conn, n):
+    cs = conn.cursor()
+    n = max(n / 10, 1)
+    def run():
+        cs.execute('SELECT * FROM SYNTH_BLOB4096_%d' % n)
+        r = cs.fetchall()
+        return len(r), r
+    return run
+
+def bench_lob_read(conn, n):
+    cs = conn.cursor()
+    n = max(n / 100, 1)
+    def run():
+        cs.execute('SELECT * FROM SYNTH_BLOB65536_%d' % n)
+        r = cs.fetchall()
+        return len(r), r
+    return run
+
+def bench_lob_write(conn, n):
+    cs = conn.cursor()
+    cs.execute('CREATE TABLE SINK_BENCH_LOB (C1 INTEGER, C2 BLOB(1M))')
+    data = buffer(''.join([ chr(i % 256) for i in range(65536) ]))
+    params = [ (i, data) for i in xrange(max(n / 100, 1)) ]
+    def run():
+        for p in params:
+            cs.execute('INSERT INTO SINK_BENCH_LOB VALUES (?, ?)', p)
+        return len(params), None
+    return run
+
+def bench_type(kind):
+    def bench(conn, n):
+        cs = conn.cursor()
+        def run():
+            cs.execute('SELECT * FROM SYNTH_%s_%d' % (kind, n))
+            r = cs.fetchall()
+            return len(r), r
+        return run
+    return bench
+
+BENCHMARKS = [
+    ('fetchone', bench_fetchone),
+    ('fetchmany', bench_fetchmany),
+    ('fetchall', bench_fetchall),
+    ('iterate', bench_iterate),
+    ('mixed', bench_mixed),
+    ('dictcursor', bench_dictcursor),
+    ('executemany', bench_executemany),
+    ('lob_read_inline', bench_lob_read_inline),
+    ('lob_read', bench_lob_read),
+    ('lob_write', bench_lob_write),
+    ] + [ ('type_' + kind.rstrip('0123456789').lower(), bench_type(kind))
+          for kind in TYPES ]
+
+def main(argv):
+    parser = OptionParser(usage='%prog [options] [name ...]')
+    parser.add_option('-n', '--rows', type='int', default=100000,
+                      help='rows per benchmark (LOBs: 1/10, 1/100) [%default]')
+    parser.add_option('-r', '--repeat', type='int', default=3,
+                      help='runs per benchmark, the fastest counts [%default]')
+    parser.add_option('-L', '--latency', type='int', default=0,
+                      help='simulated round trip time in microseconds [%default]')
+    parser.add_option('-l', '--list', action='store_true', default=False,
+                      help='list the benchmarks')
+    parser.add_option('--dsn', default='sample', help='[%default]')
+    parser.add_option('--uid', default='db2inst1', help='[%default]')
+    parser.add_option('--pwd', default='ibmdb2', help='[%default]')
+    opts, args = parser.parse_args(argv)
+
+    benchmarks = [ (name, func) for name, func in BENCHMARKS
+                   if not args or [ a for a in args if name.startswith(a) ] ]
+    if opts.list:
+        for name, func in benchmarks:
+            print name
+        return
+
+    meter = Meter()
+    meter.set_latency(opts.latency)
+    conn = DB2.connect(dsn=opts.dsn, uid=opts.uid, pwd=opts.pwd)
+
+    print '%-16s %8s %8s %12s %10s %10s %8s' % (
+        'benchmark', 'rows', 'seconds', 'rows/s', 'calls/krow',
+        'heap KB', 'objs/row')
+    try:
+        for name, func in benchmarks:
+            rows, elapsed, calls, heap, objs = meter.measure(
+                func(conn, opts.rows), opts.repeat)
+            rows = rows or 1
+            if meter.mallinfo is None:
+                heap = '-'
+            else:
+                heap = '%.0f' % (heap / 1024.0)
+            print '%-16s %8d %8.3f %12.0f %10.1f %10s %8.2f' % (
+                name, rows, elapsed, rows / max(elapsed, 1e-9),
+                calls * 1000.0 / rows, heap, float(objs) / rows)
+    finally:
+        conn.rollback()
+        conn.close()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
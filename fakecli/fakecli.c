@@ -0,0 +1,3500 @@
+/*
+	Fake DB2 CLI library
+
+	An in-process stand-in for the subset of the IBM DB2 Call Level
+	Interface used by _db2_module.c.  It keeps a tiny process-wide
+	catalog of tables and procedures in memory and understands just
+	enough SQL to run the PyDB2 test suite and the benchmarks in bench/:
+
+		CREATE TABLE t (c1 INTEGER NOT NULL, c2 VARCHAR(10), ...)
+		DROP TABLE t
+		INSERT INTO t [(c1, ...)] VALUES (?, 'lit', 1, NULL, CURRENT TIMESTAMP, ...)
+		DELETE FROM t [WHERE c = ? [AND ...]]
+		SELECT * | c1, 1, 'x', COUNT(*) FROM t [WHERE c = ? [AND ...]]
+		SELECT * FROM FINAL TABLE (INSERT INTO ...)
+		SET ... (accepted and ignored)
+		CREATE PROCEDURE p (IN a INTEGER, OUT b VARCHAR(5), INOUT c ...) ...
+		CALL p (?, ?, ?)
+
+	Tables whose name starts with SINK_ accept inserts but keep no rows.
+	Tables named SYNTH_<KIND>[<SIZE>]_<ROWS>[_<NCOLS>] always exist and
+	generate deterministic rows on the fly, e.g. SYNTH_INTEGER_100000,
+	SYNTH_VARCHAR32_10000_4, SYNTH_BLOB4096_1000 or SYNTH_MIXED_50000.
+	KIND is one of SMALLINT, INTEGER, BIGINT, REAL, DOUBLE, DECIMAL,
+	CHAR, VARCHAR, DATE, TIME, TIMESTAMP, BLOB, CLOB or MIXED.
+
+	Transactions are emulated per connection: changes made by a
+	connection are undone by its rollback.  There is no isolation
+	between connections.
+
+	Environment variables:
+
+		FAKECLI_LATENCY_US	microseconds slept (outside the library
+					lock) for every call that would be a
+					server round trip
+		FAKECLI_UID, FAKECLI_PWD
+					credentials checked when a user id is
+					given (default db2inst1 / ibmdb2)
+
+	fakecli_call_count() and fakecli_reset_counts() expose per-function
+	call counters to benchmarks through ctypes, and fakecli_set_latency()
+	overrides FAKECLI_LATENCY_US.
+
+	The module is linked with this library instead of the DB2 client by
+
+		python setup.py build_ext --inplace --fakecli
+ */
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <ctype.h>
+#include <time.h>
+#include <pthread.h>
+#include <unistd.h>
+
+#include "sqlcli1.h"
+
+#define FAKE_NAME_LEN	128
+#define FAKE_MSG_LEN	256
+
+/* ########################################################################
+
+   Call accounting and simulated latency
+
+   ######################################################################## */
+
+enum {
+	F_SQLAllocHandle, F_SQLFreeHandle, F_SQLSetEnvAttr, F_SQLSetConnectAttr,
+	F_SQLConnect, F_SQLDisconnect, F_SQLGetFunctions, F_SQLGetInfo,
+	F_SQLEndTran, F_SQLSetStmtAttr, F_SQLPrepare, F_SQLNumParams,
+	F_SQLDescribeParam, F_SQLBindParameter, F_SQLExecute, F_SQLParamData,
+	F_SQLPutData, F_SQLRowCount, F_SQLNumResultCols, F_SQLDescribeCol,
+	F_SQLColAttribute, F_SQLBindCol, F_SQLFetch, F_SQLFetchScroll,
+	F_SQLFreeStmt, F_SQLProcedureColumns, F_SQLGetLength,
+	F_SQLGetSubString, F_SQLGetDiagRec, F_SQLGetDiagField,
+	F_SQLCancel,
+	F_COUNT
+};
+
+static const char *fakeFuncNames[F_COUNT] = {
+	"SQLAllocHandle", "SQLFreeHandle", "SQLSetEnvAttr", "SQLSetConnectAttr",
+	"SQLConnect", "SQLDisconnect", "SQLGetFunctions", "SQLGetInfo",
+	"SQLEndTran", "SQLSetStmtAttr", "SQLPrepare", "SQLNumParams",
+	"SQLDescribeParam", "SQLBindParameter", "SQLExecute", "SQLParamData",
+	"SQLPutData", "SQLRowCount", "SQLNumResultCols", "SQLDescribeCol",
+	"SQLColAttribute", "SQLBindCol", "SQLFetch", "SQLFetchScroll",
+	"SQLFreeStmt", "SQLProcedureColumns", "SQLGetLength",
+	"SQLGetSubString", "SQLGetDiagRec", "SQLGetDiagField",
+	"SQLCancel",
+};
+
+static long fakeCalls[F_COUNT];
+static int fakeLatencyUs = -1;
+
+static pthread_mutex_t fakeLock = PTHREAD_MUTEX_INITIALIZER;
+
+#define FAKE_LOCK()	pthread_mutex_lock(&fakeLock)
+#define FAKE_UNLOCK()	pthread_mutex_unlock(&fakeLock)
+
+static void
+fake_count(int func)
+{
+	__sync_fetch_and_add(&fakeCalls[func], 1);
+}
+
+/* Sleep for the configured latency; called without holding the lock */
+static void
+fake_round_trip(void)
+{
+	if (fakeLatencyUs < 0) {
+		char *v = getenv("FAKECLI_LATENCY_US");
+		fakeLatencyUs = v ? atoi(v) : 0;
+	}
+	if (fakeLatencyUs > 0) {
+		usleep((useconds_t)fakeLatencyUs);
+	}
+}
+
+long
+fakecli_call_count(const char *name)
+{
+	int i;
+	long total = 0;
+
+	for (i = 0; i < F_COUNT; i++) {
+		if (name == NULL || strcmp(name, fakeFuncNames[i]) == 0) {
+			total += fakeCalls[i];
+		}
+	}
+	return total;
+}
+
+void
+fakecli_reset_counts(void)
+{
+	memset(fakeCalls, 0, sizeof(fakeCalls));
+}
+
+void
+fakecli_set_latency(int us)
+{
+	fakeLatencyUs = us;
+}
+
+/* ########################################################################
+
+   Small helpers
+
+   ######################################################################## */
+
+typedef struct {
+	char	*buf;
+	int	len;
+	int	cap;
+} FBuf;
+
+static void
+fbuf_reserve(FBuf *b, int need)
+{
+	if (b->cap < need) {
+		int cap = b->cap ? b->cap : 64;
+		while (cap < need) { cap *= 2; }
+		b->buf = (char *)realloc(b->buf, cap);
+		b->cap = cap;
+	}
+}
+
+static void
+fbuf_set(FBuf *b, const char *s, int len)
+{
+	fbuf_reserve(b, len + 1);
+	memcpy(b->buf, s, len);
+	b->buf[len] = '\0';
+	b->len = len;
+}
+
+static void
+fbuf_append(FBuf *b, const char *s, int len)
+{
+	fbuf_reserve(b, b->len + len + 1);
+	memcpy(b->buf + b->len, s, len);
+	b->len += len;
+	b->buf[b->len] = '\0';
+}
+
+static void
+fbuf_free(FBuf *b)
+{
+	free(b->buf);
+	b->buf = NULL;
+	b->len = b->cap = 0;
+}
+
+static char *
+fake_strndup(const char *s, int len)
+{
+	char *r = (char *)malloc(len + 1);
+	memcpy(r, s, len);
+	r[len] = '\0';
+	return r;
+}
+
+static void
+fake_upper(char *s)
+{
+	for (; *s; s++) { *s = (char)toupper((unsigned char)*s); }
+}
+
+/* ########################################################################
+
+   Diagnostics
+
+   ######################################################################## */
+
+typedef struct {
+	char		state[SQL_SQLSTATE_SIZE + 1];
+	SQLINTEGER	native;
+	char		msg[FAKE_MSG_LEN];
+	SQLINTEGER	row;
+} FDiag;
+
+typedef struct {
+	int		htype;
+	FDiag		*diag;
+	int		nDiag;
+	int		capDiag;
+} FHeader;
+
+static void
+diag_clear(FHeader *h)
+{
+	h->nDiag = 0;
+}
+
+static void
+diag_add_row(FHeader *h, const char *state, int native, SQLINTEGER row,
+		const char *fmt, const char *arg)
+{
+	FDiag *d;
+
+	if (h->nDiag == h->capDiag) {
+		h->capDiag = h->capDiag ? h->capDiag * 2 : 4;
+		h->diag = (FDiag *)realloc(h->diag, sizeof(FDiag) * h->capDiag);
+	}
+	d = &h->diag[h->nDiag++];
+	strncpy(d->state, state, SQL_SQLSTATE_SIZE);
+	d->state[SQL_SQLSTATE_SIZE] = '\0';
+	d->native = native;
+	d->row = row;
+	snprintf(d->msg, FAKE_MSG_LEN, "[FAKE CLI] SQL%04dN  ", native < 0 ? -native : native);
+	snprintf(d->msg + strlen(d->msg), FAKE_MSG_LEN - strlen(d->msg), fmt, arg ? arg : "");
+}
+
+static SQLRETURN
+diag_error(FHeader *h, const char *state, int native, const char *fmt, const char *arg)
+{
+	diag_add_row(h, state, native, 0, fmt, arg);
+	return SQL_ERROR;
+}
+
+/* ########################################################################
+
+   Values, columns and tables
+
+   ######################################################################## */
+
+enum { TC_INT, TC_FLT, TC_DEC, TC_STR, TC_BIN, TC_DATE, TC_TIME, TC_TS };
+
+typedef struct {
+	char		name[FAKE_NAME_LEN + 1];
+	SQLSMALLINT	type;
+	SQLUINTEGER	size;
+	SQLSMALLINT	scale;
+	SQLSMALLINT	nullable;
+} FCol;
+
+typedef struct {
+	int		isnull;
+	long long	i;
+	double		d;
+	char		*s;	/* strings, binary data and datetime text */
+	int		len;
+} FVal;
+
+typedef FVal *FRow;
+
+static int
+type_class(SQLSMALLINT t)
+{
+	switch (t) {
+	case SQL_SMALLINT: case SQL_INTEGER: case SQL_BIGINT:
+		return TC_INT;
+	case SQL_REAL: case SQL_FLOAT: case SQL_DOUBLE:
+		return TC_FLT;
+	case SQL_DECIMAL: case SQL_NUMERIC:
+		return TC_DEC;
+	case SQL_BINARY: case SQL_VARBINARY: case SQL_LONGVARBINARY: case SQL_BLOB:
+		return TC_BIN;
+	case SQL_TYPE_DATE:
+		return TC_DATE;
+	case SQL_TYPE_TIME:
+		return TC_TIME;
+	case SQL_TYPE_TIMESTAMP:
+		return TC_TS;
+	default:
+		return TC_STR;
+	}
+}
+
+static void
+fv_clear(FVal *v)
+{
+	free(v->s);
+	v->s = NULL;
+	v->len = 0;
+	v->isnull = 1;
+}
+
+static void
+fv_copy(FVal *dst, const FVal *src)
+{
+	*dst = *src;
+	if (src->s) {
+		dst->s = fake_strndup(src->s, src->len);
+	}
+}
+
+typedef struct FTable {
+	char		name[FAKE_NAME_LEN + 1];
+	int		ncols;
+	FCol		*cols;
+	FRow		*rows;
+	int		nrows;
+	int		cap;
+	int		sink;
+
+	/* transaction bookkeeping, by connection id */
+	int		createdBy;
+	int		droppedBy;
+	int		snapBy;
+	FRow		*snapRows;
+	int		snapN;
+
+	struct FTable	*next;
+} FTable;
+
+typedef struct {
+	char		name[FAKE_NAME_LEN + 1];
+	SQLSMALLINT	inOut;
+	FCol		col;
+} FProcParam;
+
+typedef struct FProc {
+	char		name[FAKE_NAME_LEN + 1];
+	int		nparams;
+	FProcParam	*params;
+	char		*resultSelect;	/* "SELECT ..." opened WITH RETURN */
+	int		createdBy;
+	int		droppedBy;
+	struct FProc	*next;
+} FProc;
+
+static FTable *fakeTables = NULL;
+static FProc *fakeProcs = NULL;
+
+static FTable *
+table_find(const char *name)
+{
+	FTable *t;
+	for (t = fakeTables; t; t = t->next) {
+		if (!t->droppedBy && strcmp(t->name, name) == 0) { return t; }
+	}
+	return NULL;
+}
+
+static FProc *
+proc_find(const char *name)
+{
+	FProc *p;
+	for (p = fakeProcs; p; p = p->next) {
+		if (!p->droppedBy && strcmp(p->name, name) == 0) { return p; }
+	}
+	return NULL;
+}
+
+static void
+table_snapshot(FTable *t, int dbcId)
+{
+	if (t->snapBy || t->createdBy == dbcId) {
+		return;
+	}
+	t->snapBy = dbcId;
+	t->snapN = t->nrows;
+	t->snapRows = (FRow *)malloc(sizeof(FRow) * (t->nrows + 1));
+	memcpy(t->snapRows, t->rows, sizeof(FRow) * t->nrows);
+}
+
+static void
+table_append(FTable *t, FRow row)
+{
+	if (t->nrows == t->cap) {
+		t->cap = t->cap ? t->cap * 2 : 16;
+		t->rows = (FRow *)realloc(t->rows, sizeof(FRow) * t->cap);
+	}
+	t->rows[t->nrows++] = row;
+}
+
+/* End the transaction of connection dbcId; rows are never freed. */
+static void
+catalog_end_tran(int dbcId, int commit)
+{
+	FTable **tp, *t;
+	FProc **pp, *p;
+
+	for (tp = &fakeTables; (t = *tp) != NULL; ) {
+		if (t->snapBy == dbcId) {
+			if (!commit) {
+				free(t->rows);
+				t->rows = t->snapRows;
+				t->nrows = t->cap = t->snapN;
+				if (t->cap == 0) { t->rows = NULL; free(t->snapRows); }
+			} else {
+				free(t->snapRows);
+			}
+			t->snapRows = NULL;
+			t->snapBy = 0;
+		}
+		if ((t->createdBy == dbcId && !commit) ||
+		    (t->droppedBy == dbcId && commit)) {
+			*tp = t->next;
+			free(t->cols);
+			free(t->rows);
+			free(t);
+			continue;
+		}
+		if (t->createdBy == dbcId) { t->createdBy = 0; }
+		if (t->droppedBy == dbcId) { t->droppedBy = 0; }
+		tp = &t->next;
+	}
+
+	for (pp = &fakeProcs; (p = *pp) != NULL; ) {
+		if ((p->createdBy == dbcId && !commit) ||
+		    (p->droppedBy == dbcId && commit)) {
+			*pp = p->next;
+			free(p->params);
+			free(p->resultSelect);
+			free(p);
+			continue;
+		}
+		if (p->createdBy == dbcId) { p->createdBy = 0; }
+		if (p->droppedBy == dbcId) { p->droppedBy = 0; }
+		pp = &p->next;
+	}
+}
+
+/* ########################################################################
+
+   Handles
+
+   ######################################################################## */
+
+typedef struct {
+	FHeader		hdr;
+} FEnv;
+
+typedef struct {
+	char		*data;
+	int		len;
+} FLocator;
+
+typedef struct {
+	FHeader		hdr;
+	int		id;
+	int		connected;
+	int		autoCommit;
+	FLocator	*locs;
+	int		nLocs;
+	int		capLocs;
+} FDbc;
+
+typedef struct {
+	SQLSMALLINT	ctype;
+	SQLPOINTER	buf;
+	SQLINTEGER	bufLen;
+	SQLINTEGER	*ind;
+} FBind;
+
+typedef struct {
+	int		bound;
+	SQLSMALLINT	io;
+	SQLSMALLINT	ctype;
+	SQLSMALLINT	sqlType;
+	SQLPOINTER	buf;
+	SQLINTEGER	bufLen;
+	SQLINTEGER	*ind;
+	FBuf		dae;	/* data-at-exec value collected by SQLPutData */
+	int		daeNull;
+} FParam;
+
+/* where a parameter marker or literal value goes */
+typedef struct {
+	int		param;		/* marker index or -1 */
+	int		special;	/* CURRENT DATE/TIME/TIMESTAMP, NULL */
+	char		*lit;		/* literal text */
+	int		litLen;
+	int		col;		/* target column */
+} FExpr;
+
+enum { SP_NONE, SP_NULL, SP_CUR_DATE, SP_CUR_TIME, SP_CUR_TS };
+
+enum {
+	K_NONE, K_SELECT, K_INSERT, K_DELETE, K_CREATE_TABLE, K_DROP_TABLE,
+	K_CREATE_PROC, K_DROP_PROC, K_CALL, K_FINAL_INSERT, K_PROC_COLUMNS,
+	K_SET
+};
+
+enum { SEL_STAR, SEL_COL, SEL_LIT, SEL_COUNT };
+
+typedef struct {
+	int		kind;
+	int		col;
+	char		*lit;
+	int		litLen;
+	int		litIsStr;
+} FSelItem;
+
+/* synthetic table description */
+typedef struct {
+	int		active;
+	int		kind;
+	int		size;
+	long		rows;
+	int		ncols;
+} FSynth;
+
+typedef struct {
+	FHeader		hdr;
+	FDbc		*dbc;
+
+	/* prepared statement */
+	int		prepared;
+	int		kind;
+	char		tableName[FAKE_NAME_LEN + 1];
+	FSynth		synth;
+	FCol		*tcols;		/* columns of the target table */
+	int		ntcols;
+	FCol		*pdesc;		/* parameter marker descriptions */
+	int		nparams;
+	FExpr		*values;	/* INSERT values */
+	int		nvalues;
+	FExpr		*where;		/* WHERE col = expr [AND ...] */
+	int		nwhere;
+	FSelItem	*items;
+	int		nitems;
+	FCol		*newCols;	/* CREATE TABLE / PROCEDURE */
+	int		nNewCols;
+	FProcParam	*newParams;
+	char		*procSelect;
+
+	/* bindings */
+	FBind		*binds;
+	int		nbinds;
+	FParam		*params;
+	int		nParamSlots;
+
+	/* attributes */
+	SQLUINTEGER	rowArraySize;
+	SQLUINTEGER	*rowsFetchedPtr;
+	SQLUSMALLINT	*rowStatusPtr;
+	SQLINTEGER	*bindOffsetPtr;
+	SQLUINTEGER	paramsetSize;
+	SQLUINTEGER	*paramsProcessedPtr;
+	SQLUSMALLINT	*paramStatusPtr;
+	int		atomic;
+	int		scrollable;
+
+	/* result set */
+	int		open;
+	FCol		*rcols;
+	int		nrcols;
+	int		*rmap;		/* result column -> source column */
+	FRow		*rrows;		/* materialized rows (borrowed) */
+	FRow		*ownRows;	/* materialized rows (owned) */
+	long		nrrows;
+	long		cur;
+	long		curN;
+	FVal		synthVal;
+	FBuf		scratch;
+	FBuf		scratch2;
+
+	SQLINTEGER	rowCount;
+
+	/* data-at-exec */
+	int		daePending;
+	int		daeIdx;
+} FStmt;
+
+typedef struct {
+	int		type;
+	void		*obj;
+} FSlot;
+
+static FSlot *fakeHandles = NULL;
+static int fakeNHandles = 0;
+static int fakeNextDbcId = 1;
+
+static SQLHANDLE
+handle_new(int type, void *obj)
+{
+	int i;
+
+	for (i = 0; i < fakeNHandles; i++) {
+		if (fakeHandles[i].type == 0) { break; }
+	}
+	if (i == fakeNHandles) {
+		fakeNHandles = fakeNHandles ? fakeNHandles * 2 : 64;
+		fakeHandles = (FSlot *)realloc(fakeHandles, sizeof(FSlot) * fakeNHandles);
+		memset(fakeHandles + i, 0, sizeof(FSlot) * (fakeNHandles - i));
+	}
+	fakeHandles[i].type = type;
+	fakeHandles[i].obj = obj;
+	return (SQLHANDLE)(i + 1);
+}
+
+static void *
+handle_get(int type, SQLHANDLE h)
+{
+	if (h <= 0 || h > fakeNHandles) { return NULL; }
+	if (fakeHandles[h - 1].type != type) { return NULL; }
+	return fakeHandles[h - 1].obj;
+}
+
+static void
+handle_release(SQLHANDLE h)
+{
+	fakeHandles[h - 1].type = 0;
+	fakeHandles[h - 1].obj = NULL;
+}
+
+/* ########################################################################
+
+   Date and time helpers
+
+   ######################################################################## */
+
+static int
+parse_digits(const char **p, int n, int *out)
+{
+	int v = 0, i;
+	for (i = 0; i < n; i++) {
+		if (!isdigit((unsigned char)(*p)[i])) { return 0; }
+		v = v * 10 + ((*p)[i] - '0');
+	}
+	*p += n;
+	*out = v;
+	return 1;
+}
+
+static int
+parse_date(const char **p, int *y, int *m, int *d)
+{
+	if (!parse_digits(p, 4, y) || **p != '-') { return 0; }
+	(*p)++;
+	if (!parse_digits(p, 2, m) || **p != '-') { return 0; }
+	(*p)++;
+	if (!parse_digits(p, 2, d)) { return 0; }
+	return *m >= 1 && *m <= 12 && *d >= 1 && *d <= 31;
+}
+
+static int
+parse_time(const char **p, int *h, int *mi, int *s)
+{
+	char sep;
+	if (!parse_digits(p, 2, h)) { return 0; }
+	sep = **p;
+	if (sep != ':' && sep != '.') { return 0; }
+	(*p)++;
+	if (!parse_digits(p, 2, mi) || **p != sep) { return 0; }
+	(*p)++;
+	if (!parse_digits(p, 2, s)) { return 0; }
+	return *h <= 24 && *mi <= 59 && *s <= 59;
+}
+
+/* canonicalize datetime text into FVal; returns 0 on a bad format */
+static int
+datetime_from_text(int tc, const char *txt, int len, FVal *out)
+{
+	char tmp[64], res[40];
+	const char *p = tmp;
+	int y, m, d, h = 0, mi = 0, s = 0, n;
+	long frac = 0;
+
+	while (len > 0 && txt[len - 1] == ' ') { len--; }
+	if (len >= (int)sizeof(tmp)) { return 0; }
+	memcpy(tmp, txt, len);
+	tmp[len] = '\0';
+
+	if (tc == TC_DATE) {
+		if (!parse_date(&p, &y, &m, &d) || *p) { return 0; }
+		sprintf(res, "%04d-%02d-%02d", y, m, d);
+	} else if (tc == TC_TIME) {
+		if (!parse_time(&p, &h, &mi, &s) || *p) { return 0; }
+		sprintf(res, "%02d:%02d:%02d", h, mi, s);
+	} else {
+		if (!parse_date(&p, &y, &m, &d)) { return 0; }
+		if (*p) {
+			if (*p != '-' && *p != ' ' && *p != 'T') { return 0; }
+			p++;
+			if (!parse_time(&p, &h, &mi, &s)) { return 0; }
+			if (*p == '.') {
+				p++;
+				for (n = 0; n < 6 && isdigit((unsigned char)*p); n++, p++) {
+					frac = frac * 10 + (*p - '0');
+				}
+				for (; n < 6; n++) { frac *= 10; }
+				while (isdigit((unsigned char)*p)) { p++; }
+			}
+			if (*p) { return 0; }
+		}
+		sprintf(res, "%04d-%02d-%02d-%02d.%02d.%02d.%06ld", y, m, d, h, mi, s, frac);
+	}
+
+	out->isnull = 0;
+	out->len = (int)strlen(res);
+	out->s = fake_strndup(res, out->len);
+	return 1;
+}
+
+static void
+current_datetime(int tc, FVal *out)
+{
+	struct timespec ts;
+	struct tm tmv;
+	time_t t;
+	char res[40];
+
+	clock_gettime(CLOCK_REALTIME, &ts);
+	t = ts.tv_sec;
+	localtime_r(&t, &tmv);
+	if (tc == TC_DATE) {
+		strftime(res, sizeof(res), "%Y-%m-%d", &tmv);
+	} else if (tc == TC_TIME) {
+		strftime(res, sizeof(res), "%H:%M:%S", &tmv);
+	} else {
+		strftime(res, sizeof(res), "%Y-%m-%d-%H.%M.%S", &tmv);
+		sprintf(res + strlen(res), ".%06ld", (long)(ts.tv_nsec / 1000));
+	}
+	out->isnull = 0;
+	out->len = (int)strlen(res);
+	out->s = fake_strndup(res, out->len);
+}
+
+/* days since 1970-01-01 -> civil date */
+static void
+civil_from_days(long z, int *y, int *m, int *d)
+{
+	long era, doe, yoe, doy, mp;
+	z += 719468;
+	era = (z >= 0 ? z : z - 146096) / 146097;
+	doe = z - era * 146097;
+	yoe = (doe - doe / 1460 + doe / 36524 - doe / 146096) / 365;
+	doy = doe - (365 * yoe + yoe / 4 - yoe / 100);
+	mp = (5 * doy + 2) / 153;
+	*d = (int)(doy - (153 * mp + 2) / 5 + 1);
+	*m = (int)(mp < 10 ? mp + 3 : mp - 9);
+	*y = (int)(yoe + era * 400 + (*m <= 2));
+}
+
+/* ########################################################################
+
+   Conversions
+
+   ######################################################################## */
+
+static const char hexDigits[] = "0123456789ABCDEF";
+
+static int
+hex_val(int c)
+{
+	if (c >= '0' && c <= '9') { return c - '0'; }
+	if (c >= 'a' && c <= 'f') { return c - 'a' + 10; }
+	if (c >= 'A' && c <= 'F') { return c - 'A' + 10; }
+	return -1;
+}
+
+/* Render a value as text (hex for binary data) into b */
+static void
+fv_text(const FCol *col, const FVal *v, FBuf *b)
+{
+	char tmp[64];
+	int i, tc = type_class(col->type);
+
+	switch (tc) {
+	case TC_INT:
+		sprintf(tmp, "%lld", v->i);
+		fbuf_set(b, tmp, (int)strlen(tmp));
+		break;
+	case TC_FLT:
+		sprintf(tmp, col->type == SQL_REAL ? "%.7g" : "%.15g", v->d);
+		fbuf_set(b, tmp, (int)strlen(tmp));
+		break;
+	case TC_DEC:
+		sprintf(tmp, "%.*f", col->scale, v->d);
+		fbuf_set(b, tmp, (int)strlen(tmp));
+		break;
+	case TC_BIN:
+		fbuf_reserve(b, v->len * 2 + 1);
+		for (i = 0; i < v->len; i++) {
+			b->buf[2*i] = hexDigits[((unsigned char)v->s[i]) >> 4];
+			b->buf[2*i+1] = hexDigits[((unsigned char)v->s[i]) & 0x0f];
+		}
+		b->len = v->len * 2;
+		b->buf[b->len] = '\0';
+		break;
+	default:
+		fbuf_set(b, v->s ? v->s : "", v->len);
+		break;
+	}
+}
+
+/* Parse text into a value of column type; returns SQLSTATE or NULL */
+static const char *
+fv_from_text(const FCol *col, const char *txt, int len, int isHex, FVal *out)
+{
+	char tmp[128], *end;
+	int tc = type_class(col->type), i;
+	double lim;
+
+	memset(out, 0, sizeof(FVal));
+
+	switch (tc) {
+	case TC_INT:
+	case TC_FLT:
+	case TC_DEC:
+		while (len > 0 && isspace((unsigned char)*txt)) { txt++; len--; }
+		while (len > 0 && isspace((unsigned char)txt[len-1])) { len--; }
+		if (len == 0 || len >= (int)sizeof(tmp)) { return "22018"; }
+		memcpy(tmp, txt, len);
+		tmp[len] = '\0';
+		if (tc == TC_INT) {
+			out->i = strtoll(tmp, &end, 10);
+			if (*end) { return "22018"; }
+			if ((col->type == SQL_SMALLINT && (out->i < -32768 || out->i > 32767)) ||
+			    (col->type == SQL_INTEGER && (out->i < -2147483647LL-1 || out->i > 2147483647LL))) {
+				return "22003";
+			}
+		} else {
+			out->d = strtod(tmp, &end);
+			if (*end) { return "22018"; }
+		}
+		if (tc == TC_DEC) {
+			double scale = 1.0;
+			for (i = 0; i < col->scale; i++) { scale *= 10.0; }
+			/* DB2 truncates excess fraction digits */
+			out->d = (out->d < 0 ? -1 : 1) *
+				(double)(long long)((out->d < 0 ? -out->d : out->d) * scale + 1e-9) / scale;
+			lim = 1.0;
+			for (i = 0; i < (int)col->size - col->scale; i++) { lim *= 10.0; }
+			if (out->d >= lim || out->d <= -lim) { return "22003"; }
+		}
+		break;
+
+	case TC_BIN:
+		if (isHex) {
+			if (len % 2) { return "22546"; }
+			out->s = (char *)malloc(len / 2 + 1);
+			for (i = 0; i < len / 2; i++) {
+				int hi = hex_val((unsigned char)txt[2*i]);
+				int lo = hex_val((unsigned char)txt[2*i+1]);
+				if (hi < 0 || lo < 0) { free(out->s); out->s = NULL; return "22546"; }
+				out->s[i] = (char)((hi << 4) | lo);
+			}
+			out->len = len / 2;
+		} else {
+			out->s = fake_strndup(txt, len);
+			out->len = len;
+		}
+		if ((SQLUINTEGER)out->len > col->size) {
+			free(out->s); out->s = NULL;
+			return "22001";
+		}
+		break;
+
+	case TC_DATE:
+	case TC_TIME:
+	case TC_TS:
+		if (!datetime_from_text(tc, txt, len, out)) { return "22007"; }
+		break;
+
+	default:
+		if (col->type == SQL_CHAR || col->type == SQL_GRAPHIC) {
+			while (len > 0 && (SQLUINTEGER)len > col->size && txt[len-1] == ' ') { len--; }
+		}
+		if ((SQLUINTEGER)len > col->size) { return "22001"; }
+		out->s = fake_strndup(txt, len);
+		out->len = len;
+		if (col->type == SQL_CHAR && (SQLUINTEGER)len < col->size) {
+			/* CHAR(n) is blank padded */
+			out->s = (char *)realloc(out->s, col->size + 1);
+			memset(out->s + len, ' ', col->size - len);
+			out->s[col->size] = '\0';
+			out->len = col->size;
+		}
+		break;
+	}
+	out->isnull = 0;
+	return NULL;
+}
+
+/* Convert a bound C value into a value of column type */
+static const char *
+fv_from_c(const FCol *col, SQLSMALLINT ctype, const char *buf, int len, FVal *out)
+{
+	char tmp[64];
+	int tc = type_class(col->type);
+
+	memset(out, 0, sizeof(FVal));
+
+	switch (ctype) {
+	case SQL_C_CHAR:
+		return fv_from_text(col, buf, len, 1, out);
+	case SQL_C_BINARY:
+		return fv_from_text(col, buf, len, 0, out);
+	case SQL_C_SHORT:
+		sprintf(tmp, "%d", (int)*(SQLSMALLINT *)buf);
+		break;
+	case SQL_C_LONG:
+		sprintf(tmp, "%d", (int)*(SQLINTEGER *)buf);
+		break;
+	case SQL_C_SBIGINT:
+		sprintf(tmp, "%lld", *(SQLBIGINT *)buf);
+		break;
+	case SQL_C_DOUBLE:
+		if (tc == TC_FLT || tc == TC_DEC) {
+			sprintf(tmp, "%.17g", *(SQLDOUBLE *)buf);
+		} else {
+			sprintf(tmp, "%.15g", *(SQLDOUBLE *)buf);
+		}
+		break;
+	case SQL_C_FLOAT:
+		sprintf(tmp, "%.9g", (double)*(SQLREAL *)buf);
+		break;
+	case SQL_C_TYPE_DATE: {
+		DATE_STRUCT *d = (DATE_STRUCT *)buf;
+		sprintf(tmp, "%04d-%02d-%02d", d->year, d->month, d->day);
+		break;
+	}
+	case SQL_C_TYPE_TIME: {
+		TIME_STRUCT *t = (TIME_STRUCT *)buf;
+		sprintf(tmp, "%02d:%02d:%02d", t->hour, t->minute, t->second);
+		break;
+	}
+	case SQL_C_TYPE_TIMESTAMP: {
+		TIMESTAMP_STRUCT *t = (TIMESTAMP_STRUCT *)buf;
+		sprintf(tmp, "%04d-%02d-%02d-%02d.%02d.%02d.%06u",
+			t->year, t->month, t->day, t->hour, t->minute, t->second,
+			t->fraction / 1000);
+		break;
+	}
+	default:
+		return "HY003";
+	}
+	if (tc == TC_BIN) { return "22005"; }
+	return fv_from_text(col, tmp, (int)strlen(tmp), 0, out);
+}
+
+static int
+c_type_size(SQLSMALLINT ctype)
+{
+	switch (ctype) {
+	case SQL_C_SHORT: return sizeof(SQLSMALLINT);
+	case SQL_C_LONG: return sizeof(SQLINTEGER);
+	case SQL_C_SBIGINT: return sizeof(SQLBIGINT);
+	case SQL_C_DOUBLE: return sizeof(SQLDOUBLE);
+	case SQL_C_FLOAT: return sizeof(SQLREAL);
+	case SQL_C_TYPE_DATE: return sizeof(DATE_STRUCT);
+	case SQL_C_TYPE_TIME: return sizeof(TIME_STRUCT);
+	case SQL_C_TYPE_TIMESTAMP: return sizeof(TIMESTAMP_STRUCT);
+	case SQL_C_BLOB_LOCATOR: case SQL_C_CLOB_LOCATOR: case SQL_C_DBCLOB_LOCATOR:
+		return sizeof(SQLINTEGER);
+	default: return 0;
+	}
+}
+
+static SQLINTEGER
+locator_new(FDbc *dbc, const char *data, int len)
+{
+	if (dbc->nLocs == dbc->capLocs) {
+		dbc->capLocs = dbc->capLocs ? dbc->capLocs * 2 : 64;
+		dbc->locs = (FLocator *)realloc(dbc->locs, sizeof(FLocator) * dbc->capLocs);
+	}
+	dbc->locs[dbc->nLocs].data = fake_strndup(data, len);
+	dbc->locs[dbc->nLocs].len = len;
+	dbc->nLocs++;
+	return (SQLINTEGER)dbc->nLocs;
+}
+
+static void
+locators_free(FDbc *dbc)
+{
+	int i;
+	for (i = 0; i < dbc->nLocs; i++) { free(dbc->locs[i].data); }
+	dbc->nLocs = 0;
+}
+
+static FLocator *
+locator_get(FDbc *dbc, SQLINTEGER loc)
+{
+	if (loc <= 0 || loc > dbc->nLocs) { return NULL; }
+	return &dbc->locs[loc - 1];
+}
+
+/*
+	Store a value into a C buffer.  Returns SQL_SUCCESS,
+	SQL_SUCCESS_WITH_INFO (truncated) or SQL_ERROR with *state set.
+ */
+static SQLRETURN
+fv_to_c(FStmt *s, const FCol *col, const FVal *v, SQLSMALLINT ctype,
+	char *buf, SQLINTEGER bufLen, SQLINTEGER *ind, const char **state)
+{
+	int tc = type_class(col->type);
+	const char *data;
+	int len, y, m, d, h, mi, sec;
+	long frac;
+	const char *p;
+	char *end;
+
+	if (v->isnull) {
+		if (ind) { *ind = SQL_NULL_DATA; return SQL_SUCCESS; }
+		*state = "22002";
+		return SQL_ERROR;
+	}
+
+	switch (ctype) {
+	case SQL_C_CHAR:
+	case SQL_C_BINARY:
+	case SQL_C_DBCHAR:
+		if (ctype == SQL_C_BINARY && (tc == TC_BIN || tc == TC_STR)) {
+			data = v->s ? v->s : "";
+			len = v->len;
+		} else {
+			fv_text(col, v, &s->scratch);
+			data = s->scratch.buf;
+			len = s->scratch.len;
+		}
+		if (ind) { *ind = len; }
+		if (ctype == SQL_C_BINARY) {
+			memcpy(buf, data, len <= bufLen ? len : bufLen);
+			return len <= bufLen ? SQL_SUCCESS : SQL_SUCCESS_WITH_INFO;
+		} else {
+			int nul = (ctype == SQL_C_DBCHAR) ? 2 : 1;
+			int room = bufLen - nul;
+			if (room < 0) { room = 0; }
+			memcpy(buf, data, len <= room ? len : room);
+			memset(buf + (len <= room ? len : room), 0, bufLen > 0 ? nul : 0);
+			return len <= room ? SQL_SUCCESS : SQL_SUCCESS_WITH_INFO;
+		}
+
+	case SQL_C_SHORT:
+	case SQL_C_LONG:
+	case SQL_C_SBIGINT:
+	case SQL_C_DOUBLE:
+	case SQL_C_FLOAT: {
+		long long iv;
+		double dv;
+		if (tc == TC_INT) {
+			iv = v->i; dv = (double)v->i;
+		} else if (tc == TC_FLT || tc == TC_DEC) {
+			iv = (long long)v->d; dv = v->d;
+		} else if (tc == TC_STR) {
+			char tmp[128];
+			len = v->len < 127 ? v->len : 127;
+			memcpy(tmp, v->s, len);
+			tmp[len] = '\0';
+			dv = strtod(tmp, &end);
+			if (end == tmp) { *state = "22018"; return SQL_ERROR; }
+			iv = (long long)dv;
+		} else {
+			*state = "07006";
+			return SQL_ERROR;
+		}
+		if (ctype == SQL_C_SHORT) { *(SQLSMALLINT *)buf = (SQLSMALLINT)iv; }
+		else if (ctype == SQL_C_LONG) { *(SQLINTEGER *)buf = (SQLINTEGER)iv; }
+		else if (ctype == SQL_C_SBIGINT) { *(SQLBIGINT *)buf = (SQLBIGINT)iv; }
+		else if (ctype == SQL_C_DOUBLE) { *(SQLDOUBLE *)buf = dv; }
+		else { *(SQLREAL *)buf = (SQLREAL)dv; }
+		if (ind) { *ind = c_type_size(ctype); }
+		return SQL_SUCCESS;
+	}
+
+	case SQL_C_TYPE_DATE:
+	case SQL_C_TYPE_TIME:
+	case SQL_C_TYPE_TIMESTAMP:
+		if (tc != TC_DATE && tc != TC_TIME && tc != TC_TS) {
+			*state = "07006";
+			return SQL_ERROR;
+		}
+		y = 1; m = 1; d = 1; h = mi = sec = 0; frac = 0;
+		p = v->s;
+		if (tc == TC_DATE || tc == TC_TS) {
+			parse_date(&p, &y, &m, &d);
+			if (*p) { p++; }
+		}
+		if (tc == TC_TIME || tc == TC_TS) {
+			parse_time(&p, &h, &mi, &sec);
+			if (*p == '.') { frac = strtol(p + 1, NULL, 10); }
+		}
+		if (ctype == SQL_C_TYPE_DATE) {
+			DATE_STRUCT *ds = (DATE_STRUCT *)buf;
+			ds->year = (SQLSMALLINT)y; ds->month = (SQLUSMALLINT)m; ds->day = (SQLUSMALLINT)d;
+		} else if (ctype == SQL_C_TYPE_TIME) {
+			TIME_STRUCT *ts = (TIME_STRUCT *)buf;
+			ts->hour = (SQLUSMALLINT)h; ts->minute = (SQLUSMALLINT)mi; ts->second = (SQLUSMALLINT)sec;
+		} else {
+			TIMESTAMP_STRUCT *ts = (TIMESTAMP_STRUCT *)buf;
+			ts->year = (SQLSMALLINT)y; ts->month = (SQLUSMALLINT)m; ts->day = (SQLUSMALLINT)d;
+			ts->hour = (SQLUSMALLINT)h; ts->minute = (SQLUSMALLINT)mi; ts->second = (SQLUSMALLINT)sec;
+			ts->fraction = (SQLUINTEGER)(frac * 1000);
+		}
+		if (ind) { *ind = c_type_size(ctype); }
+		return SQL_SUCCESS;
+
+	case SQL_C_BLOB_LOCATOR:
+	case SQL_C_CLOB_LOCATOR:
+	case SQL_C_DBCLOB_LOCATOR:
+		if (tc != TC_BIN && tc != TC_STR) {
+			*state = "07006";
+			return SQL_ERROR;
+		}
+		*(SQLINTEGER *)buf = locator_new(s->dbc, v->s ? v->s : "", v->len);
+		if (ind) { *ind = sizeof(SQLINTEGER); }
+		return SQL_SUCCESS;
+
+	default:
+		*state = "HY003";
+		return SQL_ERROR;
+	}
+}
+
+/* ########################################################################
+
+   Synthetic tables
+
+   ######################################################################## */
+
+enum {
+	SY_SMALLINT, SY_INTEGER, SY_BIGINT, SY_REAL, SY_DOUBLE, SY_DECIMAL,
+	SY_CHAR, SY_VARCHAR, SY_DATE, SY_TIME, SY_TIMESTAMP, SY_BLOB, SY_CLOB,
+	SY_MIXED
+};
+
+static const char *synthKindNames[] = {
+	"SMALLINT", "INTEGER", "BIGINT", "REAL", "DOUBLE", "DECIMAL",
+	"CHAR", "VARCHAR", "DATE", "TIME", "TIMESTAMP", "BLOB", "CLOB",
+	"MIXED", NULL
+};
+
+static const int mixedKinds[] = {
+	SY_INTEGER, SY_VARCHAR, SY_DOUBLE, SY_TIMESTAMP,
+	SY_DECIMAL, SY_DATE, SY_SMALLINT, SY_BIGINT,
+};
+
+static int
+synth_parse(const char *name, FSynth *sy)
+{
+	char kind[32];
+	const char *p = name + 6;
+	int i, n = 0;
+
+	memset(sy, 0, sizeof(FSynth));
+	if (strncmp(name, "SYNTH_", 6) != 0) { return 0; }
+	while (isalpha((unsigned char)*p) && n < 31) { kind[n++] = *p++; }
+	kind[n] = '\0';
+	for (i = 0; synthKindNames[i]; i++) {
+		if (strcmp(kind, synthKindNames[i]) == 0) { break; }
+	}
+	if (!synthKindNames[i]) { return 0; }
+	sy->kind = i;
+	sy->size = isdigit((unsigned char)*p) ? (int)strtol(p, (char **)&p, 10) : 0;
+	if (*p != '_') { return 0; }
+	sy->rows = strtol(p + 1, (char **)&p, 10);
+	sy->ncols = (sy->kind == SY_MIXED) ? 8 : 1;
+	if (*p == '_') { sy->ncols = (int)strtol(p + 1, (char **)&p, 10); }
+	if (*p || sy->ncols < 1) { return 0; }
+	sy->active = 1;
+	return 1;
+}
+
+static void
+synth_col(const FSynth *sy, int c, FCol *col)
+{
+	int kind = (sy->kind == SY_MIXED) ? mixedKinds[c % 8] : sy->kind;
+	int size = sy->size;
+
+	memset(col, 0, sizeof(FCol));
+	sprintf(col->name, "C%d", c + 1);
+	col->nullable = SQL_NULLABLE;
+	switch (kind) {
+	case SY_SMALLINT: col->type = SQL_SMALLINT; col->size = 5; break;
+	case SY_INTEGER: col->type = SQL_INTEGER; col->size = 10; break;
+	case SY_BIGINT: col->type = SQL_BIGINT; col->size = 19; break;
+	case SY_REAL: col->type = SQL_REAL; col->size = 7; break;
+	case SY_DOUBLE: col->type = SQL_DOUBLE; col->size = 15; break;
+	case SY_DECIMAL: col->type = SQL_DECIMAL; col->size = 12; col->scale = 2; break;
+	case SY_CHAR: col->type = SQL_CHAR; col->size = size ? size : 8; break;
+	case SY_VARCHAR: col->type = SQL_VARCHAR; col->size = size ? size : 32; break;
+	case SY_DATE: col->type = SQL_TYPE_DATE; col->size = 10; break;
+	case SY_TIME: col->type = SQL_TYPE_TIME; col->size = 8; break;
+	case SY_TIMESTAMP: col->type = SQL_TYPE_TIMESTAMP; col->size = 26; col->scale = 6; break;
+	case SY_BLOB: col->type = SQL_BLOB; col->size = size ? size : 4096; break;
+	case SY_CLOB: col->type = SQL_CLOB; col->size = size ? size : 4096; break;
+	}
+}
+
+static void
+synth_value(FStmt *s, const FCol *col, long row, int c, FVal *v)
+{
+	char tmp[64];
+	int y, m, d, i;
+	long secs;
+
+	free(v->s);
+	memset(v, 0, sizeof(FVal));
+	if ((row * 31 + c * 7) % 101 == 100) {
+		v->isnull = 1;
+		return;
+	}
+	switch (col->type) {
+	case SQL_SMALLINT: v->i = (row + c) % 32000; break;
+	case SQL_INTEGER: v->i = row + c * 1000; break;
+	case SQL_BIGINT: v->i = row * 1000003LL + c; break;
+	case SQL_REAL: v->d = (row % 10000) * 0.25; break;
+	case SQL_DOUBLE: v->d = row * 0.5 + c; break;
+	case SQL_DECIMAL: v->d = (row % 1000000) + 0.25; break;
+	case SQL_CHAR:
+	case SQL_VARCHAR:
+	case SQL_CLOB:
+	case SQL_BLOB:
+		v->len = (int)col->size;
+		if (col->type == SQL_VARCHAR) {
+			v->len = (int)(col->size / 2 + row % (col->size / 2 + 1));
+		}
+		v->s = (char *)malloc(v->len + 1);
+		for (i = 0; i < v->len; i++) {
+			v->s[i] = (col->type == SQL_BLOB) ?
+				(char)((row + i) & 0xff) : (char)('a' + (row + c + i) % 26);
+		}
+		v->s[v->len] = '\0';
+		break;
+	case SQL_TYPE_DATE:
+		civil_from_days(10957 + row % 20000, &y, &m, &d);
+		sprintf(tmp, "%04d-%02d-%02d", y, m, d);
+		v->s = fake_strndup(tmp, (int)strlen(tmp));
+		v->len = (int)strlen(tmp);
+		break;
+	case SQL_TYPE_TIME:
+		secs = (row * 37 + c) % 86400;
+		sprintf(tmp, "%02ld:%02ld:%02ld", secs / 3600, secs / 60 % 60, secs % 60);
+		v->s = fake_strndup(tmp, (int)strlen(tmp));
+		v->len = (int)strlen(tmp);
+		break;
+	case SQL_TYPE_TIMESTAMP:
+		civil_from_days(10957 + row % 20000, &y, &m, &d);
+		secs = (row * 37 + c) % 86400;
+		sprintf(tmp, "%04d-%02d-%02d-%02ld.%02ld.%02ld.%06ld", y, m, d,
+			secs / 3600, secs / 60 % 60, secs % 60, (row * 1000) % 1000000);
+		v->s = fake_strndup(tmp, (int)strlen(tmp));
+		v->len = (int)strlen(tmp);
+		break;
+	}
+	(void)s;
+}
+
+/* ########################################################################
+
+   SQL parsing
+
+   ######################################################################## */
+
+enum { T_END, T_IDENT, T_NUM, T_STR, T_PUNCT, T_PARAM };
+
+typedef struct {
+	int		type;
+	char		*text;
+	int		len;
+	int		offset;
+} FTok;
+
+typedef struct {
+	FTok		*toks;
+	int		n;
+	int		i;
+	const char	*src;
+	int		nparams;
+} FParser;
+
+static void
+tokenize(FParser *p, const char *src)
+{
+	int cap = 32, start;
+	const char *c = src;
+
+	memset(p, 0, sizeof(FParser));
+	p->src = src;
+	p->toks = (FTok *)malloc(sizeof(FTok) * cap);
+
+	while (1) {
+		FTok t;
+		while (*c && isspace((unsigned char)*c)) { c++; }
+		if (c[0] == '-' && c[1] == '-') {
+			while (*c && *c != '\n') { c++; }
+			continue;
+		}
+		memset(&t, 0, sizeof(t));
+		t.offset = (int)(c - src);
+		start = t.offset;
+		if (!*c) {
+			t.type = T_END;
+		} else if (isalpha((unsigned char)*c) || *c == '_' || *c == '"') {
+			FBuf b = { NULL, 0, 0 };
+			while (*c && (isalnum((unsigned char)*c) || *c == '_' || *c == '.' ||
+					*c == '$' || *c == '#' || *c == '@' || *c == '"')) {
+				if (*c == '"') {
+					c++;
+					while (*c && *c != '"') { fbuf_append(&b, c, 1); c++; }
+					if (*c) { c++; }
+				} else {
+					char u = (char)toupper((unsigned char)*c);
+					fbuf_append(&b, &u, 1);
+					c++;
+				}
+			}
+			t.type = T_IDENT;
+			t.text = b.buf ? b.buf : fake_strndup("", 0);
+			t.len = b.len;
+		} else if (isdigit((unsigned char)*c) ||
+				(*c == '.' && isdigit((unsigned char)c[1]))) {
+			while (isalnum((unsigned char)*c) || *c == '.' ||
+				((*c == '+' || *c == '-') && (c[-1] == 'E' || c[-1] == 'e'))) {
+				c++;
+			}
+			t.type = T_NUM;
+			t.text = fake_strndup(src + start, (int)(c - src) - start);
+			t.len = (int)(c - src) - start;
+		} else if (*c == '\'') {
+			FBuf b = { NULL, 0, 0 };
+			c++;
+			while (*c) {
+				if (*c == '\'' && c[1] == '\'') { fbuf_append(&b, c, 1); c += 2; continue; }
+				if (*c == '\'') { c++; break; }
+				fbuf_append(&b, c, 1);
+				c++;
+			}
+			t.type = T_STR;
+			t.text = b.buf ? b.buf : fake_strndup("", 0);
+			t.len = b.len;
+		} else if (*c == '?') {
+			t.type = T_PARAM;
+			t.text = fake_strndup("?", 1);
+			t.len = 1;
+			c++;
+		} else {
+			t.type = T_PUNCT;
+			t.text = fake_strndup(c, 1);
+			t.len = 1;
+			c++;
+		}
+		if (p->n == cap) {
+			cap *= 2;
+			p->toks = (FTok *)realloc(p->toks, sizeof(FTok) * cap);
+		}
+		p->toks[p->n++] = t;
+		if (t.type == T_END) { break; }
+	}
+}
+
+static void
+parser_free(FParser *p)
+{
+	int i;
+	for (i = 0; i < p->n; i++) { free(p->toks[i].text); }
+	free(p->toks);
+}
+
+static FTok *
+peek(FParser *p)
+{
+	return &p->toks[p->i];
+}
+
+static int
+is_kw(FParser *p, const char *kw)
+{
+	FTok *t = peek(p);
+	return t->type == T_IDENT && strcmp(t->text, kw) == 0;
+}
+
+static int
+accept_kw(FParser *p, const char *kw)
+{
+	if (is_kw(p, kw)) { p->i++; return 1; }
+	return 0;
+}
+
+static int
+accept_punct(FParser *p, char ch)
+{
+	FTok *t = peek(p);
+	if (t->type == T_PUNCT && t->text[0] == ch) { p->i++; return 1; }
+	return 0;
+}
+
+static unsigned long
+parse_size(FParser *p, unsigned long dflt)
+{
+	unsigned long n;
+	FTok *t;
+
+	if (!accept_punct(p, '(')) { return dflt; }
+	t = peek(p);
+	n = strtoul(t->text ? t->text : "0", NULL, 10);
+	if (t->type == T_NUM) {
+		char last = t->text[t->len - 1];
+		if (last == 'K' || last == 'k') { n *= 1024; }
+		if (last == 'M' || last == 'm') { n *= 1024 * 1024; }
+		if (last == 'G' || last == 'g') { n *= 1024 * 1024 * 1024; }
+	}
+	p->i++;
+	if (peek(p)->type == T_IDENT && (is_kw(p, "K") || is_kw(p, "M") || is_kw(p, "G"))) {
+		if (is_kw(p, "K")) { n *= 1024; }
+		if (is_kw(p, "M")) { n *= 1024 * 1024; }
+		if (is_kw(p, "G")) { n *= 1024 * 1024 * 1024; }
+		p->i++;
+	}
+	accept_punct(p, ')');
+	return n;
+}
+
+/* parse a column type; returns 0 on an unknown type */
+static int
+parse_type(FParser *p, FCol *col)
+{
+	col->scale = 0;
+	if (accept_kw(p, "INTEGER") || accept_kw(p, "INT")) {
+		col->type = SQL_INTEGER; col->size = 10;
+	} else if (accept_kw(p, "SMALLINT")) {
+		col->type = SQL_SMALLINT; col->size = 5;
+	} else if (accept_kw(p, "BIGINT")) {
+		col->type = SQL_BIGINT; col->size = 19;
+	} else if (accept_kw(p, "REAL")) {
+		col->type = SQL_REAL; col->size = 7;
+	} else if (accept_kw(p, "FLOAT") || accept_kw(p, "DOUBLE")) {
+		accept_kw(p, "PRECISION");
+		parse_size(p, 0);
+		col->type = SQL_DOUBLE; col->size = 15;
+	} else if (accept_kw(p, "DECIMAL") || accept_kw(p, "DEC") || accept_kw(p, "NUMERIC")) {
+		col->type = SQL_DECIMAL; col->size = 5;
+		if (accept_punct(p, '(')) {
+			col->size = (SQLUINTEGER)strtoul(peek(p)->text, NULL, 10);
+			p->i++;
+			if (accept_punct(p, ',')) {
+				col->scale = (SQLSMALLINT)strtol(peek(p)->text, NULL, 10);
+				p->i++;
+			}
+			accept_punct(p, ')');
+		}
+	} else if (accept_kw(p, "CHAR") || accept_kw(p, "CHARACTER")) {
+		if (accept_kw(p, "VARYING")) {
+			col->type = SQL_VARCHAR; col->size = (SQLUINTEGER)parse_size(p, 1);
+		} else {
+			col->type = SQL_CHAR; col->size = (SQLUINTEGER)parse_size(p, 1);
+		}
+	} else if (accept_kw(p, "VARCHAR")) {
+		col->type = SQL_VARCHAR; col->size = (SQLUINTEGER)parse_size(p, 1);
+	} else if (accept_kw(p, "LONG")) {
+		if (accept_kw(p, "VARGRAPHIC")) {
+			col->type = SQL_LONGVARGRAPHIC; col->size = 16350;
+		} else {
+			accept_kw(p, "VARCHAR");
+			col->type = SQL_LONGVARCHAR; col->size = 32700;
+		}
+	} else if (accept_kw(p, "GRAPHIC")) {
+		col->type = SQL_GRAPHIC; col->size = (SQLUINTEGER)parse_size(p, 1);
+	} else if (accept_kw(p, "VARGRAPHIC")) {
+		col->type = SQL_VARGRAPHIC; col->size = (SQLUINTEGER)parse_size(p, 1);
+	} else if (accept_kw(p, "DATE")) {
+		col->type = SQL_TYPE_DATE; col->size = 10;
+	} else if (accept_kw(p, "TIMESTAMP")) {
+		col->type = SQL_TYPE_TIMESTAMP; col->size = 26; col->scale = 6;
+	} else if (accept_kw(p, "TIME")) {
+		col->type = SQL_TYPE_TIME; col->size = 8;
+	} else if (accept_kw(p, "BLOB")) {
+		col->type = SQL_BLOB; col->size = (SQLUINTEGER)parse_size(p, 1024 * 1024);
+	} else if (accept_kw(p, "CLOB")) {
+		col->type = SQL_CLOB; col->size = (SQLUINTEGER)parse_size(p, 1024 * 1024);
+	} else if (accept_kw(p, "DBCLOB")) {
+		col->type = SQL_DBCLOB; col->size = (SQLUINTEGER)parse_size(p, 1024 * 1024);
+	} else {
+		return 0;
+	}
+
+	if (accept_kw(p, "FOR")) {
+		accept_kw(p, "BIT");
+		accept_kw(p, "DATA");
+		if (col->type == SQL_CHAR) { col->type = SQL_BINARY; }
+		else if (col->type == SQL_VARCHAR) { col->type = SQL_VARBINARY; }
+		else if (col->type == SQL_LONGVARCHAR) { col->type = SQL_LONGVARBINARY; }
+	}
+	return 1;
+}
+
+static void
+default_pdesc(FCol *col)
+{
+	memset(col, 0, sizeof(FCol));
+	col->type = SQL_VARCHAR;
+	col->size = 254;
+	col->nullable = SQL_NULLABLE;
+}
+
+static int
+add_param(FStmt *s, FParser *p, const FCol *desc)
+{
+	int idx = p->nparams++;
+	s->pdesc = (FCol *)realloc(s->pdesc, sizeof(FCol) * p->nparams);
+	if (desc) { s->pdesc[idx] = *desc; } else { default_pdesc(&s->pdesc[idx]); }
+	return idx;
+}
+
+static int
+col_index(FCol *cols, int n, const char *name)
+{
+	int i;
+	for (i = 0; i < n; i++) {
+		if (strcmp(cols[i].name, name) == 0) { return i; }
+	}
+	return -1;
+}
+
+/* parse an expression: ?, literal, NULL or CURRENT xxx */
+static int
+parse_expr(FStmt *s, FParser *p, FExpr *e, const FCol *target)
+{
+	FTok *t = peek(p);
+	int neg = 0;
+
+	memset(e, 0, sizeof(FExpr));
+	e->param = -1;
+	if (t->type == T_PARAM) {
+		e->param = add_param(s, p, target);
+		p->i++;
+		return 1;
+	}
+	if (accept_kw(p, "NULL")) {
+		e->special = SP_NULL;
+		return 1;
+	}
+	if (accept_kw(p, "CURRENT")) {
+		accept_punct(p, '_');
+		if (accept_kw(p, "TIMESTAMP")) { e->special = SP_CUR_TS; }
+		else if (accept_kw(p, "DATE")) { e->special = SP_CUR_DATE; }
+		else if (accept_kw(p, "TIME")) { e->special = SP_CUR_TIME; }
+		else { return 0; }
+		return 1;
+	}
+	if (accept_kw(p, "CURRENT_TIMESTAMP")) { e->special = SP_CUR_TS; return 1; }
+	if (t->type == T_PUNCT && t->text[0] == '-') {
+		neg = 1;
+		p->i++;
+		t = peek(p);
+	}
+	if (t->type == T_NUM || t->type == T_STR) {
+		if (neg) {
+			e->lit = (char *)malloc(t->len + 2);
+			e->lit[0] = '-';
+			memcpy(e->lit + 1, t->text, t->len + 1);
+			e->litLen = t->len + 1;
+		} else {
+			e->lit = fake_strndup(t->text, t->len);
+			e->litLen = t->len;
+		}
+		p->i++;
+		return 1;
+	}
+	return 0;
+}
+
+static int
+parse_where(FStmt *s, FParser *p)
+{
+	if (!accept_kw(p, "WHERE")) { return 1; }
+	do {
+		FTok *t = peek(p);
+		FExpr e;
+		int col;
+		if (t->type != T_IDENT) { return 0; }
+		col = col_index(s->tcols, s->ntcols, t->text);
+		if (col < 0) { return 0; }
+		p->i++;
+		if (!accept_punct(p, '=')) { return 0; }
+		if (!parse_expr(s, p, &e, &s->tcols[col])) { return 0; }
+		e.col = col;
+		s->where = (FExpr *)realloc(s->where, sizeof(FExpr) * (s->nwhere + 1));
+		s->where[s->nwhere++] = e;
+	} while (accept_kw(p, "AND"));
+	return 1;
+}
+
+/* resolve table name into s->tcols; returns 0 if it does not exist */
+static int
+resolve_table(FStmt *s, const char *name)
+{
+	FTable *t;
+	int c;
+
+	strncpy(s->tableName, name, FAKE_NAME_LEN);
+	s->tableName[FAKE_NAME_LEN] = '\0';
+	free(s->tcols);
+	s->tcols = NULL;
+	s->ntcols = 0;
+
+	if (synth_parse(name, &s->synth)) {
+		s->ntcols = s->synth.ncols;
+		s->tcols = (FCol *)malloc(sizeof(FCol) * s->ntcols);
+		for (c = 0; c < s->ntcols; c++) { synth_col(&s->synth, c, &s->tcols[c]); }
+		return 1;
+	}
+	if (strcmp(name, "SYSIBM.SYSDUMMY1") == 0) {
+		s->ntcols = 1;
+		s->tcols = (FCol *)calloc(1, sizeof(FCol));
+		strcpy(s->tcols[0].name, "IBMREQD");
+		s->tcols[0].type = SQL_CHAR;
+		s->tcols[0].size = 1;
+		return 1;
+	}
+	t = table_find(name);
+	if (!t) { return 0; }
+	s->ntcols = t->ncols;
+	s->tcols = (FCol *)malloc(sizeof(FCol) * t->ncols);
+	memcpy(s->tcols, t->cols, sizeof(FCol) * t->ncols);
+	return 1;
+}
+
+static int
+parse_insert(FStmt *s, FParser *p)
+{
+	int *cols = NULL, ncols = 0, i;
+	FTok *t;
+
+	if (!accept_kw(p, "INTO")) { return 0; }
+	t = peek(p);
+	if (t->type != T_IDENT) { return 0; }
+	if (!resolve_table(s, t->text)) { return -1; }
+	p->i++;
+
+	if (accept_punct(p, '(')) {
+		do {
+			t = peek(p);
+			if (t->type != T_IDENT) { free(cols); return 0; }
+			cols = (int *)realloc(cols, sizeof(int) * (ncols + 1));
+			cols[ncols] = col_index(s->tcols, s->ntcols, t->text);
+			if (cols[ncols] < 0) { free(cols); return -2; }
+			ncols++;
+			p->i++;
+		} while (accept_punct(p, ','));
+		if (!accept_punct(p, ')')) { free(cols); return 0; }
+	}
+
+	if (!accept_kw(p, "VALUES")) { free(cols); return 0; }
+	if (!accept_punct(p, '(')) { free(cols); return 0; }
+	i = 0;
+	do {
+		FExpr e;
+		int col = cols ? (i < ncols ? cols[i] : -1) : i;
+		if (col < 0 || col >= s->ntcols) { free(cols); return 0; }
+		if (!parse_expr(s, p, &e, &s->tcols[col])) { free(cols); return 0; }
+		e.col = col;
+		s->values = (FExpr *)realloc(s->values, sizeof(FExpr) * (s->nvalues + 1));
+		s->values[s->nvalues++] = e;
+		i++;
+	} while (accept_punct(p, ','));
+	free(cols);
+	if (!accept_punct(p, ')')) { return 0; }
+	return 1;
+}
+
+static void
+stmt_clear_plan(FStmt *s)
+{
+	int i;
+
+	for (i = 0; i < s->nvalues; i++) { free(s->values[i].lit); }
+	for (i = 0; i < s->nwhere; i++) { free(s->where[i].lit); }
+	for (i = 0; i < s->nitems; i++) { free(s->items[i].lit); }
+	free(s->values); s->values = NULL; s->nvalues = 0;
+	free(s->where); s->where = NULL; s->nwhere = 0;
+	free(s->items); s->items = NULL; s->nitems = 0;
+	free(s->tcols); s->tcols = NULL; s->ntcols = 0;
+	free(s->pdesc); s->pdesc = NULL; s->nparams = 0;
+	free(s->newCols); s->newCols = NULL; s->nNewCols = 0;
+	free(s->newParams); s->newParams = NULL;
+	free(s->procSelect); s->procSelect = NULL;
+	memset(&s->synth, 0, sizeof(FSynth));
+	s->kind = K_NONE;
+	s->prepared = 0;
+}
+
+static void
+result_close(FStmt *s)
+{
+	long i;
+	int c;
+
+	if (s->ownRows) {
+		for (i = 0; i < s->nrrows; i++) {
+			for (c = 0; c < s->nrcols; c++) { free(s->ownRows[i][c].s); }
+			free(s->ownRows[i]);
+		}
+		free(s->ownRows);
+		s->ownRows = NULL;
+	}
+	free(s->rrows);
+	s->rrows = NULL;
+	s->nrrows = 0;
+	s->cur = 0;
+	s->curN = 0;
+	s->open = 0;
+}
+
+static void
+result_cols_clear(FStmt *s)
+{
+	free(s->rcols); s->rcols = NULL;
+	free(s->rmap); s->rmap = NULL;
+	s->nrcols = 0;
+}
+
+/* describe the result columns of a SELECT plan */
+static void
+select_describe(FStmt *s)
+{
+	int i, c, n = 0;
+
+	result_cols_clear(s);
+	for (i = 0; i < s->nitems; i++) {
+		n += (s->items[i].kind == SEL_STAR) ? s->ntcols : 1;
+	}
+	s->rcols = (FCol *)calloc(n ? n : 1, sizeof(FCol));
+	s->rmap = (int *)calloc(n ? n : 1, sizeof(int));
+	s->nrcols = 0;
+	for (i = 0; i < s->nitems; i++) {
+		FSelItem *it = &s->items[i];
+		if (it->kind == SEL_STAR) {
+			for (c = 0; c < s->ntcols; c++) {
+				s->rmap[s->nrcols] = c;
+				s->rcols[s->nrcols++] = s->tcols[c];
+			}
+		} else if (it->kind == SEL_COL) {
+			s->rmap[s->nrcols] = it->col;
+			s->rcols[s->nrcols++] = s->tcols[it->col];
+		} else {
+			FCol *col = &s->rcols[s->nrcols];
+			s->rmap[s->nrcols++] = -1 - i;
+			sprintf(col->name, "%d", s->nrcols);
+			if (it->kind == SEL_COUNT || !it->litIsStr) {
+				col->type = SQL_INTEGER;
+				col->size = 10;
+			} else {
+				col->type = SQL_VARCHAR;
+				col->size = it->litLen ? it->litLen : 1;
+			}
+		}
+	}
+}
+
+static int
+parse_select(FStmt *s, FParser *p)
+{
+	int itemStart = p->i, itemEnd, save;
+	FTok *t;
+
+	/* skip to FROM first; items need the table columns */
+	while (peek(p)->type != T_END && !is_kw(p, "FROM")) { p->i++; }
+	if (!accept_kw(p, "FROM")) { return 0; }
+	itemEnd = p->i - 1;
+
+	if (accept_kw(p, "FINAL")) {
+		if (!accept_kw(p, "TABLE") || !accept_punct(p, '(') || !accept_kw(p, "INSERT")) {
+			return 0;
+		}
+		save = parse_insert(s, p);
+		if (save <= 0) { return save; }
+		if (!accept_punct(p, ')')) { return 0; }
+		s->kind = K_FINAL_INSERT;
+	} else {
+		t = peek(p);
+		if (t->type != T_IDENT) { return 0; }
+		if (!resolve_table(s, t->text)) { return -1; }
+		p->i++;
+		if (!parse_where(s, p)) { return 0; }
+		s->kind = K_SELECT;
+	}
+
+	/* now the select list */
+	save = p->i;
+	p->i = itemStart;
+	while (p->i < itemEnd) {
+		FSelItem it;
+		memset(&it, 0, sizeof(it));
+		t = peek(p);
+		if (accept_punct(p, '*')) {
+			it.kind = SEL_STAR;
+		} else if (accept_kw(p, "COUNT")) {
+			it.kind = SEL_COUNT;
+			while (p->i < itemEnd && !accept_punct(p, ')')) { p->i++; }
+		} else if (t->type == T_NUM || t->type == T_STR) {
+			it.kind = SEL_LIT;
+			it.lit = fake_strndup(t->text, t->len);
+			it.litLen = t->len;
+			it.litIsStr = (t->type == T_STR);
+			p->i++;
+		} else if (t->type == T_IDENT) {
+			it.kind = SEL_COL;
+			it.col = col_index(s->tcols, s->ntcols, t->text);
+			if (it.col < 0) { p->i = save; return -2; }
+			p->i++;
+		} else {
+			return 0;
+		}
+		s->items = (FSelItem *)realloc(s->items, sizeof(FSelItem) * (s->nitems + 1));
+		s->items[s->nitems++] = it;
+		if (p->i < itemEnd && !accept_punct(p, ',')) { return 0; }
+	}
+	p->i = save;
+	if (s->nitems == 0) { return 0; }
+	select_describe(s);
+	return 1;
+}
+
+static int
+parse_create_table(FStmt *s, FParser *p)
+{
+	FTok *t = peek(p);
+
+	if (t->type != T_IDENT) { return 0; }
+	strncpy(s->tableName, t->text, FAKE_NAME_LEN);
+	p->i++;
+	if (!accept_punct(p, '(')) { return 0; }
+	do {
+		FCol col;
+		memset(&col, 0, sizeof(col));
+		t = peek(p);
+		if (t->type != T_IDENT) { return 0; }
+		strncpy(col.name, t->text, FAKE_NAME_LEN);
+		p->i++;
+		if (!parse_type(p, &col)) { return 0; }
+		col.nullable = SQL_NULLABLE;
+		while (peek(p)->type != T_END) {
+			if (is_kw(p, "NOT")) {
+				p->i++;
+				if (accept_kw(p, "NULL")) { col.nullable = SQL_NO_NULLS; }
+			} else if (peek(p)->type == T_PUNCT &&
+					(peek(p)->text[0] == ',' || peek(p)->text[0] == ')')) {
+				break;
+			} else {
+				p->i++;
+			}
+		}
+		s->newCols = (FCol *)realloc(s->newCols, sizeof(FCol) * (s->nNewCols + 1));
+		s->newCols[s->nNewCols++] = col;
+	} while (accept_punct(p, ','));
+	if (!accept_punct(p, ')')) { return 0; }
+	s->kind = K_CREATE_TABLE;
+	return 1;
+}
+
+static int
+parse_create_proc(FStmt *s, FParser *p)
+{
+	FTok *t = peek(p);
+	int i;
+
+	if (t->type != T_IDENT) { return 0; }
+	strncpy(s->tableName, t->text, FAKE_NAME_LEN);
+	p->i++;
+	if (accept_punct(p, '(') && !accept_punct(p, ')')) {
+		do {
+			FProcParam pp;
+			memset(&pp, 0, sizeof(pp));
+			pp.inOut = SQL_PARAM_INPUT;
+			if (accept_kw(p, "IN")) { pp.inOut = SQL_PARAM_INPUT; }
+			else if (accept_kw(p, "OUT")) { pp.inOut = SQL_PARAM_OUTPUT; }
+			else if (accept_kw(p, "INOUT")) { pp.inOut = SQL_PARAM_INPUT_OUTPUT; }
+			t = peek(p);
+			if (t->type != T_IDENT) { return 0; }
+			strncpy(pp.name, t->text, FAKE_NAME_LEN);
+			p->i++;
+			if (!parse_type(p, &pp.col)) { return 0; }
+			pp.col.nullable = SQL_NULLABLE;
+			strcpy(pp.col.name, pp.name);
+			s->newParams = (FProcParam *)realloc(s->newParams,
+					sizeof(FProcParam) * (s->nNewCols + 1));
+			s->newParams[s->nNewCols++] = pp;
+		} while (accept_punct(p, ','));
+		if (!accept_punct(p, ')')) { return 0; }
+	}
+
+	/* DECLARE c CURSOR WITH RETURN FOR SELECT ... ; */
+	for (i = p->i; i < p->n - 3; i++) {
+		if (p->toks[i].type == T_IDENT && strcmp(p->toks[i].text, "RETURN") == 0 &&
+		    p->toks[i+1].type == T_IDENT && strcmp(p->toks[i+1].text, "FOR") == 0) {
+			const char *start = p->src + p->toks[i+2].offset;
+			const char *end = strchr(start, ';');
+			int len = end ? (int)(end - start) : (int)strlen(start);
+			s->procSelect = fake_strndup(start, len);
+			break;
+		}
+	}
+	s->kind = K_CREATE_PROC;
+	return 1;
+}
+
+static int
+parse_call(FStmt *s, FParser *p)
+{
+	FTok *t = peek(p);
+	FProc *proc;
+	int i = 0;
+
+	if (t->type != T_IDENT) { return 0; }
+	proc = proc_find(t->text);
+	if (!proc) { return -3; }
+	strncpy(s->tableName, t->text, FAKE_NAME_LEN);
+	p->i++;
+	if (accept_punct(p, '(') && !accept_punct(p, ')')) {
+		do {
+			FExpr e;
+			if (i >= proc->nparams) { return -4; }
+			if (!parse_expr(s, p, &e, &proc->params[i].col)) { return 0; }
+			e.col = i++;
+			s->values = (FExpr *)realloc(s->values, sizeof(FExpr) * (s->nvalues + 1));
+			s->values[s->nvalues++] = e;
+		} while (accept_punct(p, ','));
+		if (!accept_punct(p, ')')) { return 0; }
+	}
+	if (i != proc->nparams) { return -4; }
+	s->kind = K_CALL;
+	return 1;
+}
+
+static SQLRETURN
+stmt_prepare(FStmt *s, const char *sql)
+{
+	FParser p;
+	int r = 0;
+
+	result_close(s);
+	result_cols_clear(s);
+	stmt_clear_plan(s);
+	tokenize(&p, sql);
+
+	if (accept_kw(&p, "SELECT")) {
+		r = parse_select(s, &p);
+	} else if (accept_kw(&p, "INSERT")) {
+		r = parse_insert(s, &p);
+		s->kind = K_INSERT;
+	} else if (accept_kw(&p, "DELETE")) {
+		if (accept_kw(&p, "FROM") && peek(&p)->type == T_IDENT) {
+			if (!resolve_table(s, peek(&p)->text)) {
+				r = -1;
+			} else {
+				p.i++;
+				r = parse_where(s, &p);
+				s->kind = K_DELETE;
+			}
+		}
+	} else if (accept_kw(&p, "CREATE")) {
+		if (accept_kw(&p, "TABLE")) {
+			r = parse_create_table(s, &p);
+		} else if (accept_kw(&p, "PROCEDURE")) {
+			r = parse_create_proc(s, &p);
+		}
+	} else if (accept_kw(&p, "DROP")) {
+		if (accept_kw(&p, "TABLE") && peek(&p)->type == T_IDENT) {
+			strncpy(s->tableName, peek(&p)->text, FAKE_NAME_LEN);
+			p.i++;
+			s->kind = K_DROP_TABLE;
+			r = 1;
+		} else if (accept_kw(&p, "PROCEDURE") && peek(&p)->type == T_IDENT) {
+			strncpy(s->tableName, peek(&p)->text, FAKE_NAME_LEN);
+			p.i++;
+			s->kind = K_DROP_PROC;
+			r = 1;
+		}
+	} else if (accept_kw(&p, "CALL")) {
+		r = parse_call(s, &p);
+	} else if (accept_kw(&p, "SET")) {
+		/* special registers are not kept */
+		while (peek(&p)->type != T_END) { p.i++; }
+		s->kind = K_SET;
+		r = 1;
+	}
+
+	if (r == 1 && s->kind != K_CREATE_PROC && peek(&p)->type != T_END) {
+		r = 0;
+	}
+	s->nparams = p.nparams;
+	parser_free(&p);
+
+	if (r == 1) {
+		s->prepared = 1;
+		return SQL_SUCCESS;
+	}
+	if (r == -1) {
+		diag_error(&s->hdr, "42704", -204, "\"%s\" is an undefined name.", s->tableName);
+	} else if (r == -2) {
+		diag_error(&s->hdr, "42703", -206, "Column is not valid in the context where it is used.", NULL);
+	} else if (r == -3) {
+		diag_error(&s->hdr, "42884", -440, "No authorized routine named \"%s\" was found.", NULL);
+	} else if (r == -4) {
+		diag_error(&s->hdr, "42884", -440, "Wrong number of arguments for the routine.", NULL);
+	} else {
+		diag_error(&s->hdr, "42601", -104, "Statement not supported by the fake CLI: %s", sql);
+	}
+	stmt_clear_plan(s);
+	return SQL_ERROR;
+}
+
+/* ########################################################################
+
+   Execution
+
+   ######################################################################## */
+
+/* fetch value of parameter idx for paramset row r into out */
+static const char *
+param_value(FStmt *s, int idx, SQLUINTEGER r, FVal *out)
+{
+	FParam *pa = &s->params[idx];
+	const FCol *col = &s->pdesc[idx];
+	SQLINTEGER len, *ind;
+	char *buf;
+	int elem;
+
+	memset(out, 0, sizeof(FVal));
+	out->isnull = 1;
+	if (pa->io == SQL_PARAM_OUTPUT) {
+		return NULL;
+	}
+	elem = pa->bufLen > 0 ? pa->bufLen : c_type_size(pa->ctype);
+	buf = (char *)pa->buf + (size_t)elem * r;
+	ind = pa->ind ? pa->ind + r : NULL;
+
+	if (ind && (*ind == SQL_DATA_AT_EXEC || *ind <= SQL_LEN_DATA_AT_EXEC_OFFSET)) {
+		if (pa->daeNull) { return NULL; }
+		return fv_from_c(col, pa->ctype, pa->dae.buf ? pa->dae.buf : "", pa->dae.len, out);
+	}
+	if (ind && *ind == SQL_NULL_DATA) {
+		return NULL;
+	}
+	if (pa->ctype == SQL_C_CHAR || pa->ctype == SQL_C_BINARY) {
+		if (!ind || *ind == SQL_NTS) {
+			len = (SQLINTEGER)strlen(buf);
+		} else {
+			len = *ind;
+		}
+	} else {
+		len = c_type_size(pa->ctype);
+	}
+	return fv_from_c(col, pa->ctype, buf, len, out);
+}
+
+static const char *
+expr_value(FStmt *s, FExpr *e, const FCol *col, FVal *pv, FVal *out)
+{
+	memset(out, 0, sizeof(FVal));
+	out->isnull = 1;
+	if (e->param >= 0) {
+		fv_copy(out, &pv[e->param]);
+		return NULL;
+	}
+	switch (e->special) {
+	case SP_NULL: return NULL;
+	case SP_CUR_DATE: current_datetime(TC_DATE, out); return NULL;
+	case SP_CUR_TIME: current_datetime(TC_TIME, out); return NULL;
+	case SP_CUR_TS: current_datetime(TC_TS, out); return NULL;
+	}
+	return fv_from_text(col, e->lit, e->litLen, 0, out);
+}
+
+static int
+fv_equal(const FCol *col, const FVal *a, const FVal *b)
+{
+	int tc = type_class(col->type);
+	if (a->isnull || b->isnull) { return 0; }
+	if (tc == TC_INT) { return a->i == b->i; }
+	if (tc == TC_FLT || tc == TC_DEC) { return a->d == b->d; }
+	return a->len == b->len && memcmp(a->s, b->s, a->len) == 0;
+}
+
+static const char *
+row_matches(FStmt *s, FRow row, FVal *pv, int *match)
+{
+	int w;
+	const char *st;
+
+	*match = 1;
+	for (w = 0; w < s->nwhere; w++) {
+		FVal v;
+		int col = s->where[w].col;
+		st = expr_value(s, &s->where[w], &s->tcols[col], pv, &v);
+		if (st) { return st; }
+		if (!fv_equal(&s->tcols[col], &row[col], &v)) { *match = 0; }
+		fv_clear(&v);
+		if (!*match) { break; }
+	}
+	return NULL;
+}
+
+static SQLRETURN
+exec_error(FStmt *s, const char *state, SQLINTEGER row)
+{
+	const char *msg = "Value error.";
+	int native = -302;
+
+	if (strcmp(state, "22001") == 0) {
+		msg = "The value of a host variable is too long."; native = -302;
+	} else if (strcmp(state, "22003") == 0) {
+		msg = "Numeric value out of range."; native = -413;
+	} else if (strcmp(state, "22007") == 0) {
+		msg = "Invalid datetime format."; native = -180;
+	} else if (strcmp(state, "23502") == 0) {
+		msg = "Assignment of a NULL value to a NOT NULL column."; native = -407;
+	} else if (strcmp(state, "22018") == 0) {
+		msg = "Invalid character value for cast."; native = -420;
+	}
+	diag_add_row(&s->hdr, state, native, row, "%s", msg);
+	return SQL_ERROR;
+}
+
+/* insert one row; on error returns the SQLSTATE */
+static const char *
+do_insert(FStmt *s, FTable *t, FVal *pv, FRow *outRow)
+{
+	FRow row;
+	int c, i;
+	const char *st;
+
+	row = (FRow)calloc(t->ncols, sizeof(FVal));
+	for (c = 0; c < t->ncols; c++) { row[c].isnull = 1; }
+	for (i = 0; i < s->nvalues; i++) {
+		FExpr *e = &s->values[i];
+		fv_clear(&row[e->col]);
+		st = expr_value(s, e, &t->cols[e->col], pv, &row[e->col]);
+		if (st) { goto fail; }
+	}
+	for (c = 0; c < t->ncols; c++) {
+		if (row[c].isnull && t->cols[c].nullable == SQL_NO_NULLS) {
+			st = "23502";
+			goto fail;
+		}
+	}
+	if (outRow) {
+		*outRow = row;
+	} else if (t->sink) {
+		for (c = 0; c < t->ncols; c++) { free(row[c].s); }
+		free(row);
+	} else {
+		table_snapshot(t, s->dbc->id);
+		table_append(t, row);
+	}
+	return NULL;
+fail:
+	for (c = 0; c < t->ncols; c++) { free(row[c].s); }
+	free(row);
+	return st;
+}
+
+static void
+result_add_row(FStmt *s, FRow row)
+{
+	if ((s->nrrows & (s->nrrows - 1)) == 0) {
+		s->rrows = (FRow *)realloc(s->rrows, sizeof(FRow) * (s->nrrows ? s->nrrows * 2 : 1));
+	}
+	s->rrows[s->nrrows++] = row;
+}
+
+static SQLRETURN
+open_select(FStmt *s, FVal *pv)
+{
+	FTable *t;
+	long r;
+	int i, match, count = 0;
+	const char *st;
+
+	result_close(s);
+	s->open = 1;
+	s->cur = 0;
+	s->curN = 0;
+
+	if (s->synth.active || strcmp(s->tableName, "SYSIBM.SYSDUMMY1") == 0) {
+		s->nrrows = s->synth.active ? s->synth.rows : 1;
+		for (i = 0; i < s->nitems; i++) {
+			if (s->items[i].kind == SEL_COUNT) { s->nrrows = 1; }
+		}
+		s->rowCount = s->scrollable ? (SQLINTEGER)s->nrrows : -1;
+		return SQL_SUCCESS;
+	}
+
+	t = table_find(s->tableName);
+	if (!t) {
+		s->open = 0;
+		return diag_error(&s->hdr, "42704", -204, "\"%s\" is an undefined name.", s->tableName);
+	}
+	for (r = 0; r < t->nrows; r++) {
+		st = row_matches(s, t->rows[r], pv, &match);
+		if (st) { s->open = 0; return exec_error(s, st, 0); }
+		if (match) { result_add_row(s, t->rows[r]); count++; }
+	}
+	for (i = 0; i < s->nitems; i++) {
+		if (s->items[i].kind == SEL_COUNT) {
+			/* COUNT(*) collapses the result to one row */
+			FRow row = (FRow)calloc(t->ncols ? t->ncols : 1, sizeof(FVal));
+			free(s->rrows);
+			s->rrows = NULL;
+			s->nrrows = 0;
+			s->ownRows = (FRow *)malloc(sizeof(FRow));
+			s->ownRows[0] = row;
+			s->nrrows = 1;
+			s->synthVal.i = count;
+			break;
+		}
+	}
+	s->rowCount = s->scrollable ? (SQLINTEGER)s->nrrows : -1;
+	return SQL_SUCCESS;
+}
+
+static void
+get_result_value(FStmt *s, long r, int c, FVal **out)
+{
+	int src = s->rmap[c];
+
+	if (src < 0) {
+		FSelItem *it = &s->items[-1 - src];
+		fv_clear(&s->synthVal);
+		if (it->kind == SEL_COUNT) {
+			long long count = s->synthVal.i;
+			s->synthVal.isnull = 0;
+			s->synthVal.i = (s->ownRows || s->synth.active) ?
+				(s->synth.active ? s->synth.rows : count) : count;
+		} else {
+			fv_from_text(&s->rcols[c], it->lit, it->litLen, 0, &s->synthVal);
+		}
+		*out = &s->synthVal;
+		return;
+	}
+	if (s->synth.active) {
+		synth_value(s, &s->rcols[c], r, src, &s->synthVal);
+		*out = &s->synthVal;
+		return;
+	}
+	if (strcmp(s->tableName, "SYSIBM.SYSDUMMY1") == 0 && s->kind == K_SELECT) {
+		fv_clear(&s->synthVal);
+		fv_from_text(&s->rcols[c], "Y", 1, 0, &s->synthVal);
+		*out = &s->synthVal;
+		return;
+	}
+	*out = s->ownRows ? &s->ownRows[r][src] : &s->rrows[r][src];
+}
+
+static SQLRETURN
+do_call(FStmt *s, FVal *pv)
+{
+	FProc *proc = proc_find(s->tableName);
+	SQLRETURN rc = SQL_SUCCESS;
+	int i;
+
+	if (!proc) {
+		return diag_error(&s->hdr, "42884", -440, "No authorized routine named \"%s\" was found.", s->tableName);
+	}
+	for (i = 0; i < s->nvalues; i++) {
+		FExpr *e = &s->values[i];
+		FProcParam *pp = &proc->params[e->col];
+		FParam *pa;
+		FVal v;
+		const char *st = NULL;
+		int tc = type_class(pp->col.type);
+		SQLRETURN r;
+
+		if (pp->inOut == SQL_PARAM_INPUT || e->param < 0) { continue; }
+		pa = &s->params[e->param];
+		memset(&v, 0, sizeof(v));
+		if (tc == TC_INT) { v.i = 3; }
+		else if (tc == TC_FLT || tc == TC_DEC) { v.d = 3.0; }
+		else { v.s = fake_strndup("YYY", 3); v.len = 3; }
+		r = fv_to_c(s, &pp->col, &v, pa->ctype, (char *)pa->buf, pa->bufLen, pa->ind, &st);
+		fv_clear(&v);
+		if (r == SQL_ERROR) { return exec_error(s, st, 0); }
+		if (r == SQL_SUCCESS_WITH_INFO) {
+			diag_add_row(&s->hdr, "01004", 0, 0, "%s", "String data, right truncation.");
+			rc = SQL_SUCCESS_WITH_INFO;
+		}
+	}
+	result_cols_clear(s);
+	if (proc->resultSelect) {
+		FParser p;
+		int r;
+		char saved[FAKE_NAME_LEN + 1];
+
+		strcpy(saved, s->tableName);
+		tokenize(&p, proc->resultSelect);
+		accept_kw(&p, "SELECT");
+		for (i = 0; i < s->nitems; i++) { free(s->items[i].lit); }
+		free(s->items); s->items = NULL; s->nitems = 0;
+		r = parse_select(s, &p);
+		parser_free(&p);
+		if (r == 1) {
+			int kind = s->kind;
+			rc = open_select(s, pv);
+			s->kind = kind;
+		}
+		strcpy(s->tableName, saved);
+		s->kind = K_CALL;
+	}
+	s->rowCount = -1;
+	return rc;
+}
+
+static SQLRETURN
+exec_ddl(FStmt *s)
+{
+	FDbc *dbc = s->dbc;
+
+	if (s->kind == K_CREATE_TABLE) {
+		FTable *t;
+		if (table_find(s->tableName) || synth_parse(s->tableName, &s->synth)) {
+			memset(&s->synth, 0, sizeof(FSynth));
+			return diag_error(&s->hdr, "42710", -601, "The name of the object to be created is identical to the existing name \"%s\".", s->tableName);
+		}
+		t = (FTable *)calloc(1, sizeof(FTable));
+		strcpy(t->name, s->tableName);
+		t->ncols = s->nNewCols;
+		t->cols = (FCol *)malloc(sizeof(FCol) * (t->ncols ? t->ncols : 1));
+		memcpy(t->cols, s->newCols, sizeof(FCol) * t->ncols);
+		t->sink = strncmp(t->name, "SINK_", 5) == 0;
+		t->createdBy = dbc->id;
+		t->next = fakeTables;
+		fakeTables = t;
+	} else if (s->kind == K_DROP_TABLE) {
+		FTable *t = table_find(s->tableName);
+		if (!t) {
+			return diag_error(&s->hdr, "42704", -204, "\"%s\" is an undefined name.", s->tableName);
+		}
+		t->droppedBy = dbc->id;
+	} else if (s->kind == K_CREATE_PROC) {
+		FProc *pr;
+		if (proc_find(s->tableName)) {
+			return diag_error(&s->hdr, "42723", -454, "A routine with the same signature already exists: \"%s\".", s->tableName);
+		}
+		pr = (FProc *)calloc(1, sizeof(FProc));
+		strcpy(pr->name, s->tableName);
+		pr->nparams = s->nNewCols;
+		pr->params = (FProcParam *)malloc(sizeof(FProcParam) * (pr->nparams ? pr->nparams : 1));
+		memcpy(pr->params, s->newParams, sizeof(FProcParam) * pr->nparams);
+		pr->resultSelect = s->procSelect ? strdup(s->procSelect) : NULL;
+		pr->createdBy = dbc->id;
+		pr->next = fakeProcs;
+		fakeProcs = pr;
+	} else if (s->kind == K_DROP_PROC) {
+		FProc *pr = proc_find(s->tableName);
+		if (!pr) {
+			return diag_error(&s->hdr, "42704", -204, "\"%s\" is an undefined name.", s->tableName);
+		}
+		pr->droppedBy = dbc->id;
+	}
+	s->rowCount = -1;
+	return SQL_SUCCESS;
+}
+
+/* run the prepared statement for every row in the parameter set */
+static SQLRETURN
+stmt_run(FStmt *s)
+{
+	SQLUINTEGER n = s->paramsetSize ? s->paramsetSize : 1, r;
+	FVal *pv = NULL;
+	FTable *t = NULL;
+	int i, failed = 0, succeeded = 0;
+	long total = 0;
+	SQLRETURN rc = SQL_SUCCESS;
+	FRow *inserted = NULL;
+	int nInserted = 0;
+
+	if (s->kind == K_SELECT || s->kind == K_CALL || s->kind == K_FINAL_INSERT ||
+	    s->kind == K_CREATE_TABLE || s->kind == K_DROP_TABLE ||
+	    s->kind == K_CREATE_PROC || s->kind == K_DROP_PROC ||
+	    s->kind == K_SET) {
+		n = 1;
+	}
+	if (s->kind == K_INSERT || s->kind == K_DELETE || s->kind == K_FINAL_INSERT) {
+		t = table_find(s->tableName);
+		if (!t) {
+			return diag_error(&s->hdr, "42704", -204, "\"%s\" is an undefined name.", s->tableName);
+		}
+	}
+
+	pv = (FVal *)calloc(s->nparams ? s->nparams : 1, sizeof(FVal));
+	if (s->paramsProcessedPtr) { *s->paramsProcessedPtr = 0; }
+
+	for (r = 0; r < n; r++) {
+		const char *st = NULL;
+
+		for (i = 0; i < s->nparams; i++) {
+			fv_clear(&pv[i]);
+			if (!st) { st = param_value(s, i, r, &pv[i]); }
+		}
+		if (s->paramsProcessedPtr) { *s->paramsProcessedPtr = r + 1; }
+
+		if (!st) {
+			switch (s->kind) {
+			case K_INSERT:
+				st = do_insert(s, t, pv, NULL);
+				if (!st) { total++; }
+				break;
+			case K_FINAL_INSERT: {
+				FRow row;
+				st = do_insert(s, t, pv, &row);
+				if (!st) {
+					FRow copy = (FRow)calloc(t->ncols, sizeof(FVal));
+					int c;
+					for (c = 0; c < t->ncols; c++) { fv_copy(&copy[c], &row[c]); }
+					if (!t->sink) { table_snapshot(t, s->dbc->id); table_append(t, row); }
+					inserted = (FRow *)realloc(inserted, sizeof(FRow) * (nInserted + 1));
+					inserted[nInserted++] = copy;
+					total++;
+				}
+				break;
+			}
+			case K_DELETE: {
+				long k, keep = 0;
+				int match;
+				FRow *rows = (FRow *)malloc(sizeof(FRow) * (t->nrows + 1));
+				for (k = 0; k < t->nrows && !st; k++) {
+					st = row_matches(s, t->rows[k], pv, &match);
+					if (!match) { rows[keep++] = t->rows[k]; } else { total++; }
+				}
+				if (!st && keep != t->nrows) {
+					table_snapshot(t, s->dbc->id);
+					free(t->rows);
+					t->rows = rows;
+					t->nrows = t->cap = (int)keep;
+					if (keep == 0) { t->cap = 0; free(rows); t->rows = NULL; }
+				} else {
+					free(rows);
+				}
+				break;
+			}
+			case K_SELECT:
+				rc = open_select(s, pv);
+				goto done;
+			case K_CALL:
+				rc = do_call(s, pv);
+				goto done;
+			default:
+				rc = exec_ddl(s);
+				goto done;
+			}
+		}
+
+		if (st) {
+			failed++;
+			if (s->paramStatusPtr) { s->paramStatusPtr[r] = SQL_PARAM_ERROR; }
+			exec_error(s, st, n > 1 ? (SQLINTEGER)(r + 1) : 0);
+			if (s->atomic || n == 1) {
+				rc = SQL_ERROR;
+				for (r = r + 1; r < n && s->paramStatusPtr; r++) {
+					s->paramStatusPtr[r] = SQL_PARAM_UNUSED;
+				}
+				break;
+			}
+		} else {
+			succeeded++;
+			if (s->paramStatusPtr) { s->paramStatusPtr[r] = SQL_PARAM_SUCCESS; }
+		}
+	}
+
+	if (rc == SQL_SUCCESS && failed) {
+		rc = SQL_SUCCESS_WITH_INFO;
+	}
+	if (rc == SQL_ERROR && n > 1 && s->atomic && t && !t->sink) {
+		/* an atomic array insert is all or nothing */
+		t->nrows -= (int)total;
+		total = 0;
+	}
+	s->rowCount = (SQLINTEGER)total;
+
+	if (s->kind == K_FINAL_INSERT && rc != SQL_ERROR) {
+		int c;
+		result_close(s);
+		s->ownRows = inserted;
+		s->nrrows = nInserted;
+		s->open = 1;
+		inserted = NULL;
+		for (c = 0; c < s->nrcols; c++) { s->rmap[c] = s->rmap[c]; }
+	}
+done:
+	if (inserted) {
+		for (i = 0; i < nInserted; i++) {
+			int c;
+			for (c = 0; c < t->ncols; c++) { free(inserted[i][c].s); }
+			free(inserted[i]);
+		}
+		free(inserted);
+	}
+	for (i = 0; i < s->nparams; i++) { fv_clear(&pv[i]); }
+	free(pv);
+
+	if (rc != SQL_ERROR && s->dbc->autoCommit && s->kind != K_SELECT) {
+		catalog_end_tran(s->dbc->id, 1);
+	}
+	return rc;
+}
+
+static SQLRETURN
+stmt_execute(FStmt *s)
+{
+	int i;
+
+	if (!s->prepared) {
+		return diag_error(&s->hdr, "HY010", -99999, "Function sequence error.", NULL);
+	}
+	result_close(s);
+	if (s->kind == K_CALL) { result_cols_clear(s); }
+	if (s->kind == K_SELECT) { select_describe(s); }
+
+	for (i = 0; i < s->nparams; i++) {
+		if (i >= s->nParamSlots || !s->params[i].bound) {
+			return diag_error(&s->hdr, "07002", -313, "The number of host variables is not equal to the number of parameter markers.", NULL);
+		}
+	}
+
+	for (i = 0; i < s->nparams; i++) {
+		FParam *pa = &s->params[i];
+		pa->dae.len = 0;
+		pa->daeNull = 0;
+		if (pa->ind && (*pa->ind == SQL_DATA_AT_EXEC ||
+				*pa->ind <= SQL_LEN_DATA_AT_EXEC_OFFSET)) {
+			s->daePending = 1;
+		}
+	}
+	if (s->daePending) {
+		s->daeIdx = -1;
+		return SQL_NEED_DATA;
+	}
+	return stmt_run(s);
+}
+
+/* ########################################################################
+
+   API: handles, environment and connections
+
+   ######################################################################## */
+
+#define GET_STMT(var, h)						\
+	FStmt *var = (FStmt *)handle_get(SQL_HANDLE_STMT, h);		\
+	if (!var) { FAKE_UNLOCK(); return SQL_INVALID_HANDLE; }		\
+	diag_clear(&var->hdr)
+
+#define GET_DBC(var, h)							\
+	FDbc *var = (FDbc *)handle_get(SQL_HANDLE_DBC, h);		\
+	if (!var) { FAKE_UNLOCK(); return SQL_INVALID_HANDLE; }		\
+	diag_clear(&var->hdr)
+
+SQLRETURN SQL_API_FN
+SQLAllocHandle(SQLSMALLINT type, SQLHANDLE input, SQLHANDLE *out)
+{
+	SQLRETURN rc = SQL_SUCCESS;
+
+	fake_count(F_SQLAllocHandle);
+	FAKE_LOCK();
+	if (type == SQL_HANDLE_ENV) {
+		FEnv *e = (FEnv *)calloc(1, sizeof(FEnv));
+		e->hdr.htype = type;
+		*out = handle_new(type, e);
+	} else if (type == SQL_HANDLE_DBC) {
+		FDbc *d;
+		if (!handle_get(SQL_HANDLE_ENV, input)) {
+			rc = SQL_INVALID_HANDLE;
+		} else {
+			d = (FDbc *)calloc(1, sizeof(FDbc));
+			d->hdr.htype = type;
+			d->id = fakeNextDbcId++;
+			*out = handle_new(type, d);
+		}
+	} else if (type == SQL_HANDLE_STMT) {
+		FDbc *d = (FDbc *)handle_get(SQL_HANDLE_DBC, input);
+		if (!d) {
+			rc = SQL_INVALID_HANDLE;
+		} else if (!d->connected) {
+			rc = diag_error(&d->hdr, "08003", -1024, "Connection is closed.", NULL);
+		} else {
+			FStmt *s = (FStmt *)calloc(1, sizeof(FStmt));
+			s->hdr.htype = type;
+			s->dbc = d;
+			s->rowArraySize = 1;
+			s->paramsetSize = 1;
+			s->atomic = 1;
+			s->rowCount = -1;
+			*out = handle_new(type, s);
+		}
+	} else {
+		rc = SQL_ERROR;
+	}
+	FAKE_UNLOCK();
+	return rc;
+}
+
+static void
+stmt_free(FStmt *s)
+{
+	int i;
+
+	result_close(s);
+	result_cols_clear(s);
+	stmt_clear_plan(s);
+	for (i = 0; i < s->nParamSlots; i++) { fbuf_free(&s->params[i].dae); }
+	free(s->params);
+	free(s->binds);
+	fv_clear(&s->synthVal);
+	fbuf_free(&s->scratch);
+	fbuf_free(&s->scratch2);
+	free(s->hdr.diag);
+	free(s);
+}
+
+SQLRETURN SQL_API_FN
+SQLFreeHandle(SQLSMALLINT type, SQLHANDLE h)
+{
+	void *obj;
+
+	fake_count(F_SQLFreeHandle);
+	FAKE_LOCK();
+	obj = handle_get(type, h);
+	if (!obj) {
+		FAKE_UNLOCK();
+		return SQL_INVALID_HANDLE;
+	}
+	if (type == SQL_HANDLE_STMT) {
+		stmt_free((FStmt *)obj);
+	} else if (type == SQL_HANDLE_DBC) {
+		FDbc *d = (FDbc *)obj;
+		int i;
+		if (d->connected) {
+			diag_clear(&d->hdr);
+			diag_error(&d->hdr, "HY010", -99999, "Function sequence error.", NULL);
+			FAKE_UNLOCK();
+			return SQL_ERROR;
+		}
+		/* drop statements still allocated on this connection */
+		for (i = 0; i < fakeNHandles; i++) {
+			if (fakeHandles[i].type == SQL_HANDLE_STMT &&
+			    ((FStmt *)fakeHandles[i].obj)->dbc == d) {
+				stmt_free((FStmt *)fakeHandles[i].obj);
+				handle_release(i + 1);
+			}
+		}
+		locators_free(d);
+		free(d->locs);
+		free(d->hdr.diag);
+		free(d);
+	} else {
+		free(((FHeader *)obj)->diag);
+		free(obj);
+	}
+	handle_release(h);
+	FAKE_UNLOCK();
+	return SQL_SUCCESS;
+}
+
+SQLRETURN SQL_API_FN
+SQLSetEnvAttr(SQLHENV h, SQLINTEGER attr, SQLPOINTER val, SQLINTEGER len)
+{
+	fake_count(F_SQLSetEnvAttr);
+	return SQL_SUCCESS;
+}
+
+SQLRETURN SQL_API_FN
+SQLSetConnectAttr(SQLHDBC h, SQLINTEGER attr, SQLPOINTER val, SQLINTEGER len)
+{
+	fake_count(F_SQLSetConnectAttr);
+	FAKE_LOCK();
+	{
+		GET_DBC(d, h);
+		if (attr == SQL_ATTR_AUTOCOMMIT) {
+			d->autoCommit = (int)(long)val == SQL_AUTOCOMMIT_ON;
+		}
+	}
+	FAKE_UNLOCK();
+	return SQL_SUCCESS;
+}
+
+static int
+fake_strlen(SQLCHAR *s, SQLSMALLINT len)
+{
+	if (!s) { return 0; }
+	return len == SQL_NTS ? (int)strlen((char *)s) : len;
+}
+
+SQLRETURN SQL_API_FN
+SQLConnect(SQLHDBC h, SQLCHAR *dsn, SQLSMALLINT dsnLen,
+	SQLCHAR *uid, SQLSMALLINT uidLen, SQLCHAR *pwd, SQLSMALLINT pwdLen)
+{
+	char d[SQL_MAX_DSN_LENGTH + 1], u[129], p[129];
+	const char *wantUid = getenv("FAKECLI_UID");
+	const char *wantPwd = getenv("FAKECLI_PWD");
+	SQLRETURN rc = SQL_SUCCESS;
+	int n;
+
+	fake_count(F_SQLConnect);
+	fake_round_trip();
+	FAKE_LOCK();
+	{
+		GET_DBC(c, h);
+
+		n = fake_strlen(dsn, dsnLen);
+		snprintf(d, sizeof(d), "%.*s", n, dsn ? (char *)dsn : "");
+		n = fake_strlen(uid, uidLen);
+		snprintf(u, sizeof(u), "%.*s", n, uid ? (char *)uid : "");
+		n = fake_strlen(pwd, pwdLen);
+		snprintf(p, sizeof(p), "%.*s", n, pwd ? (char *)pwd : "");
+		fake_upper(d);
+
+		if (!wantUid) { wantUid = "db2inst1"; }
+		if (!wantPwd) { wantPwd = "ibmdb2"; }
+
+		if (strstr(d, "NONEXIST") || strstr(d, "NO_DATABASE")) {
+			rc = diag_error(&c->hdr, "08001", -1013, "The database alias name \"%s\" could not be found.", d);
+		} else if (u[0] && (strcmp(u, wantUid) != 0 || strcmp(p, wantPwd) != 0)) {
+			rc = diag_error(&c->hdr, "08001", -30082, "Security processing failed with reason \"24\" (\"USERNAME AND/OR PASSWORD INVALID\").", NULL);
+		} else {
+			c->connected = 1;
+		}
+	}
+	FAKE_UNLOCK();
+	return rc;
+}
+
+SQLRETURN SQL_API_FN
+SQLDisconnect(SQLHDBC h)
+{
+	fake_count(F_SQLDisconnect);
+	fake_round_trip();
+	FAKE_LOCK();
+	{
+		GET_DBC(c, h);
+		if (!c->connected) {
+			diag_error(&c->hdr, "08003", -1024, "Connection is closed.", NULL);
+			FAKE_UNLOCK();
+			return SQL_ERROR;
+		}
+		catalog_end_tran(c->id, 0);
+		locators_free(c);
+		c->connected = 0;
+	}
+	FAKE_UNLOCK();
+	return SQL_SUCCESS;
+}
+
+SQLRETURN SQL_API_FN
+SQLGetFunctions(SQLHDBC h, SQLUSMALLINT fn, SQLUSMALLINT *supported)
+{
+	fake_count(F_SQLGetFunctions);
+	*supported = SQL_TRUE;
+	return SQL_SUCCESS;
+}
+
+SQLRETURN SQL_API_FN
+SQLGetInfo(SQLHDBC h, SQLUSMALLINT type, SQLPOINTER val,
+	SQLSMALLINT bufLen, SQLSMALLINT *len)
+{
+	const char *s = NULL;
+
+	fake_count(F_SQLGetInfo);
+	fake_round_trip();
+	switch (type) {
+	case SQL_DBMS_NAME: s = "DB2/LINUXX8664"; break;
+	case SQL_DBMS_VER: s = "11.05.0000"; break;
+	case SQL_DRIVER_NAME: s = "libfakecli"; break;
+	case SQL_DRIVER_VER: s = "11.05.0000"; break;
+	case SQL_SERVER_NAME: s = "FAKEDB2"; break;
+	case SQL_FETCH_DIRECTION:
+		if (val) { *(SQLINTEGER *)val = 0x7f; }
+		if (len) { *len = sizeof(SQLINTEGER); }
+		return SQL_SUCCESS;
+	default:
+		return SQL_ERROR;
+	}
+	if (val && bufLen > 0) {
+		snprintf((char *)val, bufLen, "%s", s);
+	}
+	if (len) { *len = (SQLSMALLINT)strlen(s); }
+	return SQL_SUCCESS;
+}
+
+SQLRETURN SQL_API_FN
+SQLEndTran(SQLSMALLINT type, SQLHANDLE h, SQLSMALLINT completion)
+{
+	fake_count(F_SQLEndTran);
+	fake_round_trip();
+	FAKE_LOCK();
+	{
+		GET_DBC(c, h);
+		if (!c->connected) {
+			diag_error(&c->hdr, "08003", -1024, "Connection is closed.", NULL);
+			FAKE_UNLOCK();
+			return SQL_ERROR;
+		}
+		catalog_end_tran(c->id, completion == SQL_COMMIT);
+		locators_free(c);
+	}
+	FAKE_UNLOCK();
+	return SQL_SUCCESS;
+}
+
+/* ########################################################################
+
+   API: statements
+
+   ######################################################################## */
+
+SQLRETURN SQL_API_FN
+SQLSetStmtAttr(SQLHSTMT h, SQLINTEGER attr, SQLPOINTER val, SQLINTEGER len)
+{
+	SQLUINTEGER n = (SQLUINTEGER)(unsigned long)val;
+
+	fake_count(F_SQLSetStmtAttr);
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		switch (attr) {
+		case SQL_ATTR_ROW_ARRAY_SIZE: s->rowArraySize = n ? n : 1; break;
+		case SQL_ATTR_ROWS_FETCHED_PTR: s->rowsFetchedPtr = (SQLUINTEGER *)val; break;
+		case SQL_ATTR_ROW_STATUS_PTR: s->rowStatusPtr = (SQLUSMALLINT *)val; break;
+		case SQL_ATTR_ROW_BIND_OFFSET_PTR: s->bindOffsetPtr = (SQLINTEGER *)val; break;
+		case SQL_ATTR_PARAMSET_SIZE: s->paramsetSize = n ? n : 1; break;
+		case SQL_ATTR_PARAMS_PROCESSED_PTR: s->paramsProcessedPtr = (SQLUINTEGER *)val; break;
+		case SQL_ATTR_PARAM_STATUS_PTR: s->paramStatusPtr = (SQLUSMALLINT *)val; break;
+		case SQL_ATTR_PARAMOPT_ATOMIC: s->atomic = (n == SQL_ATOMIC_YES); break;
+		case SQL_ATTR_CURSOR_SCROLLABLE: s->scrollable = (n == SQL_SCROLLABLE); break;
+		default: break;
+		}
+	}
+	FAKE_UNLOCK();
+	return SQL_SUCCESS;
+}
+
+SQLRETURN SQL_API_FN
+SQLPrepare(SQLHSTMT h, SQLCHAR *sql, SQLINTEGER len)
+{
+	SQLRETURN rc;
+	char *text;
+
+	fake_count(F_SQLPrepare);
+	fake_round_trip();
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		text = fake_strndup((char *)sql, len == SQL_NTS ? (int)strlen((char *)sql) : len);
+		rc = stmt_prepare(s, text);
+		free(text);
+	}
+	FAKE_UNLOCK();
+	return rc;
+}
+
+SQLRETURN SQL_API_FN
+SQLNumParams(SQLHSTMT h, SQLSMALLINT *n)
+{
+	fake_count(F_SQLNumParams);
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		*n = (SQLSMALLINT)s->nparams;
+	}
+	FAKE_UNLOCK();
+	return SQL_SUCCESS;
+}
+
+SQLRETURN SQL_API_FN
+SQLDescribeParam(SQLHSTMT h, SQLUSMALLINT idx, SQLSMALLINT *type,
+	SQLUINTEGER *size, SQLSMALLINT *dec, SQLSMALLINT *nullable)
+{
+	SQLRETURN rc = SQL_SUCCESS;
+
+	fake_count(F_SQLDescribeParam);
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		if (idx < 1 || idx > s->nparams) {
+			rc = diag_error(&s->hdr, "07009", -99999, "Invalid descriptor index.", NULL);
+		} else {
+			FCol *c = &s->pdesc[idx - 1];
+			if (type) { *type = c->type; }
+			if (size) { *size = c->size; }
+			if (dec) { *dec = c->scale; }
+			if (nullable) { *nullable = c->nullable; }
+		}
+	}
+	FAKE_UNLOCK();
+	return rc;
+}
+
+SQLRETURN SQL_API_FN
+SQLBindParameter(SQLHSTMT h, SQLUSMALLINT idx, SQLSMALLINT io,
+	SQLSMALLINT ctype, SQLSMALLINT sqlType, SQLUINTEGER size,
+	SQLSMALLINT dec, SQLPOINTER buf, SQLINTEGER bufLen, SQLINTEGER *ind)
+{
+	fake_count(F_SQLBindParameter);
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		FParam *pa;
+		if (idx < 1) {
+			diag_error(&s->hdr, "07009", -99999, "Invalid descriptor index.", NULL);
+			FAKE_UNLOCK();
+			return SQL_ERROR;
+		}
+		if (idx > s->nParamSlots) {
+			s->params = (FParam *)realloc(s->params, sizeof(FParam) * idx);
+			memset(s->params + s->nParamSlots, 0, sizeof(FParam) * (idx - s->nParamSlots));
+			s->nParamSlots = idx;
+		}
+		pa = &s->params[idx - 1];
+		pa->bound = 1;
+		pa->io = io;
+		pa->ctype = ctype;
+		pa->sqlType = sqlType;
+		pa->buf = buf;
+		pa->bufLen = bufLen;
+		pa->ind = ind;
+	}
+	FAKE_UNLOCK();
+	return SQL_SUCCESS;
+}
+
+SQLRETURN SQL_API_FN
+SQLExecute(SQLHSTMT h)
+{
+	SQLRETURN rc;
+
+	fake_count(F_SQLExecute);
+	fake_round_trip();
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		rc = stmt_execute(s);
+	}
+	FAKE_UNLOCK();
+	return rc;
+}
+
+SQLRETURN SQL_API_FN
+SQLParamData(SQLHSTMT h, SQLPOINTER *value)
+{
+	SQLRETURN rc = SQL_NEED_DATA;
+	int i;
+
+	fake_count(F_SQLParamData);
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		if (!s->daePending) {
+			diag_error(&s->hdr, "HY010", -99999, "Function sequence error.", NULL);
+			FAKE_UNLOCK();
+			return SQL_ERROR;
+		}
+		for (i = s->daeIdx + 1; i < s->nparams; i++) {
+			FParam *pa = &s->params[i];
+			if (pa->ind && (*pa->ind == SQL_DATA_AT_EXEC ||
+					*pa->ind <= SQL_LEN_DATA_AT_EXEC_OFFSET)) {
+				break;
+			}
+		}
+		if (i < s->nparams) {
+			s->daeIdx = i;
+			if (value) { *value = s->params[i].buf; }
+		} else {
+			s->daePending = 0;
+			s->daeIdx = -1;
+			rc = stmt_run(s);
+		}
+	}
+	FAKE_UNLOCK();
+	return rc;
+}
+
+SQLRETURN SQL_API_FN
+SQLCancel(SQLHSTMT h)
+{
+	fake_count(F_SQLCancel);
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		s->daePending = 0;
+		s->daeIdx = -1;
+	}
+	FAKE_UNLOCK();
+	return SQL_SUCCESS;
+}
+
+SQLRETURN SQL_API_FN
+SQLPutData(SQLHSTMT h, SQLPOINTER data, SQLINTEGER len)
+{
+	fake_count(F_SQLPutData);
+	fake_round_trip();
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		FParam *pa;
+		if (!s->daePending || s->daeIdx < 0) {
+			diag_error(&s->hdr, "HY010", -99999, "Function sequence error.", NULL);
+			FAKE_UNLOCK();
+			return SQL_ERROR;
+		}
+		pa = &s->params[s->daeIdx];
+		if (len == SQL_NULL_DATA) {
+			pa->daeNull = 1;
+		} else {
+			if (len == SQL_NTS) { len = (SQLINTEGER)strlen((char *)data); }
+			fbuf_append(&pa->dae, (char *)data, len);
+		}
+	}
+	FAKE_UNLOCK();
+	return SQL_SUCCESS;
+}
+
+SQLRETURN SQL_API_FN
+SQLRowCount(SQLHSTMT h, SQLINTEGER *count)
+{
+	fake_count(F_SQLRowCount);
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		*count = s->rowCount;
+	}
+	FAKE_UNLOCK();
+	return SQL_SUCCESS;
+}
+
+SQLRETURN SQL_API_FN
+SQLNumResultCols(SQLHSTMT h, SQLSMALLINT *n)
+{
+	fake_count(F_SQLNumResultCols);
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		*n = (SQLSMALLINT)s->nrcols;
+	}
+	FAKE_UNLOCK();
+	return SQL_SUCCESS;
+}
+
+SQLRETURN SQL_API_FN
+SQLDescribeCol(SQLHSTMT h, SQLUSMALLINT idx, SQLCHAR *name,
+	SQLSMALLINT bufLen, SQLSMALLINT *nameLen, SQLSMALLINT *type,
+	SQLUINTEGER *size, SQLSMALLINT *dec, SQLSMALLINT *nullable)
+{
+	SQLRETURN rc = SQL_SUCCESS;
+
+	fake_count(F_SQLDescribeCol);
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		if (idx < 1 || idx > s->nrcols) {
+			rc = diag_error(&s->hdr, "07009", -99999, "Invalid descriptor index.", NULL);
+		} else {
+			FCol *c = &s->rcols[idx - 1];
+			if (name && bufLen > 0) { snprintf((char *)name, bufLen, "%s", c->name); }
+			if (nameLen) { *nameLen = (SQLSMALLINT)strlen(c->name); }
+			if (type) { *type = c->type; }
+			if (size) { *size = c->size; }
+			if (dec) { *dec = c->scale; }
+			if (nullable) { *nullable = c->nullable; }
+		}
+	}
+	FAKE_UNLOCK();
+	return rc;
+}
+
+static SQLINTEGER
+col_display_size(const FCol *c)
+{
+	switch (c->type) {
+	case SQL_SMALLINT: return 6;
+	case SQL_INTEGER: return 11;
+	case SQL_BIGINT: return 20;
+	case SQL_REAL: return 14;
+	case SQL_DOUBLE: case SQL_FLOAT: return 24;
+	case SQL_DECIMAL: case SQL_NUMERIC: return (SQLINTEGER)c->size + 2;
+	case SQL_BINARY: case SQL_VARBINARY: case SQL_LONGVARBINARY: case SQL_BLOB:
+		return (SQLINTEGER)c->size * 2;
+	default: return (SQLINTEGER)c->size;
+	}
+}
+
+static SQLINTEGER
+col_octet_length(const FCol *c)
+{
+	switch (c->type) {
+	case SQL_SMALLINT: return 2;
+	case SQL_INTEGER: case SQL_REAL: return 4;
+	case SQL_BIGINT: case SQL_DOUBLE: case SQL_FLOAT: return 8;
+	case SQL_DECIMAL: case SQL_NUMERIC: return (SQLINTEGER)c->size / 2 + 1;
+	case SQL_TYPE_DATE: case SQL_TYPE_TIME: return 6;
+	case SQL_TYPE_TIMESTAMP: return 16;
+	default: return (SQLINTEGER)c->size;
+	}
+}
+
+SQLRETURN SQL_API_FN
+SQLColAttribute(SQLHSTMT h, SQLUSMALLINT idx, SQLUSMALLINT field,
+	SQLPOINTER charAttr, SQLSMALLINT bufLen, SQLSMALLINT *strLen,
+	SQLPOINTER numAttr)
+{
+	SQLRETURN rc = SQL_SUCCESS;
+
+	fake_count(F_SQLColAttribute);
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		if (idx < 1 || idx > s->nrcols) {
+			rc = diag_error(&s->hdr, "07009", -99999, "Invalid descriptor index.", NULL);
+		} else if (numAttr) {
+			FCol *c = &s->rcols[idx - 1];
+			if (field == SQL_DESC_DISPLAY_SIZE) {
+				*(SQLINTEGER *)numAttr = col_display_size(c);
+			} else if (field == SQL_DESC_LENGTH) {
+				*(SQLINTEGER *)numAttr = col_octet_length(c);
+			} else {
+				*(SQLINTEGER *)numAttr = 0;
+			}
+		}
+	}
+	FAKE_UNLOCK();
+	return rc;
+}
+
+SQLRETURN SQL_API_FN
+SQLBindCol(SQLHSTMT h, SQLUSMALLINT idx, SQLSMALLINT ctype,
+	SQLPOINTER buf, SQLINTEGER bufLen, SQLINTEGER *ind)
+{
+	fake_count(F_SQLBindCol);
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		if (idx < 1) {
+			diag_error(&s->hdr, "07009", -99999, "Invalid descriptor index.", NULL);
+			FAKE_UNLOCK();
+			return SQL_ERROR;
+		}
+		if (idx > s->nbinds) {
+			s->binds = (FBind *)realloc(s->binds, sizeof(FBind) * idx);
+			memset(s->binds + s->nbinds, 0, sizeof(FBind) * (idx - s->nbinds));
+			s->nbinds = idx;
+		}
+		s->binds[idx - 1].ctype = ctype;
+		s->binds[idx - 1].buf = buf;
+		s->binds[idx - 1].bufLen = bufLen;
+		s->binds[idx - 1].ind = ind;
+	}
+	FAKE_UNLOCK();
+	return SQL_SUCCESS;
+}
+
+static SQLRETURN
+stmt_fetch(FStmt *s, SQLSMALLINT orient, SQLINTEGER offset)
+{
+	long start, n, r;
+	SQLUINTEGER size = s->rowArraySize;
+	int c, warn = 0;
+	SQLINTEGER off = s->bindOffsetPtr ? *s->bindOffsetPtr : 0;
+
+	if (!s->open) {
+		return diag_error(&s->hdr, "24000", -501, "The cursor specified in a FETCH statement or CLOSE statement is not open.", NULL);
+	}
+	switch (orient) {
+	case SQL_FETCH_FIRST: start = 0; break;
+	case SQL_FETCH_LAST: start = s->nrrows - (long)size; if (start < 0) { start = 0; } break;
+	case SQL_FETCH_PRIOR: start = s->cur - (long)size; break;
+	case SQL_FETCH_ABSOLUTE: start = offset > 0 ? offset - 1 : s->nrrows + offset; break;
+	case SQL_FETCH_RELATIVE: start = s->cur + offset; break;
+	default: start = s->cur + s->curN; break;
+	}
+	if (start < 0 || start >= s->nrrows) {
+		s->cur = start < 0 ? 0 : s->nrrows;
+		s->curN = 0;
+		if (s->rowsFetchedPtr) { *s->rowsFetchedPtr = 0; }
+		return SQL_NO_DATA_FOUND;
+	}
+	n = s->nrrows - start;
+	if (n > (long)size) { n = (long)size; }
+
+	for (r = 0; r < n; r++) {
+		for (c = 0; c < s->nrcols && c < s->nbinds; c++) {
+			FBind *b = &s->binds[c];
+			FVal *v;
+			const char *st = NULL;
+			SQLRETURN rc;
+			int elem;
+			char *buf;
+			SQLINTEGER *ind;
+
+			if (!b->buf && !b->ind) { continue; }
+			elem = b->bufLen > 0 ? b->bufLen : c_type_size(b->ctype);
+			buf = (char *)b->buf + (size_t)elem * r + off;
+			ind = b->ind ? (SQLINTEGER *)((char *)(b->ind + r) + off) : NULL;
+			get_result_value(s, start + r, c, &v);
+			rc = fv_to_c(s, &s->rcols[c], v, b->ctype, buf, b->bufLen, ind, &st);
+			if (rc == SQL_ERROR) {
+				if (s->rowStatusPtr) { s->rowStatusPtr[r] = SQL_ROW_ERROR; }
+				return exec_error(s, st, (SQLINTEGER)(r + 1));
+			}
+			if (rc == SQL_SUCCESS_WITH_INFO) { warn = 1; }
+		}
+		if (s->rowStatusPtr) {
+			s->rowStatusPtr[r] = warn ? SQL_ROW_SUCCESS_WITH_INFO : SQL_ROW_SUCCESS;
+		}
+	}
+	for (r = n; r < (long)size && s->rowStatusPtr; r++) {
+		s->rowStatusPtr[r] = SQL_ROW_NOROW;
+	}
+	if (s->rowsFetchedPtr) { *s->rowsFetchedPtr = (SQLUINTEGER)n; }
+	s->cur = start;
+	s->curN = n;
+	if (warn) {
+		diag_add_row(&s->hdr, "01004", 0, 0, "%s", "String data, right truncation.");
+		return SQL_SUCCESS_WITH_INFO;
+	}
+	return SQL_SUCCESS;
+}
+
+SQLRETURN SQL_API_FN
+SQLFetchScroll(SQLHSTMT h, SQLSMALLINT orient, SQLINTEGER offset)
+{
+	SQLRETURN rc;
+
+	fake_count(F_SQLFetchScroll);
+	fake_round_trip();
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		if (!s->scrollable && orient != SQL_FETCH_NEXT) {
+			rc = diag_error(&s->hdr, "HY106", -99999, "Fetch type out of range.", NULL);
+		} else {
+			rc = stmt_fetch(s, orient, offset);
+		}
+	}
+	FAKE_UNLOCK();
+	return rc;
+}
+
+SQLRETURN SQL_API_FN
+SQLFetch(SQLHSTMT h)
+{
+	SQLRETURN rc;
+
+	fake_count(F_SQLFetch);
+	fake_round_trip();
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		rc = stmt_fetch(s, SQL_FETCH_NEXT, 0);
+	}
+	FAKE_UNLOCK();
+	return rc;
+}
+
+SQLRETURN SQL_API_FN
+SQLFreeStmt(SQLHSTMT h, SQLUSMALLINT option)
+{
+	int i;
+
+	fake_count(F_SQLFreeStmt);
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		switch (option) {
+		case SQL_CLOSE:
+			result_close(s);
+			s->daePending = 0;
+			break;
+		case SQL_UNBIND:
+			free(s->binds);
+			s->binds = NULL;
+			s->nbinds = 0;
+			break;
+		case SQL_RESET_PARAMS:
+			for (i = 0; i < s->nParamSlots; i++) {
+				fbuf_free(&s->params[i].dae);
+				s->params[i].bound = 0;
+			}
+			break;
+		}
+	}
+	FAKE_UNLOCK();
+	return SQL_SUCCESS;
+}
+
+SQLRETURN SQL_API_FN
+SQLProcedureColumns(SQLHSTMT h, SQLCHAR *cat, SQLSMALLINT catLen,
+	SQLCHAR *schema, SQLSMALLINT schemaLen, SQLCHAR *proc,
+	SQLSMALLINT procLen, SQLCHAR *col, SQLSMALLINT colLen)
+{
+	static const struct { const char *name; SQLSMALLINT type; } cols[] = {
+		{ "PROCEDURE_CAT", SQL_VARCHAR }, { "PROCEDURE_SCHEM", SQL_VARCHAR },
+		{ "PROCEDURE_NAME", SQL_VARCHAR }, { "COLUMN_NAME", SQL_VARCHAR },
+		{ "COLUMN_TYPE", SQL_SMALLINT }, { "DATA_TYPE", SQL_SMALLINT },
+		{ "TYPE_NAME", SQL_VARCHAR }, { "COLUMN_SIZE", SQL_INTEGER },
+		{ "BUFFER_LENGTH", SQL_INTEGER }, { "DECIMAL_DIGITS", SQL_SMALLINT },
+		{ "NUM_PREC_RADIX", SQL_SMALLINT }, { "NULLABLE", SQL_SMALLINT },
+		{ "REMARKS", SQL_VARCHAR }, { "COLUMN_DEF", SQL_VARCHAR },
+		{ "SQL_DATA_TYPE", SQL_SMALLINT }, { "SQL_DATETIME_SUB", SQL_SMALLINT },
+		{ "CHAR_OCTET_LENGTH", SQL_INTEGER }, { "ORDINAL_POSITION", SQL_INTEGER },
+		{ "IS_NULLABLE", SQL_VARCHAR },
+	};
+	char name[FAKE_NAME_LEN + 1];
+	int i, c, n = fake_strlen(proc, procLen);
+
+	fake_count(F_SQLProcedureColumns);
+	fake_round_trip();
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		FProc *pr;
+
+		snprintf(name, sizeof(name), "%.*s", n, proc ? (char *)proc : "");
+		fake_upper(name);
+		result_close(s);
+		result_cols_clear(s);
+		stmt_clear_plan(s);
+		s->kind = K_PROC_COLUMNS;
+
+		s->nrcols = 19;
+		s->rcols = (FCol *)calloc(19, sizeof(FCol));
+		s->rmap = (int *)calloc(19, sizeof(int));
+		for (c = 0; c < 19; c++) {
+			strcpy(s->rcols[c].name, cols[c].name);
+			s->rcols[c].type = cols[c].type;
+			s->rcols[c].size = cols[c].type == SQL_VARCHAR ? 128 : 10;
+			s->rcols[c].nullable = SQL_NULLABLE;
+			s->rmap[c] = c;
+		}
+
+		pr = proc_find(name);
+		n = pr ? pr->nparams : 0;
+		s->ownRows = (FRow *)calloc(n ? n : 1, sizeof(FRow));
+		for (i = 0; i < n; i++) {
+			FProcParam *pp = &pr->params[i];
+			FRow row = (FRow)calloc(19, sizeof(FVal));
+			for (c = 0; c < 19; c++) { row[c].isnull = 1; }
+			row[2].isnull = 0; row[2].s = strdup(pr->name); row[2].len = (int)strlen(pr->name);
+			row[3].isnull = 0; row[3].s = strdup(pp->name); row[3].len = (int)strlen(pp->name);
+			row[4].isnull = 0; row[4].i = pp->inOut;
+			row[5].isnull = 0; row[5].i = pp->col.type;
+			row[7].isnull = 0; row[7].i = pp->col.size;
+			row[9].isnull = 0; row[9].i = pp->col.scale;
+			row[11].isnull = 0; row[11].i = SQL_NULLABLE;
+			row[17].isnull = 0; row[17].i = i + 1;
+			s->ownRows[i] = row;
+		}
+		s->nrrows = n;
+		s->open = 1;
+		s->cur = s->curN = 0;
+	}
+	FAKE_UNLOCK();
+	return SQL_SUCCESS;
+}
+
+SQLRETURN SQL_API_FN
+SQLGetLength(SQLHSTMT h, SQLSMALLINT locType, SQLINTEGER loc,
+	SQLINTEGER *len, SQLINTEGER *ind)
+{
+	SQLRETURN rc = SQL_SUCCESS;
+
+	fake_count(F_SQLGetLength);
+	fake_round_trip();
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		FLocator *l = locator_get(s->dbc, loc);
+		if (!l) {
+			rc = diag_error(&s->hdr, "0F001", -423, "Locator variable does not currently represent any value.", NULL);
+		} else {
+			if (len) { *len = l->len; }
+			if (ind) { *ind = 0; }
+		}
+	}
+	FAKE_UNLOCK();
+	return rc;
+}
+
+SQLRETURN SQL_API_FN
+SQLGetSubString(SQLHSTMT h, SQLSMALLINT locType, SQLINTEGER loc,
+	SQLUINTEGER pos, SQLUINTEGER forLen, SQLSMALLINT ctype,
+	SQLPOINTER buf, SQLINTEGER bufLen, SQLINTEGER *outLen, SQLINTEGER *ind)
+{
+	SQLRETURN rc = SQL_SUCCESS;
+
+	fake_count(F_SQLGetSubString);
+	fake_round_trip();
+	FAKE_LOCK();
+	{
+		GET_STMT(s, h);
+		FLocator *l = locator_get(s->dbc, loc);
+		if (!l) {
+			rc = diag_error(&s->hdr, "0F001", -423, "Locator variable does not currently represent any value.", NULL);
+		} else if (pos < 1 || (long)pos - 1 > l->len) {
+			rc = diag_error(&s->hdr, "22011", -138, "A substring error occurred.", NULL);
+		} else {
+			long avail = l->len - (long)(pos - 1);
+			long n = (long)forLen < avail ? (long)forLen : avail;
+			long room = (ctype == SQL_C_CHAR) ? bufLen - 1 : bufLen;
+			if (room < 0) { room = 0; }
+			memcpy(buf, l->data + pos - 1, n <= room ? n : room);
+			if (ctype == SQL_C_CHAR && bufLen > 0) {
+				((char *)buf)[n <= room ? n : room] = '\0';
+			}
+			if (outLen) { *outLen = (SQLINTEGER)n; }
+			if (ind) { *ind = 0; }
+			if (n > room) {
+				diag_add_row(&s->hdr, "01004", 0, 0, "%s", "String data, right truncation.");
+				rc = SQL_SUCCESS_WITH_INFO;
+			}
+		}
+	}
+	FAKE_UNLOCK();
+	return rc;
+}
+
+static FHeader *
+header_of(SQLSMALLINT type, SQLHANDLE h)
+{
+	return (FHeader *)handle_get(type, h);
+}
+
+SQLRETURN SQL_API_FN
+SQLGetDiagRec(SQLSMALLINT type, SQLHANDLE h, SQLSMALLINT rec,
+	SQLCHAR *state, SQLINTEGER *native, SQLCHAR *msg,
+	SQLSMALLINT bufLen, SQLSMALLINT *textLen)
+{
+	FHeader *hdr;
+	FDiag *d;
+	SQLRETURN rc = SQL_SUCCESS;
+
+	fake_count(F_SQLGetDiagRec);
+	FAKE_LOCK();
+	hdr = header_of(type, h);
+	if (!hdr) {
+		rc = SQL_INVALID_HANDLE;
+	} else if (rec < 1 || rec > hdr->nDiag) {
+		rc = SQL_NO_DATA_FOUND;
+	} else {
+		d = &hdr->diag[rec - 1];
+		if (state) { memcpy(state, d->state, SQL_SQLSTATE_SIZE + 1); }
+		if (native) { *native = d->native; }
+		if (msg && bufLen > 0) { snprintf((char *)msg, bufLen, "%s", d->msg); }
+		if (textLen) { *textLen = (SQLSMALLINT)strlen(d->msg); }
+	}
+	FAKE_UNLOCK();
+	return rc;
+}
+
+SQLRETURN SQL_API_FN
+SQLGetDiagField(SQLSMALLINT type, SQLHANDLE h, SQLSMALLINT rec,
+	SQLSMALLINT field, SQLPOINTER info, SQLSMALLINT bufLen,
+	SQLSMALLINT *strLen)
+{
+	FHeader *hdr;
+	SQLRETURN rc = SQL_SUCCESS;
+
+	fake_count(F_SQLGetDiagField);
+	FAKE_LOCK();
+	hdr = header_of(type, h);
+	if (!hdr) {
+		rc = SQL_INVALID_HANDLE;
+	} else if (field == SQL_DIAG_NUMBER) {
+		*(SQLINTEGER *)info = hdr->nDiag;
+	} else if (rec < 1 || rec > hdr->nDiag) {
+		rc = SQL_NO_DATA_FOUND;
+	} else if (field == SQL_DIAG_ROW_NUMBER) {
+		*(SQLINTEGER *)info = hdr->diag[rec - 1].row;
+	} else if (field == SQL_DIAG_SQLSTATE) {
+		if (bufLen > 0) { snprintf((char *)info, bufLen, "%s", hdr->diag[rec - 1].state); }
+		if (strLen) { *strLen = SQL_SQLSTATE_SIZE; }
+	} else {
+		rc = SQL_ERROR;
+	}
+	FAKE_UNLOCK();
+	return rc;
+}
+
+/* FIN */
@@ -0,0 +1,272 @@
+/*
+	Minimal stand-in for the IBM DB2 CLI header (sqlcli1.h).
+
+	Declares only the types, constants and functions that _db2_module.c
+	uses, with the same names and signatures as the real DB2 header, so
+	the module can be built against the fake CLI library in fakecli.c.
+ */
+#ifndef FAKECLI_SQLCLI1_H
+#define FAKECLI_SQLCLI1_H
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+#define SQL_API_FN
+
+typedef unsigned char	SQLCHAR;
+typedef signed short	SQLSMALLINT;
+typedef unsigned short	SQLUSMALLINT;
+typedef int		SQLINTEGER;
+typedef unsigned int	SQLUINTEGER;
+typedef double		SQLDOUBLE;
+typedef float		SQLREAL;
+typedef void *		SQLPOINTER;
+typedef unsigned short	SQLDBCHAR;
+typedef SQLSMALLINT	SQLRETURN;
+typedef long long	SQLBIGINT;
+
+/* DB2 CLI handles are integers, not pointers */
+typedef SQLINTEGER	SQLHANDLE;
+typedef SQLHANDLE	SQLHENV;
+typedef SQLHANDLE	SQLHDBC;
+typedef SQLHANDLE	SQLHSTMT;
+
+typedef struct {
+	SQLSMALLINT	year;
+	SQLUSMALLINT	month;
+	SQLUSMALLINT	day;
+} DATE_STRUCT;
+
+typedef struct {
+	SQLUSMALLINT	hour;
+	SQLUSMALLINT	minute;
+	SQLUSMALLINT	second;
+} TIME_STRUCT;
+
+typedef struct {
+	SQLSMALLINT	year;
+	SQLUSMALLINT	month;
+	SQLUSMALLINT	day;
+	SQLUSMALLINT	hour;
+	SQLUSMALLINT	minute;
+	SQLUSMALLINT	second;
+	SQLUINTEGER	fraction;	/* nanoseconds */
+} TIMESTAMP_STRUCT;
+
+/* return codes */
+#define SQL_SUCCESS		0
+#define SQL_SUCCESS_WITH_INFO	1
+#define SQL_STILL_EXECUTING	2
+#define SQL_NEED_DATA		99
+#define SQL_NO_DATA_FOUND	100
+#define SQL_NO_DATA		SQL_NO_DATA_FOUND
+#define SQL_ERROR		(-1)
+#define SQL_INVALID_HANDLE	(-2)
+
+/* handles */
+#define SQL_HANDLE_ENV		1
+#define SQL_HANDLE_DBC		2
+#define SQL_HANDLE_STMT		3
+#define SQL_NULL_HANDLE		0
+
+#define SQL_TRUE		1
+#define SQL_FALSE		0
+
+/* SQL data types */
+#define SQL_CHAR		1
+#define SQL_NUMERIC		2
+#define SQL_DECIMAL		3
+#define SQL_INTEGER		4
+#define SQL_SMALLINT		5
+#define SQL_FLOAT		6
+#define SQL_REAL		7
+#define SQL_DOUBLE		8
+#define SQL_VARCHAR		12
+#define SQL_TYPE_DATE		91
+#define SQL_TYPE_TIME		92
+#define SQL_TYPE_TIMESTAMP	93
+#define SQL_LONGVARCHAR		(-1)
+#define SQL_BINARY		(-2)
+#define SQL_VARBINARY		(-3)
+#define SQL_LONGVARBINARY	(-4)
+#define SQL_BIGINT		(-5)
+#define SQL_GRAPHIC		(-95)
+#define SQL_VARGRAPHIC		(-96)
+#define SQL_LONGVARGRAPHIC	(-97)
+#define SQL_BLOB		(-98)
+#define SQL_CLOB		(-99)
+#define SQL_DBCLOB		(-350)
+#define SQL_DATALINK		(-400)
+#define SQL_BLOB_LOCATOR	31
+#define SQL_CLOB_LOCATOR	41
+#define SQL_DBCLOB_LOCATOR	(-351)
+
+/* C data types */
+#define SQL_C_CHAR		SQL_CHAR
+#define SQL_C_LONG		SQL_INTEGER
+#define SQL_C_SHORT		SQL_SMALLINT
+#define SQL_C_FLOAT		SQL_REAL
+#define SQL_C_DOUBLE		SQL_DOUBLE
+#define SQL_C_TYPE_DATE		SQL_TYPE_DATE
+#define SQL_C_TYPE_TIME		SQL_TYPE_TIME
+#define SQL_C_TYPE_TIMESTAMP	SQL_TYPE_TIMESTAMP
+#define SQL_C_BINARY		SQL_BINARY
+#define SQL_C_SBIGINT		(-25)
+#define SQL_C_DBCHAR		SQL_DBCLOB
+#define SQL_C_BLOB_LOCATOR	SQL_BLOB_LOCATOR
+#define SQL_C_CLOB_LOCATOR	SQL_CLOB_LOCATOR
+#define SQL_C_DBCLOB_LOCATOR	SQL_DBCLOB_LOCATOR
+
+/* lengths and indicators */
+#define SQL_NTS				(-3)
+#define SQL_NULL_DATA			(-1)
+#define SQL_DATA_AT_EXEC		(-2)
+#define SQL_LEN_DATA_AT_EXEC_OFFSET	(-100)
+#define SQL_LEN_DATA_AT_EXEC(length)	(-(length)+SQL_LEN_DATA_AT_EXEC_OFFSET)
+
+#define SQL_SQLSTATE_SIZE	5
+#define SQL_MAX_MESSAGE_LENGTH	1024
+#define SQL_MAX_DSN_LENGTH	32
+
+/* parameter types */
+#define SQL_PARAM_INPUT		1
+#define SQL_PARAM_INPUT_OUTPUT	2
+#define SQL_PARAM_OUTPUT	4
+
+#define SQL_NO_NULLS		0
+#define SQL_NULLABLE		1
+
+/* statement / connection attributes */
+#define SQL_ATTR_QUERY_TIMEOUT		0
+#define SQL_ATTR_ROW_BIND_TYPE		5
+#define SQL_ATTR_CURSOR_TYPE		6
+#define SQL_ATTR_PARAM_BIND_TYPE	18
+#define SQL_ATTR_PARAM_STATUS_PTR	20
+#define SQL_ATTR_PARAMS_PROCESSED_PTR	21
+#define SQL_ATTR_PARAMSET_SIZE		22
+#define SQL_ATTR_ROW_BIND_OFFSET_PTR	23
+#define SQL_ATTR_ROW_STATUS_PTR		25
+#define SQL_ATTR_ROWS_FETCHED_PTR	26
+#define SQL_ATTR_ROW_ARRAY_SIZE		27
+#define SQL_ATTR_AUTOCOMMIT		102
+#define SQL_ATTR_CURSOR_SCROLLABLE	(-1)
+#define SQL_ATTR_PARAMOPT_ATOMIC	2577
+
+#define SQL_AUTOCOMMIT_OFF		0
+#define SQL_AUTOCOMMIT_ON		1
+#define SQL_NONSCROLLABLE		0
+#define SQL_SCROLLABLE			1
+#define SQL_CURSOR_STATIC		3
+#define SQL_BIND_BY_COLUMN		0
+#define SQL_PARAM_BIND_BY_COLUMN	0
+#define SQL_ATOMIC_NO			0
+#define SQL_ATOMIC_YES			1
+
+/* parameter and row status values */
+#define SQL_PARAM_SUCCESS		0
+#define SQL_PARAM_DIAG_UNAVAILABLE	1
+#define SQL_PARAM_ERROR			5
+#define SQL_PARAM_SUCCESS_WITH_INFO	6
+#define SQL_PARAM_UNUSED		7
+
+#define SQL_ROW_SUCCESS			0
+#define SQL_ROW_DELETED			1
+#define SQL_ROW_UPDATED			2
+#define SQL_ROW_NOROW			3
+#define SQL_ROW_ADDED			4
+#define SQL_ROW_ERROR			5
+#define SQL_ROW_SUCCESS_WITH_INFO	6
+
+/* fetch orientation */
+#define SQL_FETCH_NEXT		1
+#define SQL_FETCH_FIRST		2
+#define SQL_FETCH_LAST		3
+#define SQL_FETCH_PRIOR		4
+#define SQL_FETCH_ABSOLUTE	5
+#define SQL_FETCH_RELATIVE	6
+
+/* SQLFreeStmt options */
+#define SQL_CLOSE		0
+#define SQL_DROP		1
+#define SQL_UNBIND		2
+#define SQL_RESET_PARAMS	3
+
+/* SQLEndTran */
+#define SQL_COMMIT		0
+#define SQL_ROLLBACK		1
+
+/* SQLColAttribute */
+#define SQL_DESC_DISPLAY_SIZE	6
+#define SQL_DESC_LENGTH		1003
+
+/* SQLGetDiagField */
+#define SQL_DIAG_NUMBER		2
+#define SQL_DIAG_SQLSTATE	4
+#define SQL_DIAG_ROW_NUMBER	(-1248)
+
+/* SQLGetInfo */
+#define SQL_DRIVER_NAME		6
+#define SQL_DRIVER_VER		7
+#define SQL_FETCH_DIRECTION	8
+#define SQL_SERVER_NAME		13
+#define SQL_DBMS_NAME		17
+#define SQL_DBMS_VER		18
+
+/* SQLGetFunctions */
+#define SQL_API_SQLGETINFO	45
+
+SQLRETURN SQL_API_FN SQLAllocHandle(SQLSMALLINT, SQLHANDLE, SQLHANDLE *);
+SQLRETURN SQL_API_FN SQLFreeHandle(SQLSMALLINT, SQLHANDLE);
+SQLRETURN SQL_API_FN SQLSetEnvAttr(SQLHENV, SQLINTEGER, SQLPOINTER, SQLINTEGER);
+SQLRETURN SQL_API_FN SQLSetConnectAttr(SQLHDBC, SQLINTEGER, SQLPOINTER, SQLINTEGER);
+SQLRETURN SQL_API_FN SQLConnect(SQLHDBC, SQLCHAR *, SQLSMALLINT,
+		SQLCHAR *, SQLSMALLINT, SQLCHAR *, SQLSMALLINT);
+SQLRETURN SQL_API_FN SQLDisconnect(SQLHDBC);
+SQLRETURN SQL_API_FN SQLGetFunctions(SQLHDBC, SQLUSMALLINT, SQLUSMALLINT *);
+SQLRETURN SQL_API_FN SQLGetInfo(SQLHDBC, SQLUSMALLINT, SQLPOINTER,
+		SQLSMALLINT, SQLSMALLINT *);
+SQLRETURN SQL_API_FN SQLEndTran(SQLSMALLINT, SQLHANDLE, SQLSMALLINT);
+
+SQLRETURN SQL_API_FN SQLSetStmtAttr(SQLHSTMT, SQLINTEGER, SQLPOINTER, SQLINTEGER);
+SQLRETURN SQL_API_FN SQLPrepare(SQLHSTMT, SQLCHAR *, SQLINTEGER);
+SQLRETURN SQL_API_FN SQLNumParams(SQLHSTMT, SQLSMALLINT *);
+SQLRETURN SQL_API_FN SQLDescribeParam(SQLHSTMT, SQLUSMALLINT, SQLSMALLINT *,
+		SQLUINTEGER *, SQLSMALLINT *, SQLSMALLINT *);
+SQLRETURN SQL_API_FN SQLBindParameter(SQLHSTMT, SQLUSMALLINT, SQLSMALLINT,
+		SQLSMALLINT, SQLSMALLINT, SQLUINTEGER, SQLSMALLINT,
+		SQLPOINTER, SQLINTEGER, SQLINTEGER *);
+SQLRETURN SQL_API_FN SQLExecute(SQLHSTMT);
+SQLRETURN SQL_API_FN SQLParamData(SQLHSTMT, SQLPOINTER *);
+SQLRETURN SQL_API_FN SQLPutData(SQLHSTMT, SQLPOINTER, SQLINTEGER);
+SQLRETURN SQL_API_FN SQLCancel(SQLHSTMT);
+SQLRETURN SQL_API_FN SQLRowCount(SQLHSTMT, SQLINTEGER *);
+SQLRETURN SQL_API_FN SQLNumResultCols(SQLHSTMT, SQLSMALLINT *);
+SQLRETURN SQL_API_FN SQLDescribeCol(SQLHSTMT, SQLUSMALLINT, SQLCHAR *,
+		SQLSMALLINT, SQLSMALLINT *, SQLSMALLINT *, SQLUINTEGER *,
+		SQLSMALLINT *, SQLSMALLINT *);
+SQLRETURN SQL_API_FN SQLColAttribute(SQLHSTMT, SQLUSMALLINT, SQLUSMALLINT,
+		SQLPOINTER, SQLSMALLINT, SQLSMALLINT *, SQLPOINTER);
+SQLRETURN SQL_API_FN SQLBindCol(SQLHSTMT, SQLUSMALLINT, SQLSMALLINT,
+		SQLPOINTER, SQLINTEGER, SQLINTEGER *);
+SQLRETURN SQL_API_FN SQLFetch(SQLHSTMT);
+SQLRETURN SQL_API_FN SQLFetchScroll(SQLHSTMT, SQLSMALLINT, SQLINTEGER);
+SQLRETURN SQL_API_FN SQLFreeStmt(SQLHSTMT, SQLUSMALLINT);
+SQLRETURN SQL_API_FN SQLProcedureColumns(SQLHSTMT, SQLCHAR *, SQLSMALLINT,
+		SQLCHAR *, SQLSMALLINT, SQLCHAR *, SQLSMALLINT,
+		SQLCHAR *, SQLSMALLINT);
+SQLRETURN SQL_API_FN SQLGetLength(SQLHSTMT, SQLSMALLINT, SQLINTEGER,
+		SQLINTEGER *, SQLINTEGER *);
+SQLRETURN SQL_API_FN SQLGetSubString(SQLHSTMT, SQLSMALLINT, SQLINTEGER,
+		SQLUINTEGER, SQLUINTEGER, SQLSMALLINT, SQLPOINTER,
+		SQLINTEGER, SQLINTEGER *, SQLINTEGER *);
+SQLRETURN SQL_API_FN SQLGetDiagRec(SQLSMALLINT, SQLHANDLE, SQLSMALLINT,
+		SQLCHAR *, SQLINTEGER *, SQLCHAR *, SQLSMALLINT, SQLSMALLINT *);
+SQLRETURN SQL_API_FN SQLGetDiagField(SQLSMALLINT, SQLHANDLE, SQLSMALLINT,
+		SQLSMALLINT, SQLPOINTER, SQLSMALLINT, SQLSMALLINT *);
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif /* FAKECLI_SQLCLI1_H */
@@ -0,0 +1,7 @@
+/*
+	Placeholder for the IBM DB2 sqlenv.h header; _db2_module.c includes
+	it but uses nothing from it.
+ */
+#ifndef FAKECLI_SQLENV_H
+#define FAKECLI_SQLENV_H
+#endif /* FAKECLI_SQLENV_H */
@@ -12,6 +12,12 @@ import os
 # DB2_ROOT = "/opt/IBM/db2/V8.1/"
 DB2_ROOT = ""
 
+# With --fakecli, _db2 is linked with the fake DB2 CLI library in fakecli/
+# instead of the DB2 client, to run the tests and benchmarks without DB2
+FAKECLI = '--fakecli' in sys.argv
+if FAKECLI:
+    sys.argv.remove('--fakecli')
+
 def find_db2rootdir():
     # Check various environment variables, depending on platform.
     if sys.platform[:5] == 'win32':
@@ -91,19 +97,37 @@ def find_db2lib():
     else:
         return 'db2'
 
-db2rootdir = find_db2rootdir()
-print 'DB2 install path: "%s"' % db2rootdir
-db2includedir = os.path.join(db2rootdir, 'include')
-print 'DB2 include path: "%s"' % db2includedir
-db2libdir = find_db2libdir()
-print 'DB2 lib path:     "%s"' % db2libdir
-db2lib = find_db2lib()
-print 'DB2 library:      "%s"' % db2lib
+if FAKECLI:
+    if sys.platform[:5] == 'win32':
+        raise Exception('The fake DB2 CLI library does not build on Windows')
+    print 'DB2 library:      fake (fakecli/)'
+    db2ext = Extension(
+        "_db2",
+        ["_db2_module.c", os.path.join('fakecli', 'fakecli.c')],
+        include_dirs=['fakecli'],
+        libraries=['pthread'],
+        )
+else:
+    db2rootdir = find_db2rootdir()
+    print 'DB2 install path: "%s"' % db2rootdir
+    db2includedir = os.path.join(db2rootdir, 'include')
+    print 'DB2 include path: "%s"' % db2includedir
+    db2libdir = find_db2libdir()
+    print 'DB2 lib path:     "%s"' % db2libdir
+    db2lib = find_db2lib()
+    print 'DB2 library:      "%s"' % db2lib
 
-if not os.path.exists(os.path.join(db2includedir, 'sqlcli1.h')):
-    print """WARNING:
+    if not os.path.exists(os.path.join(db2includedir, 'sqlcli1.h')):
+        print """WARNING:
 It seems that you did not install the 'Application Development Kit'.
 Compilation may fail."""
+    db2ext = Extension(
+        "_db2",
+        ["_db2_module.c"],
+        include_dirs=[db2includedir],
+        library_dirs=[db2libdir],
+        libraries=[db2lib],
+        )
 
 setup(
     name="PyDB2",
@@ -117,15 +141,7 @@ setup(
     license="LGPL",
     package_dir={'DB2': os.curdir},
     py_modules=['DB2'],
-    ext_modules=[
-        Extension(
-            "_db2",
-            ["_db2_module.c"],
-            include_dirs=[db2includedir],
-            library_dirs=[db2libdir],
-            libraries=[db2lib],
-            )
-        ],
+    ext_modules=[db2ext],
     )
 
 # FIN
@@ -0,0 +1,83 @@
+"""Thread scaling benchmark.
+
+Runs the same query from 1, 2, 4, ... threads, each thread on its own
+connection, and prints the queries per second reached for each thread
+count.  As long as the CLI calls run without the GIL, the throughput
+should grow with the number of threads until the server (or the
+client CPU) is saturated.
+
+    python bench_threads.py [-t 1,2,4,8] [-s seconds] [-q query]
+
+The connection arguments are taken from Config.ConnDict.
+"""
+
+import sys
+import time
+import threading
+from optparse import OptionParser
+
+import DB2
+import Config
+
+DEFAULT_QUERY = 'SELECT * FROM SYSIBM.SYSDUMMY1'
+
+def worker(query, fetch, stop, counts, idx):
+    conn = DB2.connect(**Config.ConnDict)
+    cs = conn.cursor()
+    n = 0
+    try:
+        while not stop.isSet():
+            cs.execute(query)
+            if fetch:
+                cs.fetchall()
+            n += 1
+    finally:
+        cs.close()
+        conn.close()
+    counts[idx] = n
+
+def run(nthreads, seconds, query, fetch):
+    stop = threading.Event()
+    counts = [0] * nthreads
+    threads = []
+    for i in range(nthreads):
+        t = threading.Thread(target=worker,
+                             args=(query, fetch, stop, counts, i))
+        t.setDaemon(1)
+        threads.append(t)
+
+    start = time.time()
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.time() - start
+
+    return sum(counts), elapsed
+
+def main(argv):
+    parser = OptionParser(usage='%prog [options]')
+    parser.add_option('-t', '--threads', default='1,2,4,8',
+                      help='comma separated thread counts [%default]')
+    parser.add_option('-s', '--seconds', type='float', default=5.0,
+                      help='seconds per thread count [%default]')
+    parser.add_option('-q', '--query', default=DEFAULT_QUERY,
+                      help='statement to execute [%default]')
+    parser.add_option('-n', '--no-fetch', dest='fetch',
+                      action='store_false', default=True,
+                      help='do not fetch the result set')
+    opts, args = parser.parse_args(argv)
+
+    base = None
+    print '%8s %10s %12s %8s' % ('threads', 'queries', 'queries/s', 'scale')
+    for nthreads in [ int(x) for x in opts.threads.split(',') ]:
+        total, elapsed = run(nthreads, opts.seconds, opts.query, opts.fetch)
+        rate = total / elapsed
+        if base is None:
+            base = rate or 1.0
+        print '%8d %10d %12.1f %8.2f' % (nthreads, total, rate, rate / base)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -30,6 +30,19 @@ class SimpleDB2Test_Connection(unittest.TestCase):
         self.conn_d['pwd'] = ''
         self.assertRaises( DB2.Error, DB2.connect, **self.conn_d )
 
+    def test_005_ConnInfo(self):
+        """DB2.connect() - connection info and the shared environment"""
+        db1 = DB2.connect(**Config.ConnDict)
+        db2 = DB2.connect(**Config.ConnDict)
+        db1.close()
+        name = db2._db.dbmsName
+        self.assert_( name and name in str(db2) )
+        db2.close()
+        self.assertEqual( db2._db.dbmsName, name )
+        db3 = DB2.connect(**Config.ConnDict)
+        db3.cursor().execute("SELECT 1 FROM SYSIBM.SYSDUMMY1")
+        db3.close()
+
     
 class SimpleDB2Test_Cursor(unittest.TestCase):
     def setUp(self):
@@ -145,11 +158,210 @@ class SimpleDB2Test_Cursor(unittest.TestCase):
             r = self.cs.fetchone()
             self.assertEqual(r, None)
 
+    def test_0044_execute_same_statement(self):
+        """cs.execute() - re-execute the same SELECT"""
+        self._createTable()
+        self._insertDataList( [(1, 'a'), (2, 'b'), (3, 'c')] )
+        stmt = "SELECT * FROM %s WHERE C1 = ?" % self.tableName
+
+        for i in (1, 2, 3, 2):
+            self.cs.execute(stmt, i)
+            desc = self.cs.description
+            self.assertEqual( [ d[0] for d in desc ], ['C1', 'C2'] )
+            self.assertEqual( tuple(self.cs.fetchone()), (i, 'abc'[i-1]) )
+            self.assertEqual( self.cs.fetchone(), None )
+
+        self.cs.execute("SELECT C2 FROM %s WHERE C1 = ?" % self.tableName, 3)
+        self.assertEqual( len(self.cs.description), 1 )
+        self.assertEqual( self.cs.fetchall(), [('c', )] )
+
+    def test_0045_stmt_cache(self):
+        """db.stmt_cache_stats() - statements shared through the cache"""
+        self._createTable()
+        self._insertDataList( [(1, 'a'), (2, 'b'), (3, 'c')] )
+        stmts = [
+            "SELECT C2 FROM %s WHERE C1 = ?" % self.tableName,
+            "SELECT C1 FROM %s WHERE C2 = ?" % self.tableName,
+        ]
+        before = self.db.stmt_cache_stats()
+
+        for i in range(3):
+            self.cs.execute(stmts[0], 2)
+            self.assertEqual( self.cs.fetchall(), [('b', )] )
+            self.cs.execute(stmts[1], 'c')
+            self.assertEqual( self.cs.fetchall(), [(3, )] )
+
+        cs2 = self.db.cursor()
+        cs2.execute(stmts[0], 1)
+        self.assertEqual( cs2.fetchall(), [('a', )] )
+        cs2.close()
+
+        after = self.db.stmt_cache_stats()
+        self.assertEqual( after['hits'] - before['hits'], 5 )
+        self.assertEqual( after['misses'] - before['misses'], 2 )
+
+        # DDL from executemany() and SET SCHEMA empty the cache
+        self.cs.executemany("CREATE TABLE PYDB2TEST_1 (C1 INTEGER)", [()])
+        self.assertEqual( 0, self.db.stmt_cache_stats()['count'] )
+        self.cs.execute(stmts[0], 2)
+        self.cs.execute("SET SCHEMA USER")
+        self.assertEqual( 0, self.db.stmt_cache_stats()['count'] )
+        hits = self.db.stmt_cache_stats()['hits']
+        self.cs.execute(stmts[0], 2)
+        self.assertEqual( self.cs.fetchall(), [('b', )] )
+        self.assertEqual( hits, self.db.stmt_cache_stats()['hits'] )
+
+    def test_0046_reexecute_params(self):
+        """cs.execute() - same INSERT with NULLs, other lengths, executemany()"""
+        self._createTable()
+        valList = [(1, 'abc'), (None, 'a'), (3, None), (4, ''), (None, None)]
+
+        for valTuple in valList:
+            self._insertData(valTuple)
+        self._insertDataList( [(6, 'f'), (7, 'gh')] )
+        self._insertData( (8, 'ijk') )
+
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        self.assertEqual( [ tuple(r) for r in self.cs.fetchall() ],
+                valList + [(6, 'f'), (7, 'gh'), (8, 'ijk')] )
+
+    def test_0047_stats(self):
+        """db.stats(), cs.last_stats - per statement counters"""
+        self._createTable()
+        self.db.stats(reset=True)
+        insert = "INSERT INTO %s VALUES (?, ?)" % self.tableName
+        select = "SELECT * FROM %s" % self.tableName
+        for i in range(3):
+            self.cs.execute(insert, (i, 'x'))
+        self.cs.executemany(insert, [ (i, 'y') for i in range(10) ])
+        self.cs.execute(select)
+        self.assertEqual( 13, len(self.cs.fetchall()) )
+
+        self.assertEqual( 1, self.cs.last_stats['prepares'] )
+        self.cs.execute(select)
+        self.assertEqual( 13, len(self.cs.fetchall()) )
+        last = self.cs.last_stats
+        self.assertEqual( 0, last['prepares'] )
+        self.assertEqual( 1, last['executes'] )
+        self.assertEqual( 13, last['rows'] )
+        self.assert_( last['fetches'] >= 1 )
+
+        stats = self.db.stats()
+        self.assertEqual( 4, stats[insert]['executes'] )
+        self.assertEqual( 1, stats[insert]['prepares'] )
+        self.assert_( stats[insert]['bytes_bound'] > 0 )
+        self.assertEqual( 26, stats[select]['rows'] )
+        for key in ('prepare_time', 'execute_time',
+                    'fetch_time', 'convert_time'):
+            self.assert_( stats[select][key] >= 0.0 )
+
+        self.assertEqual( stats, self.db.stats(reset=True) )
+        self.assertEqual( {}, self.db.stats() )
+        self.cs.execute(insert, (99, 'z'))
+        self.assertEqual( 1, self.db.stats()[insert]['executes'] )
+
+    def test_0048_slow_log(self):
+        """db.set_slow_log() - slow statements by fingerprint"""
+        import os
+        import tempfile
+        fp = DB2.fingerprint
+        self.assertEqual( 'select * from t where a in (?+) and b = ?',
+                fp("SELECT *  FROM t -- 'x\nWHERE a IN (1, 2.5, 3) AND b = 'it''s'") )
+        self.assertEqual( 'update t set note=? where id=?',
+                fp("UPDATE t SET note='a--b' WHERE id=1") )
+        self.assertEqual( fp("UPDATE t SET note='a--b' WHERE id=1"),
+                fp("UPDATE t SET note='c--d' WHERE id=2") )
+        self.assertEqual( 'select * from t where s=? and id=? and u=?',
+                fp("SELECT * FROM t WHERE s='/*' AND id=3 AND u='*/'") )
+        self.assertEqual( 'select ? from t',
+                fp("SELECT /* it's */ 1 FROM t") )
+        self._createTable()
+        records = []
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            log = self.db.set_slow_log(0.0, records.append, filename)
+            self.cs.execute("INSERT INTO %s VALUES (1, 'a')" % self.tableName)
+            self.cs.execute("INSERT INTO %s VALUES (2, 'b')" % self.tableName)
+            self.assertRaises(DB2.Error, self._insertData, (3, 'XXXX'))
+            self.assertEqual( ['-', '-', '22001'],
+                    [ r['sqlstate'] or '-' for r in records ] )
+            self.assertEqual( records[0]['fingerprint'],
+                    records[1]['fingerprint'] )
+            self.assertEqual( 1, records[0]['rows'] )
+
+            # logged once the result set is fetched
+            self.cs.execute("SELECT C1, 5 FROM %s" % self.tableName)
+            self.assertEqual( 3, len(records) )
+            self.cs.fetchall()
+            self.assertEqual( 4, len(records) )
+            self.assertEqual( 2, records[3]['rows'] )
+            self.assertEqual( records[3]['fingerprint'],
+                    'select c1, ? from %s' % self.tableName.lower() )
+
+            top = log.top(1)[0]
+            self.assertEqual( 3, top['count'] )     # the INSERTs
+            self.assertEqual( records[0]['fingerprint'], top['fingerprint'] )
+
+            self.db.set_slow_log(None)
+            self.cs.execute("SELECT * FROM %s" % self.tableName)
+            self.cs.fetchall()
+            self.assertEqual( 4, len(records) )
+            lines = open(filename).read().splitlines()
+            self.assertEqual( 4, len(lines) )
+            self.assertEqual( '22001', lines[2].split('\t')[3] )
+        finally:
+            self.db.set_slow_log(None)
+            os.remove(filename)
+
     def test_005_executemany(self):
         """cs.executemany()"""
         self._createTable()
         self._insertDataList( [(1, 'a'), (2, 'b'), (None, None)] )
 
+    def test_0051_executemany_batchsize(self):
+        """cs.executemany() - Several batches"""
+        self._createTable()
+        dataList = [ (i, str(i)) for i in range(25) ]
+        dataList[7] = (None, None)
+        counts = self.cs.executemany( """INSERT INTO %s
+                    VALUES (?, ?)
+            """ % self.tableName,
+            dataList, batchsize=10)
+        self.assertEqual( counts, [10, 10, 5] )
+        self.assertEqual( self.cs.rowcount, 25 )
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        rows = self.cs.fetchall()
+        self.assertEqual( dataList, [ tuple(r) for r in rows ] )
+
+    def test_0052_load(self):
+        """cs.load() - failed rows reported, periodic commits"""
+        self._createTable()
+        self.db.commit()
+        try:
+            dataList = [ (i, str(i)) for i in range(25) ]
+            dataList[3] = (3, 'XXXX')
+            dataList[24] = (24, 'YYYY')
+
+            def rows():
+                for r in dataList:
+                    yield r
+            n, errors = self.cs.load( """INSERT INTO %s
+                        VALUES (?, ?)
+                """ % self.tableName,
+                rows(), batch_size=10, commit_every=10)
+            self.assertEqual( n, 23 )
+            self.assertEqual( [ (e[0], e[1]) for e in errors ],
+                    [ (3, '22001'), (24, '22001') ] )
+
+            self.db.rollback()
+            self.cs.execute("SELECT C1 FROM %s" % self.tableName)
+            self.assertEqual( [ r[0] for r in self.cs.fetchall() ],
+                    [ i for i in range(25) if i not in (3, 24) ] )
+        finally:
+            self.cs.execute("DROP TABLE %s" % self.tableName)
+            self.db.commit()
+
     def test_006_fetchall(self):
         """cs.fetchall()"""
         self._createTable()
@@ -161,6 +373,122 @@ class SimpleDB2Test_Cursor(unittest.TestCase):
         for i in range( len(rows) ):
             self.assertEqual( dataList[i], tuple(rows[i]) )
 
+    def test_0061_fetchall_many_rows(self):
+        """cs.fetchall() - several fetch blocks"""
+        self._createTable()
+        dataList = [ (i, str(i % 1000)) for i in range(3000) ]
+        self._insertDataList( dataList )
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        self.assertEqual( dataList[:10], map(tuple, self.cs.fetchmany(10)) )
+        rows = self.cs.fetchall()
+        self.assertEqual( dataList[10:], rows )
+        self.assertEqual( [], self.cs.fetchall() )
+
+    def test_0062_fetchnumpy(self):
+        """cs.fetchnumpy()"""
+        self._createTable()
+        dataList = [(1, 'a'), (None, 'b'), (3, None)]
+        self._insertDataList( dataList )
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        if DB2.numpy is None:
+            self.assertRaises(DB2.NotSupportedError, self.cs.fetchnumpy)
+            return
+        (c1, n1), (c2, n2) = self.cs.fetchnumpy(-1)
+        self.assertEqual( c1.dtype, DB2.numpy.dtype('int32') )
+        self.assertEqual( [1, 0, 3], list(c1) )
+        self.assertEqual( [False, True, False], list(n1) )
+        self.assertEqual( ['a', 'b', None], list(c2) )
+        self.assertEqual( [False, False, True], list(n2) )
+
+    def test_0063_fetcharrow(self):
+        """cs.fetcharrow()"""
+        self._createTable()
+        dataList = [(1, 'a'), (None, 'b'), (3, None)]
+        self._insertDataList( dataList )
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        batch = self.cs.fetcharrow(2)
+        self.assertEqual( 2, len(batch) )
+        schema, array = batch.__arrow_c_array__()
+        self.assertRaises(DB2.InterfaceError, batch.__arrow_c_array__)
+        self.assertEqual( 1, len(self.cs.fetcharrow(-1)) )
+
+    def test_0063_fetcharrow_decimal(self):
+        """cs.fetcharrow() - DECIMAL as decimal128"""
+        import sys
+        import ctypes
+        class ArrowSchema(ctypes.Structure):
+            pass
+        ArrowSchema._fields_ = [
+            ('format', ctypes.c_char_p), ('name', ctypes.c_char_p),
+            ('metadata', ctypes.c_char_p), ('flags', ctypes.c_int64),
+            ('n_children', ctypes.c_int64),
+            ('children', ctypes.POINTER(ctypes.POINTER(ArrowSchema))),
+            ('dictionary', ctypes.c_void_p), ('release', ctypes.c_void_p),
+            ('private_data', ctypes.c_void_p)]
+        class ArrowArray(ctypes.Structure):
+            pass
+        ArrowArray._fields_ = [
+            ('length', ctypes.c_int64), ('null_count', ctypes.c_int64),
+            ('offset', ctypes.c_int64), ('n_buffers', ctypes.c_int64),
+            ('n_children', ctypes.c_int64),
+            ('buffers', ctypes.POINTER(ctypes.c_void_p)),
+            ('children', ctypes.POINTER(ctypes.POINTER(ArrowArray))),
+            ('dictionary', ctypes.c_void_p), ('release', ctypes.c_void_p),
+            ('private_data', ctypes.c_void_p)]
+        get = ctypes.pythonapi.PyCapsule_GetPointer
+        get.restype = ctypes.c_void_p
+        get.argtypes = [ctypes.py_object, ctypes.c_char_p]
+
+        self.cs.execute("CREATE TABLE PYDB2TEST_D (C1 DECIMAL(9, 2))")
+        self.cs.executemany("INSERT INTO PYDB2TEST_D VALUES (?)",
+                [ (1234567.5, ), (-0.25, ), (None, ), (12.0, ) ])
+        self.cs.execute("SELECT * FROM PYDB2TEST_D")
+        batch = self.cs.fetcharrow(-1)
+        capsules = batch.__arrow_c_array__()
+        schema = ArrowSchema.from_address(get(capsules[0], 'arrow_schema'))
+        array = ArrowArray.from_address(get(capsules[1], 'arrow_array'))
+        self.assertEqual( 'd:9,2', schema.children[0].contents.format )
+        col = array.children[0].contents
+        data = ctypes.string_at(col.buffers[1], 16 * 4)
+        values = []
+        for i in range(4):
+            v = 0L
+            item = data[16 * i:16 * i + 16]
+            if sys.byteorder == 'little':
+                item = item[::-1]
+            for b in item:
+                v = v * 256 + ord(b)
+            if v >= 1L << 127:
+                v -= 1L << 128
+            values.append(v)
+        self.assertEqual( [123456750, -25, 0, 1200], values )
+        self.assertEqual( 1, col.null_count )
+
+    def test_0064_converters(self):
+        """register_converter()"""
+        self._createTable()
+        dataList = [(1, 'a'), (2, 'b'), (None, None)]
+        self._insertDataList( dataList )
+        calls = []
+        def double(values):
+            calls.append(len(values))
+            return [ v and v * 2 for v in values ]
+        INTEGER = [ code for code, name in DB2.SQL_type_dict.items()
+                        if name == 'INTEGER' ][0]
+        self.db.register_converter(INTEGER, double)
+        self.cs.register_converter('C2', double)
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        self.assertEqual( [(2, 'aa'), (4, 'bb'), (None, None)],
+                          self.cs.fetchall() )
+        self.assertEqual( [3, 3], calls )
+        cs = self.db.cursor()
+        cs.execute("SELECT * FROM %s" % self.tableName)
+        self.assertEqual( (2, 'a'), cs.fetchone() )
+        cs.close()
+        self.cs.register_converter('C2', lambda values: values[1:])
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        self.assertRaises(DB2.InterfaceError, self.cs.fetchall)
+
     def test_007_fetchmany(self):
         """cs.fetchmany()"""
         self._createTable()
@@ -173,6 +501,100 @@ class SimpleDB2Test_Cursor(unittest.TestCase):
         for i in range( len(rows) ):
             self.assertEqual( dataList[i], tuple(rows[i]) )
 
+    def test_0065_iterate(self):
+        """for row in cs"""
+        self._createTable()
+        dataList = [ (i, str(i)) for i in range(25) ]
+        self._insertDataList( dataList )
+        self.cs.arraysize = 10
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        self.assertEqual( dataList, [ r for r in self.cs ] )
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        it = iter(self.cs)
+        self.assertEqual( dataList[0], it.next() )
+        self.assertEqual( dataList[1], self.cs.fetchone() )
+        self.assertEqual( dataList[2:5], map(tuple, self.cs.fetchmany(3)) )
+        self.assertEqual( 6, self.cs.scroll(6) )
+        self.assertEqual( dataList[11], it.next() )
+        self.assertEqual( dataList[12:], self.cs.fetchall() )
+        self.assertRaises(StopIteration, it.next)
+        # next() using up a whole block
+        dcs = self.db.cursor(dictCursor=True)
+        dcs.arraysize = 10
+        for cs in (self.cs, dcs):
+            cs.execute("SELECT * FROM %s" % self.tableName)
+            self.assertEqual( dataList[:10], [ cs.next() for i in range(10) ] )
+            self.assertEqual( dataList[10], cs.fetchone() )
+            for i in range(9):
+                cs.next()
+            self.assertEqual( dataList[20:22],
+                    [ (r[0], r[1]) for r in cs.fetchmany(2) ] )
+            cs.next()
+            self.assertEqual( dataList[23:], cs.fetchall() )
+        dcs.close()
+
+    def test_0066_prefetch(self):
+        """cs.set_prefetch() - fetching in a background thread"""
+        self._createTable()
+        dataList = [ (i, str(i)) for i in range(25) ]
+        self._insertDataList( dataList )
+        self.cs.set_prefetch(2, 4)
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        self.assertEqual( dataList[0], self.cs.fetchone() )
+        self.assertEqual( dataList[1:10], map(tuple, self.cs.fetchmany(9)) )
+        # leaving rows behind
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        self.assertEqual( dataList[0], self.cs.fetchone() )
+        self.cs.set_prefetch(2, 4)     # resets the counters
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        self.assertEqual( dataList, self.cs.fetchall() )
+        self.assertEqual( None, self.cs.fetchone() )
+        stats = self.cs.get_prefetch_stats()
+        self.assertEqual( 25, stats['rows'] )
+        self.assertEqual( 7, stats['blocks'] )
+        self.assertEqual( (2, 4), self.cs.set_prefetch(0) )
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        self.assertEqual( dataList, self.cs.fetchall() )
+        # the connection stops the workers before it disconnects
+        self.cs.set_prefetch(2, 4)
+        cs2 = self.db.cursor()
+        cs2.set_prefetch(2, 4)
+        for cs in (self.cs, cs2):
+            cs.execute("SELECT * FROM %s" % self.tableName)
+            self.assertEqual( dataList[0], cs.fetchone() )
+        self.db.close()
+        cs2.close()
+
+    def test_0067_copy_to(self):
+        """cs.copy_to() - delimited text from the fetched rows"""
+        import csv
+        import StringIO
+        import tempfile
+        self._createTable()
+        dataList = [(1, 'a,b'), (None, 'c"d'), (3, None), (4, 'e')]
+        self._insertDataList( dataList )
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        f = StringIO.StringIO()
+        n, size = self.cs.copy_to(f, header=True)
+        self.assertEqual( 4, n )
+        self.assertEqual( f.getvalue(),
+                'C1,C2\n1,"a,b"\n,"c""d"\n3,\n4,e\n' )
+        self.assertEqual( size, len(f.getvalue()) - len('C1,C2\n') )
+
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        f = StringIO.StringIO()
+        self.cs.copy_to(f, '\t', '\\N', csv.QUOTE_NONNUMERIC)
+        self.assertEqual( f.getvalue(),
+                '1\t"a,b"\n\\N\t"c""d"\n3\t\\N\n4\t"e"\n' )
+
+        self.cs.set_prefetch(2, 2)
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        self.assertEqual( dataList[0], self.cs.fetchone() )
+        f = tempfile.TemporaryFile()
+        self.assertEqual( (3, 15), self.cs.copy_to(f, '|') )
+        f.seek(0)
+        self.assertEqual( f.read(), '|"c""d"\n3|\n4|e\n' )
+
     def test_007_1_fetchmany_ask_for_too_much(self):
         """cs.fetchmany() - asking for too many rows"""
         self._createTable()
@@ -320,6 +742,31 @@ class SimpleDB2Test_Cursor(unittest.TestCase):
         params = ( 'XXXXX', 3, 1 )
         self.assertRaises(TypeError, self.cs.callproc, 'CP_TEST_1', params )
 
+    def test_0105_callproc_cache(self):
+        """cs.callproc() - parameters cached, 30 parameters"""
+        self.cs.execute(
+            """CREATE PROCEDURE CP_TEST_1
+            (%s, OUT R INTEGER)
+            LANGUAGE SQL
+            BEGIN
+                SET R = 3;
+            END""" % ', '.join([ 'IN P%d INTEGER' % i for i in range(30) ]))
+        params = tuple(range(30)) + (None, )
+        before = self.db.proc_cache_stats()
+
+        for i in range(3):
+            r = self.cs.callproc('CP_TEST_1', params)
+            self.assertEqual( tuple(range(30)) + (3, ), r )
+        self.assertRaises(DB2.ProgrammingError,
+                self.cs.callproc, 'CP_TEST_1', (1, 2))
+
+        self.db.proc_cache_clear('CP_TEST_1')
+        self.cs.callproc('CP_TEST_1', params)
+
+        after = self.db.proc_cache_stats()
+        self.assertEqual( after['hits'] - before['hits'], 3 )
+        self.assertEqual( after['misses'] - before['misses'], 2 )
+
 class SimpleDB2Test_DictCursor(unittest.TestCase):
     def setUp(self):
         self.db = DB2.connect(**Config.ConnDict)
@@ -482,6 +929,36 @@ class SimpleDB2Test_DictCursor(unittest.TestCase):
         for i in range( len(rows) ):
             self.assertEqual( dataList[i], (rows[i]['C1'], rows[i]['C2']) )
             
+    def test_007_3_Row(self):
+        """DictCursor Row - by position, name and attribute"""
+        self._createTable()
+        self._insertDataList( [(1, 'a'), (2, None)] )
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        rows = self.cs.fetchall()
+        r = rows[0]
+        self.assertEqual( (1, 'a'), (r[0], r[1]) )
+        self.assertEqual( (1, 'a'), (r['C1'], r['C2']) )
+        self.assertEqual( (1, 'a'), (r.C1, r.C2) )
+        self.assertEqual( 'a', r[-1] )
+        self.assertEqual( (1, 'a'), r[:] )
+        self.assertEqual( [1, 'a'], r.values() )
+        self.assertEqual( ['C1', 'C2'], r.keys() )
+        # "in", iteration and dict() as with dicts
+        self.assert_( 'C1' in r and 'C3' not in r and 1 not in r )
+        self.assertEqual( ['C1', 'C2'], [ k for k in r ] )
+        self.assertEqual( {'C1': 1, 'C2': 'a'}, dict(r) )
+        def assign():
+            r['C1'] = 2
+        self.assertRaises(TypeError, assign)    # read-only
+        self.assertEqual( [('C1', 2), ('C2', None)], rows[1].items() )
+        self.assertEqual( {'C1': 1, 'C2': 'a'}, r )
+        self.assertEqual( (1, 'a'), r )
+        self.assertEqual( 'x', r.get('C3', 'x') )
+        self.assert_( r.has_key('C2') and not r.has_key('C3') )
+        self.assertRaises(KeyError, lambda: r['C3'])
+        self.assertRaises(AttributeError, lambda: r.C3)
+        self.assertRaises(IndexError, lambda: r[2])
+
     def test_008_description(self):
         """DictCursor cs.description & description2"""
         import types
@@ -723,6 +1200,40 @@ class SimpleDB2Test_Extended(unittest.TestCase):
         rows = self.cs.fetchone()
         self.assertEqual(str(rows[0]), data)
 
+    def test_0030_1_BLOB_stream(self):
+        """BLOB (buffer, reader and iterator)"""
+        import StringIO
+        self.__creatSampleBLOBTable()
+        self.cs.set_LOB_upload_chunk(100 / (1024.0 * 1024.0))
+        data = ''.join([ chr(i % 256) for i in range(1000) ])
+        values = [
+            bytearray(data),
+            StringIO.StringIO(data),
+            iter([ data[i:i+7] for i in range(0, 1000, 7) ]),
+            iter([]),
+            ]
+        for v in values:
+            self.cs.execute(
+                "INSERT INTO %s (P1) VALUES (?)" % self.tableName, v
+            )
+        self.cs.execute("SELECT P1 FROM %s" % self.tableName)
+        rows = self.cs.fetchall()
+        self.assertEqual( [data, data, data, ''], [ str(r[0]) for r in rows ] )
+        self.assertRaises(TypeError, self.cs.execute,
+            "INSERT INTO %s (P1) VALUES (?)" % self.tableName,
+            iter([u'text']))
+        self.assertRaises(ValueError, self.cs.set_LOB_upload_chunk, 2048)
+
+    def test_0030_2_BLOB_2G(self):
+        """BLOB(2G) streamed without a buffer of the column size"""
+        import StringIO
+        self.cs.execute("CREATE TABLE %s (C1 INTEGER, C2 BLOB(2G))"
+                        % self.tableName)
+        self.cs.execute("INSERT INTO %s VALUES (?, ?)" % self.tableName,
+                        (1, StringIO.StringIO('abc')))
+        self.cs.execute("SELECT C2 FROM %s" % self.tableName)
+        self.assertEqual( 'abc', str(self.cs.fetchone()[0]) )
+
     def __test_BLOB(self, auto_LOB_read):
         SIZE = 10
         self.__creatSampleBLOBTable()
@@ -751,6 +1262,37 @@ class SimpleDB2Test_Extended(unittest.TestCase):
             b = r[0]
             v = self.cs.readLOB(b)
 
+    def test_0033_BLOB_stream(self):
+        """BLOB (file-like LOBReader)"""
+        import array
+        rows = self.__test_BLOB(0)
+        f = rows[9][1].open(chunk_size=100)
+        self.assertEqual( 1015, f.length )
+        self.assertEqual( [100] * 10 + [15], map(len, f) )
+        f.seek(-15, 2)
+        self.assertEqual( chr(9) * 15, f.read() )
+        self.assertEqual( '', f.read(10) )
+        f.seek(10)
+        buf = array.array('c', ' ' * 20)
+        self.assertEqual( 20, f.readinto(buf) )
+        self.assertEqual( chr(9) * 20, buf.tostring() )
+        self.assertEqual( 30, f.tell() )
+        f = self.cs.readLOB(rows[9][0], stream=1)
+        self.assertEqual( chr(9) * 9, f.read(100) )
+
+    def test_0034_BLOB_inline(self):
+        """BLOB (inline and block read)"""
+        expected = [ (chr(i) * i, chr(i) * (1024-i)) for i in range(10) ]
+        for size in (32768, 0):
+            self.cs.LOB_inline_size = size
+            rows = self.__test_BLOB(1)
+            self.assertEqual( expected,
+                [ (str(r[0]), str(r[1])) for r in rows ] )
+            self.cs.execute("SELECT P2 FROM %s" % self.tableName)
+            r = self.cs.fetchone()
+            self.assertEqual( chr(0) * 1024, str(r[0]) )
+            self.cs.execute("DROP TABLE %s" % self.tableName)
+
     def test_0040_DATE(self):
         """DATE"""
         import time
@@ -812,6 +1354,27 @@ class SimpleDB2Test_Extended(unittest.TestCase):
             self.assertEqual( len(r[0]), 26 )
             self.cs.execute("DELETE FROM %s" % self.tableName)
 
+    def test_0043_native_datetime(self):
+        """DATE, TIME, TIMESTAMP as datetime objects"""
+        import datetime
+        self.cs.execute("""CREATE TABLE %s
+            (P1 DATE, P2 TIME, P3 TIMESTAMP) """ % self.tableName)
+        self.cs.execute("""INSERT INTO %s
+                VALUES (?, ?, ?)
+            """ % self.tableName,
+            ('2005-03-09', '08:24:59', '2005-03-09-08.24.59.001000'))
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        self.cs.native_datetime = 1
+        r = self.cs.fetchone()
+        self.assertEqual( r, (datetime.date(2005, 3, 9),
+                              datetime.time(8, 24, 59),
+                              datetime.datetime(2005, 3, 9, 8, 24, 59, 1000)) )
+        self.cs.native_datetime = 0
+        self.cs.execute("SELECT * FROM %s" % self.tableName)
+        r = self.cs.fetchone()
+        self.assertEqual( r, ('2005-03-09', '08:24:59',
+                              '2005-03-09-08.24.59.001000') )
+
     def test_0050_rowcount(self):
         """cs.rowcount - w/ Scrollable cursor"""
         self.__creatSampleTable()
@@ -1028,6 +1591,90 @@ class SimpleDB2Test_Regression(unittest.TestCase):
         row = cursor.fetchone()
         self.assertEqual(row, insert_row)
 
+class SimpleDB2Test_Pool(unittest.TestCase):
+    def setUp(self):
+        self.pool = DB2.pool(min_size=1, max_size=2, timeout=0.1,
+                             **Config.ConnDict)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_001_reuse(self):
+        """DB2.pool - connections are reused"""
+        db = self.pool.connection()
+        first = str(db)
+        db.close()
+        db = self.pool.connection()
+        self.assertEqual( str(db), first )
+        db.close()
+        st = self.pool.stats()
+        self.assertEqual( (st['opened'], st['checkouts'], st['idle']), (1, 2, 1) )
+
+    def test_002_rollback_on_release(self):
+        """DB2.pool - returned connections are rolled back"""
+        db = self.pool.connection()
+        cs = db.cursor()
+        cs.execute("CREATE TABLE PYDB2TEST_POOL (C1 INTEGER)")
+        db.close()
+        db = self.pool.connection()
+        self.assertRaises( DB2.Error, db.cursor().execute,
+                           "SELECT * FROM PYDB2TEST_POOL" )
+        db.close()
+
+    def test_003_timeout(self):
+        """DB2.pool - checkout timeout when all connections are in use"""
+        db1 = self.pool.connection()
+        db2 = self.pool.connection()
+        self.assertRaises( DB2.PoolTimeoutError, self.pool.connection )
+        db1.close()
+        db3 = self.pool.connection()
+        db2.close()
+        db3.close()
+        st = self.pool.stats()
+        self.assertEqual( (st['timeouts'], st['peak_in_use']), (1, 2) )
+
+class SimpleDB2Test_Aio(unittest.TestCase):
+    def setUp(self):
+        self.pool = DB2.aio.ConnectionPool(max_size=2, **Config.ConnDict)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_001_connect(self):
+        """DB2.aio - connect, execute, fetch, next"""
+        db = DB2.aio.connect(**Config.ConnDict).result()
+        cs = db.cursor()
+        cs.arraysize = 2
+        cs.execute("SELECT 1, 'a' FROM SYSIBM.SYSDUMMY1").result()
+        self.assertEqual( (1, 'a'), cs.next().result() )
+        self.assertEqual( None, cs.next().result() )
+        # next() after calls still queued comes after them
+        cs.execute("CREATE TABLE PYDB2TEST_0 (C1 INTEGER, C2 VARCHAR(3))")
+        cs.executemany("INSERT INTO PYDB2TEST_0 VALUES (?, ?)",
+                       [ (i, str(i)) for i in range(3) ])
+        cs.execute("SELECT * FROM PYDB2TEST_0").result()
+        self.assertEqual( (0, '0'), cs.next().result() )
+        cs.execute("SELECT 1, 'a' FROM SYSIBM.SYSDUMMY1")
+        self.assertEqual( (1, 'a'), cs.next().result() )
+        f = cs.execute("SELECT * FROM PYDB2TEST_NONE")
+        self.assertRaises(DB2.Error, f.result)
+        self.assert_( isinstance(f.exception(), DB2.Error) )
+        db.close().result()
+
+    def test_002_pool_waiters(self):
+        """DB2.aio - pool checkouts wait for a connection"""
+        import time
+        db1 = self.pool.connection().result()
+        db2 = self.pool.connection().result()
+        f = self.pool.connection()
+        time.sleep(0.1)
+        self.assertEqual( (0, 1), (f.done(), self.pool.stats()['waiters']) )
+        db1.close().result()
+        db3 = f.result(5)
+        self.assertEqual( 2, self.pool.stats()['opened'] )
+        db2.close().result()
+        db3.close().result()
+
 if __name__ == '__main__':
     suite = unittest.TestSuite()
 
@@ -1037,6 +1684,8 @@ if __name__ == '__main__':
             SimpleDB2Test_DictCursor,
             SimpleDB2Test_Extended,
             SimpleDB2Test_Regression,
+            SimpleDB2Test_Pool,
+            SimpleDB2Test_Aio,
         ]:
         suite.addTest(unittest.makeSuite(t))
 